@@ -173,8 +173,8 @@ def get_confidence_weighted_suggestions(
     Returns:
         List of suggestions with confidence scores
     """
-    from pgvector.django import CosineDistance
     from apps.public_core.services.openai_config import get_openai_client
+    from apps.public_core.services.vector_search import nearest
 
     # Build query text from context
     text_parts = []
@@ -205,12 +205,23 @@ def get_confidence_weighted_suggestions(
         logger.exception(f"Error generating embedding for query: {e}")
         return []
 
+    # Apply the confidence floor in SQL so the vector ordering only ranks
+    # eligible rows (a missing confidence counts as the 0.5 default)
+    eligible = Q(metadata__outcome__confidence__gte=min_confidence)
+    if min_confidence <= 0.5:
+        eligible |= Q(metadata__outcome__confidence__isnull=True)
+    candidates = DocumentVector.objects.filter(
+        eligible,
+        document_type="plan_modification",
+        metadata__has_key="modification_id",
+    )
+
     # Query for similar modifications with confidence weighting
-    similar_docs = DocumentVector.objects.filter(
-        document_type="plan_modification"
-    ).annotate(
-        distance=CosineDistance('embedding', query_embedding)
-    ).order_by('distance')[:limit * 3]  # Get more candidates for filtering
+    similar_docs = nearest(
+        candidates,
+        query_embedding,
+        limit * 3,  # Get more candidates for re-weighting
+    )
 
     # Filter and weight by confidence
     suggestions = []
@@ -333,8 +344,8 @@ def find_similar_modifications(modification, top_k: int = 5):
     Returns:
         List of (PlanModification, similarity_score) tuples
     """
-    from pgvector.django import CosineDistance
     from apps.public_core.models import DocumentVector
+    from apps.public_core.services.vector_search import nearest
     from apps.assistant.models import PlanModification
     from apps.assistant.services.modification_embedder import embed_modification
 
@@ -350,13 +361,15 @@ def find_similar_modifications(modification, top_k: int = 5):
     query_embedding = query_doc.embedding
 
     # Find similar modifications using cosine distance
-    similar_docs = DocumentVector.objects.filter(
-        document_type="plan_modification"
-    ).exclude(
-        metadata__modification_id=str(modification.id)
-    ).annotate(
-        distance=CosineDistance('embedding', query_embedding)
-    ).order_by('distance')[:top_k]
+    similar_docs = nearest(
+        DocumentVector.objects.filter(
+            document_type="plan_modification"
+        ).exclude(
+            metadata__modification_id=str(modification.id)
+        ),
+        query_embedding,
+        top_k,
+    )
 
     # Convert to PlanModification objects with similarity scores
     results = []
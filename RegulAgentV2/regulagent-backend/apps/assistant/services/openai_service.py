@@ -22,6 +22,7 @@ from apps.public_core.services.openai_config import (
     TEMPERATURE_LOW,
     log_openai_usage,
     check_rate_limit,
+    PRIORITY_INTERACTIVE,
 )
 
 logger = logging.getLogger(__name__)
@@ -284,7 +285,7 @@ def process_chat_with_openai(
     while tool_iterations < max_tool_calls:
         try:
             # Check rate limit before making request (prevents 429 errors)
-            check_rate_limit(estimated_tokens=15000)
+            check_rate_limit(estimated_tokens=15000, model=DEFAULT_CHAT_MODEL, priority=PRIORITY_INTERACTIVE)
             
             # Call OpenAI with optimized settings
             response = client.chat.completions.create(
@@ -118,7 +118,7 @@ def categorize_step_changes(
                 })
         
         if field_changes:
-            summary = f"Step {step_id} modified: {', '.join(f'{c['field']}' for c in field_changes[:3])}"
+            summary = f"Step {step_id} modified: {', '.join(str(c['field']) for c in field_changes[:3])}"
             step_diffs.append(StepDiff(
                 step_id=step_id,
                 change_type='modified',
@@ -5,6 +5,7 @@ These functions are called when the AI decides to use a tool.
 Each executor returns a ToolCallResponse with results, risk score, and violations delta.
 """
 
+import copy
 import logging
 from typing import Dict, Any, List, Optional
 from django.db import transaction
@@ -12,6 +13,8 @@ from django.db import transaction
 from apps.public_core.models import PlanSnapshot, WellRegistry, DocumentVector
 from apps.assistant.models import ChatThread, PlanModification
 from apps.assistant.services.guardrails import enforce_guardrails, GuardrailViolation
+from apps.kernel.services.materials_recalc import is_tracked, recalc_plan_materials
+from apps.public_core.services import plan_snapshot_store
 from .schemas import ToolCallResponse
 
 # Import materials calculation functions
@@ -70,6 +73,32 @@ def _get_nominal_casing_id(casing_size_in: Any) -> float:
     return 4.778
 
 
+def _recalc_materials_totals(
+    plan_payload: Dict[str, Any],
+    source_plan: PlanSnapshot,
+    removed_steps: List[Dict[str, Any]] = (),
+    note: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Recompute materials for changed steps only and update materials_totals.
+
+    See apps.kernel.services.materials_recalc; ``removed_steps`` are the
+    steps this modification dropped from the plan. A plan that is not tracked
+    yet is diffed against the stored ``source_plan`` payload (the in-memory
+    one shares its steps with ``plan_payload``).
+    """
+    source = None
+    if not is_tracked(plan_payload):
+        source = plan_snapshot_store.materialize_id(source_plan.pk)
+    recalc_plan_materials(plan_payload, removed_steps=removed_steps, source=source)
+    totals = plan_payload['materials_totals']
+    if note:
+        totals['note'] = note
+    else:
+        totals.pop('note', None)
+    return totals
+
+
 def execute_get_plan_snapshot(plan_id: str, thread: ChatThread) -> Dict[str, Any]:
     """
     Retrieve plan snapshot JSON.
@@ -371,6 +400,10 @@ def execute_combine_plugs(
         new_steps.sort(key=lambda s: s.get('base', 0) or 0, reverse=True)  # Re-sort by depth (deepest first)
         
         plan_payload['steps'] = new_steps
+
+        # Recompute materials for changed steps only and update totals
+        totals = _recalc_materials_totals(plan_payload, source_plan, removed_steps=target_steps)
+        total_sacks, total_bbl = totals['total_sacks'], totals['total_bbl']
         
         # Regenerate rrc_export from updated steps
         # This ensures frontend displays the modified plan correctly
@@ -416,36 +449,6 @@ def execute_combine_plugs(
             })
         
         plan_payload['rrc_export'] = rrc_export
-        
-        # Recalculate materials_totals for the entire plan
-        total_sacks = 0
-        total_bbl = 0.0
-        for step in new_steps:
-            step_sacks = step.get('sacks')
-            if step_sacks is not None:
-                try:
-                    total_sacks += int(step_sacks)
-                except (ValueError, TypeError):
-                    pass
-            
-            # Also sum from materials dict if available
-            materials = step.get('materials', {})
-            if isinstance(materials, dict):
-                slurry = materials.get('slurry', {})
-                if isinstance(slurry, dict):
-                    step_bbl = slurry.get('total_bbl')
-                    if step_bbl is not None:
-                        try:
-                            total_bbl += float(step_bbl)
-                        except (ValueError, TypeError):
-                            pass
-        
-        # Update materials_totals
-        plan_payload['materials_totals'] = {
-            "total_sacks": total_sacks,
-            "total_bbl": round(total_bbl, 2),
-        }
-        
         logger.info(f"Recalculated materials totals: {total_sacks} sacks, {total_bbl:.2f} bbl")
         
         # Create new snapshot
@@ -457,6 +460,7 @@ def execute_combine_plugs(
                 kind='post_edit',
                 status=PlanSnapshot.STATUS_DRAFT,
                 payload=plan_payload,
+                delta_base=source_plan,
                 kernel_version=source_plan.kernel_version,
                 policy_id=source_plan.policy_id,
             )
@@ -738,6 +742,10 @@ def execute_replace_cibp(
 
         plan_payload['steps'] = new_steps
 
+        # Recompute materials for changed steps only and update totals
+        totals = _recalc_materials_totals(plan_payload, source_plan, removed_steps=[cibp_step, cap_step])
+        total_sacks, total_bbl = totals['total_sacks'], totals['total_bbl']
+
         # Regenerate rrc_export
         rrc_export = []
         for idx, step in enumerate(sorted(new_steps, key=lambda s: s.get('base', 0) or 0, reverse=True), start=1):
@@ -782,33 +790,6 @@ def execute_replace_cibp(
 
         plan_payload['rrc_export'] = rrc_export
 
-        # Recalculate materials_totals
-        total_sacks = 0
-        total_bbl = 0.0
-        for step in new_steps:
-            step_sacks = step.get('sacks')
-            if step_sacks is not None:
-                try:
-                    total_sacks += int(step_sacks)
-                except (ValueError, TypeError):
-                    pass
-
-            materials = step.get('materials', {})
-            if isinstance(materials, dict):
-                slurry = materials.get('slurry', {})
-                if isinstance(slurry, dict):
-                    step_bbl = slurry.get('total_bbl')
-                    if step_bbl is not None:
-                        try:
-                            total_bbl += float(step_bbl)
-                        except (ValueError, TypeError):
-                            pass
-
-        plan_payload['materials_totals'] = {
-            "total_sacks": total_sacks,
-            "total_bbl": round(total_bbl, 2),
-        }
-
         logger.info(f"Recalculated materials totals: {total_sacks} sacks, {total_bbl:.2f} bbl")
 
         # Create new snapshot
@@ -820,6 +801,7 @@ def execute_replace_cibp(
                 kind='post_edit',
                 status=PlanSnapshot.STATUS_DRAFT,
                 payload=plan_payload,
+                delta_base=source_plan,
                 kernel_version=source_plan.kernel_version,
                 policy_id=source_plan.policy_id,
             )
@@ -1084,6 +1066,10 @@ def execute_adjust_interval(
         steps.sort(key=lambda s: s.get('base', 0) or 0, reverse=True)
         plan_payload['steps'] = steps
 
+        # Recompute materials for changed steps only and update totals
+        totals = _recalc_materials_totals(plan_payload, source_plan)
+        total_sacks, total_bbl = totals['total_sacks'], totals['total_bbl']
+
         # Regenerate rrc_export
         rrc_export = []
         for idx, step in enumerate(sorted(steps, key=lambda s: s.get('base', 0) or 0, reverse=True), start=1):
@@ -1128,33 +1114,6 @@ def execute_adjust_interval(
 
         plan_payload['rrc_export'] = rrc_export
 
-        # Recalculate materials_totals
-        total_sacks = 0
-        total_bbl = 0.0
-        for step in steps:
-            step_sacks = step.get('sacks')
-            if step_sacks is not None:
-                try:
-                    total_sacks += int(step_sacks)
-                except (ValueError, TypeError):
-                    pass
-
-            materials = step.get('materials', {})
-            if isinstance(materials, dict):
-                slurry = materials.get('slurry', {})
-                if isinstance(slurry, dict):
-                    step_bbl = slurry.get('total_bbl')
-                    if step_bbl is not None:
-                        try:
-                            total_bbl += float(step_bbl)
-                        except (ValueError, TypeError):
-                            pass
-
-        plan_payload['materials_totals'] = {
-            "total_sacks": total_sacks,
-            "total_bbl": round(total_bbl, 2),
-        }
-
         logger.info(f"Recalculated materials totals: {total_sacks} sacks, {total_bbl:.2f} bbl")
 
         # Create new snapshot
@@ -1166,6 +1125,7 @@ def execute_adjust_interval(
                 kind='post_edit',
                 status=PlanSnapshot.STATUS_DRAFT,
                 payload=plan_payload,
+                delta_base=source_plan,
                 kernel_version=source_plan.kernel_version,
                 policy_id=source_plan.policy_id,
             )
@@ -1264,18 +1224,92 @@ def execute_recalc_materials(
 ) -> Dict[str, Any]:
     """
     Recalculate materials and totals.
-    
-    MVP: Returns success without recalculation - full implementation pending.
-    Materials are currently calculated during plan generation.
+
+    Only steps whose geometry or cement parameters changed since their
+    materials were last computed are recomputed (materials_recalc); the rest
+    keep their cached results. A new post_edit snapshot is created only when
+    something changed. Compliance is not re-run here; plan modifications
+    report their own violations.
     """
-    return ToolCallResponse(
-        success=True,
-        message="Materials and compliance are recalculated automatically during plan modifications. No additional action needed.",
-        data={
-            "note": "Material recalculation is performed by the kernel during plan generation",
-            "revalidate_compliance": revalidate_compliance
+    try:
+        source_plan = thread.current_plan
+        if source_plan is None:
+            return ToolCallResponse(
+                success=False,
+                message="No current plan to recalculate"
+            ).model_dump()
+
+        plan_payload = copy.deepcopy(source_plan.payload)
+        previous_totals = dict(plan_payload.get('materials_totals') or {})
+        result = recalc_plan_materials(plan_payload)
+        totals = plan_payload['materials_totals']
+
+        data = {
+            'recomputed_step_ids': result.recomputed,
+            'reused_steps': result.reused,
+            'total_sacks': totals['total_sacks'],
+            'total_bbl': totals['total_bbl'],
+            'revalidate_compliance': revalidate_compliance,
         }
-    ).model_dump()
+        if not result.changed and previous_totals == totals:
+            return ToolCallResponse(
+                success=True,
+                message=f"Materials are up to date: {totals['total_sacks']} total sacks.",
+                data=data
+            ).model_dump()
+
+        with transaction.atomic():
+            new_snapshot = PlanSnapshot.objects.create(
+                tenant_id=thread.tenant_id,
+                well=source_plan.well,
+                plan_id=source_plan.plan_id,
+                kind='post_edit',
+                status=PlanSnapshot.STATUS_DRAFT,
+                payload=plan_payload,
+                delta_base=source_plan,
+                kernel_version=source_plan.kernel_version,
+                policy_id=source_plan.policy_id,
+                extraction_meta=source_plan.extraction_meta
+            )
+            modification = PlanModification.objects.create(
+                source_snapshot=source_plan,
+                result_snapshot=new_snapshot,
+                op_type='change_materials',
+                description=f"Recalculated materials for {len(result.recomputed)} step(s)",
+                operation_payload={
+                    'recomputed_step_ids': result.recomputed,
+                    'revalidate_compliance': revalidate_compliance,
+                },
+                diff={
+                    'materials_totals': {'before': previous_totals, 'after': totals},
+                },
+                risk_score=0.1,
+                chat_thread=thread,
+            )
+            thread.current_plan = new_snapshot
+            thread.save()
+
+        data.update({
+            'new_snapshot_id': new_snapshot.id,
+            'modification_id': modification.id,
+        })
+        return ToolCallResponse(
+            success=True,
+            message=(
+                f"Recalculated materials for {len(result.recomputed)} changed step(s) "
+                f"({result.reused} unchanged). Total plan: {totals['total_sacks']} sacks."
+            ),
+            data=data,
+            risk_score=0.1,
+            violations_delta=[]
+        ).model_dump()
+
+    except Exception as e:
+        logger.exception(f"Error in recalc_materials: {e}")
+        return ToolCallResponse(
+            success=False,
+            message=f"Error recalculating materials: {str(e)}"
+        ).model_dump()
 
 
 def execute_change_plug_type(
@@ -1681,19 +1715,13 @@ def execute_change_plug_type(
                     else:
                         logger.warning(f"Skipped step {step.get('step_id')} - missing geometry: casing_id={casing_id}, stinger_od={stinger_od}, new_type={new_type}")
                 
-                # Recalculate materials_totals for the entire plan
-                total_sacks = sum(s.get('sacks', 0) for s in steps if s.get('sacks') is not None)
-                plan_payload['materials_totals'] = {
-                    'total_sacks': total_sacks,
-                    'note': 'Recalculated after plug type conversion'
-                }
-                logger.info(f"Updated materials_totals: {total_sacks} total sacks")
-                
             except Exception as e:
                 logger.exception(f"Error recalculating materials: {e}")
                 # Continue anyway - materials may be recalculated later
         
         plan_payload['steps'] = steps
+        totals = _recalc_materials_totals(plan_payload, source_plan, note='Recalculated after plug type conversion')
+        logger.info(f"Updated materials_totals: {totals['total_sacks']} total sacks")
         
         # Create new PlanSnapshot
         new_snapshot = PlanSnapshot.objects.create(
@@ -1703,6 +1731,7 @@ def execute_change_plug_type(
             kind='post_edit',
             status=PlanSnapshot.STATUS_DRAFT,
             payload=plan_payload,
+            delta_base=source_plan,
             kernel_version=source_plan.kernel_version,
             policy_id=source_plan.policy_id,
             extraction_meta=source_plan.extraction_meta
@@ -1827,11 +1856,13 @@ def execute_remove_steps(
         plan_payload['steps'] = remaining_steps
         
         # Recalculate materials_totals
-        total_sacks = sum(s.get('sacks', 0) for s in remaining_steps if s.get('sacks') is not None)
-        plan_payload['materials_totals'] = {
-            'total_sacks': total_sacks,
-            'note': f'Recalculated after removing {len(step_ids)} step(s)'
-        }
+        totals = _recalc_materials_totals(
+            plan_payload,
+            source_plan,
+            removed_steps=steps_to_remove,
+            note=f'Recalculated after removing {len(step_ids)} step(s)',
+        )
+        total_sacks = totals['total_sacks']
         
         # Create new PlanSnapshot
         new_snapshot = PlanSnapshot.objects.create(
@@ -1841,6 +1872,7 @@ def execute_remove_steps(
             kind='post_edit',
             status=PlanSnapshot.STATUS_DRAFT,
             payload=plan_payload,
+            delta_base=source_plan,
             kernel_version=source_plan.kernel_version,
             policy_id=source_plan.policy_id,
             extraction_meta=source_plan.extraction_meta
@@ -2095,8 +2127,7 @@ def execute_add_formation_plugs(
         plan_payload['steps'] = steps
         
         # Recalculate materials totals
-        total_sacks = sum(s.get('sacks', 0) or 0 for s in steps if isinstance(s.get('sacks'), int))
-        plan_payload.setdefault('materials_totals', {})['total_sacks'] = total_sacks
+        total_sacks = _recalc_materials_totals(plan_payload, source_plan)['total_sacks']
         
         # Create new PlanSnapshot
         new_snapshot = PlanSnapshot.objects.create(
@@ -2106,6 +2137,7 @@ def execute_add_formation_plugs(
             kind='post_edit',
             status=PlanSnapshot.STATUS_DRAFT,
             payload=plan_payload,
+            delta_base=source_plan,
             kernel_version=source_plan.kernel_version,
             policy_id=source_plan.policy_id,
             extraction_meta=source_plan.extraction_meta
@@ -2586,11 +2618,7 @@ def execute_add_plug(
         plan_payload['steps'] = steps
         
         # Recalculate materials_totals
-        total_sacks = sum(s.get('sacks', 0) for s in steps if s.get('sacks') is not None)
-        plan_payload['materials_totals'] = {
-            'total_sacks': total_sacks,
-            'note': f'Recalculated after adding {type}'
-        }
+        total_sacks = _recalc_materials_totals(plan_payload, source_plan, note=f'Recalculated after adding {type}')['total_sacks']
         
         # Create new PlanSnapshot
         new_snapshot = PlanSnapshot.objects.create(
@@ -2600,6 +2628,7 @@ def execute_add_plug(
             kind='post_edit',
             status=PlanSnapshot.STATUS_DRAFT,
             payload=plan_payload,
+            delta_base=source_plan,
             kernel_version=source_plan.kernel_version,
             policy_id=source_plan.policy_id,
             extraction_meta=source_plan.extraction_meta
@@ -2711,11 +2740,9 @@ def execute_override_materials(
         target_step['details']['original_sacks'] = original_sacks
         target_step['details']['override_reason'] = reason
         
-        total_sacks = sum(s.get('sacks', 0) for s in steps if s.get('sacks') is not None)
-        plan_payload['materials_totals'] = {
-            'total_sacks': total_sacks,
-            'note': f'Includes material override for step {step_id}'
-        }
+        total_sacks = _recalc_materials_totals(
+            plan_payload, source_plan, note=f'Includes material override for step {step_id}'
+        )['total_sacks']
         
         new_snapshot = PlanSnapshot.objects.create(
             tenant_id=thread.tenant_id,
@@ -2724,6 +2751,7 @@ def execute_override_materials(
             kind='post_edit',
             status=PlanSnapshot.STATUS_DRAFT,
             payload=plan_payload,
+            delta_base=source_plan,
             kernel_version=source_plan.kernel_version,
             policy_id=source_plan.policy_id,
             extraction_meta=source_plan.extraction_meta
@@ -118,9 +118,8 @@ class RejectionEmbedder:
            ORDER BY cosine distance to query embedding.
         3. Return pattern info + similarity score.
         """
-        from pgvector.django import CosineDistance
-
         from apps.public_core.models import DocumentVector
+        from apps.public_core.services.vector_search import nearest
 
         check_rate_limit(estimated_tokens=_ESTIMATED_EMBEDDING_TOKENS)
 
@@ -131,10 +130,10 @@ class RejectionEmbedder:
         )
         query_vector = response.data[0].embedding
 
-        similar_vectors = (
-            DocumentVector.objects.filter(document_type="rejection_pattern")
-            .annotate(distance=CosineDistance("embedding", query_vector))
-            .order_by("distance")[:limit]
+        similar_vectors = nearest(
+            DocumentVector.objects.filter(document_type="rejection_pattern"),
+            query_vector,
+            limit,
         )
 
         results = []
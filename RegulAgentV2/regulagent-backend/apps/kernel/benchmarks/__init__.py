@@ -0,0 +1,5 @@
+"""
+Kernel benchmark suite: golden-fact corpus, phase runner and regression budgets.
+
+Run with ``python manage.py benchmark_kernel`` (see runner.py for details).
+"""
@@ -0,0 +1,365 @@
+"""
+Kernel benchmark runner.
+
+Replays the golden-fact corpus (corpus/*.json, drawn from the kernel golden
+tests) through the kernel entry points and measures each phase separately:
+
+    policy           effective policy load (get_effective_policy / NM C-103 pack)
+    rules            w3a_rules.generate_steps (TX) or
+                     C103PluggingRules.generate_plugging_plan (NM)
+    plan_from_facts  the full policy_kernel.plan_from_facts pipeline
+
+Wall time comes from time.perf_counter over ``iterations`` runs (after
+``warmup`` untimed runs). Allocations come from one extra tracemalloc pass per
+phase, so tracing overhead never skews the timings. Inputs are deep-copied
+outside the timed region because the kernel mutates facts and policies.
+
+The report is a plain JSON-serialisable dict. check_budgets() compares it with
+budgets.json and returns every metric that exceeds budget * (1 + tolerance).
+"""
+from __future__ import annotations
+
+import copy
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCHMARKS_DIR, 'corpus')
+DEFAULT_BUDGETS_PATH = os.path.join(BENCHMARKS_DIR, 'budgets.json')
+NM_PACKS_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARKS_DIR)), 'policy', 'packs')
+
+PHASE_POLICY = 'policy'
+PHASE_RULES = 'rules'
+PHASE_PLAN = 'plan_from_facts'
+PHASES = (PHASE_POLICY, PHASE_RULES, PHASE_PLAN)
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_WARMUP = 3
+DEFAULT_TOLERANCE = 0.5
+
+REPORT_FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchmarkCase:
+    """One anonymized resolved-facts fixture plus how to build its policy."""
+
+    name: str
+    jurisdiction: str
+    facts: Dict[str, Any]
+    policy_spec: Dict[str, Any]
+    source: str = ''
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BenchmarkCase":
+        return cls(
+            name=data['name'],
+            jurisdiction=(data.get('jurisdiction') or 'TX').upper(),
+            facts=data['facts'],
+            policy_spec=data.get('policy') or {},
+            source=data.get('source', ''),
+        )
+
+    def build_policy(self) -> Dict[str, Any]:
+        """Build the policy dict the matching golden test passes to plan_from_facts."""
+        spec = self.policy_spec
+        if self.jurisdiction == 'NM':
+            from apps.policy.services import policy_store
+
+            policy = policy_store.load_source(os.path.join(NM_PACKS_DIR, spec.get('pack', 'nm_ocd_c103_base_policy_pack.yaml')))
+            policy['policy_id'] = 'nm.c103'
+            policy['complete'] = True
+            policy['jurisdiction'] = 'NM'
+            policy['form'] = 'C-103'
+            return policy
+
+        from apps.policy.services.loader import get_effective_policy
+
+        policy = get_effective_policy(district=spec.get('district'), county=spec.get('county'))
+        policy['policy_id'] = 'tx.w3a'
+        policy['complete'] = True
+        preferences = copy.deepcopy(spec.get('preferences') or {})
+        if spec.get('replace_preferences'):
+            policy['preferences'] = preferences
+        else:
+            policy.setdefault('preferences', {}).update(preferences)
+        overrides = spec.get('steps_overrides')
+        if overrides:
+            policy.setdefault('effective', {}).setdefault('steps_overrides', {}).update(copy.deepcopy(overrides))
+        return policy
+
+
+def load_corpus(corpus_dir: Optional[str] = None, names: Optional[Iterable[str]] = None) -> List[BenchmarkCase]:
+    """Load corpus cases sorted by name, optionally restricted to ``names``."""
+    corpus_dir = corpus_dir or CORPUS_DIR
+    wanted = set(names) if names else None
+    cases: List[BenchmarkCase] = []
+    for fname in sorted(os.listdir(corpus_dir)):
+        if not fname.endswith('.json'):
+            continue
+        with open(os.path.join(corpus_dir, fname), 'r', encoding='utf-8') as f:
+            case = BenchmarkCase.from_dict(json.load(f))
+        if wanted is None or case.name in wanted:
+            cases.append(case)
+    if wanted:
+        missing = wanted - {c.name for c in cases}
+        if missing:
+            raise ValueError(f"Unknown benchmark case(s): {', '.join(sorted(missing))}")
+    return cases
+
+
+def _rules_runner(case: BenchmarkCase) -> Callable[[Dict[str, Any], Dict[str, Any]], Any]:
+    from apps.policy.services.formula_engine import get_formula_engine
+
+    formula_engine = get_formula_engine(case.jurisdiction)
+    if case.jurisdiction == 'NM':
+        from apps.kernel.services.c103_rules import C103PluggingRules
+        from apps.kernel.services.c103_step_generator import _build_well_dict
+        from apps.policy.services.nm_region_rules import NMRegionRulesEngine
+
+        def run_c103(facts: Dict[str, Any], _policy: Dict[str, Any]) -> Any:
+            well = _build_well_dict(facts)
+            region_engine = NMRegionRulesEngine(
+                county=well.get('county') or None,
+                township=well.get('township') or None,
+                range_=well.get('range') or None,
+            )
+            return C103PluggingRules(region_engine=region_engine).generate_plugging_plan(well, {})
+
+        return run_c103
+
+    from apps.kernel.services.w3a_rules import generate_steps
+
+    def run_w3a(facts: Dict[str, Any], policy_: Dict[str, Any]) -> Any:
+        return generate_steps(facts, policy_.get('effective') or {}, formula_engine)
+
+    return run_w3a
+
+
+def case_phases(case: BenchmarkCase) -> List[Tuple[str, Callable[[], Callable[[], Any]]]]:
+    """Return (phase, prepare) pairs; prepare() copies inputs and returns the call to time."""
+    from apps.kernel.services import kernel_trace
+    from apps.kernel.services.policy_kernel import plan_from_facts
+
+    policy = case.build_policy()
+    rules = _rules_runner(case)
+
+    def prepare_policy() -> Callable[[], Any]:
+        return case.build_policy
+
+    def prepare_rules() -> Callable[[], Any]:
+        facts, pol = copy.deepcopy(case.facts), copy.deepcopy(policy)
+        return lambda: rules(facts, pol)
+
+    def prepare_plan() -> Callable[[], Any]:
+        facts, pol = copy.deepcopy(case.facts), copy.deepcopy(policy)
+        # An explicit trace bypasses the plan_cache, so the pipeline itself is timed
+        return lambda: plan_from_facts(facts, pol, trace=kernel_trace.PlanTrace())
+
+    return [
+        (PHASE_POLICY, prepare_policy),
+        (PHASE_RULES, prepare_rules),
+        (PHASE_PLAN, prepare_plan),
+    ]
+
+
+def _percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def measure_phase(prepare: Callable[[], Callable[[], Any]], iterations: int = DEFAULT_ITERATIONS, warmup: int = DEFAULT_WARMUP) -> Dict[str, Any]:
+    """Time ``iterations`` runs of one phase, then trace its allocations once."""
+    for _ in range(warmup):
+        prepare()()
+
+    gc.collect()
+    timings: List[float] = []
+    for _ in range(max(1, iterations)):
+        fn = prepare()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+
+    fn = prepare()
+    gc.collect()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    del result
+
+    return {
+        'runs': len(timings),
+        'min_ms': round(timings[0], 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'mean_ms': round(statistics.fmean(timings), 4),
+        'p95_ms': round(_percentile(timings, 95), 4),
+        'max_ms': round(timings[-1], 4),
+        'peak_alloc_kib': round(max(0, peak - baseline) / 1024.0, 2),
+        'net_alloc_kib': round((current - baseline) / 1024.0, 2),
+    }
+
+
+@contextmanager
+def _quiet(enabled: bool):
+    """The kernel logs at INFO and prints debug output on every call; keep that I/O out of the timings."""
+    if not enabled:
+        yield
+        return
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        with redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(previous)
+
+
+def run_case(case: BenchmarkCase, iterations: int = DEFAULT_ITERATIONS, warmup: int = DEFAULT_WARMUP) -> Dict[str, Any]:
+    """Benchmark every phase of one case.
+
+    ``kernel_phases`` is the plan_from_facts internal phase breakdown from one
+    extra traced run (informational; not budgeted).
+    """
+    from apps.kernel.services.kernel_trace import PlanTrace
+    from apps.kernel.services.policy_kernel import plan_from_facts
+
+    phases: Dict[str, Any] = {}
+    for name, prepare in case_phases(case):
+        phases[name] = measure_phase(prepare, iterations=iterations, warmup=warmup)
+    trace = PlanTrace()
+    plan = plan_from_facts(copy.deepcopy(case.facts), case.build_policy(), trace=trace)
+    return {
+        'jurisdiction': case.jurisdiction,
+        'source': case.source,
+        'steps': len(plan.get('steps') or []),
+        'phases': phases,
+        'kernel_phases': {
+            span.name: {'duration_ms': span.duration_ms, 'steps_in': span.steps_in, 'steps_out': span.steps_out}
+            for span in trace.spans
+        },
+    }
+
+
+def run_benchmark(
+    cases: Optional[List[BenchmarkCase]] = None,
+    iterations: int = DEFAULT_ITERATIONS,
+    warmup: int = DEFAULT_WARMUP,
+    quiet: bool = True,
+) -> Dict[str, Any]:
+    """Run the corpus and return the machine-readable report."""
+    from apps.kernel.services.policy_kernel import KERNEL_VERSION
+
+    cases = load_corpus() if cases is None else cases
+    started = time.perf_counter()
+    with _quiet(quiet):
+        results = {case.name: run_case(case, iterations=iterations, warmup=warmup) for case in cases}
+    return {
+        'format_version': REPORT_FORMAT_VERSION,
+        'kernel_version': KERNEL_VERSION,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': iterations,
+        'warmup': warmup,
+        'duration_s': round(time.perf_counter() - started, 3),
+        'cases': results,
+    }
+
+
+def load_budgets(path: Optional[str] = None) -> Dict[str, Any]:
+    with open(path or DEFAULT_BUDGETS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_budgets(report: Dict[str, Any], budgets: Dict[str, Any], tolerance: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Return one entry per metric that exceeds its budget by more than ``tolerance``.
+
+    Cases or phases missing from the report (e.g. a filtered run) are skipped.
+    """
+    tol = float(budgets.get('tolerance', DEFAULT_TOLERANCE) if tolerance is None else tolerance)
+    regressions: List[Dict[str, Any]] = []
+    for case_name, phase_budgets in (budgets.get('cases') or {}).items():
+        case = (report.get('cases') or {}).get(case_name)
+        if case is None:
+            continue
+        for phase, metrics in phase_budgets.items():
+            measured = (case.get('phases') or {}).get(phase)
+            if measured is None:
+                continue
+            for metric, budget in metrics.items():
+                value = measured.get(metric)
+                if value is None:
+                    continue
+                limit = float(budget) * (1.0 + tol)
+                if value > limit:
+                    regressions.append({
+                        'case': case_name,
+                        'phase': phase,
+                        'metric': metric,
+                        'budget': budget,
+                        'limit': round(limit, 4),
+                        'measured': value,
+                    })
+    return regressions
+
+
+def attach_budget_result(report: Dict[str, Any], budgets: Dict[str, Any], budgets_path: str, tolerance: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Record the budget check in ``report['budget']`` and return the regressions."""
+    regressions = check_budgets(report, budgets, tolerance)
+    report['budget'] = {
+        'path': budgets_path,
+        'tolerance': float(budgets.get('tolerance', DEFAULT_TOLERANCE) if tolerance is None else tolerance),
+        'passed': not regressions,
+        'regressions': regressions,
+    }
+    return regressions
+
+
+BUDGET_METRICS = ('median_ms', 'peak_alloc_kib')
+# Sub-millisecond phases are dominated by timer and scheduler noise.
+MIN_TIME_BUDGET_MS = 1.0
+
+
+def budgets_from_report(report: Dict[str, Any], headroom: float = 2.0, tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Any]:
+    """Derive a budgets file from a measured report (each metric * ``headroom``)."""
+    def _budget(metric: str, value: float) -> float:
+        budget = round(float(value) * headroom, 2)
+        if metric.endswith('_ms'):
+            budget = max(budget, MIN_TIME_BUDGET_MS)
+        return budget
+
+    cases: Dict[str, Any] = {}
+    for case_name, case in sorted((report.get('cases') or {}).items()):
+        cases[case_name] = {
+            phase: {m: _budget(m, measured[m]) for m in BUDGET_METRICS if m in measured}
+            for phase, measured in (case.get('phases') or {}).items()
+        }
+    return {
+        'tolerance': tolerance,
+        'headroom': headroom,
+        'kernel_version': report.get('kernel_version'),
+        'cases': cases,
+    }
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.kernel.benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = "Benchmark the policy kernel against the golden-fact corpus and fail on budget regressions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--case', action='append', dest='cases', help='Only run this corpus case (repeatable)')
+        parser.add_argument('--iterations', type=int, default=runner.DEFAULT_ITERATIONS, help='Timed runs per phase')
+        parser.add_argument('--warmup', type=int, default=runner.DEFAULT_WARMUP, help='Untimed runs per phase')
+        parser.add_argument('--output', help='Write the JSON report to this path instead of stdout')
+        parser.add_argument('--budgets', default=runner.DEFAULT_BUDGETS_PATH, help='Budgets JSON file')
+        parser.add_argument('--tolerance', type=float, help='Override the budgets file tolerance (0.5 = +50%%)')
+        parser.add_argument('--no-budgets', action='store_true', help='Report only; skip the regression gate')
+        parser.add_argument('--write-budgets', help='Write budgets derived from this run to the given path')
+        parser.add_argument('--headroom', type=float, default=2.0, help='Multiplier applied by --write-budgets')
+
+    def handle(self, *args, **options):
+        try:
+            cases = runner.load_corpus(names=options.get('cases'))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = runner.run_benchmark(cases, iterations=options['iterations'], warmup=options['warmup'])
+
+        regressions = []
+        if not options['no_budgets']:
+            budgets = runner.load_budgets(options['budgets'])
+            regressions = runner.attach_budget_result(report, budgets, options['budgets'], options.get('tolerance'))
+
+        payload = json.dumps(report, indent=2)
+        if options.get('output'):
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+        if options.get('write_budgets'):
+            budgets = runner.budgets_from_report(report, headroom=options['headroom'])
+            with open(options['write_budgets'], 'w', encoding='utf-8') as f:
+                f.write(json.dumps(budgets, indent=2) + '\n')
+            self.stderr.write(f"Budgets written to {options['write_budgets']}")
+
+        if regressions:
+            for r in regressions:
+                self.stderr.write(
+                    f"REGRESSION: {r['case']} {r['phase']} {r['metric']} = {r['measured']} "
+                    f"(budget {r['budget']}, limit {r['limit']})"
+                )
+            raise CommandError(f"{len(regressions)} kernel benchmark budget(s) regressed")
@@ -0,0 +1,305 @@
+"""
+Structured phase tracing for plan_from_facts.
+
+plan_from_facts runs a dozen sequential phases (baseline steps, mechanical
+awareness, CIBP detector, defaults, district overrides, county procedures,
+overlap suppression, merges, materials, ...). A PlanTrace records one span per
+phase with:
+
+- wall time (perf_counter, relative to the trace start)
+- step count entering and leaving the phase
+- compiled policy store lookups served from cache vs. parsed/compiled
+
+The kernel calls ``trace.mark(phase, len(steps))`` at each phase boundary:
+the mark closes the running span (steps_out) and opens the next (steps_in),
+so the phases do not need to be re-indented into ``with`` blocks.
+
+Finished traces go to every registered sink. Sinks are configured with
+KERNEL_TRACE_SINKS (comma separated):
+
+    log    one JSON line per trace on the ``apps.kernel.trace`` logger
+    jsonl  OpenTelemetry-style span records appended to KERNEL_TRACE_JSONL_PATH
+    otel   real spans through the opentelemetry API (when installed)
+
+KERNEL_TRACE_ATTACH=1 also stores the trace in plan["debug"]["trace"]. It is
+off by default because timings would make otherwise identical plans differ.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+trace_logger = logging.getLogger('apps.kernel.trace')
+
+CACHE_COUNTERS = ('hits', 'disk_hits', 'misses', 'source_hits', 'source_misses')
+
+
+def _env_flag(name: str, default: str = '0') -> bool:
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _cache_counters() -> Dict[str, int]:
+    try:
+        from apps.policy.services import policy_store
+        stats = policy_store.stats()
+    except Exception:
+        return {}
+    return {k: int(stats.get(k, 0)) for k in CACHE_COUNTERS}
+
+
+@dataclass
+class PhaseSpan:
+    """One phase of a plan_from_facts run."""
+
+    name: str
+    span_id: str
+    start_ms: float
+    duration_ms: float = 0.0
+    steps_in: Optional[int] = None
+    steps_out: Optional[int] = None
+    policy_cache: Dict[str, int] = field(default_factory=dict)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class PlanTrace:
+    """Collects phase spans for one plan_from_facts call.
+
+    Policy-store counters are process-wide, so with concurrent plans in one
+    process a span's cache delta may include lookups made by other threads.
+    """
+
+    def __init__(self, name: str = 'kernel.plan_from_facts', attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_unix_ns = time.time_ns()
+        self._t0 = time.perf_counter()
+        self.spans: List[PhaseSpan] = []
+        self.duration_ms: Optional[float] = None
+        self.steps_out: Optional[int] = None
+        self._current: Optional[PhaseSpan] = None
+        self._counters_at_start = _cache_counters()
+        self._counters = self._counters_at_start
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def _close_current(self, now_ms: float, steps: Optional[int]) -> None:
+        span = self._current
+        if span is None:
+            return
+        counters = _cache_counters()
+        span.duration_ms = round(now_ms - span.start_ms, 4)
+        span.steps_out = steps
+        span.policy_cache = {k: counters[k] - self._counters.get(k, 0) for k in counters}
+        self._counters = counters
+        self.spans.append(span)
+        self._current = None
+
+    def mark(self, phase: str, steps: Optional[int] = None, **attributes: Any) -> None:
+        """Close the running phase with ``steps`` out and open ``phase`` with ``steps`` in."""
+        now = self._now_ms()
+        self._close_current(now, steps)
+        self._current = PhaseSpan(
+            name=phase,
+            span_id=uuid.uuid4().hex[:16],
+            start_ms=round(now, 4),
+            steps_in=steps,
+            attributes=dict(attributes),
+        )
+
+    def annotate(self, **attributes: Any) -> None:
+        """Add attributes to the running phase (or to the trace when none is running)."""
+        target = self._current.attributes if self._current is not None else self.attributes
+        target.update(attributes)
+
+    def finish(self, steps: Optional[int] = None) -> "PlanTrace":
+        """Close the last phase and record the total duration. Idempotent."""
+        if self.duration_ms is not None:
+            return self
+        now = self._now_ms()
+        self._close_current(now, steps)
+        self.duration_ms = round(now, 4)
+        self.steps_out = steps
+        return self
+
+    def phase(self, name: str) -> Optional[PhaseSpan]:
+        return next((s for s in self.spans if s.name == name), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        counters = _cache_counters() if self.duration_ms is None else self._counters
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'start_unix_ns': self.start_unix_ns,
+            'duration_ms': self.duration_ms,
+            'steps_out': self.steps_out,
+            'attributes': dict(self.attributes),
+            'policy_cache': {k: counters.get(k, 0) - self._counters_at_start.get(k, 0) for k in counters},
+            'phases': [asdict(s) for s in self.spans],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+class TraceSink:
+    """Receives finished traces. Subclasses implement export()."""
+
+    def export(self, trace: PlanTrace) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+
+class LogSink(TraceSink):
+    """Writes one JSON line per trace to the ``apps.kernel.trace`` logger."""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def export(self, trace: PlanTrace) -> None:
+        if trace_logger.isEnabledFor(self.level):
+            trace_logger.log(self.level, "kernel.trace %s", json.dumps(trace.to_dict(), default=str))
+
+
+def otel_span_records(trace: PlanTrace) -> List[Dict[str, Any]]:
+    """Render a trace as OpenTelemetry-style span records (root span first)."""
+    def _ns(offset_ms: float) -> int:
+        return trace.start_unix_ns + int(offset_ms * 1_000_000)
+
+    def _attrs(values: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in values.items() if v is not None}
+
+    records = [{
+        'traceId': trace.trace_id,
+        'spanId': trace.span_id,
+        'parentSpanId': None,
+        'name': trace.name,
+        'startTimeUnixNano': trace.start_unix_ns,
+        'endTimeUnixNano': _ns(trace.duration_ms or 0.0),
+        'attributes': _attrs(dict(trace.attributes, **{'kernel.steps_out': trace.steps_out})),
+    }]
+    for span in trace.spans:
+        attrs = {
+            'kernel.steps_in': span.steps_in,
+            'kernel.steps_out': span.steps_out,
+        }
+        attrs.update({f'policy_cache.{k}': v for k, v in span.policy_cache.items()})
+        attrs.update(span.attributes)
+        records.append({
+            'traceId': trace.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': trace.span_id,
+            'name': f'{trace.name}.{span.name}',
+            'startTimeUnixNano': _ns(span.start_ms),
+            'endTimeUnixNano': _ns(span.start_ms + span.duration_ms),
+            'attributes': _attrs(attrs),
+        })
+    return records
+
+
+class JsonlSpanSink(TraceSink):
+    """Local exporter: appends OpenTelemetry-style span records to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: PlanTrace) -> None:
+        lines = ''.join(json.dumps(r, default=str) + '\n' for r in otel_span_records(trace))
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+class OpenTelemetrySink(TraceSink):
+    """Emits the trace as real spans through the opentelemetry API.
+
+    Uses whatever tracer provider/exporter the process configured; raises
+    ImportError when opentelemetry is not installed.
+    """
+
+    def __init__(self, tracer_name: str = 'apps.kernel'):
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self.tracer = otel_trace.get_tracer(tracer_name)
+
+    def export(self, trace: PlanTrace) -> None:
+        records = otel_span_records(trace)
+        root_rec, children = records[0], records[1:]
+        root = self.tracer.start_span(root_rec['name'], start_time=root_rec['startTimeUnixNano'], attributes=root_rec['attributes'])
+        ctx = self._otel_trace.set_span_in_context(root)
+        for rec in children:
+            child = self.tracer.start_span(rec['name'], context=ctx, start_time=rec['startTimeUnixNano'], attributes=rec['attributes'])
+            child.end(end_time=rec['endTimeUnixNano'])
+        root.end(end_time=root_rec['endTimeUnixNano'])
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+_sinks_lock = threading.Lock()
+_sinks: Optional[List[TraceSink]] = None
+
+
+def _build_sink(name: str) -> Optional[TraceSink]:
+    if name == 'log':
+        return LogSink()
+    if name == 'jsonl':
+        return JsonlSpanSink(os.getenv('KERNEL_TRACE_JSONL_PATH', 'kernel_trace.jsonl'))
+    if name == 'otel':
+        try:
+            return OpenTelemetrySink()
+        except ImportError:
+            logger.warning("kernel_trace: KERNEL_TRACE_SINKS includes 'otel' but opentelemetry is not installed")
+            return None
+    logger.warning("kernel_trace: unknown sink %r in KERNEL_TRACE_SINKS", name)
+    return None
+
+
+def get_sinks() -> List[TraceSink]:
+    """Registered sinks; built from KERNEL_TRACE_SINKS on first use."""
+    global _sinks
+    with _sinks_lock:
+        if _sinks is None:
+            names = [n.strip().lower() for n in os.getenv('KERNEL_TRACE_SINKS', '').split(',') if n.strip()]
+            _sinks = [s for s in (_build_sink(n) for n in names) if s is not None]
+        return list(_sinks)
+
+
+def register_sink(sink: TraceSink) -> None:
+    """Add a sink in addition to the configured ones."""
+    get_sinks()
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def reset_sinks() -> None:
+    """Forget registered sinks; KERNEL_TRACE_SINKS is re-read on next use."""
+    global _sinks
+    with _sinks_lock:
+        _sinks = None
+
+
+def attach_enabled() -> bool:
+    return _env_flag('KERNEL_TRACE_ATTACH')
+
+
+def export(trace: PlanTrace) -> None:
+    """Send a finished trace to every sink; sink failures never fail the plan."""
+    for sink in get_sinks():
+        try:
+            sink.export(trace)
+        except Exception:
+            logger.warning("kernel_trace: sink %s failed", sink.__class__.__name__, exc_info=True)
@@ -0,0 +1,221 @@
+"""
+Incremental materials recalculation for edited plans.
+
+plan_from_facts computes materials for every step once. After that, each
+assistant edit touches one or two steps of a 20-40 step plan, so volumes and
+sacks are only recomputed for steps whose inputs changed:
+
+- Every step carries ``materials_cache``: a fingerprint of the inputs
+  _compute_materials_for_steps reads (type, depths, geometry, excess
+  factors, recipe, merge details) plus the well context (jurisdiction,
+  casing strings), and the sacks/bbl the step contributed to the totals.
+- A step whose fingerprint still matches keeps its materials as-is. A step
+  whose fingerprint differs, or that has no cache in an already tracked
+  plan (a new step), is recomputed through _compute_materials_for_steps.
+  Steps with a manual sack override (details.materials_override) are never
+  recomputed; their cache only follows the overridden sacks.
+- ``materials_totals`` is adjusted by the difference between the old and
+  new contribution of each recomputed step (and the contribution of removed
+  steps), so updating totals is O(changed steps).
+
+A plan that is not tracked yet (no ``incremental`` marker on its totals,
+e.g. straight from plan_from_facts) is diffed against ``source``, the plan
+as it was before the edit: a step identical to one of its steps keeps the
+materials it has (adopted), every other step is recomputed exactly as in a
+tracked plan, so the result of an edit does not depend on edit history.
+Without a source every step is recomputed. Totals are then summed once.
+Steps the assistant builds itself (combined plugs, CIBP replacements) often
+lack the per-step geometry the engine needs; when the engine yields no slurry
+for such a step, the materials the tool computed are kept.
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "materials_cache"
+
+# Step keys read by _compute_materials_for_steps (outputs such as sacks/materials excluded)
+STEP_INPUT_KEYS = (
+    "type", "plug_type", "top_ft", "bottom_ft", "interval_ft", "geometry_context",
+    "hole_d_in", "casing_id_in", "stinger_od_in", "stinger_id_in",
+    "inner_casing_od_in", "outer_casing_id_in",
+    "annular_excess", "squeeze_factor", "cap_length_ft", "displacement_margin_bbl",
+    "operational_topoff", "segments", "spacer", "recipe", "from_override",
+)
+DETAIL_INPUT_KEYS = (
+    "merged", "merged_steps", "sacks_required", "cement_cap_inside_casing", "perforation_interval",
+)
+
+
+@dataclass
+class RecalcResult:
+    recomputed: List[Any] = field(default_factory=list)  # step_ids
+    reused: int = 0
+    adopted: int = 0
+    restamped: int = 0  # sacks set outside the engine (overrides)
+    totals: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.recomputed or self.adopted or self.restamped)
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def plan_context(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Well facts _compute_materials_for_steps needs, taken from the plan payload."""
+    geometry = plan.get("well_geometry") or {}
+    return {
+        "jurisdiction": plan.get("jurisdiction") or "TX",
+        "casing_strings": geometry.get("casing_strings") or [],
+    }
+
+
+def is_tracked(plan: Dict[str, Any]) -> bool:
+    totals = plan.get("materials_totals")
+    return isinstance(totals, dict) and bool(totals.get("incremental"))
+
+
+def step_fingerprint(step: Dict[str, Any], context_fp: str = "") -> str:
+    details = step.get("details") or {}
+    return _digest({
+        "context": context_fp,
+        "step": {k: step.get(k) for k in STEP_INPUT_KEYS},
+        "details": {k: details.get(k) for k in DETAIL_INPUT_KEYS},
+    })
+
+
+def _contribution(step: Dict[str, Any]) -> Tuple[int, float]:
+    sacks, bbl = 0, 0.0
+    try:
+        sacks = int(step.get("sacks") or 0)
+    except (TypeError, ValueError):
+        pass
+    slurry = (step.get("materials") or {}).get("slurry") or {}
+    try:
+        bbl = round(float(slurry.get("total_bbl") or 0.0), 2)
+    except (TypeError, ValueError):
+        pass
+    return sacks, bbl
+
+
+def _slurry_sacks(step: Dict[str, Any]) -> Any:
+    materials = step.get("materials")
+    if not isinstance(materials, dict):
+        return None
+    return (materials.get("slurry") or {}).get("sacks")
+
+
+def _stamp(step: Dict[str, Any], fingerprint: str) -> None:
+    sacks, bbl = _contribution(step)
+    step[CACHE_KEY] = {"fingerprint": fingerprint, "sacks": sacks, "total_bbl": bbl}
+
+
+def _cached_contribution(step: Dict[str, Any]) -> Tuple[int, float]:
+    cache = step.get(CACHE_KEY)
+    if not isinstance(cache, dict):
+        return 0, 0.0
+    return int(cache.get("sacks") or 0), float(cache.get("total_bbl") or 0.0)
+
+
+def recalc_plan_materials(
+    plan: Dict[str, Any],
+    removed_steps: Iterable[Dict[str, Any]] = (),
+    force: bool = False,
+    formula_engine=None,
+    source: Optional[Dict[str, Any]] = None,
+) -> RecalcResult:
+    """
+    Recompute materials for the steps of ``plan`` whose inputs changed (in place).
+
+    ``removed_steps`` are steps deleted from the plan since it was last
+    recalculated; their contribution is taken off the totals. ``force``
+    recomputes every step. ``source`` is the plan before this edit; it is
+    only read when ``plan`` is not tracked yet.
+    """
+    from .policy_kernel import _compute_materials_for_steps
+
+    result = RecalcResult()
+    steps = plan.get("steps") or []
+    totals = plan.get("materials_totals") if isinstance(plan.get("materials_totals"), dict) else {}
+    tracked = is_tracked(plan) and not force
+    context = plan_context(plan)
+    context_fp = _digest(context)
+    unchanged_fps = set()
+    if not tracked and not force and source:
+        source_fp = _digest(plan_context(source))
+        unchanged_fps = {step_fingerprint(step, source_fp) for step in source.get("steps") or []}
+
+    sacks = int(totals.get("total_sacks") or 0)
+    bbl = float(totals.get("total_bbl") or 0.0)
+    dirty: List[Tuple[Dict[str, Any], Tuple[int, float]]] = []
+    for step in steps:
+        fp = step_fingerprint(step, context_fp)
+        cache = step.get(CACHE_KEY)
+        pinned = bool((step.get("details") or {}).get("materials_override"))
+        if isinstance(cache, dict) and (pinned or (not force and cache.get("fingerprint") == fp)):
+            old, new = _cached_contribution(step), _contribution(step)
+            if new != old:
+                _stamp(step, fp)
+                result.restamped += 1
+                sacks, bbl = sacks + new[0] - old[0], bbl + new[1] - old[1]
+            else:
+                result.reused += 1
+        elif not tracked and not isinstance(cache, dict) and fp in unchanged_fps:
+            _stamp(step, fp)
+            result.adopted += 1
+        elif pinned:
+            _stamp(step, fp)
+            result.restamped += 1
+            new = _cached_contribution(step)
+            sacks, bbl = sacks + new[0], bbl + new[1]
+        else:
+            dirty.append((step, _cached_contribution(step)))
+
+    if dirty:
+        prior = [(copy.deepcopy(step.get("materials")), step.get("sacks"), step.get("errors")) for step, _ in dirty]
+        _compute_materials_for_steps(
+            [step for step, _ in dirty], resolved_facts=context, formula_engine=formula_engine,
+        )
+        for (step, _), (materials, step_sacks, errors) in zip(dirty, prior):
+            if _slurry_sacks(step) is None and _slurry_sacks({"materials": materials}) is not None:
+                logger.info("materials_recalc: engine gave no slurry for step %s; keeping prior materials",
+                            step.get("step_id"))
+                step["materials"], step["sacks"] = materials, step_sacks
+                if errors is None:
+                    step.pop("errors", None)
+                else:
+                    step["errors"] = errors
+
+    for step in removed_steps:
+        old_sacks, old_bbl = _cached_contribution(step)
+        sacks, bbl = sacks - old_sacks, bbl - old_bbl
+    for step, (old_sacks, old_bbl) in dirty:
+        # Fingerprint after computing, in case the kernel filled in an input
+        _stamp(step, step_fingerprint(step, context_fp))
+        result.recomputed.append(step.get("step_id"))
+        new_sacks, new_bbl = _cached_contribution(step)
+        sacks, bbl = sacks + new_sacks - old_sacks, bbl + new_bbl - old_bbl
+    if not tracked:
+        # First recalculation (or forced): totals are summed once
+        contributions = [_cached_contribution(step) for step in steps]
+        sacks = sum(c[0] for c in contributions)
+        bbl = sum(c[1] for c in contributions)
+
+    result.totals = {"total_sacks": sacks, "total_bbl": round(bbl, 2), "incremental": True}
+    plan["materials_totals"] = {**totals, **result.totals}
+    logger.info(
+        "materials_recalc: %d recomputed, %d reused, %d adopted, %d restamped; %d sacks, %.2f bbl",
+        len(result.recomputed), result.reused, result.adopted, result.restamped, sacks, bbl,
+    )
+    return result
@@ -0,0 +1,213 @@
+"""
+Result cache for plan_from_facts.
+
+plan_from_facts is deterministic: the same resolved facts and policy always
+produce the same plan. Plan previews, advisory checks, the W-3A views and
+orchestrator, and plan_from_extractions nevertheless re-run every phase for
+wells whose inputs have not changed. This cache returns the earlier plan:
+
+- The key is a SHA-256 over canonical JSON of the resolved facts and the
+  policy (sorted keys, compact separators; floats use Python's shortest
+  round-trip repr, so the encoding is stable across processes), prefixed
+  with FORMAT_VERSION, KERNEL_VERSION, code_version() and the policy
+  id/version. Any change to facts, overlays or preferences yields a new key.
+- code_version() hashes the source that decides the plan (CODE_SOURCES:
+  the kernel, policy and materials services and the NM plugging books), so
+  a deploy that changes w3a_rules, the formula engine or the materials code
+  never serves plans cached by the previous build, with no manual bump.
+- Entries are pickled once and kept in a per-process LRU
+  (KERNEL_PLAN_CACHE_SIZE) in front of the "plan_cache" Django cache alias
+  (Redis), shared by Gunicorn and Celery workers for KERNEL_PLAN_CACHE_TTL
+  seconds. Every caller gets its own unpickled copy to mutate.
+- plan["debug"] (the optional kernel trace) is never cached.
+
+Inputs containing values that have no canonical JSON form are not cached.
+KERNEL_PLAN_CACHE=0 disables the cache.
+"""
+from __future__ import annotations
+
+import datetime
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached plan when no CODE_SOURCES file changed
+FORMAT_VERSION = 1
+KEY_PREFIX = "kernel:plan"
+CACHE_ALIAS = "plan_cache"
+
+_APPS_DIR = Path(__file__).resolve().parents[2]
+# Files whose contents decide the plan for given facts and policy
+CODE_SOURCES = (
+    ("kernel/services", "*.py"),
+    ("policy/services", "*.py"),
+    ("materials/services", "*.py"),
+    ("policy/packs/nm/ocd", "*.json"),
+)
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, bytes]" = OrderedDict()
+_stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def enabled() -> bool:
+    return os.getenv("KERNEL_PLAN_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _max_entries() -> int:
+    return int(os.getenv("KERNEL_PLAN_CACHE_SIZE", "256"))
+
+
+def _ttl() -> int:
+    return int(os.getenv("KERNEL_PLAN_CACHE_TTL", "86400"))
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"{type(value).__name__} has no canonical JSON form")
+
+
+def _string_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _string_keys(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_string_keys(v) for v in value]
+    return value
+
+
+def canonical_json(value: Any) -> bytes:
+    """Canonical JSON encoding of ``value`` (raises TypeError/ValueError when it has none)."""
+    kwargs = dict(sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_default)
+    try:
+        raw = json.dumps(value, **kwargs)
+    except TypeError:
+        # Mixed int/str keys cannot be sorted; compare them as JSON would write them
+        raw = json.dumps(_string_keys(value), **kwargs)
+    return raw.encode("utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Short hash of the CODE_SOURCES files (paths and contents) of this build."""
+    digest = hashlib.sha256()
+    for directory, pattern in CODE_SOURCES:
+        for path in sorted((_APPS_DIR / directory).glob(pattern)):
+            digest.update(path.relative_to(_APPS_DIR).as_posix().encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(path.read_bytes())
+            digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+def cache_key(resolved_facts: Dict[str, Any], policy: Dict[str, Any], kernel_version: str) -> Optional[str]:
+    """Key for a plan_from_facts call, or None when caching is off or the inputs are not canonical."""
+    if not enabled():
+        return None
+    try:
+        digest = hashlib.sha256()
+        digest.update(canonical_json(resolved_facts))
+        digest.update(b"\x00")
+        digest.update(canonical_json(policy))
+    except (TypeError, ValueError) as e:
+        logger.debug("plan_cache: inputs not cacheable (%s)", e)
+        return None
+    return ":".join((
+        KEY_PREFIX,
+        str(FORMAT_VERSION),
+        str(kernel_version),
+        code_version(),
+        str(policy.get("policy_id")),
+        str(policy.get("policy_version")),
+        digest.hexdigest(),
+    ))
+
+
+def _shared_cache():
+    try:
+        from django.conf import settings
+
+        if not settings.configured:
+            return None
+        from django.core.cache import caches
+
+        return caches[CACHE_ALIAS]
+    except Exception:
+        return None
+
+
+def _remember(key: str, data: bytes) -> None:
+    size = _max_entries()
+    if size <= 0:
+        return
+    with _lock:
+        _entries[key] = data
+        _entries.move_to_end(key)
+        while len(_entries) > size:
+            _entries.popitem(last=False)
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """A fresh copy of the cached plan for ``key``, or None."""
+    with _lock:
+        data = _entries.get(key)
+        if data is not None:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+    if data is None:
+        shared = _shared_cache()
+        try:
+            data = shared.get(key) if shared is not None else None
+        except Exception as e:
+            logger.warning("plan_cache: shared cache read failed (%s)", e)
+            data = None
+        if data is None:
+            with _lock:
+                _stats["misses"] += 1
+            return None
+        _remember(key, data)
+        with _lock:
+            _stats["shared_hits"] += 1
+    return pickle.loads(data)
+
+
+def put(key: str, plan: Dict[str, Any]) -> None:
+    """Cache ``plan`` (without plan["debug"]) under ``key``."""
+    cacheable = {k: v for k, v in plan.items() if k != "debug"}
+    try:
+        data = pickle.dumps(cacheable, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.warning("plan_cache: plan not picklable (%s)", e)
+        return
+    _remember(key, data)
+    shared = _shared_cache()
+    if shared is None:
+        return
+    try:
+        shared.set(key, data, timeout=_ttl())
+    except Exception as e:
+        logger.warning("plan_cache: shared cache write failed (%s)", e)
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats, entries=len(_entries))
+
+
+def clear() -> None:
+    """Drop this process's entries and counters (the shared cache expires on its own)."""
+    with _lock:
+        _entries.clear()
+        for k in _stats:
+            _stats[k] = 0
@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 KERNEL_VERSION = "0.1.0"
 from .w3a_rules import generate_steps as generate_w3a_steps
 from .c103_step_generator import generate_c103_steps
+from . import kernel_trace, plan_cache
 
 
 def _get_jurisdiction(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> str:
@@ -93,12 +94,42 @@ def _collect_constraints(policy: Dict[str, Any]) -> List[Dict[str, Any]]:
     return constraints
 
 
-def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> Dict[str, Any]:
+def plan_from_facts(
+    resolved_facts: Dict[str, Any],
+    policy: Dict[str, Any],
+    trace: Optional[kernel_trace.PlanTrace] = None,
+) -> Dict[str, Any]:
     """
     Deterministic kernel entrypoint (stub).
     - If policy is incomplete, emit constraints and no steps.
     - When complete, this function will emit a compliant plan and steps with citations.
+    - Each phase is recorded on ``trace`` (a new PlanTrace when not given) and
+      the finished trace is exported to the configured kernel_trace sinks.
+    - Results are cached by a canonical hash of facts and policy (plan_cache).
+      Passing ``trace`` always recomputes, so the phases are actually timed.
     """
+    key = plan_cache.cache_key(resolved_facts, policy, KERNEL_VERSION) if trace is None else None
+    if key is not None:
+        plan = plan_cache.get(key)
+        if plan is not None:
+            trace = kernel_trace.PlanTrace(attributes={"policy_id": policy.get("policy_id"), "plan_cache": "hit"})
+            trace.finish(len(plan.get("steps") or []))
+            if kernel_trace.attach_enabled():
+                plan.setdefault("debug", {})["trace"] = trace.to_dict()
+            kernel_trace.export(trace)
+            return plan
+
+    plan = _plan_from_facts(resolved_facts, policy, trace)
+    if key is not None:
+        plan_cache.put(key, plan)
+    return plan
+
+
+def _plan_from_facts(
+    resolved_facts: Dict[str, Any],
+    policy: Dict[str, Any],
+    trace: Optional[kernel_trace.PlanTrace] = None,
+) -> Dict[str, Any]:
     district = None
     if isinstance(resolved_facts.get("district"), dict):
         district = resolved_facts["district"].get("value")
@@ -132,7 +163,14 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     if not is_complete:
         logger.warning("kernel.plan_from_facts: policy incomplete; constraints=%s", constraints)
         return plan
-    
+
+    trace = trace if trace is not None else kernel_trace.PlanTrace()
+    trace.attributes.update({
+        "policy_id": policy.get("policy_id"),
+        "district": district,
+        "api14": plan["inputs_summary"]["api14"],
+    })
+    trace.mark("baseline_steps", 0)
 
     # Get jurisdiction-specific formula engine for cement calculations
     from apps.policy.services.formula_engine import get_formula_engine
@@ -151,6 +189,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         generated = generate_w3a_steps(resolved_facts, policy.get("effective") or {}, formula_engine)
         plan["violations"] = generated.get("violations", [])
         steps = generated.get("steps", [])
+        trace.mark("mechanical_awareness", len(steps))
         # --- Mechanical awareness: suppress conflicting ops when barriers exist ---
         try:
             mech = resolved_facts.get("existing_mechanical_barriers") or []
@@ -222,6 +261,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         except Exception:
             logger.exception("mechanical-awareness: failed")
 
+        trace.mark("cibp_detector", len(steps))
         # --- CIBP detector: emit bridge plug + cap when producing interval is exposed below production shoe, no existing CIBP, and no cap present ---
         try:
             # Skip if an existing CIBP is already recorded
@@ -533,9 +573,11 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         steps = generated.get("steps", [])
 
     logger.debug("kernel.plan_from_facts: generated %d steps", len(steps))
+    trace.mark("step_defaults", len(steps))
     steps = _dedup_step_citations(steps)
     # Apply default geometry/recipe from preferences when present
     plan_steps = _apply_step_defaults(steps, policy.get("preferences") if isinstance(policy.get("preferences"), dict) else {}, resolved_facts)
+    trace.mark("district_overrides", len(plan_steps))
     # Apply district/county overrides (e.g., 08A tagging; 7C operational instructions)
     plan_steps = _apply_district_overrides(
         plan_steps,
@@ -546,6 +588,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         resolved_facts,  # CRITICAL FIX: Pass resolved_facts so formation plugs can determine plug_type
     )
     
+    trace.mark("county_procedures", len(plan_steps))
     # Apply county procedures (data-driven from policy YAML)
     county_procedures = (policy.get("effective") or {}).get("district_overrides", {}).get("county_procedures", {})
     if not county_procedures:
@@ -560,6 +603,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
             policy.get("county"),
         )
     
+    trace.mark("steps_overrides", len(plan_steps))
     # Apply explicit step overrides provided by caller/payload (cap length, squeeze intervals, etc.)
     plan_steps = _apply_steps_overrides(
         plan_steps,
@@ -567,6 +611,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         policy.get("preferences") or {},
     )
     logger.debug("kernel.plan_from_facts: after overrides %d steps", len(plan_steps))
+    trace.mark("overlap_suppression", len(plan_steps))
     # Suppress formation/cement plugs fully contained within perf_circulate cemented intervals
     try:
         perf_intervals: List[Tuple[float, float]] = []
@@ -589,6 +634,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
             plan_steps = filtered
     except Exception:
         logger.exception("kernel.plan_from_facts: perf overlap suppression failed")
+    trace.mark("cement_class", len(plan_steps))
     # Annotate cement class based on base pack cutoff (shallow vs deep)
     try:
         base_pack = policy.get("base") or {}
@@ -622,6 +668,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
             plan_steps = annotated
     except Exception:
         logger.exception("cement-class annotation failed")
+    trace.mark("tagging", len(plan_steps))
     # Inject tagging/verification details where required
     try:
         tag_wait = None
@@ -643,6 +690,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     except Exception:
         logger.exception("tagging/verification enrichment failed")
 
+    trace.mark("plan_notes", len(plan_steps))
     # Plan-level notes (existing conditions and operations)
     try:
         notes: Dict[str, Any] = {}
@@ -721,6 +769,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     except Exception:
         logger.exception("plan-level notes aggregation failed")
 
+    trace.mark("plug_types", len(plan_steps))
     # CRITICAL: Assign plug_type BEFORE merge so incompatibility checks work!
     prod_toc_val = resolved_facts.get('production_casing_toc_ft') or {}
     production_toc_ft = prod_toc_val.get('value') if isinstance(prod_toc_val, dict) else prod_toc_val
@@ -731,6 +780,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     logger.debug("kernel.plan_from_facts: assigning plug_type and plug_purpose BEFORE merge")
     plan_steps = _assign_plug_types_and_purposes(plan_steps, production_toc_ft)
 
+    trace.mark("merge", len(plan_steps))
     # Optionally merge adjacent formation plugs into longer plugs to minimize wait cycles
     try:
         prefs = policy.get("preferences") or {}
@@ -748,6 +798,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
             f"sack_limit_no_tag={sack_limit_no_tag}, sack_limit_with_tag={sack_limit_with_tag}"
         )
         
+        trace.annotate(enabled=enabled)
         if enabled:
             plan_steps = _merge_adjacent_plugs(
                 plan_steps,
@@ -764,6 +815,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     # If steps exist, compute materials
     if plan["steps"]:
         logger.debug("kernel.plan_from_facts: computing materials for %d steps", len(plan["steps"]))
+        trace.mark("materials", len(plan["steps"]))
         
         # Update recipe yields based on cement class annotations (must happen AFTER class annotation, BEFORE materials)
         # CRITICAL: Copy recipe dict per-step to avoid mutating shared references
@@ -784,6 +836,7 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
         
         # Final validation and cleanup pass
         logger.debug("kernel.plan_from_facts: running final validation")
+        trace.mark("validation", len(plan["steps"]))
         plan["steps"] = _validate_and_cleanup_steps(plan["steps"], resolved_facts, policy)
     # plan-level rounding policy and safety stock
     rounding_pref = None
@@ -796,6 +849,10 @@ def plan_from_facts(resolved_facts: Dict[str, Any], policy: Dict[str, Any]) -> D
     plan["materials_policy"] = {"rounding": rounding_pref}
     plan["safety_stock_sacks"] = int(policy.get("preferences", {}).get("safety_stock_sacks", 0)) if isinstance(policy.get("preferences"), dict) else 0
     logger.debug("Steps generated: %s", plan.get("steps"))
+    trace.finish(len(plan["steps"]))
+    if kernel_trace.attach_enabled():
+        plan.setdefault("debug", {})["trace"] = trace.to_dict()
+    kernel_trace.export(trace)
     return plan
 
 
@@ -812,6 +869,7 @@ try:
         spacer_bbl_for_interval,
         balanced_displacement_bbl,
     )
+    from apps.materials.services.material_batch import compute_materials_batch
 except Exception:  # pragma: no cover - materials optional in early boot
     annulus_capacity_bbl_per_ft = None  # type: ignore
     cylinder_capacity_bbl_per_ft = None  # type: ignore
@@ -822,6 +880,7 @@ except Exception:  # pragma: no cover - materials optional in early boot
     compute_sacks = None  # type: ignore
     spacer_bbl_for_interval = None  # type: no cover
     balanced_displacement_bbl = None  # type: ignore
+    compute_materials_batch = None  # type: ignore
 
 
 def _assign_plug_types_and_purposes(steps: List[Dict[str, Any]], production_toc_ft: Optional[float] = None) -> List[Dict[str, Any]]:
@@ -1110,6 +1169,73 @@ def _estimate_sacks_for_merged_interval(
         return None
 
 
+def _slurry_recipe(step: Dict[str, Any]):
+    recipe_dict = step.get("recipe") or {}
+    return SlurryRecipe(
+        recipe_id=recipe_dict.get("id", "unknown"),
+        cement_class=recipe_dict.get("class", ""),
+        density_ppg=float(recipe_dict.get("density_ppg", 0) or 0),
+        yield_ft3_per_sk=float(recipe_dict.get("yield_ft3_per_sk", 0) or 0),
+        water_gal_per_sk=float(recipe_dict.get("water_gal_per_sk", 0) or 0),
+        additives=recipe_dict.get("additives", []) or [],
+    )
+
+
+def _batch_balanced_plugs(steps: List[Dict[str, Any]], recipes: List[Any]) -> Dict[int, Any]:
+    """Compute all well-formed balanced plugs in one compute_materials_batch call.
+
+    Returns {step index: (total_bbl, VolumeBreakdown, displacement_bbl)}.
+    Steps whose inputs would make the scalar path raise are left out, so they
+    still go through the per-step code (and record the same error). Batch
+    results are bit-identical to balanced_plug_bbl + compute_sacks +
+    balanced_displacement_bbl.
+    """
+    if compute_materials_batch is None:
+        return {}
+    idx: List[int] = []
+    margins: List[float] = []
+    cols: Dict[str, List[float]] = {"top": [], "bottom": [], "outer": [], "stinger_od": [], "stinger_id": [], "excess": []}
+    for i, step in enumerate(steps):
+        if step.get("type") != "balanced_plug":
+            continue
+        try:
+            top_ft = float(step.get("top_ft"))
+            bottom_ft = float(step.get("bottom_ft"))
+            outer = step.get("hole_d_in")
+            outer = float(outer if outer is not None else step.get("casing_id_in"))
+            stinger_od = float(step.get("stinger_od_in"))
+            stinger_id = float(step.get("stinger_id_in"))
+            excess = float(step.get("annular_excess", 0))
+            margin = float(step.get("displacement_margin_bbl", 0))
+        except (TypeError, ValueError):
+            continue
+        recipe = recipes[i]
+        if (bottom_ft - top_ft <= 0 or outer <= 0 or stinger_od < 0 or stinger_id <= 0 or excess < 0
+                or margin < 0 or recipe.yield_ft3_per_sk <= 0 or recipe.water_gal_per_sk < 0):
+            continue
+        idx.append(i)
+        margins.append(margin)
+        for key, value in zip(cols, (top_ft, bottom_ft, outer, stinger_od, stinger_id, excess)):
+            cols[key].append(value)
+    if not idx:
+        return {}
+    try:
+        batch = compute_materials_batch(
+            cols["top"], cols["bottom"], cols["outer"], cols["stinger_od"],
+            [recipes[i] for i in idx],
+            stinger_id_in=cols["stinger_id"],
+            annular_excess=cols["excess"],
+        )
+    except ValueError:
+        logger.warning("materials.compute: balanced plug batch rejected; using per-step path", exc_info=True)
+        return {}
+    # Displacement is interval * id_cap + margin; the batch's inside volume is interval * id_cap
+    return {
+        i: (float(batch.total_bbl[pos]), batch.breakdown(pos), float(batch.inside_bbl[pos]) + margins[pos])
+        for pos, i in enumerate(idx)
+    }
+
+
 def _compute_materials_for_steps(steps: List[Dict[str, Any]], resolved_facts: Dict[str, Any] = None, formula_engine=None) -> List[Dict[str, Any]]:
     if formula_engine is None:
         try:
@@ -1120,43 +1246,41 @@ def _compute_materials_for_steps(steps: List[Dict[str, Any]], resolved_facts: Di
         except Exception:
             logger.warning("_compute_materials_for_steps: could not create formula_engine fallback")
     out: List[Dict[str, Any]] = []
-    
-    for step in steps:
+    recipes = [_slurry_recipe(step) for step in steps]
+    # Balanced plugs are volume-only, so they are computed for the whole plan in one NumPy pass
+    balanced = _batch_balanced_plugs(steps, recipes)
+
+    for step_index, step in enumerate(steps):
         step_type = step.get("type")
-        recipe_dict = step.get("recipe") or {}
-        recipe = SlurryRecipe(
-            recipe_id=recipe_dict.get("id", "unknown"),
-            cement_class=recipe_dict.get("class", ""),
-            density_ppg=float(recipe_dict.get("density_ppg", 0) or 0),
-            yield_ft3_per_sk=float(recipe_dict.get("yield_ft3_per_sk", 0) or 0),
-            water_gal_per_sk=float(recipe_dict.get("water_gal_per_sk", 0) or 0),
-            additives=recipe_dict.get("additives", []) or [],
-        )
+        recipe = recipes[step_index]
         materials: Dict[str, Any] = {"slurry": {}, "fluids": {}}
 
         try:
             logger.debug("materials.compute: type=%s step_keys=%s", step_type, list(step.keys()))
             if step_type == "balanced_plug":
-                top_ft = float(step.get("top_ft"))
-                bottom_ft = float(step.get("bottom_ft"))
-                interval_ft = max(bottom_ft - top_ft, 0)
-                ann_excess = float(step.get("annular_excess", 0))
-                # geometry
-                hole_d = step.get("hole_d_in")
-                casing_id = step.get("casing_id_in")
-                stinger_od = step.get("stinger_od_in")
-                stinger_id = float(step.get("stinger_id_in"))
-                if hole_d is not None:
-                    ann_cap = annulus_capacity_bbl_per_ft(float(hole_d), float(stinger_od))
+                if step_index in balanced:
+                    total_bbl, vb, disp_bbl = balanced[step_index]
                 else:
-                    ann_cap = annulus_capacity_bbl_per_ft(float(casing_id), float(stinger_od))
-                id_cap = cylinder_capacity_bbl_per_ft(stinger_id)
-                vols = balanced_plug_bbl(interval_ft, ann_cap, id_cap, ann_excess)
-                vb = compute_sacks(vols["total_bbl"], recipe)
-                disp_margin = float(step.get("displacement_margin_bbl", 0))
-                disp_bbl = balanced_displacement_bbl(interval_ft, id_cap, margin_bbl=disp_margin)
+                    top_ft = float(step.get("top_ft"))
+                    bottom_ft = float(step.get("bottom_ft"))
+                    interval_ft = max(bottom_ft - top_ft, 0)
+                    ann_excess = float(step.get("annular_excess", 0))
+                    # geometry
+                    hole_d = step.get("hole_d_in")
+                    casing_id = step.get("casing_id_in")
+                    stinger_od = step.get("stinger_od_in")
+                    stinger_id = float(step.get("stinger_id_in"))
+                    if hole_d is not None:
+                        ann_cap = annulus_capacity_bbl_per_ft(float(hole_d), float(stinger_od))
+                    else:
+                        ann_cap = annulus_capacity_bbl_per_ft(float(casing_id), float(stinger_od))
+                    id_cap = cylinder_capacity_bbl_per_ft(stinger_id)
+                    total_bbl = balanced_plug_bbl(interval_ft, ann_cap, id_cap, ann_excess)["total_bbl"]
+                    vb = compute_sacks(total_bbl, recipe)
+                    disp_margin = float(step.get("displacement_margin_bbl", 0))
+                    disp_bbl = balanced_displacement_bbl(interval_ft, id_cap, margin_bbl=disp_margin)
                 materials["slurry"] = {
-                    "total_bbl": vols["total_bbl"],
+                    "total_bbl": total_bbl,
                     "ft3": vb.ft3,
                     "sacks": vb.sacks,
                     "water_bbl": vb.water_bbl,
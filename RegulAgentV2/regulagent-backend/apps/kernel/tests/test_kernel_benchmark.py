@@ -0,0 +1,100 @@
+"""
+Tests for the kernel benchmark suite (apps/kernel/benchmarks).
+
+Covers:
+- Corpus loading and case filtering
+- Budget checks (tolerance, filtered reports) and budget derivation
+- Report shape for a single case
+- Regression gate: the full corpus stays within budgets.json (wall-clock,
+  so marked ``benchmark`` and deselected by default; run with
+  ``pytest -m benchmark`` on a quiet machine)
+"""
+
+import json
+
+import pytest
+
+from apps.kernel.benchmarks import runner
+
+
+def _report(median_ms=1.0, peak_alloc_kib=10.0):
+    return {
+        'cases': {
+            'tx_case': {
+                'phases': {
+                    'plan_from_facts': {'median_ms': median_ms, 'peak_alloc_kib': peak_alloc_kib},
+                },
+            },
+        },
+    }
+
+
+class TestCorpus:
+
+    def test_corpus_covers_tx_and_nm(self):
+        cases = runner.load_corpus()
+        jurisdictions = {c.jurisdiction for c in cases}
+        assert jurisdictions == {'TX', 'NM'}
+        districts = {c.policy_spec.get('district') for c in cases if c.jurisdiction == 'TX'}
+        assert {'08A', '7C'} <= districts
+
+    def test_filter_by_name(self):
+        cases = runner.load_corpus(names=['tx_7c_coke'])
+        assert [c.name for c in cases] == ['tx_7c_coke']
+
+    def test_unknown_case_raises(self):
+        with pytest.raises(ValueError):
+            runner.load_corpus(names=['no_such_case'])
+
+    def test_every_budgeted_case_exists(self):
+        budgets = runner.load_budgets()
+        names = {c.name for c in runner.load_corpus()}
+        assert set(budgets['cases']) == names
+
+
+class TestBudgets:
+
+    def test_within_tolerance_passes(self):
+        budgets = {'tolerance': 0.5, 'cases': {'tx_case': {'plan_from_facts': {'median_ms': 1.0}}}}
+        assert runner.check_budgets(_report(median_ms=1.4), budgets) == []
+
+    def test_regression_is_reported(self):
+        budgets = {'tolerance': 0.5, 'cases': {'tx_case': {'plan_from_facts': {'median_ms': 1.0, 'peak_alloc_kib': 20}}}}
+        regressions = runner.check_budgets(_report(median_ms=1.6), budgets)
+        assert len(regressions) == 1
+        assert regressions[0]['metric'] == 'median_ms'
+        assert regressions[0]['limit'] == 1.5
+
+    def test_tolerance_override(self):
+        budgets = {'tolerance': 0.5, 'cases': {'tx_case': {'plan_from_facts': {'median_ms': 1.0}}}}
+        assert runner.check_budgets(_report(median_ms=1.2), budgets, tolerance=0.1)
+
+    def test_cases_missing_from_report_are_skipped(self):
+        budgets = {'cases': {'other_case': {'plan_from_facts': {'median_ms': 0.001}}}}
+        assert runner.check_budgets(_report(), budgets) == []
+
+    def test_budgets_from_report(self):
+        budgets = runner.budgets_from_report(_report(median_ms=0.1, peak_alloc_kib=10.0), headroom=2.0)
+        metrics = budgets['cases']['tx_case']['plan_from_facts']
+        assert metrics['peak_alloc_kib'] == 20.0
+        assert metrics['median_ms'] == runner.MIN_TIME_BUDGET_MS
+
+
+class TestRunner:
+
+    def test_report_shape_is_json_serialisable(self):
+        report = runner.run_benchmark(runner.load_corpus(names=['nm_potash']), iterations=2, warmup=0)
+        case = report['cases']['nm_potash']
+        assert case['steps'] > 0
+        assert set(case['phases']) == set(runner.PHASES)
+        for metrics in case['phases'].values():
+            assert metrics['runs'] == 2
+            assert metrics['min_ms'] <= metrics['median_ms'] <= metrics['max_ms']
+            assert metrics['peak_alloc_kib'] >= 0
+        json.dumps(report)
+
+    @pytest.mark.benchmark
+    def test_corpus_within_budgets(self):
+        report = runner.run_benchmark(iterations=5, warmup=1)
+        regressions = runner.check_budgets(report, runner.load_budgets())
+        assert not regressions, json.dumps(regressions, indent=2)
@@ -0,0 +1,142 @@
+"""
+Tests for plan_from_facts phase tracing (kernel_trace).
+
+Covers:
+- PlanTrace span bookkeeping (step counts in/out, durations, finish)
+- OpenTelemetry-style span records and the JSONL exporter
+- plan_from_facts: spans per phase, sink export, optional debug attachment
+- Sink failures never fail the plan
+"""
+
+import json
+
+import pytest
+
+from apps.kernel.services import kernel_trace
+from apps.kernel.services.kernel_trace import JsonlSpanSink, PlanTrace, TraceSink
+from apps.kernel.services.policy_kernel import plan_from_facts
+from apps.kernel.tests.test_golden_helpers import load_nm_policy
+
+
+_FACTS = {
+    'api14': {'value': '30-015-99999'},
+    'state': {'value': 'NM'},
+    'county': {'value': 'Eddy'},
+    'casing_strings': [
+        {'type': 'surface',    'size_in': 13.375, 'depth_ft': 500},
+        {'type': 'production', 'size_in': 7.0,    'depth_ft': 5500},
+    ],
+    'perforations': [{'top_ft': 4800, 'bottom_ft': 5200}],
+    'formation_tops': [{'name': 'San Andres', 'depth_ft': 3500}],
+    'total_depth_ft': {'value': 5500},
+}
+
+
+class _CollectingSink(TraceSink):
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+class _FailingSink(TraceSink):
+
+    def export(self, trace):
+        raise RuntimeError('sink down')
+
+
+@pytest.fixture(autouse=True)
+def isolated_sinks(monkeypatch):
+    monkeypatch.delenv('KERNEL_TRACE_SINKS', raising=False)
+    monkeypatch.delenv('KERNEL_TRACE_ATTACH', raising=False)
+    kernel_trace.reset_sinks()
+    yield
+    kernel_trace.reset_sinks()
+
+
+class TestPlanTrace:
+
+    def test_mark_closes_previous_span(self):
+        trace = PlanTrace()
+        trace.mark('a', 0)
+        trace.mark('b', 3)
+        trace.finish(5)
+        a, b = trace.spans
+        assert (a.name, a.steps_in, a.steps_out) == ('a', 0, 3)
+        assert (b.name, b.steps_in, b.steps_out) == ('b', 3, 5)
+        assert b.start_ms >= a.start_ms
+        assert trace.duration_ms >= a.duration_ms + b.duration_ms - 1e-3
+
+    def test_finish_is_idempotent(self):
+        trace = PlanTrace()
+        trace.mark('a', 1)
+        trace.finish(1)
+        trace.finish(9)
+        assert len(trace.spans) == 1
+        assert trace.steps_out == 1
+
+    def test_otel_records_nest_under_root(self):
+        trace = PlanTrace(attributes={'district': '7C'})
+        trace.mark('a', 0)
+        trace.finish(2)
+        root, child = kernel_trace.otel_span_records(trace)
+        assert root['parentSpanId'] is None
+        assert child['parentSpanId'] == root['spanId']
+        assert child['traceId'] == root['traceId']
+        assert child['name'] == 'kernel.plan_from_facts.a'
+        assert child['attributes']['kernel.steps_out'] == 2
+        assert root['startTimeUnixNano'] <= child['startTimeUnixNano'] <= child['endTimeUnixNano']
+
+    def test_jsonl_sink_appends_span_records(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        trace = PlanTrace()
+        trace.mark('a', 0)
+        trace.finish(1)
+        JsonlSpanSink(str(path)).export(trace)
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])['name'].endswith('.a')
+
+
+class TestPlanFromFactsTracing:
+
+    def test_phases_recorded_and_exported(self):
+        sink = _CollectingSink()
+        kernel_trace.register_sink(sink)
+        trace = PlanTrace()
+        out = plan_from_facts(_FACTS, load_nm_policy(), trace=trace)
+
+        assert sink.traces == [trace]
+        names = [s.name for s in trace.spans]
+        assert names[0] == 'baseline_steps'
+        assert 'district_overrides' in names and 'materials' in names
+        assert trace.spans[0].steps_in == 0
+        assert trace.steps_out == len(out['steps'])
+        for prev, nxt in zip(trace.spans, trace.spans[1:]):
+            assert prev.steps_out == nxt.steps_in
+        assert 'debug' not in out
+
+    def test_attach_to_debug_metadata(self, monkeypatch):
+        monkeypatch.setenv('KERNEL_TRACE_ATTACH', '1')
+        out = plan_from_facts(_FACTS, load_nm_policy())
+        trace = out['debug']['trace']
+        assert trace['attributes']['policy_id'] == 'nm.c103'
+        assert trace['phases'][0]['name'] == 'baseline_steps'
+        json.dumps(trace)
+
+    def test_sink_failure_does_not_fail_plan(self):
+        kernel_trace.register_sink(_FailingSink())
+        out = plan_from_facts(_FACTS, load_nm_policy())
+        assert out['steps']
+
+    def test_sinks_from_env(self, monkeypatch, tmp_path):
+        path = tmp_path / 'k.jsonl'
+        monkeypatch.setenv('KERNEL_TRACE_SINKS', 'log,jsonl,bogus')
+        monkeypatch.setenv('KERNEL_TRACE_JSONL_PATH', str(path))
+        kernel_trace.reset_sinks()
+        sinks = kernel_trace.get_sinks()
+        assert [type(s).__name__ for s in sinks] == ['LogSink', 'JsonlSpanSink']
+        plan_from_facts(_FACTS, load_nm_policy())
+        assert path.exists()
@@ -0,0 +1,219 @@
+import copy
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from apps.assistant.tools import executors
+from apps.kernel.services import policy_kernel
+from apps.kernel.services.materials_recalc import CACHE_KEY, recalc_plan_materials
+
+
+RECIPE = {
+    "id": "class_h_neat_15_8",
+    "class": "H",
+    "density_ppg": 15.8,
+    "yield_ft3_per_sk": 1.18,
+    "water_gal_per_sk": 5.2,
+    "additives": [],
+    "rounding": "nearest",
+}
+
+
+def _step(step_id: int, top_ft: float) -> dict:
+    return {
+        "step_id": step_id,
+        "type": "cement_plug",
+        "geometry_context": "open_hole",
+        "top_ft": top_ft,
+        "bottom_ft": top_ft + 140.0,
+        "stinger_od_in": 2.875,
+        "annular_excess": 0.60,
+        "recipe": dict(RECIPE),
+        "segments": [
+            {"top_ft": top_ft, "bottom_ft": top_ft + 40.0, "hole_d_in": 8.5, "stinger_od_in": 2.875, "annular_excess": 0.60},
+            {"top_ft": top_ft + 40.0, "bottom_ft": top_ft + 140.0, "hole_d_in": 10.0, "stinger_od_in": 2.875, "annular_excess": 0.60},
+        ],
+    }
+
+
+def _plan(n_steps: int = 30) -> dict:
+    steps = policy_kernel._compute_materials_for_steps([_step(i, 1000.0 * i) for i in range(1, n_steps + 1)])
+    return {"jurisdiction": "TX", "steps": steps, "materials_totals": {"total_sacks": 0}}
+
+
+def _full_sum(plan: dict) -> int:
+    return sum(int(s.get("sacks") or 0) for s in plan["steps"])
+
+
+def _spy():
+    return patch.object(policy_kernel, "_compute_materials_for_steps", wraps=policy_kernel._compute_materials_for_steps)
+
+
+def test_first_recalc_adopts_steps_unchanged_since_source():
+    plan = _plan()
+    with _spy() as compute:
+        result = recalc_plan_materials(plan, source=copy.deepcopy(plan))
+
+    compute.assert_not_called()
+    assert result.adopted == 30
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+    assert plan["materials_totals"]["incremental"] is True
+    assert all(CACHE_KEY in s for s in plan["steps"])
+
+
+def test_first_recalc_without_source_recomputes_every_step():
+    plan = _plan(5)
+    with _spy() as compute:
+        result = recalc_plan_materials(plan)
+
+    assert compute.call_count == 1
+    assert result.recomputed == [1, 2, 3, 4, 5] and result.adopted == 0
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+
+
+def _widen(plan: dict, index: int) -> None:
+    plan["steps"][index]["bottom_ft"] += 100.0
+    plan["steps"][index]["segments"][1]["bottom_ft"] += 100.0
+
+
+def test_first_edit_recomputes_only_the_changed_step():
+    source = _plan()
+    plan = copy.deepcopy(source)
+    _widen(plan, 4)
+
+    with _spy() as compute:
+        result = recalc_plan_materials(plan, source=source)
+
+    assert [s["step_id"] for s in compute.call_args.args[0]] == [5]
+    assert result.recomputed == [5] and result.adopted == 29
+    assert plan["steps"][4]["sacks"] > plan["steps"][3]["sacks"]
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+
+
+def test_edit_result_does_not_depend_on_tracking():
+    source = _plan()
+    untracked = copy.deepcopy(source)
+    tracked = copy.deepcopy(source)
+    recalc_plan_materials(tracked, source=source)
+    _widen(untracked, 4)
+    _widen(tracked, 4)
+
+    recalc_plan_materials(untracked, source=source)
+    recalc_plan_materials(tracked)
+
+    assert untracked["steps"] == tracked["steps"]
+    assert untracked["materials_totals"] == tracked["materials_totals"]
+
+
+def test_only_changed_steps_are_recomputed():
+    plan = _plan()
+    recalc_plan_materials(plan)
+    _widen(plan, 4)
+
+    with _spy() as compute:
+        result = recalc_plan_materials(plan)
+
+    assert compute.call_count == 1
+    assert [s["step_id"] for s in compute.call_args.args[0]] == [5]
+    assert result.recomputed == [5] and result.reused == 29
+    assert plan["steps"][4]["sacks"] > plan["steps"][3]["sacks"]
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+
+
+def test_unchanged_plan_recomputes_nothing():
+    plan = _plan()
+    recalc_plan_materials(plan)
+    before = copy.deepcopy(plan)
+
+    with _spy() as compute:
+        result = recalc_plan_materials(plan)
+
+    compute.assert_not_called()
+    assert not result.changed
+    assert plan == before
+
+
+def test_removed_and_added_steps_adjust_totals():
+    plan = _plan()
+    recalc_plan_materials(plan)
+    removed = plan["steps"].pop(0)
+    plan["steps"].append(_step(31, 31000.0))
+
+    result = recalc_plan_materials(plan, removed_steps=[removed])
+
+    assert result.recomputed == [31]
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+
+
+def test_manual_override_is_kept():
+    plan = _plan()
+    recalc_plan_materials(plan)
+    step = plan["steps"][2]
+    step["sacks"] = 200
+    step.setdefault("details", {})["materials_override"] = True
+    step["top_ft"] -= 50.0
+
+    result = recalc_plan_materials(plan)
+
+    assert result.recomputed == [] and result.restamped == 1
+    assert step["sacks"] == 200
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+
+
+def test_tool_materials_kept_when_engine_has_no_geometry():
+    plan = _plan(3)
+    recalc_plan_materials(plan)
+    plan["steps"].append({
+        "step_id": 4,
+        "type": "cement_plug",
+        "top_ft": 5000.0,
+        "bottom_ft": 5100.0,
+        "sacks": 40,
+        "materials": {"slurry": {"sacks": 40, "total_bbl": 8.4}},
+    })
+
+    recalc_plan_materials(plan)
+
+    assert plan["steps"][3]["materials"]["slurry"]["sacks"] == 40
+    assert plan["materials_totals"]["total_sacks"] == _full_sum(plan)
+    assert plan["materials_totals"]["total_bbl"] == round(
+        sum(round(s["materials"]["slurry"]["total_bbl"], 2) for s in plan["steps"]), 2
+    )
+
+
+def _thread(payload: dict):
+    source_plan = MagicMock(pk=7, payload=payload)
+    return SimpleNamespace(current_plan=source_plan, tenant_id=None, save=lambda: None)
+
+
+def test_executor_edit_diffs_against_stored_source():
+    stored = _plan()
+    payload = copy.deepcopy(stored)
+    thread = _thread(payload)
+    # Tool executors shallow-copy the payload, so the edit is visible through
+    # the in-memory source; the stored snapshot is the reference.
+    plan_payload = thread.current_plan.payload.copy()
+    _widen(plan_payload, 4)
+
+    with _spy() as compute, patch.object(
+        executors.plan_snapshot_store, "materialize_id", return_value=copy.deepcopy(stored)
+    ) as materialize:
+        totals = executors._recalc_materials_totals(plan_payload, thread.current_plan, note="edit")
+
+    materialize.assert_called_once_with(7)
+    assert [s["step_id"] for s in compute.call_args.args[0]] == [5]
+    assert totals["total_sacks"] == _full_sum(plan_payload)
+    assert totals["note"] == "edit"
+
+
+def test_executor_recalc_on_untracked_plan_recomputes_every_step():
+    thread = _thread(_plan(5))
+
+    with patch.object(executors.transaction, "atomic", nullcontext), \
+            patch.object(executors.PlanSnapshot.objects, "create", return_value=MagicMock(id=8)), \
+            patch.object(executors.PlanModification.objects, "create", return_value=MagicMock(id=9)) as modification:
+        response = executors.execute_recalc_materials(False, thread)
+
+    assert response["success"], response["message"]
+    assert response["data"]["recomputed_step_ids"] == [1, 2, 3, 4, 5]
+    assert modification.call_args.kwargs["description"] == "Recalculated materials for 5 step(s)"
@@ -0,0 +1,140 @@
+"""
+Tests for the plan_from_facts result cache (plan_cache).
+
+Covers:
+- Canonical keys: independent of dict order, sensitive to facts, policy
+  and the kernel source (code_version)
+- Hits return independent copies without plan["debug"]
+- An explicit trace or KERNEL_PLAN_CACHE=0 bypasses the cache
+"""
+
+import copy
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import caches
+
+from apps.kernel.services import plan_cache, policy_kernel
+from apps.kernel.services.policy_kernel import KERNEL_VERSION, plan_from_facts
+from apps.kernel.services.kernel_trace import PlanTrace
+from apps.kernel.tests.test_golden_helpers import load_nm_policy
+
+
+_FACTS = {
+    'api14': {'value': '30-015-99999'},
+    'state': {'value': 'NM'},
+    'county': {'value': 'Eddy'},
+    'casing_strings': [
+        {'type': 'surface',    'size_in': 13.375, 'depth_ft': 500},
+        {'type': 'production', 'size_in': 7.0,    'depth_ft': 5500},
+    ],
+    'perforations': [{'top_ft': 4800, 'bottom_ft': 5200}],
+    'formation_tops': [{'name': 'San Andres', 'depth_ft': 3500}],
+    'total_depth_ft': {'value': 5500},
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    plan_cache.clear()
+    caches[plan_cache.CACHE_ALIAS].clear()
+    yield
+    plan_cache.clear()
+    caches[plan_cache.CACHE_ALIAS].clear()
+
+
+def _spy():
+    return patch.object(policy_kernel, '_plan_from_facts', wraps=policy_kernel._plan_from_facts)
+
+
+class TestCacheKey:
+
+    def test_independent_of_key_order(self):
+        policy = {'policy_id': 'p', 'policy_version': '1', 'a': 1, 'b': {'y': 0.1, 'x': 2.0}}
+        reordered = {'b': {'x': 2.0, 'y': 0.1}, 'a': 1, 'policy_version': '1', 'policy_id': 'p'}
+
+        assert plan_cache.cache_key(_FACTS, policy, KERNEL_VERSION) == \
+            plan_cache.cache_key(dict(reversed(list(_FACTS.items()))), reordered, KERNEL_VERSION)
+
+    def test_changes_with_inputs(self):
+        policy = {'policy_id': 'p', 'policy_version': '1'}
+        facts = copy.deepcopy(_FACTS)
+        facts['perforations'][0]['top_ft'] = 4800.5
+        keys = {
+            plan_cache.cache_key(_FACTS, policy, KERNEL_VERSION),
+            plan_cache.cache_key(facts, policy, KERNEL_VERSION),
+            plan_cache.cache_key(_FACTS, dict(policy, policy_version='2'), KERNEL_VERSION),
+            plan_cache.cache_key(_FACTS, policy, '9.9.9'),
+        }
+        assert len(keys) == 4
+
+    def test_changes_with_kernel_source(self, tmp_path, monkeypatch):
+        policy = {'policy_id': 'p', 'policy_version': '1'}
+        rules = tmp_path / 'kernel' / 'services' / 'w3a_rules.py'
+        rules.parent.mkdir(parents=True)
+        rules.write_text('CEMENT_EXCESS = 0.5\n')
+        monkeypatch.setattr(plan_cache, '_APPS_DIR', tmp_path)
+        plan_cache.code_version.cache_clear()
+        try:
+            before = plan_cache.cache_key(_FACTS, policy, KERNEL_VERSION)
+            rules.write_text('CEMENT_EXCESS = 0.6\n')
+            plan_cache.code_version.cache_clear()
+            after = plan_cache.cache_key(_FACTS, policy, KERNEL_VERSION)
+        finally:
+            plan_cache.code_version.cache_clear()
+
+        assert before != after
+
+    def test_uncanonical_inputs_are_not_cached(self):
+        assert plan_cache.cache_key({'x': object()}, {}, KERNEL_VERSION) is None
+
+
+class TestPlanFromFacts:
+
+    def test_hit_returns_independent_copy(self):
+        policy = load_nm_policy()
+        with _spy() as compute:
+            first = plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+            first['steps'].clear()
+            second = plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+
+        assert compute.call_count == 1
+        assert second['steps']
+        assert plan_cache.stats()['hits'] == 1
+
+    def test_shared_hit_from_plan_cache_alias(self):
+        policy = load_nm_policy()
+        with _spy() as compute:
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+            plan_cache.clear()
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+
+        assert compute.call_count == 1
+        assert plan_cache.stats()['shared_hits'] == 1
+
+    def test_debug_is_not_cached(self, monkeypatch):
+        monkeypatch.setenv('KERNEL_TRACE_ATTACH', '1')
+        policy = load_nm_policy()
+        plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+        hit = plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+
+        assert hit['debug']['trace']['attributes']['plan_cache'] == 'hit'
+        assert hit['debug']['trace']['phases'] == []
+
+    def test_explicit_trace_bypasses_cache(self):
+        policy = load_nm_policy()
+        with _spy() as compute:
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy), trace=PlanTrace())
+
+        assert compute.call_count == 2
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setenv('KERNEL_PLAN_CACHE', '0')
+        policy = load_nm_policy()
+        with _spy() as compute:
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+            plan_from_facts(copy.deepcopy(_FACTS), copy.deepcopy(policy))
+
+        assert compute.call_count == 2
+        assert plan_cache.stats()['entries'] == 0
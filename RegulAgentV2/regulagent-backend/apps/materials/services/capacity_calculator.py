@@ -1,6 +1,8 @@
+import bisect
 import sqlite3
 import math
 import os
+import threading
 
 # -----------------------------
 # USER SETTINGS
@@ -31,6 +33,165 @@ CLASS_C_YIELD = 1.32  # ft³/sack (Class C cement)
 CLASS_H_YIELD = 1.06  # ft³/sack (Class H cement)
 
 
+# -----------------------------
+# PIPE CATALOG (IN-MEMORY REDBOOK INDEX)
+# -----------------------------
+class PipeCatalog:
+    """
+    In-memory index over the Redbook ``pipe_data`` table.
+
+    The SQLite file stays the source of truth; it is read once into sorted
+    arrays keyed by OD. Each OD holds its rows sorted by (weight, rowid), so
+    lightest-weight and exact-weight lookups are O(log n) bisects and return
+    the same row the equivalent SQL query would.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DB_PATH
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"pipe_data.db not found at {self.db_path}")
+        self.mtime_ns = os.stat(self.db_path).st_mtime_ns
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd
+                FROM pipe_data
+                WHERE out_dia IS NOT NULL AND lin_wt IS NOT NULL
+                ORDER BY out_dia ASC, lin_wt ASC, rowid ASC;
+            """).fetchall()
+        finally:
+            conn.close()
+
+        # Parallel arrays: _ods[i] is an OD, _weights[i]/_rows[i] its rows by weight
+        self._ods = []
+        self._weights = []
+        self._rows = []
+        for row in rows:
+            od = float(row[1])
+            if not self._ods or self._ods[-1] != od:
+                self._ods.append(od)
+                self._weights.append([])
+                self._rows.append([])
+            self._weights[-1].append(float(row[2]))
+            self._rows[-1].append(row)
+
+    def __len__(self):
+        return sum(len(r) for r in self._rows)
+
+    @property
+    def ods(self):
+        """Distinct outer diameters in ascending order."""
+        return list(self._ods)
+
+    def _od_index(self, od_inch, tolerance=0.0):
+        """Index of the exact OD, else of the nearest OD within ``tolerance``."""
+        od = float(od_inch)
+        i = bisect.bisect_left(self._ods, od)
+        if i < len(self._ods) and self._ods[i] == od:
+            return i
+        if tolerance <= 0:
+            return None
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self._ods):
+                diff = abs(self._ods[j] - od)
+                if diff <= tolerance and (best is None or diff < abs(self._ods[best] - od)):
+                    best = j
+        return best
+
+    def nearest_od(self, od_inch, tolerance=0.0):
+        """Return the catalog OD matching ``od_inch`` (within ``tolerance``), or None."""
+        i = self._od_index(od_inch, tolerance)
+        return self._ods[i] if i is not None else None
+
+    def available_weights(self, od_inch, tolerance=0.0):
+        """Distinct weights (lb/ft, ascending) listed for an OD."""
+        i = self._od_index(od_inch, tolerance)
+        if i is None:
+            return []
+        out = []
+        for w in self._weights[i]:
+            if not out or out[-1] != w:
+                out.append(w)
+        return out
+
+    def lookup(self, od_inch, weight_lbft=None, tolerance=0.0):
+        """
+        Look up a pipe spec; same contract as get_pipe_spec().
+
+        Args:
+            od_inch: Outer diameter in inches
+            weight_lbft: Linear weight in lb/ft; None selects the LIGHTEST weight
+            tolerance: Accept the nearest OD within this many inches
+
+        Raises:
+            ValueError: If pipe not found in the catalog
+        """
+        i = self._od_index(od_inch, tolerance)
+        if i is None:
+            raise ValueError(f"No pipe found for OD={od_inch}\"")
+
+        weights = self._weights[i]
+        if weight_lbft is None:
+            row = self._rows[i][0]
+        else:
+            j = bisect.bisect_left(weights, float(weight_lbft))
+            if j >= len(weights) or weights[j] != float(weight_lbft):
+                available = self.available_weights(self._ods[i])
+                weights_str = ", ".join(f"{w:.1f}" for w in available[:10])
+                raise ValueError(
+                    f"No pipe found for OD={od_inch}\" with weight={weight_lbft} lb/ft.\n"
+                    f"Available weights: {weights_str}"
+                    + ("..." if len(available) > 10 else "")
+                )
+            row = self._rows[i][j]
+
+        # Row structure: (nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd)
+        return {
+            "nom_dia": row[0],
+            "out_dia": row[1],
+            "lin_wt": row[2],
+            "in_dia": row[3],
+            "grade": row[4],
+        }
+
+    def lookup_many(self, pairs, tolerance=0.0):
+        """
+        Batch lookup for many (od, weight) pairs.
+
+        Returns a list aligned with ``pairs``; entries that are not found are None.
+        """
+        out = []
+        for od_inch, weight_lbft in pairs:
+            try:
+                out.append(self.lookup(od_inch, weight_lbft, tolerance))
+            except (ValueError, TypeError):
+                out.append(None)
+        return out
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the shared PipeCatalog, reloading it if pipe_data.db has changed."""
+    global _catalog
+    catalog = _catalog
+    try:
+        mtime_ns = os.stat(DB_PATH).st_mtime_ns
+    except OSError:
+        raise FileNotFoundError(f"pipe_data.db not found at {DB_PATH}")
+    if catalog is None or catalog.db_path != DB_PATH or catalog.mtime_ns != mtime_ns:
+        with _catalog_lock:
+            catalog = _catalog
+            if catalog is None or catalog.db_path != DB_PATH or catalog.mtime_ns != mtime_ns:
+                catalog = PipeCatalog(DB_PATH)
+                _catalog = catalog
+    return catalog
+
+
 # -----------------------------
 # PIPE SPEC LOOKUP (AUTOMATIC ID RESOLUTION)
 # -----------------------------
@@ -49,62 +210,7 @@ def get_pipe_spec(od_inch, weight_lbft=None):
     Raises:
         ValueError: If pipe not found in database
     """
-    if not os.path.exists(DB_PATH):
-        raise FileNotFoundError(f"pipe_data.db not found at {DB_PATH}")
-    
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    try:
-        if weight_lbft is not None:
-            # Exact match: OD + weight
-            row = cur.execute("""
-                SELECT nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd
-                FROM pipe_data
-                WHERE out_dia = ? AND lin_wt = ?
-                LIMIT 1;
-            """, (od_inch, weight_lbft)).fetchone()
-            
-            if not row:
-                # Weight not found - get available weights for this OD
-                available_weights = cur.execute("""
-                    SELECT DISTINCT lin_wt FROM pipe_data
-                    WHERE out_dia = ?
-                    ORDER BY lin_wt ASC;
-                """, (od_inch,)).fetchall()
-                
-                if available_weights:
-                    weights_str = ", ".join(f"{w[0]:.1f}" for w in available_weights[:10])
-                    raise ValueError(
-                        f"No pipe found for OD={od_inch}\" with weight={weight_lbft} lb/ft.\n"
-                        f"Available weights: {weights_str}"
-                        + ("..." if len(available_weights) > 10 else "")
-                    )
-                else:
-                    raise ValueError(f"No pipe found for OD={od_inch}\"")
-        else:
-            # No weight provided → pick LIGHTEST available for this OD
-            row = cur.execute("""
-                SELECT nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd
-                FROM pipe_data
-                WHERE out_dia = ?
-                ORDER BY lin_wt ASC
-                LIMIT 1;
-            """, (od_inch,)).fetchone()
-            
-            if not row:
-                raise ValueError(f"No pipe found for OD={od_inch}\"")
-    finally:
-        conn.close()
-    
-    # Row structure: (nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd)
-    return {
-        "nom_dia": row[0],
-        "out_dia": row[1],
-        "lin_wt": row[2],
-        "in_dia": row[3],
-        "grade": row[4],
-    }
+    return get_catalog().lookup(od_inch, weight_lbft)
 
 
 # -----------------------------
@@ -0,0 +1,238 @@
+"""
+Vectorized (NumPy) batch API over material_engine.
+
+Computes slurry volumes, sacks, water and additives for many steps in one
+pass. Every array expression keeps the operand order of the scalar functions
+in material_engine, so each element is bit-identical to the scalar result:
+
+    annulus cap   0.000971 * (hole^2 - pipe^2), clamped to >= 0
+    balanced      annular = L * ann_cap * (1 + excess); inside = L * id_cap
+    squeeze       base = L * ann_cap; total = base * squeeze_factor
+    annulus/cap   annular = L * ann_cap * (1 + excess)
+    sacks         floor(total * 5.6146 / yield + 0.5)   (nearest; ceil/floor supported)
+    water         sacks * water_gal_per_sk / 42
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .material_engine import BBL_TO_FT3, SlurryRecipe, VolumeBreakdown
+
+METHOD_BALANCED = "balanced"
+METHOD_SQUEEZE = "squeeze"
+METHOD_ANNULUS = "annulus"
+METHODS = (METHOD_BALANCED, METHOD_SQUEEZE, METHOD_ANNULUS)
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def _as_array(values: ArrayLike, n: int, name: str) -> np.ndarray:
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 0:
+        return np.full(n, float(arr))
+    if arr.shape != (n,):
+        raise ValueError(f"{name} must be a scalar or have length {n}")
+    return arr
+
+
+def _check(mask: np.ndarray, message: str) -> None:
+    if mask.any():
+        idx = int(np.flatnonzero(mask)[0])
+        raise ValueError(f"{message} (step index {idx})")
+
+
+def cylinder_capacity_bbl_per_ft_batch(diameter_in: ArrayLike) -> np.ndarray:
+    """Vectorized cylinder_capacity_bbl_per_ft."""
+    d = np.asarray(diameter_in, dtype=np.float64)
+    _check(np.atleast_1d(d <= 0), "diameter_in must be > 0")
+    return 0.000971 * (d ** 2)
+
+
+def annulus_capacity_bbl_per_ft_batch(hole_diameter_in: ArrayLike, pipe_od_in: ArrayLike) -> np.ndarray:
+    """Vectorized annulus_capacity_bbl_per_ft (clamped to >= 0)."""
+    hole = np.asarray(hole_diameter_in, dtype=np.float64)
+    pipe = np.asarray(pipe_od_in, dtype=np.float64)
+    _check(np.atleast_1d((hole <= 0) | (pipe < 0)), "invalid diameters")
+    delta = (hole ** 2) - (pipe ** 2)
+    return np.where(delta <= 0, 0.0, 0.000971 * delta)
+
+
+def sacks_from_bbl_batch(total_bbl: ArrayLike, yield_ft3_per_sk: ArrayLike, rounding: Union[str, Sequence[str]] = "nearest") -> np.ndarray:
+    """Vectorized sacks_from_bbl; ``rounding`` may be one mode or one per step."""
+    total = np.asarray(total_bbl, dtype=np.float64)
+    n = total.shape[0] if total.ndim else 1
+    total = np.atleast_1d(total)
+    yields = _as_array(yield_ft3_per_sk, n, "yield_ft3_per_sk")
+    _check((total < 0) | (yields <= 0), "invalid total_bbl or yield")
+    raw = (total * BBL_TO_FT3) / yields
+    modes = [rounding] * n if isinstance(rounding, str) else list(rounding)
+    modes = np.asarray([(m or "nearest").lower() for m in modes], dtype=object)
+    out = np.floor(raw + 0.5)
+    out = np.where(modes == "ceil", np.ceil(raw), out)
+    out = np.where(modes == "floor", np.floor(raw), out)
+    return out.astype(np.int64)
+
+
+@dataclass
+class BatchMaterials:
+    """Per-step results of compute_materials_batch, aligned with the input steps."""
+
+    annular_bbl: np.ndarray
+    inside_bbl: np.ndarray
+    total_bbl: np.ndarray
+    ft3: np.ndarray
+    sacks: np.ndarray
+    water_bbl: np.ndarray
+    additives: List[Dict[str, float]]
+    recipes: List[SlurryRecipe]
+    rounding: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return int(self.total_bbl.shape[0])
+
+    def breakdown(self, i: int) -> VolumeBreakdown:
+        """Return step ``i`` as the VolumeBreakdown compute_sacks would produce."""
+        recipe = self.recipes[i]
+        return VolumeBreakdown(
+            total_bbl=float(self.total_bbl[i]),
+            sacks=int(self.sacks[i]),
+            ft3=float(self.ft3[i]),
+            water_bbl=float(self.water_bbl[i]),
+            additives=dict(self.additives[i]),
+            explain={
+                'yield_ft3_per_sk': recipe.yield_ft3_per_sk,
+                'water_gal_per_sk': recipe.water_gal_per_sk,
+                'rounding_mode': self.rounding[i],
+            },
+        )
+
+    def breakdowns(self) -> List[VolumeBreakdown]:
+        return [self.breakdown(i) for i in range(len(self))]
+
+
+def _additives_batch(sacks: np.ndarray, recipes: List[SlurryRecipe]) -> List[Dict[str, float]]:
+    """Per-step additive totals, accumulated in the same order as additives_totals."""
+    n = len(recipes)
+    # Group additive occurrences by (recipe identity) so shared recipes are processed once
+    out: List[Dict[str, float]] = [dict() for _ in range(n)]
+    groups: Dict[int, List[int]] = {}
+    for i, r in enumerate(recipes):
+        groups.setdefault(id(r), []).append(i)
+    for idxs in groups.values():
+        recipe = recipes[idxs[0]]
+        if not recipe.additives:
+            continue
+        idx = np.asarray(idxs)
+        sk = sacks[idx]
+        totals: Dict[str, np.ndarray] = {}
+        for a in recipe.additives:
+            name = a.get("name")
+            rate = float(a.get("rate", 0.0))
+            if not name:
+                continue
+            totals[name] = totals.get(name, 0.0) + sk * rate
+        for name, values in totals.items():
+            for pos, i in enumerate(idxs):
+                out[i][name] = float(values[pos])
+    return out
+
+
+def compute_materials_batch(
+    top_ft: ArrayLike,
+    bottom_ft: ArrayLike,
+    outer_diameter_in: ArrayLike,
+    stinger_od_in: ArrayLike,
+    recipes: Union[SlurryRecipe, Sequence[SlurryRecipe]],
+    *,
+    method: Union[str, Sequence[str]] = METHOD_BALANCED,
+    stinger_id_in: Optional[ArrayLike] = None,
+    annular_excess: ArrayLike = 0.0,
+    squeeze_factor: ArrayLike = 1.0,
+    rounding: Union[str, Sequence[str]] = "nearest",
+) -> BatchMaterials:
+    """
+    Compute volumes and materials for many steps in one pass.
+
+    Args:
+        top_ft, bottom_ft: Step interval bounds (interval = bottom - top, must be > 0)
+        outer_diameter_in: Hole diameter (open hole) or casing ID (cased hole)
+        stinger_od_in: Work-string OD inside the outer diameter
+        recipes: One SlurryRecipe for all steps, or one per step
+        method: "balanced", "squeeze" or "annulus", once or per step
+        stinger_id_in: Work-string ID for the inside volume of balanced plugs
+                       (None or 0 means no inside volume)
+        annular_excess: Fractional excess for balanced/annulus steps
+        squeeze_factor: Multiplier for squeeze steps
+        rounding: Sack rounding mode ("nearest", "ceil", "floor"), once or per step
+
+    Raises:
+        ValueError: On any invalid step input, naming the first offending index
+    """
+    top = np.atleast_1d(np.asarray(top_ft, dtype=np.float64))
+    n = top.shape[0]
+    bottom = _as_array(bottom_ft, n, "bottom_ft")
+    outer = _as_array(outer_diameter_in, n, "outer_diameter_in")
+    stinger_od = _as_array(stinger_od_in, n, "stinger_od_in")
+    excess = _as_array(annular_excess, n, "annular_excess")
+    factor = _as_array(squeeze_factor, n, "squeeze_factor")
+    stinger_id = _as_array(0.0 if stinger_id_in is None else stinger_id_in, n, "stinger_id_in")
+
+    methods = [method] * n if isinstance(method, str) else list(method)
+    if len(methods) != n:
+        raise ValueError(f"method must be a string or have length {n}")
+    bad = [m for m in methods if m not in METHODS]
+    if bad:
+        raise ValueError(f"unknown method {bad[0]!r}")
+    m_arr = np.asarray(methods, dtype=object)
+    is_balanced = m_arr == METHOD_BALANCED
+    is_squeeze = m_arr == METHOD_SQUEEZE
+
+    recipe_list = [recipes] * n if isinstance(recipes, SlurryRecipe) else list(recipes)
+    if len(recipe_list) != n:
+        raise ValueError(f"recipes must be a SlurryRecipe or have length {n}")
+    modes = [rounding] * n if isinstance(rounding, str) else list(rounding)
+    if len(modes) != n:
+        raise ValueError(f"rounding must be a string or have length {n}")
+
+    interval = bottom - top
+    _check(interval <= 0, "invalid inputs")
+    _check(~is_squeeze & (excess < 0), "invalid inputs")
+    _check(is_squeeze & (factor < 0), "invalid inputs")
+
+    ann_cap = annulus_capacity_bbl_per_ft_batch(outer, stinger_od)
+    has_id = is_balanced & (stinger_id > 0)
+    id_cap = np.zeros(n)
+    if has_id.any():
+        id_cap[has_id] = cylinder_capacity_bbl_per_ft_batch(stinger_id[has_id])
+
+    excess_bbl = interval * ann_cap * (1.0 + excess)
+    squeeze_base = interval * ann_cap
+    annular_bbl = np.where(is_squeeze, squeeze_base, excess_bbl)
+    inside_bbl = np.where(is_balanced, interval * id_cap, 0.0)
+    total_bbl = np.where(
+        is_squeeze,
+        squeeze_base * factor,
+        np.where(is_balanced, excess_bbl + inside_bbl, excess_bbl),
+    )
+
+    yields = np.asarray([r.yield_ft3_per_sk for r in recipe_list], dtype=np.float64)
+    water_rates = np.asarray([r.water_gal_per_sk for r in recipe_list], dtype=np.float64)
+    sacks = sacks_from_bbl_batch(total_bbl, yields, modes)
+    _check(water_rates < 0, "invalid sacks or water per sk")
+    ft3 = total_bbl * BBL_TO_FT3
+    water_bbl = (sacks * water_rates) / 42.0
+
+    return BatchMaterials(
+        annular_bbl=annular_bbl,
+        inside_bbl=inside_bbl,
+        total_bbl=total_bbl,
+        ft3=ft3,
+        sacks=sacks,
+        water_bbl=water_bbl,
+        additives=_additives_batch(sacks, recipe_list),
+        recipes=recipe_list,
+        rounding=modes,
+    )
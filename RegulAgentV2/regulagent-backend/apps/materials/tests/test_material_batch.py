@@ -0,0 +1,184 @@
+import random
+
+import numpy as np
+import pytest
+
+from apps.materials.services.material_engine import (
+    SlurryRecipe,
+    annulus_capacity_bbl_per_ft,
+    balanced_displacement_bbl,
+    balanced_plug_bbl,
+    bridge_plug_cap_bbl,
+    compute_sacks,
+    cylinder_capacity_bbl_per_ft,
+    squeeze_bbl,
+)
+from apps.materials.services.material_batch import (
+    annulus_capacity_bbl_per_ft_batch,
+    compute_materials_batch,
+    sacks_from_bbl_batch,
+)
+
+
+RECIPE = SlurryRecipe(
+    recipe_id="class_h_neat_15_8",
+    cement_class="H",
+    density_ppg=15.8,
+    yield_ft3_per_sk=1.18,
+    water_gal_per_sk=5.2,
+    additives=[],
+)
+
+CLASS_C_ADDS = SlurryRecipe(
+    recipe_id="class_c_2pct",
+    cement_class="C",
+    density_ppg=14.8,
+    yield_ft3_per_sk=1.32,
+    water_gal_per_sk=6.3,
+    additives=[
+        {"name": "cacl2", "unit": "lb/sk", "rate": 0.94},
+        {"name": "defoamer", "unit": "gal/sk", "rate": 0.05},
+        {"name": "cacl2", "unit": "lb/sk", "rate": 0.1},
+    ],
+)
+
+
+def _assert_same(batch, i, vb):
+    """Exact (bit-identical) comparison with a scalar VolumeBreakdown."""
+    got = batch.breakdown(i)
+    assert got.total_bbl == vb.total_bbl
+    assert got.ft3 == vb.ft3
+    assert got.sacks == vb.sacks
+    assert got.water_bbl == vb.water_bbl
+    assert got.additives == vb.additives
+    assert got.explain == vb.explain
+
+
+def test_scenarios_match_scalar_path_exactly():
+    # (top, bottom, outer, stinger_od, excess, method, factor) from test_material_engine_scenarios
+    steps = [
+        (0.0, 120.0, 8.5, 2.875, 0.30, "annulus", 1.0),
+        (0.0, 150.0, 6.094, 2.875, 0.50, "annulus", 1.0),
+        (0.0, 600.0, 4.778, 2.875, 1.20, "annulus", 1.0),
+        (0.0, 60.0, 4.778, 2.875, 0.0, "squeeze", 1.6),
+        (0.0, 50.0, 4.778, 2.875, 0.40, "annulus", 1.0),
+        (0.0, 100.0, 3.0, 2.875, 0.30, "annulus", 1.0),
+        (0.0, 100.0, 8.535, 2.875, 0.30, "annulus", 1.0),
+    ]
+    top, bottom, outer, od, excess, method, factor = map(list, zip(*steps))
+    batch = compute_materials_batch(
+        top, bottom, outer, od, RECIPE,
+        method=method, annular_excess=excess, squeeze_factor=factor,
+    )
+    for i, (t, b, o, s, e, m, f) in enumerate(steps):
+        if m == "squeeze":
+            total = squeeze_bbl(b - t, o, s, f)["total_bbl"]
+        else:
+            total = bridge_plug_cap_bbl(b - t, o, s, e)["total_bbl"]
+        _assert_same(batch, i, compute_sacks(total, RECIPE, rounding="nearest"))
+
+
+def test_balanced_plug_matches_scalar_path_exactly():
+    batch = compute_materials_batch(
+        [1000.0], [1080.0], [9.875], [2.875], RECIPE,
+        method="balanced", stinger_id_in=[2.441], annular_excess=[0.50],
+    )
+    ann_cap = annulus_capacity_bbl_per_ft(9.875, 2.875)
+    id_cap = cylinder_capacity_bbl_per_ft(2.441)
+    vols = balanced_plug_bbl(80.0, ann_cap, id_cap, 0.50)
+    assert batch.annular_bbl[0] == vols["annular_bbl"]
+    assert batch.inside_bbl[0] == vols["inside_bbl"]
+    _assert_same(batch, 0, compute_sacks(vols["total_bbl"], RECIPE))
+
+
+def test_randomized_steps_match_scalar_path_exactly():
+    rng = random.Random(1234)
+    n = 500
+    tops, bottoms, outers, ods, ids, excesses, factors, methods, recipes, modes = ([] for _ in range(10))
+    for _ in range(n):
+        top = rng.uniform(0, 12000)
+        tops.append(top)
+        bottoms.append(top + rng.uniform(1, 800))
+        outers.append(rng.uniform(3.0, 17.5))
+        ods.append(rng.choice([2.375, 2.875, 3.5]))
+        ids.append(rng.choice([1.995, 2.441, 2.992]))
+        excesses.append(rng.uniform(0, 1.5))
+        factors.append(rng.uniform(1.0, 2.0))
+        methods.append(rng.choice(["balanced", "squeeze", "annulus"]))
+        recipes.append(rng.choice([RECIPE, CLASS_C_ADDS]))
+        modes.append(rng.choice(["nearest", "ceil", "floor"]))
+
+    batch = compute_materials_batch(
+        tops, bottoms, outers, ods, recipes,
+        method=methods, stinger_id_in=ids, annular_excess=excesses,
+        squeeze_factor=factors, rounding=modes,
+    )
+    for i in range(n):
+        interval = bottoms[i] - tops[i]
+        if methods[i] == "balanced":
+            ann_cap = annulus_capacity_bbl_per_ft(outers[i], ods[i])
+            total = balanced_plug_bbl(interval, ann_cap, cylinder_capacity_bbl_per_ft(ids[i]), excesses[i])["total_bbl"]
+        elif methods[i] == "squeeze":
+            total = squeeze_bbl(interval, outers[i], ods[i], factors[i])["total_bbl"]
+        else:
+            total = bridge_plug_cap_bbl(interval, outers[i], ods[i], excesses[i])["total_bbl"]
+        _assert_same(batch, i, compute_sacks(total, recipes[i], rounding=modes[i]))
+
+
+def test_annulus_capacity_is_clamped():
+    caps = annulus_capacity_bbl_per_ft_batch([3.0, 2.0], [2.875, 2.875])
+    assert caps[0] == annulus_capacity_bbl_per_ft(3.0, 2.875)
+    assert caps[1] == 0.0
+
+
+def test_sacks_rounding_modes():
+    sacks = sacks_from_bbl_batch(np.array([1.0, 1.0, 1.0]), 1.18, ["nearest", "ceil", "floor"])
+    assert list(sacks) == [5, 5, 4]
+
+
+def test_invalid_interval_names_step():
+    with pytest.raises(ValueError, match="step index 1"):
+        compute_materials_batch([0.0, 100.0], [50.0, 100.0], 4.778, 2.875, RECIPE, method="annulus")
+
+
+def test_unknown_method_rejected():
+    with pytest.raises(ValueError, match="unknown method"):
+        compute_materials_batch([0.0], [50.0], 4.778, 2.875, RECIPE, method="spot")
+
+
+def test_kernel_computes_balanced_plugs_in_one_batch():
+    from unittest.mock import patch
+
+    from apps.kernel.services import policy_kernel
+
+    recipe = {"id": "class_h", "class": "H", "density_ppg": 15.8, "yield_ft3_per_sk": 1.18, "water_gal_per_sk": 5.2}
+    steps = [
+        {"type": "balanced_plug", "top_ft": 1000.0, "bottom_ft": 1180.0, "hole_d_in": 9.875,
+         "stinger_od_in": 2.875, "stinger_id_in": 2.441, "annular_excess": 0.5, "recipe": recipe},
+        {"type": "balanced_plug", "top_ft": 4000.0, "bottom_ft": 4400.0, "casing_id_in": 6.094,
+         "stinger_od_in": 2.375, "stinger_id_in": 1.995, "annular_excess": 0.0,
+         "displacement_margin_bbl": 1.5, "recipe": recipe},
+    ]
+    with patch.object(policy_kernel, "compute_materials_batch", wraps=compute_materials_batch) as batch, \
+            patch.object(policy_kernel, "annulus_capacity_bbl_per_ft") as scalar_ann, \
+            patch.object(policy_kernel, "cylinder_capacity_bbl_per_ft") as scalar_id:
+        out = policy_kernel._compute_materials_for_steps([dict(s) for s in steps], resolved_facts={})
+    assert batch.call_count == 1
+    # Batched steps do no scalar geometry at all
+    scalar_ann.assert_not_called()
+    scalar_id.assert_not_called()
+
+    for step, computed in zip(steps, out):
+        outer = step.get("hole_d_in") or step.get("casing_id_in")
+        ann_cap = annulus_capacity_bbl_per_ft(outer, step["stinger_od_in"])
+        vols = balanced_plug_bbl(step["bottom_ft"] - step["top_ft"], ann_cap,
+                                 cylinder_capacity_bbl_per_ft(step["stinger_id_in"]), step["annular_excess"])
+        expected = compute_sacks(vols["total_bbl"], RECIPE)
+        slurry = computed["materials"]["slurry"]
+        assert slurry["total_bbl"] == vols["total_bbl"]
+        assert slurry["sacks"] == max(expected.sacks, 25)
+        assert slurry["water_bbl"] == expected.water_bbl
+        assert computed["materials"]["fluids"]["displacement_bbl"] == balanced_displacement_bbl(
+            step["bottom_ft"] - step["top_ft"], cylinder_capacity_bbl_per_ft(step["stinger_id_in"]),
+            margin_bbl=step.get("displacement_margin_bbl", 0),
+        )
@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from apps.materials.services.capacity_calculator import (
+    DB_PATH,
+    PipeCatalog,
+    get_catalog,
+    get_pipe_spec,
+)
+
+
+def _sql_lookup(od, weight=None):
+    """Reference lookup using the original per-call SQL queries."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if weight is not None:
+            row = conn.execute(
+                "SELECT nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd FROM pipe_data "
+                "WHERE out_dia = ? AND lin_wt = ? LIMIT 1;",
+                (od, weight),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT nom_dia, out_dia, lin_wt, in_dia, pipe_grad_cd FROM pipe_data "
+                "WHERE out_dia = ? ORDER BY lin_wt ASC LIMIT 1;",
+                (od,),
+            ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return dict(zip(["nom_dia", "out_dia", "lin_wt", "in_dia", "grade"], row))
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return PipeCatalog(DB_PATH)
+
+
+@pytest.fixture(scope="module")
+def od_weight_pairs():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute("SELECT DISTINCT out_dia, lin_wt FROM pipe_data").fetchall()
+    finally:
+        conn.close()
+
+
+def test_lightest_weight_matches_sql_for_every_od(catalog):
+    for od in catalog.ods:
+        assert catalog.lookup(od) == _sql_lookup(od)
+
+
+def test_exact_weight_matches_sql_for_every_pair(catalog, od_weight_pairs):
+    for od, wt in od_weight_pairs:
+        assert catalog.lookup(od, wt) == _sql_lookup(od, wt)
+
+
+def test_common_casing_ids():
+    assert get_pipe_spec(5.5, 17)["in_dia"] == pytest.approx(4.892)
+    assert get_pipe_spec(7.0, 23)["in_dia"] == pytest.approx(6.366)
+
+
+def test_unknown_od_raises(catalog):
+    with pytest.raises(ValueError, match="No pipe found for OD=99"):
+        catalog.lookup(99)
+
+
+def test_unknown_weight_lists_available_weights(catalog):
+    with pytest.raises(ValueError, match="Available weights"):
+        catalog.lookup(5.5, 999)
+
+
+def test_nearest_od_within_tolerance(catalog):
+    assert catalog.lookup(5.49, 17, tolerance=0.02) == catalog.lookup(5.5, 17)
+    assert catalog.nearest_od(5.49, tolerance=0.02) == 5.5
+    assert catalog.nearest_od(5.49) is None
+    with pytest.raises(ValueError):
+        catalog.lookup(5.49, 17)
+
+
+def test_lookup_many_aligns_with_input(catalog):
+    out = catalog.lookup_many([(5.5, 17), (99, None), (7.0, None)])
+    assert out[0] == catalog.lookup(5.5, 17)
+    assert out[1] is None
+    assert out[2] == catalog.lookup(7.0)
+
+
+def test_shared_catalog_is_reused():
+    assert get_catalog() is get_catalog()
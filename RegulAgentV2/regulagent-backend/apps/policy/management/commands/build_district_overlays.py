@@ -4,6 +4,7 @@ import json
 import yaml
 from typing import Any, Dict
 
+from apps.policy.services import field_index
 from apps.policy.services.district_overlay_builder import (
     load_json, 
     build_overlay_from_plugging_book, 
@@ -105,6 +106,14 @@ class Command(BaseCommand):
         with open(output_yaml, "w", encoding="utf-8") as f:
             yaml.safe_dump(overlay, f, sort_keys=False, allow_unicode=True)
         self.stdout.write(self.style.SUCCESS(f"Wrote overlay to {output_yaml}"))
+        self._build_field_index(output_yaml)
+
+    def _build_field_index(self, overlay_path: str) -> None:
+        """Compile the nearest-field resolution index for a freshly written overlay."""
+        index = field_index.get_field_index(overlay_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built field index: {len(index.county_keys)} counties, {len(index.names)} field names"
+        ))
     
     def _build_hybrid_7c(self, normalized_data: Dict[str, Any], raw_data: Dict[str, Any], district: str, output_yaml: str, dry_run: bool) -> Dict[str, Any]:
         """Build hybrid 7C structure: YAML for procedures (normalized), JSON for formations (raw)."""
@@ -212,6 +221,7 @@ class Command(BaseCommand):
             with open(yaml_path, "w", encoding="utf-8") as f:
                 yaml.safe_dump(county_procedures_yaml, f, sort_keys=False, allow_unicode=True)
             self.stdout.write(self.style.SUCCESS(f"Wrote county procedures to {yaml_path}"))
+            self._build_field_index(yaml_path)
             
             # Write formation data JSON
             json_output_path = output_yaml.replace("__auto.yml", "_plugging_book.json")
@@ -0,0 +1,200 @@
+"""
+Precomputed field resolution index for district overlays.
+
+When a requested field is not defined for the well's county, the loader falls
+back to the nearest county (by centroid) that defines it ("nearest_county"),
+or failing that, the nearest county that mentions it anywhere
+("nearest_county_occurrence"). Done directly, that re-normalizes every field
+key of every county, walks every county config for mentions and computes a
+haversine per county on each lookup.
+
+FieldResolutionIndex is built once per combined overlay:
+
+- normalized field name -> counties defining it (exact lookups); skeletons
+  (letters/digits only) are precomputed per name for alias matching
+- mention terms (config keys and formation names) -> counties
+- county centroids as NumPy arrays, scored in one vectorized haversine pass
+
+Results are identical to the direct scan, including tie-breaking (first
+county in overlay order). The index is compiled through policy_store, so it
+is persisted with the compiled overlays and rebuilt whenever the overlay or
+the centroid file changes; build_district_overlays warms it after writing.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from apps.policy.services import policy_store
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def skeleton(s: str) -> str:
+    """Aggressive normalizer: keep letters/digits only for fuzzy matching."""
+    return re.sub(r"[^a-z0-9]", "", s)
+
+
+def _county_base(name: str) -> str:
+    return str(name).strip().lower().replace(' county', '')
+
+
+def _county_fields(cfg: Any) -> Dict[str, Any]:
+    if not isinstance(cfg, dict):
+        return {}
+    return cfg.get('fields') or (cfg.get('overrides') or {}).get('fields') or {}
+
+
+def _mention_terms(config: Any, out: set) -> set:
+    """Every string a county config mentions: keys at any depth and formation names."""
+    if isinstance(config, dict):
+        for k, v in config.items():
+            out.add(str(k).strip().lower())
+            if str(k).strip().lower() == 'formation':
+                out.add(str(v).strip().lower())
+            _mention_terms(v, out)
+    elif isinstance(config, list):
+        for item in config:
+            _mention_terms(item, out)
+    return out
+
+
+def _contains(a: str, b: str) -> bool:
+    return a == b or a in b or b in a
+
+
+class FieldResolutionIndex:
+    """Field-name and county-centroid lookups over one combined overlay."""
+
+    def __init__(self, counties: Dict[str, Any], centroids: Dict[str, Tuple[float, float]]):
+        from apps.policy.services.loader import _normalize_field_name
+
+        self.centroids = dict(centroids)
+        self.county_keys: List[str] = []
+        self.county_bases: List[str] = []
+        # per county, in overlay order: (field key, normalized name)
+        self.county_field_names: List[List[Tuple[Any, str]]] = []
+        # normalized field name -> (skeleton, county positions)
+        self.names: Dict[str, Tuple[str, List[int]]] = {}
+        # mention term -> county positions
+        self.terms: Dict[str, List[int]] = {}
+        lat: List[float] = []
+        lon: List[float] = []
+
+        for pos, (ck, cv) in enumerate((counties or {}).items()):
+            self.county_keys.append(ck)
+            self.county_bases.append(_county_base(ck))
+            coord = self.centroid(ck)
+            lat.append(coord[0] if coord else np.nan)
+            lon.append(coord[1] if coord else np.nan)
+
+            fields = []
+            for fk in _county_fields(cv).keys():
+                norm = _normalize_field_name(str(fk))
+                fields.append((fk, norm))
+                positions = self.names.setdefault(norm, (skeleton(norm), []))[1]
+                if not positions or positions[-1] != pos:
+                    positions.append(pos)
+            self.county_field_names.append(fields)
+
+            for term in _mention_terms(cv, set()):
+                self.terms.setdefault(term, []).append(pos)
+
+        self.lat = np.array(lat, dtype=np.float64)
+        self.lon = np.array(lon, dtype=np.float64)
+
+    def centroid(self, county: str) -> Optional[Tuple[float, float]]:
+        key = str(county).strip().lower()
+        base = key.replace(' county', '')
+        return self.centroids.get(key) or self.centroids.get(base) or self.centroids.get(f"{base} county")
+
+    @staticmethod
+    def _name_matches(name: str, name_skel: str, field_norm: str, field_skel: str, loose: bool) -> bool:
+        if _contains(name, field_norm):
+            return True
+        if not name_skel:
+            # An empty skeleton is contained in every term (loose matching only)
+            return loose
+        return _contains(name_skel, field_skel)
+
+    def _nearest(self, county: str, positions: List[int]) -> Optional[Tuple[int, float]]:
+        from apps.policy.services.loader import _haversine_km
+
+        src = self.centroid(county)
+        if not src or not positions:
+            return None
+        c_base = _county_base(county)
+        pos = np.array([p for p in positions if self.county_bases[p] != c_base], dtype=np.int64)
+        pos = pos[~np.isnan(self.lat[pos])] if len(pos) else pos
+        if not len(pos):
+            return None
+        lat, lon = self.lat[pos], self.lon[pos]
+        dlat = np.radians(lat - src[0])
+        dlon = np.radians(lon - src[1])
+        a = np.sin(dlat / 2) ** 2 + np.cos(np.radians(src[0])) * np.cos(np.radians(lat)) * np.sin(dlon / 2) ** 2
+        dist = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        best = int(pos[int(np.argmin(dist))])
+        # Report the scalar distance so field_resolution matches the direct scan exactly
+        return best, _haversine_km(src[0], src[1], float(self.lat[best]), float(self.lon[best]))
+
+    def counties_defining(self, field_norm: str, loose: bool = False) -> List[int]:
+        """Positions of counties with a field key matching ``field_norm`` (exact, contains or alias)."""
+        field_skel = skeleton(field_norm)
+        found = set()
+        for name, (name_skel, positions) in self.names.items():
+            if self._name_matches(name, name_skel, field_norm, field_skel, loose):
+                found.update(positions)
+        return sorted(found)
+
+    def nearest_field(self, county: str, field_norm: str) -> Optional[Tuple[str, Any, float]]:
+        """Nearest other county defining the field: (county key, field key, distance km)."""
+        hit = self._nearest(county, self.counties_defining(field_norm))
+        if hit is None:
+            return None
+        pos, dist = hit
+        field_skel = skeleton(field_norm)
+        for fk, norm in self.county_field_names[pos]:
+            if self._name_matches(norm, skeleton(norm), field_norm, field_skel, loose=False):
+                return self.county_keys[pos], fk, dist
+        return None
+
+    def nearest_occurrence(self, county: str, field_norm: str) -> Optional[Tuple[str, float]]:
+        """Nearest other county whose field keys or nested configs mention the field."""
+        positions = set(self.counties_defining(field_norm, loose=True))
+        for term, term_positions in self.terms.items():
+            if _contains(field_norm, term):
+                positions.update(term_positions)
+        hit = self._nearest(county, sorted(positions))
+        if hit is None:
+            return None
+        return self.county_keys[hit[0]], hit[1]
+
+
+def _centroids_path() -> str:
+    from apps.policy.services.loader import PACKS_DIR
+
+    return os.path.join(PACKS_DIR, 'tx', 'w3a', 'district_overlays', 'texas_county_centroids.json')
+
+
+def _compile(overlay_path: str) -> FieldResolutionIndex:
+    from apps.policy.services.loader import _load_centroids
+
+    combined = policy_store.load_source(overlay_path) or {}
+    return FieldResolutionIndex(combined.get('counties') or {}, _load_centroids())
+
+
+def get_field_index(overlay_path: str) -> FieldResolutionIndex:
+    """Compiled index for the combined overlay at ``overlay_path``.
+
+    Served from policy_store (memory, then the shared on-disk artifacts);
+    recompiled when the overlay or the centroid file changes.
+    """
+    overlay_path = os.path.abspath(overlay_path)
+    return policy_store.get_or_compile(
+        ('field_index', overlay_path),
+        [overlay_path, _centroids_path()],
+        lambda: _compile(overlay_path),
+    )
@@ -1,11 +1,15 @@
 import os
-import yaml
 import json
+import logging
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import math
 import re
 
+from apps.policy.services import field_index, policy_store
+
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))  # apps/policy
 PACKS_DIR = os.path.join(BASE_DIR, 'packs')
 
@@ -17,8 +21,7 @@ class PolicyIncomplete(Exception):
 
 
 def _load_yaml(path: str) -> Dict[str, Any]:
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+    return policy_store.load_source(path) or {}
 
 
 def _load_formation_data(district: str, county: str, field: Optional[str] = None) -> Dict[str, Any]:
@@ -132,9 +135,7 @@ def _load_centroids() -> Dict[str, Tuple[float, float]]:
     centroids_path = os.path.join(PACKS_DIR, 'tx', 'w3a', 'district_overlays', 'texas_county_centroids.json')
     if not os.path.exists(centroids_path):
         return {}
-    import json
-    with open(centroids_path, 'r', encoding='utf-8') as f:
-        data = json.load(f) or []
+    data = policy_store.load_source(centroids_path) or []
     out: Dict[str, Tuple[float, float]] = {}
     for row in data:
         name = str(row.get('county', '')).strip().lower()
@@ -153,36 +154,6 @@ def _load_centroids() -> Dict[str, Tuple[float, float]]:
     return out
 
 
-def _mentions_field(config: Any, term_norm: str) -> bool:
-    """Recursively check if a county config mentions the requested field in either
-    a field key name or a formation name under any nested structure.
-    """
-    if config is None:
-        return False
-    if isinstance(config, dict):
-        for k, v in config.items():
-            k_norm = str(k).strip().lower()
-            # Match on field key names, e.g., "Spraberry", "Spraberry Deep"
-            if term_norm in k_norm or k_norm in term_norm:
-                return True
-            # Match on explicit formation names
-            if str(k).strip().lower() == 'formation':
-                v_norm = str(v).strip().lower()
-                if term_norm in v_norm or v_norm in term_norm:
-                    return True
-            # Recurse
-            if _mentions_field(v, term_norm):
-                return True
-        return False
-    if isinstance(config, list):
-        for item in config:
-            if _mentions_field(item, term_norm):
-                return True
-        return False
-    # Primitive
-    return False
-
-
 def _normalize_field_name(name: str) -> str:
     """Normalize field names for comparison: lower, strip parentheticals and extra spaces."""
     s = str(name or '').lower().strip()
@@ -403,7 +374,41 @@ def _normalize_district(district: str) -> str:
     return f"{num_part}{letter_part}".lower()
 
 
+def _policy_source_paths(district: Optional[str], county: Optional[str], pack_rel_path: str) -> List[str]:
+    """Every file _compile_effective_policy may read for these arguments.
+
+    Missing files are listed too, so creating one later invalidates the
+    compiled entry.
+    """
+    paths = [os.path.join(PACKS_DIR, pack_rel_path)]
+    if district:
+        ext_dir = os.path.join(PACKS_DIR, 'tx', 'w3a', 'district_overlays')
+        d_normalized = _normalize_district(district)
+        paths.append(os.path.join(ext_dir, f"{d_normalized}__auto.yml"))
+        paths.append(os.path.join(ext_dir, f"{d_normalized}_county_procedures.yml"))
+        paths.append(os.path.join(ext_dir, f"{d_normalized}_plugging_book.json"))
+        paths.append(os.path.join(ext_dir, 'texas_county_centroids.json'))
+        if county:
+            safe_county = county.lower().replace(' ', '_')
+            paths.append(os.path.join(ext_dir, f"{d_normalized}__{safe_county}.yml"))
+    return paths
+
+
 def get_effective_policy(district: Optional[str] = None, county: Optional[str] = None, field: Optional[str] = None, as_of: Optional[datetime] = None, pack_rel_path: str = 'tx_rrc_w3a_base_policy_pack.yaml') -> Dict[str, Any]:
+    """Return the merged policy for a district/county/field.
+
+    Results are served from the compiled policy store and rebuilt only when a
+    source pack or overlay changes. Each call returns a private copy.
+    """
+    key = ('effective_policy', pack_rel_path, district, county, field, as_of.isoformat() if as_of else None)
+    return policy_store.get_or_compile(
+        key,
+        _policy_source_paths(district, county, pack_rel_path),
+        lambda: _compile_effective_policy(district, county, field, as_of, pack_rel_path),
+    )
+
+
+def _compile_effective_policy(district: Optional[str], county: Optional[str], field: Optional[str], as_of: Optional[datetime], pack_rel_path: str) -> Dict[str, Any]:
     pack_path = os.path.join(PACKS_DIR, pack_rel_path)
     policy = _load_yaml(pack_path)
     base = policy.get('base') or {}
@@ -454,9 +459,7 @@ def get_effective_policy(district: Optional[str] = None, county: Optional[str] =
                 load_path = yaml_procedures_path
             
             if os.path.exists(json_formations_path):
-                import json
-                with open(json_formations_path, 'r', encoding='utf-8') as f:
-                    formation_json = json.load(f)
+                formation_json = policy_store.load_source(json_formations_path)
                 print(f"🔍 LOADER: Loaded 7C formations JSON, {len(formation_json.get('counties', {}))} counties", flush=True)
         else:
             # Standard approach for 8A and others: single combined YAML
@@ -569,9 +572,7 @@ def get_effective_policy(district: Optional[str] = None, county: Optional[str] =
             # Field-level merge (county → field, else nearest county’s field)
             if field:
                 field_norm = _normalize_field_name(str(field))
-                def _skeleton(s: str) -> str:
-                    """Aggressive normalizer: keep letters/digits only for fuzzy matching."""
-                    return re.sub(r"[^a-z0-9]", "", s)
+                _skeleton = field_index.skeleton
 
                 def _match_field(d: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                     if not d:
@@ -603,43 +604,14 @@ def get_effective_policy(district: Optional[str] = None, county: Optional[str] =
                 chosen_field_county: Optional[str] = None
                 if not chosen_field_cfg and combined:
                     counties = combined.get('counties') or {}
-                    centroids = _load_centroids()
-                    # Robust source centroid lookup (with and without "county" suffix)
-                    c_key = str(county).strip().lower()
-                    c_base = c_key.replace(' county', '')
-                    src = centroids.get(c_key) or centroids.get(c_base) or centroids.get(f"{c_base} county")
-                    best_dist = float('inf')
-                    best_cfg = None
-                    best_name = None
+                    index = field_index.get_field_index(load_path)
                     # Nearest county that has a matching field key under fields/overrides.fields
-                    for ck, cv in counties.items():
-                        # Skip current county
-                        if str(ck).strip().lower().replace(' county','') == c_base:
-                            continue
-                        c_fields_map = cv.get('fields') or (cv.get('overrides') or {}).get('fields') or {}
-                        # Look for a field key that matches (contains either way) the requested field
-                        key_match = None
-                        for fk in c_fields_map.keys():
-                            fk_norm = _normalize_field_name(str(fk))
-                            if fk_norm == field_norm or (field_norm in fk_norm or fk_norm in field_norm):
-                                key_match = fk
-                                break
-                            # skeleton fallback
-                            if _skeleton(fk_norm) and (_skeleton(fk_norm) == _skeleton(field_norm) or _skeleton(field_norm) in _skeleton(fk_norm) or _skeleton(fk_norm) in _skeleton(field_norm)):
-                                key_match = fk
-                                break
-                        if not key_match:
-                            continue
-                        ck_key = str(ck).strip().lower()
-                        ck_base = ck_key.replace(' county', '')
-                        cand = centroids.get(ck_key) or centroids.get(ck_base) or centroids.get(f"{ck_base} county")
-                        if not (src and cand):
-                            continue
-                        dist = _haversine_km(src[0], src[1], cand[0], cand[1])
-                        if dist < best_dist:
-                            best_dist = dist
-                            best_cfg = c_fields_map.get(key_match)
-                            best_name = ck
+                    nearest = index.nearest_field(str(county), field_norm)
+                    best_cfg = None
+                    if nearest:
+                        best_name, key_match, best_dist = nearest
+                        c_fields_map = counties[best_name].get('fields') or (counties[best_name].get('overrides') or {}).get('fields') or {}
+                        best_cfg = c_fields_map.get(key_match)
                     if best_cfg:
                         chosen_field_cfg = best_cfg
                         chosen_field_county = str(best_name)
@@ -650,38 +622,9 @@ def get_effective_policy(district: Optional[str] = None, county: Optional[str] =
                     else:
                         # Fallback: nearest county where the requested field occurs either as a field key
                         # or within any formation name under that county's nested configs.
-                        c_key = str(county).strip().lower()
-                        c_base = c_key.replace(' county', '')
-                        src = centroids.get(c_key) or centroids.get(c_base) or centroids.get(f"{c_base} county")
-                        best_dist2 = float('inf')
-                        best_name2: Optional[str] = None
-                        for ck, cv in counties.items():
-                            # Exclude current county
-                            ck_key = str(ck).strip().lower()
-                            ck_base = ck_key.replace(' county', '')
-                            if ck_base == c_base:
-                                continue
-                            # Look for field key occurrence
-                            c_fields_map = cv.get('fields') or (cv.get('overrides') or {}).get('fields') or {}
-                            key_has_match = any(
-                                (_normalize_field_name(str(fk)) == field_norm) or
-                                (field_norm in _normalize_field_name(str(fk)) or _normalize_field_name(str(fk)) in field_norm) or
-                                (_skeleton(_normalize_field_name(str(fk))) == _skeleton(field_norm)) or
-                                (_skeleton(field_norm) in _skeleton(_normalize_field_name(str(fk))) or _skeleton(_normalize_field_name(str(fk))) in _skeleton(field_norm))
-                                for fk in c_fields_map.keys()
-                            )
-                            # Or formation-name occurrence anywhere
-                            has_mention = key_has_match or _mentions_field(cv, field_norm)
-                            if not has_mention:
-                                continue
-                            cand = centroids.get(ck_key) or centroids.get(ck_base) or centroids.get(f"{ck_base} county")
-                            if not (src and cand):
-                                continue
-                            dist2 = _haversine_km(src[0], src[1], cand[0], cand[1])
-                            if dist2 < best_dist2:
-                                best_dist2 = dist2
-                                best_name2 = ck
-                        if best_name2 is not None and best_dist2 < float('inf'):
+                        occurrence = index.nearest_occurrence(str(county), field_norm)
+                        if occurrence:
+                            best_name2, best_dist2 = occurrence
                             field_resolution['matched_field'] = field
                             field_resolution['matched_in_county'] = str(best_name2)
                             field_resolution['method'] = 'nearest_county_occurrence'
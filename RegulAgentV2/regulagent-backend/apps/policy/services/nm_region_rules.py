@@ -22,6 +22,8 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from apps.policy.services import policy_store
+
 logger = logging.getLogger(__name__)
 
 # Path to NM plugging book packs relative to this file's package root
@@ -110,7 +112,7 @@ class NMRegionRulesEngine:
         """Load the NM county-to-region mapping JSON."""
         path = _PACKS_DIR / "nm_county_region_map.json"
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
+            return policy_store.load_source(str(path))
         except FileNotFoundError:
             logger.warning("NM county region map not found at %s", path)
             return None
@@ -135,7 +137,7 @@ class NMRegionRulesEngine:
 
         path = _PACKS_DIR / book_filename
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
+            return policy_store.load_source(str(path))
         except FileNotFoundError:
             logger.warning("NM plugging book not found at %s", path)
             return None
@@ -0,0 +1,245 @@
+"""
+Compiled policy store.
+
+get_effective_policy() used to re-parse the base pack and the district overlays
+(08a__auto.yml alone is ~340 KB of YAML) on every call. This module keeps two
+layers of compiled data so each source is parsed once:
+
+1. Parsed sources: every YAML/JSON file is parsed once and stored as a pickle
+   artifact keyed by the SHA-256 of its bytes. Artifacts live on disk
+   (POLICY_STORE_DIR) so Gunicorn and Celery workers share them. Artifacts
+   are unpickled, so the directory must be private: it is created with mode
+   0o700, and disk sharing is turned off when it is not a real directory
+   owned by this user or is writable by anyone else.
+2. Effective policies: the merged result for a
+   (pack, district, county, field, as_of) key, stored together with the
+   digests of every source file it was built from.
+
+Entries are held as pickled bytes, so they are immutable and every caller
+gets its own copy to mutate. An entry is rebuilt when one of its source files
+changes: a changed mtime/size triggers a re-hash, and a changed hash
+invalidates the entry.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Bump when the compiled layout (or get_effective_policy merge logic) changes
+# so stale on-disk artifacts from older deployments are ignored.
+STORE_FORMAT_VERSION = 1
+
+_UID = os.getuid() if hasattr(os, 'getuid') else None
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), f"regulagent_policy_store_{_UID if _UID is not None else 'user'}")
+MAX_COMPILED_ENTRIES = int(os.getenv('POLICY_STORE_MAX_ENTRIES', '512'))
+
+_lock = threading.RLock()
+# path -> (mtime_ns, size, sha256)
+_digests: Dict[str, Tuple[int, int, str]] = {}
+# sha256 -> pickled parsed source
+_sources: Dict[str, bytes] = {}
+# key -> (dependency digests, pickled effective policy)
+_compiled: "OrderedDict[Tuple[Any, ...], Tuple[Tuple[Optional[str], ...], bytes]]" = OrderedDict()
+_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'source_hits': 0, 'source_misses': 0}
+# store root -> whether it passed the private-directory check
+_private_roots: Dict[str, bool] = {}
+
+
+def _is_private_dir(path: str) -> bool:
+    """Create ``path`` (mode 0o700) if needed; True when only this user can write to it."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as e:
+        logger.warning("policy_store: cannot use %s: %s", path, e)
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        reason = 'not a directory'
+    elif _UID is not None and st.st_uid != _UID:
+        reason = f'owned by uid {st.st_uid}'
+    elif st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        reason = 'writable by group or others'
+    else:
+        return True
+    logger.warning("policy_store: %s is %s; on-disk artifacts disabled", path, reason)
+    return False
+
+
+def store_dir() -> Optional[str]:
+    """Directory for shared on-disk artifacts, or None when disk sharing is disabled or unsafe."""
+    path = os.getenv('POLICY_STORE_DIR', DEFAULT_STORE_DIR)
+    if not path or path.lower() in ('0', 'off', 'none'):
+        return None
+    with _lock:
+        private = _private_roots.get(path)
+    if private is None:
+        private = _is_private_dir(path)
+        with _lock:
+            _private_roots[path] = private
+    return path if private else None
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Return the SHA-256 of a source file, or None if it does not exist.
+
+    The digest is only recomputed when the file's mtime or size changes.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        with _lock:
+            _digests.pop(path, None)
+        return None
+    with _lock:
+        cached = _digests.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with _lock:
+        _digests[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def _artifact_path(kind: str, name: str) -> Optional[str]:
+    root = store_dir()
+    if not root:
+        return None
+    return os.path.join(root, f"v{STORE_FORMAT_VERSION}", kind, f"{name}.pickle")
+
+
+def _read_artifact(kind: str, name: str) -> Optional[bytes]:
+    path = _artifact_path(kind, name)
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_artifact(kind: str, name: str, data: bytes) -> None:
+    """Atomically write an artifact; failures only cost a re-parse later."""
+    path = _artifact_path(kind, name)
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("policy_store: could not write artifact %s: %s", path, e)
+
+
+def _parse(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        return yaml.safe_load(f)
+
+
+def load_source(path: str) -> Any:
+    """Return a private copy of the parsed YAML/JSON file at ``path``.
+
+    Raises FileNotFoundError when the file does not exist, like open() would.
+    """
+    digest = file_digest(path)
+    if digest is None:
+        raise FileNotFoundError(path)
+    with _lock:
+        blob = _sources.get(digest)
+        if blob is not None:
+            _stats['source_hits'] += 1
+    if blob is None:
+        blob = _read_artifact('sources', digest)
+        if blob is None:
+            blob = pickle.dumps(_parse(path), protocol=pickle.HIGHEST_PROTOCOL)
+            _write_artifact('sources', digest, blob)
+        with _lock:
+            _sources[digest] = blob
+            _stats['source_misses'] += 1
+    return pickle.loads(blob)
+
+
+def _compiled_name(key: Tuple[Any, ...]) -> str:
+    return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+
+def get_or_compile(key: Tuple[Any, ...], dependencies: Iterable[str], compile_fn: Callable[[], Any]) -> Any:
+    """Return a private copy of the compiled value for ``key``.
+
+    ``dependencies`` lists every source path the value is derived from
+    (including paths that may not exist yet). ``compile_fn`` is only called
+    when no valid in-process or on-disk entry exists.
+    """
+    deps = tuple(file_digest(p) for p in dependencies)
+    with _lock:
+        entry = _compiled.get(key)
+        if entry and entry[0] == deps:
+            _compiled.move_to_end(key)
+            _stats['hits'] += 1
+            return pickle.loads(entry[1])
+
+    name = _compiled_name(key)
+    blob: Optional[bytes] = None
+    raw = _read_artifact('compiled', name)
+    if raw is not None:
+        try:
+            disk_deps, disk_blob = pickle.loads(raw)
+            if tuple(disk_deps) == deps:
+                blob = disk_blob
+        except Exception:
+            blob = None
+
+    if blob is not None:
+        with _lock:
+            _stats['disk_hits'] += 1
+    else:
+        blob = pickle.dumps(compile_fn(), protocol=pickle.HIGHEST_PROTOCOL)
+        _write_artifact('compiled', name, pickle.dumps((deps, blob), protocol=pickle.HIGHEST_PROTOCOL))
+        with _lock:
+            _stats['misses'] += 1
+
+    with _lock:
+        _compiled[key] = (deps, blob)
+        _compiled.move_to_end(key)
+        while len(_compiled) > MAX_COMPILED_ENTRIES:
+            _compiled.popitem(last=False)
+    return pickle.loads(blob)
+
+
+def stats() -> Dict[str, int]:
+    """Counters for compiled lookups served from memory, disk, or a fresh compile,
+    and for parsed-source lookups served from memory (source_hits) or not."""
+    with _lock:
+        return dict(_stats, entries=len(_compiled), sources=len(_sources))
+
+
+def clear(disk: bool = False) -> None:
+    """Drop all in-process entries (and the on-disk artifacts when ``disk`` is set)."""
+    with _lock:
+        _digests.clear()
+        _sources.clear()
+        _compiled.clear()
+        _private_roots.clear()
+        for k in _stats:
+            _stats[k] = 0
+    root = store_dir()
+    if disk and root:
+        import shutil
+        shutil.rmtree(os.path.join(root, f"v{STORE_FORMAT_VERSION}"), ignore_errors=True)
@@ -0,0 +1,77 @@
+"""
+Unit tests for the field resolution index.
+
+Tests coverage:
+- Exact, contains and skeleton (alias) field matches in other counties
+- Nearest county by centroid, skipping the source county and counties
+  without a centroid; ties keep overlay order
+- Occurrence fallback via formation names and nested keys
+- Index is compiled through policy_store and rebuilt when the overlay changes
+"""
+
+import pytest
+
+from apps.policy.services import field_index, policy_store
+from apps.policy.services.field_index import FieldResolutionIndex
+
+CENTROIDS = {
+    'andrews': (32.30, -102.64), 'andrews county': (32.30, -102.64),
+    'martin': (32.31, -101.95), 'martin county': (32.31, -101.95),
+    'gaines': (32.74, -102.63), 'gaines county': (32.74, -102.63),
+    'howard': (32.31, -101.44), 'howard county': (32.31, -101.44),
+}
+
+COUNTIES = {
+    'Andrews County': {'overrides': {'fields': {'Fuhrman-Mascho': {'requirements': {'a': 1}}}}},
+    'Howard County': {'fields': {'Spraberry (Trend Area)': {'requirements': {'h': 1}}}},
+    'Martin County': {'overrides': {'fields': {'Spraberry (Trend Area)': {'requirements': {'m': 1}}}}},
+    'Gaines County': {'overrides': {'formation_tops': [{'formation': 'San Andres'}]}},
+    'Nowhere County': {'fields': {'Wolfcamp': {}}},
+}
+
+
+@pytest.fixture
+def index():
+    return FieldResolutionIndex(COUNTIES, CENTROIDS)
+
+
+class TestFieldResolutionIndex:
+
+    @pytest.mark.parametrize('field_norm', ['spraberry', 'spraberry-trend area', 'spraberrytrendarea'])
+    def test_nearest_field_matches(self, index, field_norm):
+        county, key, dist = index.nearest_field('Andrews', field_norm)
+        assert (county, key) == ('Martin County', 'Spraberry (Trend Area)')
+        assert dist == pytest.approx(64.9, abs=1.0)
+
+    def test_skips_source_and_missing_centroids(self, index):
+        assert index.nearest_field('Martin County', 'spraberry')[0] == 'Howard County'
+        assert index.nearest_field('Andrews', 'wolfcamp') is None
+        assert index.nearest_field('Unknown', 'spraberry') is None
+
+    def test_occurrence_fallback(self, index):
+        assert index.nearest_field('Andrews', 'san andres') is None
+        county, dist = index.nearest_occurrence('Andrews', 'san andres')
+        assert county == 'Gaines County'
+        assert dist < 60
+
+    def test_ties_keep_overlay_order(self):
+        counties = {'B County': {'fields': {'X': {}}}, 'A County': {'fields': {'X': {}}}}
+        centroids = {'a': (31.0, -100.0), 'b': (31.0, -100.0), 'c': (30.0, -100.0)}
+        assert FieldResolutionIndex(counties, centroids).nearest_field('c', 'x')[0] == 'B County'
+
+
+def test_compiled_through_policy_store(tmp_path, monkeypatch):
+    monkeypatch.setenv('POLICY_STORE_DIR', str(tmp_path / 'store'))
+    policy_store.clear()
+    overlay = tmp_path / '08a__auto.yml'
+    overlay.write_text('counties:\n  Andrews County:\n    fields:\n      Dean: {}\n', encoding='utf-8')
+
+    first = field_index.get_field_index(str(overlay))
+    assert first.county_keys == ['Andrews County']
+    assert policy_store.stats()['misses'] == 1
+    field_index.get_field_index(str(overlay))
+    assert policy_store.stats()['hits'] == 1
+
+    overlay.write_text('counties:\n  Martin County:\n    fields:\n      Dean: {}\n', encoding='utf-8')
+    assert field_index.get_field_index(str(overlay)).county_keys == ['Martin County']
+    policy_store.clear()
@@ -0,0 +1,156 @@
+"""
+Unit tests for the compiled policy store.
+
+Tests coverage:
+- Parsed sources are cached and re-parsed only when the file changes
+- Compiled entries are invalidated when a dependency changes or appears
+- On-disk artifacts are shared with a fresh (cleared) process cache
+- Artifacts are only read from a private directory owned by this user
+- get_effective_policy returns private copies
+"""
+
+import os
+
+import pytest
+
+from apps.policy.services import policy_store
+from apps.policy.services.loader import get_effective_policy
+
+
+@pytest.fixture(autouse=True)
+def isolated_store(tmp_path, monkeypatch):
+    monkeypatch.setenv('POLICY_STORE_DIR', str(tmp_path / 'store'))
+    policy_store.clear()
+    yield
+    policy_store.clear()
+
+
+def _write(path, text, mtime_ns=None):
+    path.write_text(text, encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestLoadSource:
+
+    def test_yaml_and_json_are_parsed(self, tmp_path):
+        y = tmp_path / 'a.yml'
+        j = tmp_path / 'b.json'
+        _write(y, 'base:\n  x: 1\n')
+        _write(j, '{"counties": {"coke": {}}}')
+        assert policy_store.load_source(str(y)) == {'base': {'x': 1}}
+        assert policy_store.load_source(str(j)) == {'counties': {'coke': {}}}
+
+    def test_returns_private_copy(self, tmp_path):
+        y = tmp_path / 'a.yml'
+        _write(y, 'base:\n  x: 1\n')
+        first = policy_store.load_source(str(y))
+        first['base']['x'] = 99
+        assert policy_store.load_source(str(y)) == {'base': {'x': 1}}
+
+    def test_changed_file_is_reparsed(self, tmp_path):
+        y = tmp_path / 'a.yml'
+        _write(y, 'x: 1\n', mtime_ns=1_000_000_000)
+        assert policy_store.load_source(str(y)) == {'x': 1}
+        _write(y, 'x: 2\n', mtime_ns=2_000_000_000)
+        assert policy_store.load_source(str(y)) == {'x': 2}
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            policy_store.load_source(str(tmp_path / 'missing.yml'))
+
+
+class TestGetOrCompile:
+
+    def test_compiles_once_until_dependency_changes(self, tmp_path):
+        dep = tmp_path / 'dep.yml'
+        _write(dep, 'x: 1\n', mtime_ns=1_000_000_000)
+        calls = []
+
+        def compile_fn():
+            calls.append(1)
+            return {'value': policy_store.load_source(str(dep))['x']}
+
+        key = ('test', 'a')
+        assert policy_store.get_or_compile(key, [str(dep)], compile_fn) == {'value': 1}
+        assert policy_store.get_or_compile(key, [str(dep)], compile_fn) == {'value': 1}
+        assert len(calls) == 1
+
+        _write(dep, 'x: 2\n', mtime_ns=2_000_000_000)
+        assert policy_store.get_or_compile(key, [str(dep)], compile_fn) == {'value': 2}
+        assert len(calls) == 2
+
+    def test_new_dependency_file_invalidates(self, tmp_path):
+        dep = tmp_path / 'county.yml'
+        calls = []
+
+        def compile_fn():
+            calls.append(1)
+            return {'exists': dep.exists()}
+
+        key = ('test', 'b')
+        assert policy_store.get_or_compile(key, [str(dep)], compile_fn) == {'exists': False}
+        _write(dep, 'x: 1\n')
+        assert policy_store.get_or_compile(key, [str(dep)], compile_fn) == {'exists': True}
+        assert len(calls) == 2
+
+    def test_disk_artifact_shared_after_process_cache_cleared(self, tmp_path):
+        dep = tmp_path / 'dep.yml'
+        _write(dep, 'x: 1\n')
+        key = ('test', 'c')
+        policy_store.get_or_compile(key, [str(dep)], lambda: {'v': 1})
+        policy_store.clear()
+
+        def fail():
+            raise AssertionError('should have been served from disk')
+
+        assert policy_store.get_or_compile(key, [str(dep)], fail) == {'v': 1}
+        assert policy_store.stats()['disk_hits'] == 1
+
+
+class TestPrivateStoreDir:
+
+    def test_store_dir_is_created_private(self, tmp_path):
+        root = policy_store.store_dir()
+
+        assert root == str(tmp_path / 'store')
+        assert os.stat(root).st_mode & 0o777 == 0o700
+
+    def test_shared_directory_is_not_used(self, tmp_path, monkeypatch):
+        shared = tmp_path / 'shared'
+        shared.mkdir()
+        os.chmod(shared, 0o777)
+        monkeypatch.setenv('POLICY_STORE_DIR', str(shared))
+        dep = tmp_path / 'dep.yml'
+        _write(dep, 'x: 1\n')
+
+        assert policy_store.store_dir() is None
+        policy_store.get_or_compile(('test', 'd'), [str(dep)], lambda: {'v': 1})
+        assert list(shared.iterdir()) == []
+
+    def test_symlinked_directory_is_not_used(self, tmp_path, monkeypatch):
+        target = tmp_path / 'target'
+        target.mkdir(mode=0o700)
+        link = tmp_path / 'link'
+        link.symlink_to(target)
+        monkeypatch.setenv('POLICY_STORE_DIR', str(link))
+
+        assert policy_store.store_dir() is None
+
+
+class TestEffectivePolicyCaching:
+
+    def test_repeated_calls_are_equal_and_independent(self):
+        first = get_effective_policy(district='08A', county='Andrews County', field='Spraberry')
+        first['effective']['mutated'] = True
+        second = get_effective_policy(district='08A', county='Andrews County', field='Spraberry')
+        assert 'mutated' not in second['effective']
+        first['effective'].pop('mutated')
+        assert first == second
+        assert policy_store.stats()['hits'] == 1
+
+    def test_key_includes_field(self):
+        with_field = get_effective_policy(district='08A', county='Andrews County', field='Spraberry')
+        without_field = get_effective_policy(district='08A', county='Andrews County')
+        assert 'field_resolution' in with_field
+        assert 'field_resolution' not in without_field
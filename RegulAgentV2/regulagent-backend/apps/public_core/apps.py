@@ -6,4 +6,8 @@ class PublicCoreConfig(AppConfig):
     name = 'apps.public_core'
     verbose_name = 'Public Core'
 
+    def ready(self):
+        """Import signals when the app is ready."""
+        from apps.public_core import signals  # noqa: F401
+
 
@@ -3,8 +3,7 @@ from __future__ import annotations
 from django.core.management.base import BaseCommand
 
 from apps.public_core.models import ExtractedDocument
-from apps.public_core.models.document_vector import DocumentVector
-from apps.public_core.services.openai_extraction import vectorize_extracted_document
+from apps.public_core.services import bulk_vectorizer
 
 
 class Command(BaseCommand):
@@ -13,21 +12,30 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--limit', type=int, default=200, help='Max documents to process (0 for all).')
         parser.add_argument('--doc-type', type=str, default='', help='Filter by document_type (w2|w15|gau|schematic|formation_tops)')
+        parser.add_argument('--embed-batch-size', type=int, default=bulk_vectorizer.DEFAULT_MAX_BATCH_TEXTS,
+                            help='Max sections per embeddings request (across documents).')
+        parser.add_argument('--write-chunk', type=int, default=bulk_vectorizer.DEFAULT_WRITE_CHUNK,
+                            help='Vector rows per bulk insert.')
+        parser.add_argument('--workers', type=int, default=bulk_vectorizer.DEFAULT_EMBED_WORKERS,
+                            help='Concurrent embeddings requests.')
 
     def handle(self, *args, **options):
         limit = int(options.get('limit') or 0)
         doc_type = (options.get('doc_type') or '').strip().lower()
-        qs = ExtractedDocument.objects.all().order_by('-created_at')
+        qs = bulk_vectorizer.without_vectors(ExtractedDocument.objects.all()).order_by('-created_at')
         if doc_type:
             qs = qs.filter(document_type=doc_type)
-        processed = 0
-        created = 0
-        for ed in (qs if limit == 0 else qs[:limit]):
-            processed += 1
-            exists = DocumentVector.objects.filter(metadata__ed_id=str(ed.id)).exists()
-            if exists:
-                continue
-            created += vectorize_extracted_document(ed)
-        self.stdout.write(self.style.SUCCESS(f"Processed {processed} docs, created {created} vectors"))
-
-
+        qs = qs.select_related('well')
+        docs = qs.iterator(chunk_size=500) if limit == 0 else qs[:limit]
+
+        result = bulk_vectorizer.vectorize_documents(
+            docs,
+            max_batch_texts=options['embed_batch_size'],
+            write_chunk=options['write_chunk'],
+            embed_workers=options['workers'],
+        )
+        processed = result.documents + result.skipped + len(result.failed_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} docs, created {result.vectors} vectors "
+            f"({result.batches} embedding requests, {len(result.failed_ids)} failed)"
+        ))
@@ -0,0 +1,86 @@
+"""Backfill DocumentVector.embedding_ann and build its HNSW index.
+
+The shadow column (migration 0045) holds the first 1536 dimensions of the
+3072-dim embedding, L2-normalised, as halfvec. This command:
+
+1. Fills NULL shadows in batches with one UPDATE per batch computed in the
+   database (pgvector >= 0.7: subvector + l2_normalize), so vectors never
+   round-trip through Python.
+2. Builds the HNSW index CONCURRENTLY (halfvec_cosine_ops), so writes
+   continue during the build.
+
+Usage:
+    python manage.py build_vector_ann_index
+    python manage.py build_vector_ann_index --batch-size 5000
+    python manage.py build_vector_ann_index --skip-index        # backfill only
+    python manage.py build_vector_ann_index --rebuild           # drop + rebuild the index
+    python manage.py build_vector_ann_index --dry-run
+"""
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.public_core.models.document_vector import ANN_DIMENSIONS, DocumentVector
+from apps.public_core.services.vector_search import ANN_INDEX_NAME
+
+TABLE = DocumentVector._meta.db_table
+
+BACKFILL_SQL = f"""
+UPDATE {TABLE}
+SET embedding_ann = l2_normalize(subvector(embedding, 1, {ANN_DIMENSIONS}))::halfvec({ANN_DIMENSIONS})
+WHERE id IN (
+    SELECT id FROM {TABLE} WHERE embedding_ann IS NULL LIMIT %s
+)
+"""
+
+
+class Command(BaseCommand):
+    help = "Backfill the halfvec ANN shadow embedding and build its HNSW index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows updated per statement (default: 2000).")
+        parser.add_argument("--skip-index", action="store_true", help="Backfill only; do not build the index.")
+        parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild the HNSW index.")
+        parser.add_argument("--m", type=int, default=16, help="HNSW m parameter (default: 16).")
+        parser.add_argument("--ef-construction", type=int, default=64, help="HNSW ef_construction (default: 64).")
+        parser.add_argument("--dry-run", action="store_true", help="Report how many rows need a shadow and exit.")
+
+    def handle(self, *args, **options):
+        missing = DocumentVector.objects.filter(embedding_ann__isnull=True).count()
+        total = DocumentVector.objects.count()
+        self.stdout.write(f"{missing}/{total} vector row(s) missing an ANN shadow embedding")
+        if options["dry_run"]:
+            return
+
+        batch_size = max(1, options["batch_size"])
+        filled = 0
+        started = time.monotonic()
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(BACKFILL_SQL, [batch_size])
+                updated = cursor.rowcount
+            if not updated:
+                break
+            filled += updated
+            self.stdout.write(f"  Backfilled {filled}/{missing} ({time.monotonic() - started:.1f}s)")
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {filled} row(s)."))
+
+        if options["skip_index"]:
+            return
+
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+        with connection.cursor() as cursor:
+            if options["rebuild"]:
+                self.stdout.write(f"Dropping {ANN_INDEX_NAME} ...")
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {ANN_INDEX_NAME}")
+            self.stdout.write(f"Building {ANN_INDEX_NAME} (m={options['m']}, ef_construction={options['ef_construction']}) ...")
+            started = time.monotonic()
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {ANN_INDEX_NAME} "
+                f"ON {TABLE} USING hnsw (embedding_ann halfvec_cosine_ops) "
+                f"WITH (m = {int(options['m'])}, ef_construction = {int(options['ef_construction'])})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Index ready ({time.monotonic() - started:.1f}s)."))
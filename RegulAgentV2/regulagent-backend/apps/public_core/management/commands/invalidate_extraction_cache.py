@@ -0,0 +1,66 @@
+"""Delete content-addressed extraction cache entries so matching files are re-extracted."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from apps.public_core.models import ExtractionCacheEntry
+from apps.public_core.services import extraction_cache
+
+
+class Command(BaseCommand):
+    help = "Invalidate extraction cache entries (by file hash, doc type, model or age) or show cache stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Delete ALL cache entries")
+        parser.add_argument("--sha256", type=str, help="Only entries for this file SHA-256")
+        parser.add_argument("--doc-type", type=str, help="Only this doc type (e.g. w2, gau, classification)")
+        parser.add_argument("--model", type=str, help="Only entries produced by this model")
+        parser.add_argument("--older-than-days", type=int, help="Only entries created more than N days ago")
+        parser.add_argument("--dry-run", action="store_true", help="Show count without deleting")
+        parser.add_argument("--stats", action="store_true", help="Print entry/hit/token-savings totals and exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._print_stats()
+            return
+
+        older_than = None
+        if options["older_than_days"] is not None:
+            older_than = timezone.now() - timedelta(days=options["older_than_days"])
+
+        try:
+            count = extraction_cache.invalidate(
+                file_sha=options["sha256"],
+                doc_type=options["doc_type"],
+                model=options["model"],
+                older_than=older_than,
+                everything=options["all"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError:
+            raise CommandError("Specify --all, --sha256, --doc-type, --model or --older-than-days (or a combination).")
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {count} cache entr{'y' if count == 1 else 'ies'}.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} cache entr{'y' if count == 1 else 'ies'}."))
+
+    def _print_stats(self):
+        rows = (
+            ExtractionCacheEntry.objects
+            .values("doc_type")
+            .annotate(
+                entries=Count("id"),
+                hits=Sum("hit_count"),
+                tokens_saved=Sum(F("hit_count") * F("tokens_used")),
+            )
+            .order_by("doc_type")
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['doc_type']:<16} entries={row['entries']} hits={row['hits'] or 0} "
+                f"tokens_saved={row['tokens_saved'] or 0}"
+            )
@@ -5,8 +5,11 @@ Differences from backfill_vectors:
 - Supports --resume to skip documents that already have vectors (opt-in backfill mode).
 - Supports --api-prefix filter for jurisdiction-scoped runs (e.g. 30 for NM wells).
 - Supports --dry-run to preview scope without mutating any data.
-- Supports --batch-size (cosmetic: controls progress-log frequency; each doc is still
-  processed individually to match the existing vectorize_extracted_document signature).
+- Supports --batch-size (controls progress-log frequency).
+
+Documents are embedded through bulk_vectorizer: sections from many documents
+share each embeddings request, and each document's old vectors are replaced by
+its new ones in the same bulk-insert transaction.
 
 Usage:
     python manage.py reindex_vectors
@@ -15,6 +18,7 @@ Usage:
     python manage.py reindex_vectors --api-prefix 30   # NM wells only
     python manage.py reindex_vectors --resume          # skip docs that already have vectors
     python manage.py reindex_vectors --dry-run
+    python manage.py reindex_vectors --embed-batch-size 256 --workers 4
 """
 from __future__ import annotations
 
@@ -23,11 +27,8 @@ import logging
 from django.core.management.base import BaseCommand
 
 from apps.public_core.models import ExtractedDocument
-from apps.public_core.models.document_vector import DocumentVector
-from apps.public_core.services.openai_extraction import (
-    iter_json_sections_for_embedding,
-    vectorize_extracted_document,
-)
+from apps.public_core.services import bulk_vectorizer
+from apps.public_core.services.openai_extraction import iter_json_sections_for_embedding
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +65,24 @@ class Command(BaseCommand):
             action="store_true",
             help="Preview which documents would be processed without making any changes.",
         )
+        parser.add_argument(
+            "--embed-batch-size",
+            type=int,
+            default=bulk_vectorizer.DEFAULT_MAX_BATCH_TEXTS,
+            help=f"Max sections per embeddings request, across documents (default: {bulk_vectorizer.DEFAULT_MAX_BATCH_TEXTS}).",
+        )
+        parser.add_argument(
+            "--write-chunk",
+            type=int,
+            default=bulk_vectorizer.DEFAULT_WRITE_CHUNK,
+            help=f"Vector rows per bulk insert (default: {bulk_vectorizer.DEFAULT_WRITE_CHUNK}).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=bulk_vectorizer.DEFAULT_EMBED_WORKERS,
+            help=f"Concurrent embeddings requests (default: {bulk_vectorizer.DEFAULT_EMBED_WORKERS}).",
+        )
 
     def handle(self, *args, **options):
         batch_size = options["batch_size"]
@@ -88,23 +107,21 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING("[DRY RUN] No changes will be made."))
 
+        if resume:
+            # --resume: skip documents that already have vector rows
+            remaining = bulk_vectorizer.without_vectors(qs)
+            skipped = total - remaining.count()
+            qs = remaining
+        else:
+            skipped = 0
+
         processed = 0
-        skipped = 0
         errors = 0
         vectors_deleted = 0
         vectors_created = 0
 
-        for ed in qs.iterator():
-            # --resume: skip documents that already have vector rows
-            if resume:
-                already_indexed = DocumentVector.objects.filter(
-                    metadata__ed_id=str(ed.id)
-                ).exists()
-                if already_indexed:
-                    skipped += 1
-                    continue
-
-            if dry_run:
+        if dry_run:
+            for ed in qs.iterator():
                 section_pairs = iter_json_sections_for_embedding(
                     ed.document_type, ed.json_data or {}
                 )
@@ -115,38 +132,37 @@ class Command(BaseCommand):
                 processed += 1
                 if processed % batch_size == 0:
                     self.stdout.write(f"  Progress: {processed}/{total} (dry run)")
-                continue
-
-            try:
-                # Delete existing vectors for this document before re-creating them
-                deleted, _ = DocumentVector.objects.filter(
-                    metadata__ed_id=str(ed.id)
-                ).delete()
-                vectors_deleted += deleted
-
-                # Delegate to the canonical vectorization function so all metadata
-                # enrichment (district, tenant_id, well context, etc.) is applied
-                # consistently with the live pipeline.
-                count = vectorize_extracted_document(ed)
-                vectors_created += count
-                processed += 1
+        else:
+            last_logged = [0]
 
-                if processed % batch_size == 0:
-                    self.stdout.write(
-                        f"  Progress: {processed}/{total}"
-                        f" (+{vectors_created} created,"
-                        f" -{vectors_deleted} deleted,"
-                        f" {skipped} skipped,"
-                        f" {errors} errors)"
-                    )
-
-            except Exception as exc:
-                errors += 1
-                logger.error("reindex_vectors: error processing ED %s: %s", ed.id, exc)
-                self.stderr.write(
-                    f"  ERROR: ED {ed.id} ({ed.api_number} / {ed.document_type}): {exc}"
+            def _progress(result):
+                if result.documents - last_logged[0] < batch_size:
+                    return
+                last_logged[0] = result.documents
+                self.stdout.write(
+                    f"  Progress: {result.documents}/{total}"
+                    f" (+{result.vectors} created,"
+                    f" -{result.deleted} deleted,"
+                    f" {skipped} skipped,"
+                    f" {len(result.failed_ids)} errors)"
                 )
 
+            result = bulk_vectorizer.vectorize_documents(
+                qs.select_related("well").iterator(chunk_size=500),
+                max_batch_texts=options["embed_batch_size"],
+                write_chunk=options["write_chunk"],
+                embed_workers=options["workers"],
+                replace_existing=True,
+                on_progress=_progress,
+            )
+            processed = result.documents + result.skipped
+            errors = len(result.failed_ids)
+            vectors_deleted = result.deleted
+            vectors_created = result.vectors
+            for ed_id in result.failed_ids:
+                logger.error("reindex_vectors: error processing ED %s", ed_id)
+                self.stderr.write(f"  ERROR: ED {ed_id}: embedding or write failed")
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(
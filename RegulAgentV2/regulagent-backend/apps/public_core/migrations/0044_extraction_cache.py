@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0043_plan_options_field"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExtractionCacheEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("file_sha256", models.CharField(max_length=64)),
+                ("doc_type", models.CharField(max_length=64)),
+                ("prompt_version", models.CharField(max_length=64)),
+                ("model", models.CharField(max_length=64)),
+                ("schema_hash", models.CharField(max_length=64)),
+                ("json_data", models.JSONField(default=dict)),
+                ("raw_text", models.TextField(blank=True, default="")),
+                ("tokens_used", models.PositiveIntegerField(default=0)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("last_hit_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "public_core_extraction_cache",
+                "indexes": [
+                    models.Index(fields=["file_sha256"], name="extcache_sha256_idx"),
+                    models.Index(fields=["doc_type", "model"], name="extcache_type_model_idx"),
+                ],
+            },
+        ),
+    ]
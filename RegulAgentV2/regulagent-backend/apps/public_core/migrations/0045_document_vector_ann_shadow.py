@@ -0,0 +1,39 @@
+"""Add a truncated halfvec shadow of DocumentVector.embedding for ANN search.
+
+0024 dropped the vector index because pgvector caps HNSW/IVFFlat at 2000
+dimensions. The shadow column holds the first 1536 dimensions of the
+3072-dim embedding, re-normalised, as halfvec (requires pgvector >= 0.7).
+
+The column starts NULL. The HNSW index is not created here because building
+it over the full table would block the deploy. Run::
+
+    python manage.py build_vector_ann_index
+
+to backfill the shadow column in batches and build the index CONCURRENTLY.
+"""
+
+from django.db import migrations, models
+import pgvector.django
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0044_extraction_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentvector",
+            name="embedding_ann",
+            field=pgvector.django.HalfVectorField(blank=True, dimensions=1536, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="documentvector",
+            index=models.Index(
+                condition=models.Q(("embedding_ann__isnull", True)),
+                fields=["id"],
+                name="docvec_ann_missing_idx",
+            ),
+        ),
+    ]
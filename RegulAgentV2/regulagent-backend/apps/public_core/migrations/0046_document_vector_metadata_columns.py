@@ -0,0 +1,50 @@
+"""Promote hot DocumentVector metadata keys into indexed columns.
+
+Retrieval filtered on ``metadata__api_number`` / ``metadata__ed_id`` (JSON,
+unindexed) and so scanned the whole table before vector ordering. The keys
+api_number, tenant_id, district, county and ed_id are now real columns.
+DocumentVector.save() and build_document_vectors keep them in sync with
+``metadata``; existing rows are backfilled in batches by 0050, outside this
+migration's transaction, so the table is never rewritten under one lock.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0045_document_vector_ann_shadow"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentvector",
+            name="api_number",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=32),
+        ),
+        migrations.AddField(
+            model_name="documentvector",
+            name="tenant_id",
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="documentvector",
+            name="district",
+            field=models.CharField(blank=True, default="", max_length=16),
+        ),
+        migrations.AddField(
+            model_name="documentvector",
+            name="county",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="documentvector",
+            name="ed_id",
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="documentvector",
+            index=models.Index(fields=["district", "county"], name="docvec_district_county_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+"""Track the source document version each timeline event was derived from.
+
+refresh_timeline compares ``source_updated_at`` with
+ExtractedDocument.updated_at and re-derives only new or changed documents.
+Existing events start NULL and are re-derived once on their next refresh.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0046_document_vector_metadata_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="welltimelineevent",
+            name="source_updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0047_well_timeline_event_source_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentClassification",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file_sha256", models.CharField(max_length=64, unique=True)),
+                ("source_path", models.TextField(blank=True, default="")),
+                ("doc_type", models.CharField(max_length=64)),
+                ("method", models.CharField(
+                    choices=[
+                        ("llm", "LLM classifier"),
+                        ("extraction_cache", "Extraction cache"),
+                        ("extracted_document", "Existing ExtractedDocument"),
+                    ],
+                    max_length=32,
+                )),
+                ("model", models.CharField(blank=True, default="", max_length=64)),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "public_core_document_classification",
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import apps.public_core.models.plan_snapshot
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0048_document_classification"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="plansnapshot",
+            name="payload",
+            field=apps.public_core.models.plan_snapshot.SnapshotPayloadField(),
+        ),
+        migrations.AlterField(
+            model_name="historicalplansnapshot",
+            name="payload",
+            field=apps.public_core.models.plan_snapshot.SnapshotPayloadField(),
+        ),
+        migrations.AddField(
+            model_name="plansnapshot",
+            name="delta_base",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Snapshot payload_patch applies to. Null for keyframes (full payload stored).",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="delta_children",
+                to="public_core.plansnapshot",
+            ),
+        ),
+        migrations.AddField(
+            model_name="plansnapshot",
+            name="payload_patch",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="plansnapshot",
+            name="delta_depth",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="historicalplansnapshot",
+            name="delta_base",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                help_text="Snapshot payload_patch applies to. Null for keyframes (full payload stored).",
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="public_core.plansnapshot",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalplansnapshot",
+            name="payload_patch",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalplansnapshot",
+            name="delta_depth",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,61 @@
+"""Backfill the DocumentVector metadata columns added in 0046.
+
+Non-atomic: rows are updated in primary-key batches of BATCH_SIZE, each
+committed on its own, so no statement holds row locks on the whole table
+and concurrent writes continue during the deploy. Re-running is harmless;
+the values are always recomputed from ``metadata``.
+"""
+
+from django.db import migrations
+
+UUID_RE = "^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
+BATCH_SIZE = 5000
+
+BATCH_SQL = f"""
+WITH batch AS (
+    SELECT id FROM public_core_document_vectors
+    WHERE %s::uuid IS NULL OR id > %s::uuid
+    ORDER BY id
+    LIMIT %s
+), updated AS (
+    UPDATE public_core_document_vectors dv SET
+        api_number = left(coalesce(dv.metadata->>'api_number', ''), 32),
+        district = left(coalesce(dv.metadata->>'district', ''), 16),
+        county = left(coalesce(dv.metadata->>'county', ''), 64),
+        tenant_id = CASE WHEN dv.metadata->>'tenant_id' ~ '{UUID_RE}'
+                         THEN (dv.metadata->>'tenant_id')::uuid END,
+        ed_id = CASE WHEN dv.metadata->>'ed_id' ~ '{UUID_RE}'
+                     THEN (dv.metadata->>'ed_id')::uuid END
+    FROM batch
+    WHERE dv.id = batch.id
+)
+SELECT id FROM batch ORDER BY id DESC LIMIT 1
+"""
+
+
+def backfill_metadata_columns(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    last_id = None
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(BATCH_SQL, [last_id, last_id, BATCH_SIZE])
+            row = cursor.fetchone()
+        if row is None:
+            break
+        last_id = str(row[0])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("public_core", "0049_plan_snapshot_delta_storage"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_metadata_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def drop_extracted_document_entries(apps, schema_editor):
+    # Labels copied from ExtractedDocuments by path may describe older bytes
+    DocumentClassification = apps.get_model("public_core", "DocumentClassification")
+    DocumentClassification.objects.filter(method="extracted_document").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0050_document_vector_metadata_backfill"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_extracted_document_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="documentclassification",
+            name="hit_count",
+        ),
+        migrations.AlterField(
+            model_name="documentclassification",
+            name="file_sha256",
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="documentclassification",
+            name="method",
+            field=models.CharField(
+                choices=[("llm", "LLM classifier"), ("extraction_cache", "Extraction cache")],
+                max_length=32,
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="documentclassification",
+            unique_together={("file_sha256", "source_path")},
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+def stamp_base_versions(apps, schema_editor):
+    # Every existing snapshot is at version 0, so existing patches were built on it
+    PlanSnapshot = apps.get_model("public_core", "PlanSnapshot")
+    PlanSnapshot.objects.filter(delta_base__isnull=False).update(delta_base_version=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("public_core", "0051_document_classification_path_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plansnapshot",
+            name="delta_base_version",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="plansnapshot",
+            name="payload_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="historicalplansnapshot",
+            name="delta_base_version",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalplansnapshot",
+            name="payload_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(stamp_base_versions, migrations.RunPython.noop),
+    ]
@@ -24,3 +24,5 @@ from .w3a_source_audit import W3ASourceAudit  # noqa: F401
 from .manual_wbd import ManualWBD  # noqa: F401
 
 
+from .extraction_cache import ExtractionCacheEntry  # noqa: F401
+from .document_classification import DocumentClassification  # noqa: F401
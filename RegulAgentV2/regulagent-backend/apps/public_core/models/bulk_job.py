@@ -182,15 +182,17 @@ class BulkJob(models.Model):
         self.completed_at = timezone.now()
         self.save(update_fields=['status', 'error_message', 'completed_at'])
 
-    def increment_progress(self, success: bool = True):
+    def increment_progress(self, success: bool = True, count: int = 1):
         """
         Increment progress counter.
 
+        Uses an atomic F() update so concurrent chunk sub-tasks of the same
+        job never overwrite each other's counts.
+
         Args:
             success: True if item succeeded, False if failed
+            count: Number of items to add
         """
-        if success:
-            self.processed_items += 1
-        else:
-            self.failed_items += 1
-        self.save(update_fields=['processed_items', 'failed_items'])
+        field = 'processed_items' if success else 'failed_items'
+        BulkJob.objects.filter(pk=self.pk).update(**{field: models.F(field) + count})
+        self.refresh_from_db(fields=['processed_items', 'failed_items'])
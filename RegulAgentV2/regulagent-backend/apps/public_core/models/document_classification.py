@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class DocumentClassification(models.Model):
+    """
+    Persistent classification index: the doc_type decided for a file's bytes.
+
+    Keyed by (SHA-256, source path). A lookup prefers the entry for the
+    file's own path and falls back to the same bytes seen at another path,
+    so a file re-downloaded elsewhere (or shared by several wells on a lease)
+    is never re-classified. ``method`` records how the label was decided.
+    """
+
+    METHOD_LLM = 'llm'
+    METHOD_EXTRACTION_CACHE = 'extraction_cache'
+    METHOD_CHOICES = [
+        (METHOD_LLM, 'LLM classifier'),
+        (METHOD_EXTRACTION_CACHE, 'Extraction cache'),
+    ]
+
+    file_sha256 = models.CharField(max_length=64, db_index=True)
+    source_path = models.TextField(blank=True, default='')
+    doc_type = models.CharField(max_length=64)
+    method = models.CharField(max_length=32, choices=METHOD_CHOICES)
+    model = models.CharField(max_length=64, blank=True, default='')  # classifier model
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'public_core_document_classification'
+        unique_together = [('file_sha256', 'source_path')]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"DocumentClassification<{self.file_sha256[:12]}:{self.doc_type}:{self.method}>"
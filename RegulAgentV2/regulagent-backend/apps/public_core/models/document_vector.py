@@ -1,11 +1,55 @@
 from __future__ import annotations
 
+import math
 import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
 from django.db import models
-from pgvector.django import VectorField
+from pgvector.django import HalfVectorField, VectorField
 
 from .well_registry import WellRegistry
 
+# Leading dimensions kept in the ANN shadow column. text-embedding-3 models are
+# Matryoshka-trained, so a truncated, re-normalised prefix is a usable
+# lower-dimensional embedding; 1536 stays under pgvector's index limits.
+ANN_DIMENSIONS = 1536
+
+
+def ann_embedding(embedding: Optional[Sequence[float]]) -> Optional[List[float]]:
+    """Truncate ``embedding`` to ANN_DIMENSIONS and L2-normalise it (None passes through)."""
+    if embedding is None:
+        return None
+    head = [float(x) for x in list(embedding)[:ANN_DIMENSIONS]]
+    norm = math.sqrt(sum(x * x for x in head))
+    return [x / norm for x in head] if norm else head
+
+
+# metadata keys mirrored into indexed columns so retrieval can filter in SQL
+# before vector ordering. ``metadata`` stays the source of truth; save() and
+# build_document_vectors keep the columns in sync.
+METADATA_COLUMNS = ("api_number", "tenant_id", "district", "county", "ed_id")
+
+
+def _as_uuid(value: Any) -> Optional[uuid.UUID]:
+    if not value:
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def metadata_columns(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column values for METADATA_COLUMNS derived from a metadata dict."""
+    md = metadata if isinstance(metadata, dict) else {}
+    return {
+        "api_number": str(md.get("api_number") or "")[:32],
+        "tenant_id": _as_uuid(md.get("tenant_id")),
+        "district": str(md.get("district") or "")[:16],
+        "county": str(md.get("county") or "")[:64],
+        "ed_id": _as_uuid(md.get("ed_id")),
+    }
+
 
 class DocumentVector(models.Model):
     """
@@ -24,8 +68,20 @@ class DocumentVector(models.Model):
     # Embedding size 3072 for text-embedding-3-large; upgraded from 1536 via migration 0024
     embedding = VectorField(dimensions=3072)  # text-embedding-3-large
 
+    # Truncated half-precision copy of ``embedding`` for ANN candidate search
+    # (HNSW index built by the build_vector_ann_index command; results are
+    # re-ranked on the full vector). NULL until written or backfilled.
+    embedding_ann = HalfVectorField(dimensions=ANN_DIMENSIONS, null=True, blank=True)
+
     metadata = models.JSONField(default=dict)
 
+    # Indexed copies of hot metadata keys (see METADATA_COLUMNS)
+    api_number = models.CharField(max_length=32, blank=True, default="", db_index=True)
+    tenant_id = models.UUIDField(null=True, blank=True, db_index=True)
+    district = models.CharField(max_length=16, blank=True, default="")
+    county = models.CharField(max_length=64, blank=True, default="")
+    ed_id = models.UUIDField(null=True, blank=True, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -33,8 +89,30 @@ class DocumentVector(models.Model):
         indexes = [
             models.Index(fields=["well", "document_type"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["district", "county"], name="docvec_district_county_idx"),
+            # Rows still missing their ANN shadow; near-empty once backfilled
+            models.Index(
+                fields=["id"],
+                name="docvec_ann_missing_idx",
+                condition=models.Q(embedding_ann__isnull=True),
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        if self.embedding is not None:
+            self.embedding_ann = ann_embedding(self.embedding)
+        for name, value in metadata_columns(self.metadata).items():
+            setattr(self, name, value)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = []
+            if "embedding" in update_fields:
+                extra.append("embedding_ann")
+            if "metadata" in update_fields:
+                extra.extend(METADATA_COLUMNS)
+            kwargs["update_fields"] = list(dict.fromkeys([*update_fields, *extra]))
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:  # pragma: no cover
         return f"DocumentVector<{self.document_type}:{self.section_name}:{self.id}>"
 
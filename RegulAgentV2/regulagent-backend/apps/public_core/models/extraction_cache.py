@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class ExtractionCacheEntry(models.Model):
+    """
+    Content-addressed cache of model extractions/classifications.
+
+    Keyed by the file's SHA-256 plus everything that shapes the model output
+    (doc_type, prompt version, model, schema hash), so identical bytes are
+    never sent to the model twice regardless of where the file was saved or
+    which well it was downloaded for.
+    """
+
+    cache_key = models.CharField(max_length=64, unique=True)  # sha256 of the key fields below
+    file_sha256 = models.CharField(max_length=64)
+    doc_type = models.CharField(max_length=64)  # extraction doc_type, or "classification"
+    prompt_version = models.CharField(max_length=64)
+    model = models.CharField(max_length=64)
+    schema_hash = models.CharField(max_length=64)
+
+    json_data = models.JSONField(default=dict)
+    raw_text = models.TextField(blank=True, default='')
+    tokens_used = models.PositiveIntegerField(default=0)  # tokens spent producing the entry
+
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'public_core_extraction_cache'
+        indexes = [
+            models.Index(fields=['file_sha256'], name='extcache_sha256_idx'),
+            models.Index(fields=['doc_type', 'model'], name='extcache_type_model_idx'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"ExtractionCacheEntry<{self.file_sha256[:12]}:{self.doc_type}:{self.model}>"
@@ -1,11 +1,55 @@
 from __future__ import annotations
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.query_utils import DeferredAttribute
 from simple_history.models import HistoricalRecords
 
 from .well_registry import WellRegistry
 
 
+class SnapshotPayloadDescriptor(DeferredAttribute):
+    """
+    Materializes delta-encoded payloads on read (services.plan_snapshot_store).
+
+    A data descriptor (defines __set__), so reads go through __get__ even
+    when the stored stub is already in the instance __dict__.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+
+        from apps.public_core.services import plan_snapshot_store
+
+        if plan_snapshot_store.is_stub(value):
+            value = plan_snapshot_store.materialize(instance)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+
+class SnapshotPayloadField(models.JSONField):
+    """JSONField whose value may be stored as a stub plus a patch against a base snapshot.
+
+    PlanSnapshot.save() sets ``_stored_payload`` for the duration of a write
+    that stores a stub; the historical record of that write stores the same
+    stub (signals.on_plan_snapshot_history), everything else reads the full
+    payload.
+    """
+
+    descriptor_class = SnapshotPayloadDescriptor
+
+    def pre_save(self, model_instance, add):
+        stored = getattr(model_instance, "_stored_payload", None)
+        if stored is not None:
+            return stored
+        # Write what the instance holds; never materialize a stub just to store it
+        return model_instance.__dict__.get(self.attname)
+
+
 class PlanSnapshot(models.Model):
     """
     Immutable snapshots of plan outputs for audit and comparison.
@@ -75,7 +119,21 @@ class PlanSnapshot(models.Model):
     plan_id = models.CharField(max_length=64, db_index=True)
     kind = models.CharField(max_length=16, choices=KIND_CHOICES, db_index=True)
 
-    payload = models.JSONField()  # full plan JSON as returned to clients
+    payload = SnapshotPayloadField()  # full plan JSON as returned to clients (a stub for delta rows)
+
+    # Delta storage (services.plan_snapshot_store): RFC 6902 patch against delta_base
+    delta_base = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="delta_children",
+        help_text="Snapshot payload_patch applies to. Null for keyframes (full payload stored).",
+    )
+    payload_patch = models.JSONField(null=True, blank=True)
+    delta_depth = models.PositiveSmallIntegerField(default=0)  # patches since the last keyframe
+    delta_base_version = models.PositiveIntegerField(null=True, blank=True)  # base payload_version patched against
+    payload_version = models.PositiveIntegerField(default=0)  # bumped by every in-place payload change
 
     # Provenance
     kernel_version = models.CharField(max_length=32, blank=True)
@@ -136,4 +194,68 @@ class PlanSnapshot(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"PlanSnapshot<{self.plan_id}:{self.kind}:{self.visibility}>"
 
+    @property
+    def is_delta(self) -> bool:
+        return self.payload_patch is not None
+
+    def save(self, *args, **kwargs):
+        """
+        Store post_edit snapshots created with ``delta_base`` as a patch.
+
+        ``payload`` on the instance always stays the full plan. Writing the
+        payload of an existing row locks it: an unchanged (or never read)
+        payload writes back exactly what the row stores; a changed payload is
+        stored in full, and delta children are rebased in the same
+        transaction.
+        """
+        from apps.public_core.services import plan_snapshot_store
+
+        update_fields = kwargs.get("update_fields")
+        writes_payload = update_fields is None or "payload" in update_fields
+        if not writes_payload or "payload" not in self.__dict__:
+            return super().save(*args, **kwargs)
+        payload = self.__dict__["payload"]
+        unread = plan_snapshot_store.is_stub(payload)
+        if unread and self._state.adding:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic(using=kwargs.get("using")):
+            stored_payload = None
+            if self._state.adding:
+                encoded = None
+                if self.delta_base_id and self.kind == self.KIND_POST_EDIT and plan_snapshot_store.enabled():
+                    encoded = plan_snapshot_store.encode(self.delta_base_id, payload)
+                if encoded:
+                    self.payload_patch, stored_payload, self.delta_depth, self.delta_base_version = encoded
+                else:
+                    self.delta_base, self.payload_patch, self.delta_depth, self.delta_base_version = None, None, 0, None
+            else:
+                # The row, not this (possibly stale) instance, says how the payload is stored now
+                row = plan_snapshot_store.lock_row(self.pk)
+                unchanged = row is not None and (
+                    unread
+                    or plan_snapshot_store.materialize_row(self.pk, row) == plan_snapshot_store.normalized(payload)
+                )
+                if unchanged:
+                    stored_payload, self.payload_patch, self.delta_base_id, self.delta_base_version, \
+                        self.delta_depth, self.payload_version = row
+                    if unread:
+                        self.__dict__["payload"] = payload = stored_payload
+                else:
+                    if row is not None:
+                        plan_snapshot_store.rebase_children(self.pk)
+                        self.payload_version = row[5] + 1
+                    self.delta_base, self.payload_patch, self.delta_depth, self.delta_base_version = None, None, 0, None
+                if update_fields is not None:
+                    kwargs["update_fields"] = {
+                        *update_fields, "delta_base", "payload_patch", "delta_depth",
+                        "delta_base_version", "payload_version",
+                    }
 
+            self._stored_payload = stored_payload
+            try:
+                super().save(*args, **kwargs)
+            finally:
+                self._stored_payload = None
+        if self.is_delta and not plan_snapshot_store.is_stub(payload):
+            plan_snapshot_store.remember(self.pk, self.payload_version, payload)
@@ -65,6 +65,8 @@ class WellTimelineEvent(models.Model):
         related_name='timeline_events',
     )
     source_document_type = models.CharField(max_length=32, blank=True, default='')
+    # source_document.updated_at when this event was derived (incremental refresh watermark)
+    source_updated_at = models.DateTimeField(null=True, blank=True)
 
     # Component links
     components_installed = models.ManyToManyField(
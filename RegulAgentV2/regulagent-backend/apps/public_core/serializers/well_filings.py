@@ -25,6 +25,10 @@ class W3AFilingSerializer(serializers.Serializer):
         return str(obj.id)
     
     def get_form_type(self, obj):
+        # Annotated by filings_query when payload is deferred
+        annotated = getattr(obj, "filing_form_type", None)
+        if annotated:
+            return annotated
         state = ((obj.payload or {}).get("well_header") or {}).get("state", "")
         return "C-103" if state == "NM" else "W-3A"
 
@@ -54,6 +58,10 @@ class W3FilingSerializer(serializers.Serializer):
         return str(obj.id)
     
     def get_form_type(self, obj):
+        # Annotated by filings_query when form_data is deferred
+        annotated = getattr(obj, "filing_form_type", None)
+        if annotated:
+            return annotated
         # Check linked wizard session jurisdiction first
         session = getattr(obj, "w3_wizard_sessions", None)
         if session is not None:
@@ -35,3 +35,10 @@ class StateAdapter(ABC):
     def download_document(self, doc: DocumentSpec) -> Path:
         """Download a document and return local file path."""
         ...
+
+    def release_document(self, local_path: Path) -> None:
+        """Dispose of a path returned by download_document once it has been processed.
+
+        Adapters that download to temporary files delete them here; the
+        default keeps the file.
+        """
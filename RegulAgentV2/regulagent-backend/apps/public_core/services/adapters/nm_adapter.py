@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import logging
-import tempfile
 from pathlib import Path
 from typing import List
 
@@ -41,12 +40,11 @@ class NMAdapter(StateAdapter):
                 date=doc.date,
                 doc_type=doc.doc_type,
             )
-            pdf_bytes = fetcher.download_document(nm_doc)
+            # Stream straight to a unique temp file instead of buffering the PDF in memory
+            _, local_path = fetcher.download_to_file(nm_doc)
 
-        tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
-        tmp.write(pdf_bytes)
-        tmp.flush()
-        tmp.close()
-        local_path = Path(tmp.name)
         logger.info(f"NMAdapter: saved {doc.filename} to {local_path}")
         return local_path
+
+    def release_document(self, local_path: Path) -> None:
+        local_path.unlink(missing_ok=True)
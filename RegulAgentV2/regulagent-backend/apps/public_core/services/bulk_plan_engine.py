@@ -0,0 +1,233 @@
+"""
+Batch engine for bulk plan generation.
+
+bulk_generate_plans used to walk every well serially inside one Celery task,
+with one WellRegistry and one PlanSnapshot query per well. This module holds
+the pieces the tasks use to fan a job out instead:
+
+- Wells are ordered by (district, county) and split into fixed-size chunks,
+  so wells that share a policy overlay land in the same worker process. The
+  chunk size is capped so a chunk fits inside the Celery soft time limit;
+  large jobs get more chunks, dispatched in waves of at most
+  ``BULK_PLAN_MAX_PARALLEL_CHUNKS``.
+- Each chunk prefetches its wells and existing snapshots in one query each.
+- Each chunk warms the compiled policy store once per (district, county)
+  before generating plans.
+- Results are plain dicts, so chunk results can be merged by the chord
+  callback.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 25
+DEFAULT_MAX_PARALLEL_CHUNKS = 8
+DEFAULT_SECONDS_PER_WELL = 8
+
+EXISTING_PLAN_STATUSES = ('draft', 'internal_review', 'engineer_approved')
+
+
+def max_chunk_size() -> int:
+    """Largest chunk that fits in the Celery soft time limit at BULK_PLAN_SECONDS_PER_WELL."""
+    soft_limit = getattr(settings, 'CELERY_TASK_SOFT_TIME_LIMIT', None)
+    if not soft_limit:
+        return DEFAULT_CHUNK_SIZE
+    per_well = float(getattr(settings, 'BULK_PLAN_SECONDS_PER_WELL', DEFAULT_SECONDS_PER_WELL))
+    return max(1, int(soft_limit // max(per_well, 1e-3)))
+
+
+def chunk_settings() -> Tuple[int, int]:
+    """Return (chunk_size, max_parallel_chunks) from settings.
+
+    The chunk size never exceeds max_chunk_size(), whatever
+    BULK_PLAN_CHUNK_SIZE says.
+    """
+    chunk_size = int(getattr(settings, 'BULK_PLAN_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+    max_parallel = int(getattr(settings, 'BULK_PLAN_MAX_PARALLEL_CHUNKS', DEFAULT_MAX_PARALLEL_CHUNKS))
+    return max(1, min(chunk_size, max_chunk_size())), max(1, max_parallel)
+
+
+def order_by_district(well_ids: List[str], locations: Dict[str, Tuple[str, str]]) -> List[str]:
+    """Stable-sort well_ids by (district, county); unknown wells keep their order at the end."""
+    def _key(item: Tuple[int, str]) -> Tuple[int, str, str, int]:
+        idx, api = item
+        loc = locations.get(api)
+        if loc is None:
+            return (1, '', '', idx)
+        district, county = loc
+        return (0, (district or '').upper(), (county or '').lower(), idx)
+
+    return [api for _, api in sorted(enumerate(well_ids), key=_key)]
+
+
+def chunk_well_ids(well_ids: List[str], chunk_size: int) -> List[List[str]]:
+    """Split well_ids into chunks of at most ``chunk_size`` wells.
+
+    Large jobs get more chunks rather than bigger ones, so every chunk still
+    fits in the task time limit.
+    """
+    return [well_ids[i:i + chunk_size] for i in range(0, len(well_ids), chunk_size)]
+
+
+def split_waves(chunks: List[List[str]], max_parallel_chunks: int) -> Tuple[List[List[str]], List[List[str]]]:
+    """Return (next_wave, remaining_chunks) with at most ``max_parallel_chunks`` in the wave."""
+    return chunks[:max_parallel_chunks], chunks[max_parallel_chunks:]
+
+
+def plan_chunks(well_ids: List[str]) -> List[List[str]]:
+    """Group well_ids by district/county (one query) and split them into chunks."""
+    from apps.public_core.models import WellRegistry
+
+    locations = {
+        api14: (district, county)
+        for api14, district, county in WellRegistry.objects.filter(
+            api14__in=well_ids
+        ).values_list('api14', 'district', 'county')
+    }
+    chunk_size, _ = chunk_settings()
+    return chunk_well_ids(order_by_district(well_ids, locations), chunk_size)
+
+
+def prefetch_chunk(well_ids: List[str], tenant_id, force_regenerate: bool) -> Tuple[Dict[str, Any], Dict[int, Any]]:
+    """Load the chunk's wells and existing plan snapshots with one query each.
+
+    Returns (wells_by_api14, existing_plan_by_well_pk).
+    """
+    from apps.public_core.models import PlanSnapshot, WellRegistry
+
+    wells = {w.api14: w for w in WellRegistry.objects.filter(api14__in=well_ids)}
+    existing: Dict[int, Any] = {}
+    if not force_regenerate and wells:
+        snapshots = PlanSnapshot.objects.filter(
+            well__in=list(wells.values()),
+            tenant_id=tenant_id,
+            status__in=EXISTING_PLAN_STATUSES,
+        ).only('id', 'plan_id', 'well_id').order_by('well_id', 'pk')
+        for snap in snapshots:
+            existing.setdefault(snap.well_id, snap)
+    return wells, existing
+
+
+def warm_policy_context(wells: Iterable[Any]) -> int:
+    """Compile the effective policy once per (district, county) in the chunk.
+
+    Per-well plan generation then reuses the parsed packs and overlays from
+    the compiled policy store. Returns the number of contexts warmed.
+    """
+    from apps.policy.services.loader import get_effective_policy
+
+    contexts = {
+        (w.district, w.county or None)
+        for w in wells
+        if (w.state or '').upper() == 'TX' and w.district
+    }
+    for district, county in contexts:
+        try:
+            get_effective_policy(district=district, county=county)
+        except Exception:
+            logger.warning("[BulkEngine] Could not warm policy for %s/%s", district, county, exc_info=True)
+    return len(contexts)
+
+
+def generate_plan_for_well(well_id: str, well, existing_plan, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate (or skip) one well's plan and return its result entry."""
+    from apps.public_core.services.w3a_orchestrator import generate_w3a_for_api
+
+    if well is None:
+        raise ValueError(f"Well {well_id} not found in registry")
+
+    if existing_plan is not None:
+        logger.info(f"[BulkEngine] Plan already exists for well {well_id}, skipping")
+        return {
+            'well_id': well_id,
+            'status': 'skipped',
+            'plan_id': existing_plan.plan_id,
+            'snapshot_id': str(existing_plan.id),
+            'message': 'Plan already exists (use force_regenerate to override)'
+        }
+
+    plan_result = generate_w3a_for_api(
+        api_number=well_id,
+        plugs_mode=options.get('plugs_mode', 'combined'),
+        input_mode=options.get('input_mode', 'extractions'),
+        request=None,  # No HTTP request in background task
+        confirm_fact_updates=False,  # Conservative: don't auto-update facts
+        allow_precision_upgrades_only=True,
+    )
+
+    if plan_result.get('success'):
+        snapshot_id = plan_result.get('snapshot_id')
+        logger.info(f"[BulkEngine] Successfully generated plan for well {well_id}: {snapshot_id}")
+        return {
+            'well_id': well_id,
+            'status': 'success',
+            'snapshot_id': snapshot_id,
+            'auto_generated': plan_result.get('auto_generated', True),
+        }
+
+    error_msg = plan_result.get('error', 'Unknown error')
+    logger.warning(f"[BulkEngine] Failed to generate plan for well {well_id}: {error_msg}")
+    return {
+        'well_id': well_id,
+        'status': 'failed',
+        'error': error_msg
+    }
+
+
+def run_chunk(job, well_ids: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generate plans for one chunk, updating BulkJob progress after each well.
+
+    Never raises: if the chunk itself fails (prefetch error, soft time limit),
+    the wells not yet processed are recorded as failed. Progress is counted
+    exactly once per well.
+    """
+    force_regenerate = options.get('force_regenerate', False)
+    results: List[Dict[str, Any]] = []
+    try:
+        wells, existing = prefetch_chunk(well_ids, job.tenant_id, force_regenerate)
+        warm_policy_context(wells.values())
+
+        for well_id in well_ids:
+            well = wells.get(well_id)
+            try:
+                entry = generate_plan_for_well(
+                    well_id,
+                    well,
+                    existing.get(well.pk) if well is not None else None,
+                    options,
+                )
+            except SoftTimeLimitExceeded:
+                raise
+            except Exception as e:
+                logger.exception(f"[BulkEngine] Error processing well {well_id}")
+                entry = {
+                    'well_id': well_id,
+                    'status': 'failed',
+                    'error': str(e)
+                }
+            results.append(entry)
+            job.increment_progress(success=entry['status'] != 'failed')
+    except Exception as e:
+        error = 'Chunk exceeded the task time limit' if isinstance(e, SoftTimeLimitExceeded) else str(e)
+        remaining = well_ids[len(results):]
+        logger.exception(f"[BulkEngine] Chunk stopped with {len(remaining)} well(s) unprocessed")
+        results.extend({'well_id': well_id, 'status': 'failed', 'error': error} for well_id in remaining)
+        if remaining:
+            job.increment_progress(success=False, count=len(remaining))
+    return results
+
+
+def summarize(results: List[Dict[str, Any]], total: Optional[int] = None) -> Dict[str, int]:
+    """Build the job summary block from per-well result entries."""
+    failed = sum(1 for r in results if r.get('status') == 'failed')
+    return {
+        'total': total if total is not None else len(results),
+        'processed': len(results) - failed,
+        'failed': failed,
+    }
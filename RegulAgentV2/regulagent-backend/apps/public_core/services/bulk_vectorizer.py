@@ -0,0 +1,273 @@
+"""
+Bulk vectorization of ExtractedDocuments.
+
+vectorize_extracted_document makes one embeddings call per document and
+inserts its rows in one statement. backfill_vectors and reindex_vectors used
+to do that for every document in the corpus, one after the other. This
+module pipelines the work instead:
+
+- Sections from many documents are packed into embedding batches bounded by
+  input count and estimated tokens. A document's sections stay in one batch
+  unless the document alone exceeds the bounds.
+- Embedding batches run on a small thread pool while the calling thread keeps
+  reading documents and writing finished rows. At most ``2 * embed_workers``
+  batches are in flight.
+- Rows are written with bulk_create in chunks of ``write_chunk``. With
+  ``replace_existing`` the old vectors for the same documents are deleted in
+  the same transaction, so a document is never left without vectors.
+
+A failed embedding batch fails only the documents in it. Their old vectors
+(if any) are kept, and they are reported in the result.
+
+Database access stays on the calling thread; worker threads only call the
+embeddings API.
+"""
+from __future__ import annotations
+
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# OpenAI accepts up to 2048 inputs and ~300k tokens per embeddings request
+DEFAULT_MAX_BATCH_TEXTS = 512
+DEFAULT_MAX_BATCH_TOKENS = 200_000
+DEFAULT_WRITE_CHUNK = 500
+DEFAULT_EMBED_WORKERS = 2
+
+
+def without_vectors(queryset):
+    """Filter an ExtractedDocument queryset to documents with no DocumentVector rows.
+
+    One anti-join instead of an exists() query per document.
+    """
+    from django.db.models import Exists, OuterRef
+
+    from apps.public_core.models.document_vector import DocumentVector
+
+    return queryset.filter(~Exists(DocumentVector.objects.filter(ed_id=OuterRef('pk'))))
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+@dataclass
+class BulkVectorizeResult:
+    documents: int = 0  # documents whose vectors were written
+    vectors: int = 0  # rows inserted
+    deleted: int = 0  # old rows removed (replace_existing)
+    skipped: int = 0  # documents with nothing to embed
+    failed_ids: List[str] = field(default_factory=list)
+    batches: int = 0  # embedding requests made
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': self.documents,
+            'vectors': self.vectors,
+            'deleted': self.deleted,
+            'skipped': self.skipped,
+            'failed': len(self.failed_ids),
+            'batches': self.batches,
+        }
+
+
+@dataclass
+class _Part:
+    """A run of one document's sections inside an embedding batch."""
+
+    doc: Any
+    sections: List[Tuple[str, str]]
+    last: bool  # the document's final part
+
+
+@dataclass
+class _Batch:
+    parts: List[_Part] = field(default_factory=list)
+    texts: int = 0
+    tokens: int = 0
+
+    def add(self, part: _Part, tokens: int) -> None:
+        self.parts.append(part)
+        self.texts += len(part.sections)
+        self.tokens += tokens
+
+
+def pack_batches(
+    documents: Iterable[Tuple[Any, List[Tuple[str, str]]]],
+    max_texts: int = DEFAULT_MAX_BATCH_TEXTS,
+    max_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+) -> Iterable[_Batch]:
+    """Pack (doc, sections) pairs into size-bounded batches, lazily.
+
+    A document that fits in an empty batch is never split; a larger one is
+    split into consecutive parts, the last marked ``last``.
+    """
+    batch = _Batch()
+    for doc, sections in documents:
+        doc_tokens = sum(estimate_tokens(t) for _, t in sections)
+        if batch.parts and (batch.texts + len(sections) > max_texts or batch.tokens + doc_tokens > max_tokens):
+            yield batch
+            batch = _Batch()
+
+        part: List[Tuple[str, str]] = []
+        part_tokens = 0
+        for section in sections:
+            t = estimate_tokens(section[1])
+            if part and (batch.texts + len(part) + 1 > max_texts or batch.tokens + part_tokens + t > max_tokens):
+                batch.add(_Part(doc, part, last=False), part_tokens)
+                yield batch
+                batch = _Batch()
+                part, part_tokens = [], 0
+            part.append(section)
+            part_tokens += t
+        batch.add(_Part(doc, part, last=True), part_tokens)
+    if batch.parts:
+        yield batch
+
+
+def _embed_batch(batch: _Batch, embed: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+    texts = [text for part in batch.parts for _, text in part.sections]
+    vectors = embed(texts)
+    if len(vectors) != len(texts):
+        raise ValueError(f"embeddings response has {len(vectors)} vectors for {len(texts)} inputs")
+    return vectors
+
+
+class _Writer:
+    """Collects embedded sections per document and bulk-inserts finished documents."""
+
+    def __init__(self, result: BulkVectorizeResult, write_chunk: int, replace_existing: bool):
+        from apps.public_core.models.document_vector import DocumentVector
+        from apps.public_core.services.openai_extraction import build_document_vectors
+
+        self.model = DocumentVector
+        self.build = build_document_vectors
+        self.result = result
+        self.write_chunk = write_chunk
+        self.replace_existing = replace_existing
+        self._partial: Dict[int, Tuple[list, list, bool]] = {}  # id(doc) -> (sections, vectors, failed)
+        self._ready: List[Tuple[Any, list]] = []
+        self._ready_rows = 0
+
+    def accept(self, batch: _Batch, vectors: Optional[List[List[float]]]) -> None:
+        offset = 0
+        for part in batch.parts:
+            sections, embedded, failed = self._partial.pop(id(part.doc), ([], [], False))
+            n = len(part.sections)
+            if vectors is None:
+                failed = True
+            else:
+                sections = sections + part.sections
+                embedded = embedded + vectors[offset:offset + n]
+            offset += n
+            if not part.last:
+                self._partial[id(part.doc)] = (sections, embedded, failed)
+                continue
+            if failed:
+                self.result.failed_ids.append(str(getattr(part.doc, 'id', '')))
+                continue
+            self.add(part.doc, self.build(part.doc, sections, embedded))
+        if self._ready_rows >= self.write_chunk:
+            self.flush()
+
+    def add(self, doc: Any, rows: list) -> None:
+        self._ready.append((doc, rows))
+        self._ready_rows += len(rows)
+
+    def flush(self) -> None:
+        if not self._ready:
+            return
+        docs = [doc for doc, _ in self._ready]
+        rows = [row for _, doc_rows in self._ready for row in doc_rows]
+        try:
+            with transaction.atomic():
+                if self.replace_existing:
+                    deleted, _ = self.model.objects.filter(ed_id__in=[d.id for d in docs]).delete()
+                    self.result.deleted += deleted
+                self.model.objects.bulk_create(rows, batch_size=self.write_chunk)
+        except Exception:
+            logger.exception("bulk_vectorizer: failed to write %d vector rows for %d documents", len(rows), len(docs))
+            self.result.failed_ids.extend(str(d.id) for d in docs)
+        else:
+            self.result.documents += len(docs)
+            self.result.vectors += len(rows)
+        self._ready = []
+        self._ready_rows = 0
+
+
+def vectorize_documents(
+    documents: Iterable[Any],
+    *,
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    max_batch_texts: int = DEFAULT_MAX_BATCH_TEXTS,
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+    write_chunk: int = DEFAULT_WRITE_CHUNK,
+    embed_workers: int = DEFAULT_EMBED_WORKERS,
+    replace_existing: bool = False,
+    on_progress: Optional[Callable[[BulkVectorizeResult], None]] = None,
+) -> BulkVectorizeResult:
+    """Embed and store DocumentVector rows for many ExtractedDocuments.
+
+    Args:
+        documents: ExtractedDocument instances (a queryset ``.iterator()`` is fine)
+        embed: texts -> vectors; defaults to openai_extraction._embed_texts
+        replace_existing: delete each document's existing vectors when writing
+            its new ones (reindex); otherwise rows are only added (backfill)
+        on_progress: called with the running result after every write
+
+    Returns:
+        BulkVectorizeResult with document/vector counts and failed document ids
+    """
+    from apps.public_core.services.openai_extraction import _embed_texts, iter_json_sections_for_embedding
+
+    embed = embed or _embed_texts
+    result = BulkVectorizeResult()
+    writer = _Writer(result, max(1, write_chunk), replace_existing)
+    workers = max(1, int(embed_workers))
+
+    def _sections():
+        for ed in documents:
+            data = getattr(ed, 'json_data', None) or {}
+            sections = iter_json_sections_for_embedding(ed.document_type or '', data) if isinstance(data, dict) else []
+            if not sections:
+                if replace_existing:
+                    # Reindex: stale vectors of a now-empty document are still removed
+                    writer.add(ed, [])
+                else:
+                    result.skipped += 1
+                continue
+            yield ed, sections
+
+    def _drain_one(pending: Deque[Tuple[_Batch, Future]]) -> None:
+        batch, future = pending.popleft()
+        try:
+            vectors = future.result()
+        except Exception as e:
+            logger.warning("bulk_vectorizer: embedding batch of %d texts failed: %s", batch.texts, e)
+            vectors = None
+        before = result.documents
+        writer.accept(batch, vectors)
+        if on_progress and result.documents != before:
+            on_progress(result)
+
+    pending: Deque[Tuple[_Batch, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vectorize') as executor:
+        for batch in pack_batches(_sections(), max_batch_texts, max_batch_tokens):
+            pending.append((batch, executor.submit(_embed_batch, batch, embed)))
+            result.batches += 1
+            # Results are consumed in submission order so split documents reassemble
+            while len(pending) >= workers * 2 or (pending and pending[0][1].done()):
+                _drain_one(pending)
+        while pending:
+            _drain_one(pending)
+    before = result.documents
+    writer.flush()
+    if on_progress and result.documents != before:
+        on_progress(result)
+    return result
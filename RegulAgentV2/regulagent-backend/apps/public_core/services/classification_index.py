@@ -0,0 +1,76 @@
+"""
+Persistent classification index (DocumentClassification).
+
+classify_document resolves most files from their filename; the rest need
+first-page text (pdfplumber, then Tesseract OCR) and an LLM call. The
+extraction cache only short-circuits that when the classifier prompt and
+candidate list are unchanged, and the orchestrators only look for an
+existing ExtractedDocument after classifying.
+
+This index records the doc_type decided for a file's bytes at a path
+(SHA-256 + source path) and how it was decided (LLM or extraction cache).
+Only labels produced from those exact bytes are recorded. classify_document
+consults it right after the filename heuristics, before any text/OCR/model
+work. Lookups are read-only, so a hit costs one indexed SELECT.
+
+Like the extraction cache, index failures are logged and treated as a miss,
+and EXTRACTION_CACHE_ENABLED=false bypasses it.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Optional
+
+from apps.public_core.services import extraction_cache
+
+logger = logging.getLogger(__name__)
+
+
+def lookup(
+    file_sha: str, source_path: str, candidate_types: Optional[Iterable[str]] = None,
+) -> Optional[str]:
+    """Indexed doc_type for these bytes, or None (also when outside ``candidate_types``).
+
+    The entry for ``source_path`` wins; otherwise any entry for the same
+    bytes at another path is used.
+    """
+    if not extraction_cache.enabled():
+        return None
+    try:
+        from django.db.models import Case, IntegerField, Value, When
+        from apps.public_core.models import DocumentClassification
+
+        qs = DocumentClassification.objects.filter(file_sha256=file_sha)
+        if candidate_types is not None:
+            qs = qs.filter(doc_type__in=list(candidate_types))
+        return (
+            qs.order_by(
+                Case(When(source_path=str(source_path), then=Value(0)), default=Value(1), output_field=IntegerField()),
+                "-updated_at",
+            )
+            .values_list("doc_type", flat=True)
+            .first()
+        )
+    except Exception as e:
+        logger.warning("classification_index: lookup failed (%s); treating as miss", e)
+        return None
+
+
+def record(file_sha: str, source_path: str, doc_type: str, method: str, model: str = "") -> None:
+    """Index ``doc_type`` for these bytes at ``source_path``; 'unknown' is never recorded so it can be retried."""
+    if not extraction_cache.enabled() or not doc_type or doc_type == "unknown":
+        return
+    try:
+        from apps.public_core.models import DocumentClassification
+
+        DocumentClassification.objects.update_or_create(
+            file_sha256=file_sha,
+            source_path=str(source_path),
+            defaults={
+                "doc_type": doc_type,
+                "method": method,
+                "model": model or "",
+            },
+        )
+    except Exception as e:
+        logger.warning("classification_index: record failed (%s)", e)
@@ -104,7 +104,22 @@ def index_single_document(
 
     # Download
     local_path = adapter.download_document(doc)
+    try:
+        return _index_downloaded_document(doc, local_path, api_number, well, session, state)
+    finally:
+        # Temporary downloads (NM) are removed here; persistent files are kept
+        adapter.release_document(local_path)
+
 
+def _index_downloaded_document(
+    doc: DocumentSpec,
+    local_path: Path,
+    api_number: str,
+    well: Optional[WellRegistry],
+    session: Optional[ResearchSession],
+    state: str,
+) -> Optional[ExtractedDocument]:
+    """Classify, extract, store and vectorize a document already on local disk."""
     # Unsupported extension guard — short-circuit before any OpenAI calls
     # Use .suffix directly (local_path may already be a Path object or a Path-like mock)
     suffix = local_path.suffix.lower() if hasattr(local_path, "suffix") else Path(local_path).suffix.lower()
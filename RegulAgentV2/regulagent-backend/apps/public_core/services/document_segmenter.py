@@ -254,12 +254,14 @@ def segment_document(
     state: str = "TX",
     client=None,
     lease_well_map: dict | None = None,
+    max_workers: int | None = None,
 ) -> List[SegmentData]:
     """
     Main orchestrator: classify all pages and group into segments.
 
     1. For each page: extract text → classify by text
     2. Batch pages needing Vision fallback → send to Vision
+       (up to ``max_workers`` concurrent calls, default NEUBUS_VISION_MAX_WORKERS)
     3. Group consecutive same-type pages into segments (breakpoints)
     4. Return segment descriptors (not yet persisted)
     """
@@ -294,23 +296,33 @@ def segment_document(
 
     # Step 2: Vision fallback for pages that need it
     if vision_needed:
+        from apps.public_core.services.neubus_classifier import classify_pages
+
         if client is None:
             client = get_openai_client(operation="neubus_classification")
 
-        for page_num in vision_needed:
-            try:
-                vision_result = classify_page_by_vision(pdf_path, page_num, client=client, state=state)
-                # Merge vision result, keeping text confidence info
-                old = classifications[page_num]
-                if vision_result.form_type != "Other":
-                    classifications[page_num] = vision_result
-                    classifications[page_num].method = "hybrid" if old.confidence == "low" else "vision"
-                else:
-                    # Vision also couldn't classify — keep as Other
-                    classifications[page_num].method = "hybrid" if old.confidence == "low" else "vision"
-                    classifications[page_num].evidence = f"Text: {old.evidence}; Vision: {vision_result.evidence}"
-            except Exception as e:
-                logger.warning(f"[Segmenter] Vision fallback failed for page {page_num}: {e}")
+        vision_results = classify_pages(pdf_path, vision_needed, client=client, max_workers=max_workers)
+        for page_num, result in zip(vision_needed, vision_results):
+            if result is None:
+                logger.warning(f"[Segmenter] Vision fallback failed for page {page_num}")
+                continue
+            vision_result = PageClassification(
+                page=page_num,
+                form_type=result.form_type,
+                is_continuation=result.is_continuation,
+                confidence=result.confidence,
+                evidence=result.evidence,
+                method="vision",
+            )
+            # Merge vision result, keeping text confidence info
+            old = classifications[page_num]
+            if vision_result.form_type != "Other":
+                classifications[page_num] = vision_result
+                classifications[page_num].method = "hybrid" if old.confidence == "low" else "vision"
+            else:
+                # Vision also couldn't classify — keep as Other
+                classifications[page_num].method = "hybrid" if old.confidence == "low" else "vision"
+                classifications[page_num].evidence = f"Text: {old.evidence}; Vision: {vision_result.evidence}"
 
     # Step 3: Group consecutive same-type pages into segments
     segments = _group_into_segments(classifications, page_texts)
@@ -0,0 +1,187 @@
+"""
+Content-addressed cache for model extractions and classifications.
+
+The orchestrators skip re-extraction when an ExtractedDocument already exists
+for (api_number, source_path). The same RRC PDF is routinely re-downloaded to a
+new path or shared by several wells on a lease, so that check misses and the
+model is called again for identical bytes.
+
+This cache is keyed by everything that determines the model output:
+
+    (file SHA-256, doc_type, prompt version, model, schema hash)
+
+and stores the structured result plus the tokens it cost. Changing a prompt,
+the model, or the required sections changes the key, so stale entries are
+simply never hit again; ``invalidate_extraction_cache`` removes entries
+explicitly (e.g. after a post-processing fix that leaves prompts unchanged).
+
+Cache failures (no database, connection errors) are logged and treated as a
+miss; they never fail an extraction. Set EXTRACTION_CACHE_ENABLED=false to
+bypass the cache entirely.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when post-processing of model output changes in a way that should
+# invalidate every cached result (prompt/model/schema changes are keyed already).
+PIPELINE_VERSION = "1"
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'errors': 0, 'tokens_saved': 0}
+
+
+def enabled() -> bool:
+    return os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def stats() -> Dict[str, int]:
+    """Process-wide counters: hits, misses, stores, errors, tokens_saved."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's bytes (streamed)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_hash(value: Any) -> str:
+    """Stable hash of a prompt string or a JSON-serialisable schema."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_version(prompt: str) -> str:
+    return f"{PIPELINE_VERSION}:{content_hash(prompt)}"
+
+
+def cache_key(file_sha: str, doc_type: str, prompt_ver: str, model: str, schema_hash: str) -> str:
+    return hashlib.sha256("|".join((file_sha, doc_type, prompt_ver, model, schema_hash)).encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """Return ``{json_data, raw_text, tokens_used}`` for a cached key, or None."""
+    if not enabled():
+        return None
+    try:
+        from django.db.models import F
+        from django.utils import timezone
+        from apps.public_core.models import ExtractionCacheEntry
+
+        entry = (
+            ExtractionCacheEntry.objects
+            .filter(cache_key=key)
+            .values("json_data", "raw_text", "tokens_used")
+            .first()
+        )
+        if entry is None:
+            _count("misses")
+            return None
+        ExtractionCacheEntry.objects.filter(cache_key=key).update(
+            hit_count=F("hit_count") + 1, last_hit_at=timezone.now(),
+        )
+    except Exception as e:
+        _count("errors")
+        logger.warning("extraction_cache: lookup failed (%s); treating as miss", e)
+        return None
+    _count("hits")
+    _count("tokens_saved", int(entry["tokens_used"] or 0))
+    return entry
+
+
+def store(
+    key: str,
+    *,
+    file_sha: str,
+    doc_type: str,
+    prompt_ver: str,
+    model: str,
+    schema_hash: str,
+    json_data: Dict[str, Any],
+    raw_text: str = "",
+    tokens_used: int = 0,
+) -> None:
+    """Save a successful result under ``key`` (first writer wins on races)."""
+    if not enabled():
+        return
+    try:
+        from apps.public_core.models import ExtractionCacheEntry
+
+        _, created = ExtractionCacheEntry.objects.get_or_create(
+            cache_key=key,
+            defaults={
+                "file_sha256": file_sha,
+                "doc_type": doc_type,
+                "prompt_version": prompt_ver,
+                "model": model,
+                "schema_hash": schema_hash,
+                "json_data": json_data,
+                "raw_text": raw_text or "",
+                "tokens_used": int(tokens_used or 0),
+            },
+        )
+    except Exception as e:
+        _count("errors")
+        logger.warning("extraction_cache: store failed (%s)", e)
+        return
+    if created:
+        _count("stores")
+
+
+def invalidate(
+    *,
+    file_sha: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    model: Optional[str] = None,
+    older_than=None,
+    everything: bool = False,
+    dry_run: bool = False,
+) -> int:
+    """Delete matching entries; returns the number matched.
+
+    At least one filter (or ``everything=True``) is required.
+    """
+    from apps.public_core.models import ExtractionCacheEntry
+
+    filters: Dict[str, Any] = {}
+    if file_sha:
+        filters["file_sha256"] = file_sha
+    if doc_type:
+        filters["doc_type"] = doc_type
+    if model:
+        filters["model"] = model
+    if older_than is not None:
+        filters["created_at__lt"] = older_than
+    if not filters and not everything:
+        raise ValueError("invalidate() needs a filter or everything=True")
+
+    qs = ExtractionCacheEntry.objects.filter(**filters)
+    if dry_run:
+        return qs.count()
+    deleted, _ = qs.delete()
+    return deleted
@@ -0,0 +1,156 @@
+"""
+Filing metrics rollups for the dashboard (FilingMetricsView).
+
+Each table is aggregated with a single conditional-aggregation query
+(``Count(filter=...)``, ``Avg(submitted_at - created_at)``). The result is
+cached per tenant in the ``filing_metrics`` cache alias, so a dashboard load
+is one cache read.
+
+Freshness:
+- Every rollup is stored with the generation it was computed at: a global
+  token plus one per tenant. post_save/post_delete on PlanSnapshot and
+  W3FormORM (apps.public_core.signals) call ``invalidate()``: a tenant's
+  private plan snapshot rotates only that tenant's token; anything other
+  tenants can see (public snapshots, W-3 forms) rotates the global one.
+- The refresh_filing_metrics periodic task recomputes only rollups that are
+  still cached but were computed at an older generation, so idle tenants
+  cost nothing. Queryset ``.update()`` calls bypass signals;
+  FILING_METRICS_CACHE_TTL bounds staleness for those writes.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "filing_metrics"
+CACHE_PREFIX = "filing_metrics"
+GENERATION_KEY = f"{CACHE_PREFIX}:generation"
+
+W3A_ACTIVE_STATUSES = [
+    "draft", "internal_review", "engineer_approved", "filed", "under_agency_review", "agency_rejected",
+]
+W3_ACTIVE_STATUSES = ["draft", "submitted", "rejected", "archived"]
+
+
+def _ttl() -> int:
+    return int(getattr(settings, "FILING_METRICS_CACHE_TTL", 900))
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _generation_key(tenant_id: Optional[Any]) -> str:
+    return f"{GENERATION_KEY}:{tenant_id}" if tenant_id else GENERATION_KEY
+
+
+def _new_generation(key: str) -> str:
+    cache = _cache()
+    generation = uuid.uuid4().hex
+    # add() so concurrent first readers agree on one token
+    if not cache.add(key, generation, timeout=None):
+        generation = cache.get(key) or generation
+    return generation
+
+
+def current_generation(tenant_id: Optional[Any]) -> str:
+    """Generation a fresh rollup for ``tenant_id`` must carry (global + tenant token)."""
+    keys = [GENERATION_KEY] + ([_generation_key(tenant_id)] if tenant_id else [])
+    tokens = _cache().get_many(keys)
+    return ":".join(tokens.get(key) or _new_generation(key) for key in keys)
+
+
+def cache_key(tenant_id: Optional[Any]) -> str:
+    return f"{CACHE_PREFIX}:rollup:{tenant_id or 'public'}"
+
+
+def invalidate(tenant_id: Optional[Any] = None) -> None:
+    """Mark cached rollups stale: one tenant's, or every tenant's when ``tenant_id`` is None."""
+    _cache().set(_generation_key(tenant_id), uuid.uuid4().hex, timeout=None)
+
+
+def _store(tenant_id: Optional[Any], generation: str) -> Dict[str, Any]:
+    metrics = compute_filing_metrics(tenant_id)
+    _cache().set(cache_key(tenant_id), {"generation": generation, "metrics": metrics}, timeout=_ttl())
+    return metrics
+
+
+def compute_filing_metrics(tenant_id: Optional[Any]) -> Dict[str, Any]:
+    """Aggregate metrics from the database: one query per table."""
+    from apps.public_core.models import PlanSnapshot, W3FormORM
+
+    if tenant_id:
+        w3a_filter = Q(visibility="public") | Q(tenant_id=tenant_id)
+    else:
+        w3a_filter = Q(visibility="public")
+
+    w3a = PlanSnapshot.objects.filter(w3a_filter).aggregate(
+        active=Count("id", filter=Q(status__in=W3A_ACTIVE_STATUSES)),
+        rejected=Count("id", filter=Q(status="agency_rejected")),
+    )
+
+    submitted = Q(submitted_at__isnull=False)
+    w3 = W3FormORM.objects.aggregate(
+        active=Count("id", filter=Q(status__in=W3_ACTIVE_STATUSES)),
+        rejected=Count("id", filter=Q(status="rejected")),
+        submitted=Count("id", filter=submitted),
+        submitted_rejected=Count("id", filter=submitted & Q(status="rejected")),
+        avg_time_to_submission=Avg(
+            ExpressionWrapper(F("submitted_at") - F("created_at"), output_field=DurationField()),
+            filter=submitted,
+        ),
+    )
+
+    avg = w3["avg_time_to_submission"]
+    total_submitted = w3["submitted"]
+    total_rejected = w3["submitted_rejected"]
+    rejection_rate = (total_rejected / total_submitted) * 100 if total_submitted else 0.0
+
+    return {
+        "active_filings": w3a["active"] + w3["active"],
+        "requires_action": w3a["rejected"] + w3["rejected"],
+        "avg_time_to_submission_seconds": int(avg.total_seconds()) if avg is not None else None,
+        "rejection_rate": round(rejection_rate, 1),
+        "total_submitted": total_submitted,
+        "total_rejected": total_rejected,
+    }
+
+
+def get_filing_metrics(tenant_id: Optional[Any]) -> Dict[str, Any]:
+    """Cached rollup for ``tenant_id`` (None = public-only view)."""
+    generation = current_generation(tenant_id)
+    entry = _cache().get(cache_key(tenant_id))
+    if entry is not None and entry.get("generation") == generation:
+        return entry["metrics"]
+    return _store(tenant_id, generation)
+
+
+def refresh_filing_metrics(tenant_ids: Iterable[Optional[Any]]) -> int:
+    """Recompute cached rollups of ``tenant_ids`` whose generation changed; returns how many.
+
+    Tenants without a cached rollup (nobody has loaded the dashboard within
+    FILING_METRICS_CACHE_TTL) and rollups that are still current are skipped.
+    """
+    tenant_ids = list(tenant_ids)
+    entries = _cache().get_many([cache_key(t) for t in tenant_ids])
+    refreshed = 0
+    for tenant_id in tenant_ids:
+        entry = entries.get(cache_key(tenant_id))
+        if entry is None:
+            continue
+        generation = current_generation(tenant_id)
+        if entry.get("generation") == generation:
+            continue
+        try:
+            _store(tenant_id, generation)
+            refreshed += 1
+        except Exception:
+            logger.exception("filing_metrics: refresh failed for tenant %s", tenant_id)
+    return refreshed
@@ -0,0 +1,243 @@
+"""
+Unified filings query (W-3A/C-103 plan snapshots + W-3/Sundry forms).
+
+AllFilingsView and WellFilingsView list PlanSnapshot and W3FormORM rows as
+one feed. Both tables are projected to a thin row in PostgreSQL:
+
+    (filing_kind, filing_id, filing_form_type, filing_status,
+     filing_created_at, filing_updated_at)
+
+and combined with UNION ALL, so form_type/status filtering, ordering and
+pagination run in the database. form_type is derived in SQL with the same
+rules as the serializers (NM plans are C-103, NM W-3 forms are Sundry), so
+plan ``payload`` / form ``form_data`` JSON is never loaded to filter or sort.
+Only the rows on the requested page are then loaded (with the large JSON
+columns deferred) and serialized.
+
+Two pagination modes:
+
+- page/page_size: LIMIT/OFFSET on the union, COUNT for the total
+- cursor: keyset pagination on (sort value, kind, id); ``next_cursor`` is
+  returned with every page and stays cheap however deep the client pages
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import (
+    Case, CharField, Exists, F, OuterRef, Q, QuerySet, Value, When,
+)
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Cast, Coalesce
+from django.utils.dateparse import parse_datetime
+
+KIND_PLAN = "w3a"
+KIND_W3 = "w3"
+
+FILING_COLUMNS = (
+    "filing_kind", "filing_id", "filing_form_type", "filing_status",
+    "filing_created_at", "filing_updated_at",
+)
+
+DEFAULT_ORDERING = "-updated_at"
+SORT_COLUMNS = {
+    "updated_at": "filing_updated_at",
+    "created_at": "filing_created_at",
+    "form_type": "filing_form_type",
+    "status": "filing_status",
+}
+DATE_SORTS = {"updated_at", "created_at"}
+
+# Deferred when hydrating a page; the serializers never read them
+PLAN_DEFERRED = ("payload", "extraction_meta")
+W3_DEFERRED = ("form_data", "well_geometry", "rrc_export")
+
+
+class InvalidCursor(ValueError):
+    """Raised for a malformed or foreign ``cursor`` query parameter."""
+
+
+def parse_csv(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def parse_ordering(value: Optional[str]) -> Tuple[str, bool]:
+    """``-updated_at`` -> ("updated_at", True); unknown fields fall back to -updated_at."""
+    value = value or DEFAULT_ORDERING
+    field = value.lstrip("-")
+    if field not in SORT_COLUMNS:
+        return "updated_at", True
+    return field, value.startswith("-")
+
+
+def plan_form_type():
+    """SQL form_type for PlanSnapshot (see W3AFilingSerializer.get_form_type)."""
+    return Case(
+        When(payload__well_header__state="NM", then=Value("C-103")),
+        default=Value("W-3A"),
+        output_field=CharField(),
+    )
+
+
+def w3_form_type():
+    """SQL form_type for W3FormORM (see W3FilingSerializer.get_form_type)."""
+    from apps.public_core.models import W3WizardSession
+
+    # detect_jurisdiction: first two digits of the API number, "30" = NM
+    nm_session = W3WizardSession.objects.filter(w3_form=OuterRef("pk"), api_number__regex=r"^\D*3\D*0")
+    return Case(
+        When(
+            Q(Exists(nm_session))
+            | Q(form_data__header__state="NM")
+            | Q(api_number__startswith="30-0")
+            | Q(api_number__startswith="300"),
+            then=Value("Sundry"),
+        ),
+        default=Value("W-3"),
+        output_field=CharField(),
+    )
+
+
+def _project(queryset: QuerySet, kind: str, form_type, updated_at: str) -> QuerySet:
+    # Identical annotate() order on both branches keeps the UNION columns aligned
+    return (
+        queryset
+        .order_by()
+        .annotate(
+            filing_kind=Value(kind, output_field=CharField()),
+            filing_id=Cast("pk", output_field=CharField()),
+            filing_form_type=form_type,
+            filing_status=Coalesce("status", Value(""), output_field=CharField()),
+            filing_created_at=F("created_at"),
+            filing_updated_at=F(updated_at),
+        )
+    )
+
+
+def project_plans(queryset: QuerySet) -> QuerySet:
+    # PlanSnapshot is immutable: updated_at is created_at
+    return _project(queryset, KIND_PLAN, plan_form_type(), "created_at")
+
+
+def project_w3_forms(queryset: QuerySet) -> QuerySet:
+    return _project(queryset, KIND_W3, w3_form_type(), "updated_at")
+
+
+def encode_cursor(row: Dict[str, Any], sort_field: str) -> str:
+    value = row[SORT_COLUMNS[sort_field]]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_field, value, row["filing_kind"], row["filing_id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[Any, str, str]:
+    try:
+        field, value, kind, filing_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if field != sort_field or kind not in (KIND_PLAN, KIND_W3):
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    if sort_field in DATE_SORTS:
+        value = parse_datetime(value or "")
+        if value is None:
+            raise InvalidCursor("Invalid cursor")
+    return value, kind, str(filing_id)
+
+
+def after_cursor(kind: str, sort_field: str, descending: bool, cursor: Tuple[Any, str, str]) -> Q:
+    """Rows of one UNION branch (``kind``) that sort after ``cursor``.
+
+    Ordering is (sort value in the requested direction, kind asc, id asc), so
+    rows tied on the sort value continue from the cursor's (kind, id).
+    """
+    value, c_kind, c_id = cursor
+    column = SORT_COLUMNS[sort_field]
+    past = Q(**{f"{column}__lt" if descending else f"{column}__gt": value})
+    if kind > c_kind:
+        return past | Q(**{column: value})
+    if kind == c_kind:
+        return past | Q(**{column: value, "filing_id__gt": c_id})
+    return past
+
+
+def filings_union(
+    plans: QuerySet,
+    w3_forms: QuerySet,
+    *,
+    form_types: Iterable[str] = (),
+    statuses: Iterable[str] = (),
+    ordering: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> QuerySet:
+    """Ordered UNION ALL of the projected branches as a values() queryset.
+
+    ``plans`` / ``w3_forms`` carry each view's visibility filters. Slicing
+    the result pages in SQL; ``.count()`` counts in SQL.
+
+    Raises:
+        InvalidCursor: ``cursor`` is malformed or for a different ordering
+    """
+    sort_field, descending = parse_ordering(ordering)
+    position = decode_cursor(cursor, sort_field) if cursor else None
+    form_types, statuses = list(form_types), list(statuses)
+
+    branches = []
+    for kind, qs in ((KIND_PLAN, project_plans(plans)), (KIND_W3, project_w3_forms(w3_forms))):
+        if form_types:
+            qs = qs.filter(filing_form_type__in=form_types)
+        if statuses:
+            qs = qs.filter(filing_status__in=statuses)
+        if position is not None:
+            qs = qs.filter(after_cursor(kind, sort_field, descending, position))
+        branches.append(qs.values(*FILING_COLUMNS))
+
+    column = SORT_COLUMNS[sort_field]
+    return branches[0].union(branches[1], all=True).order_by(
+        f"-{column}" if descending else column, "filing_kind", "filing_id",
+    )
+
+
+@dataclass
+class FilingsPage:
+    rows: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def cursor_page(union: QuerySet, limit: int, ordering: Optional[str] = None) -> FilingsPage:
+    """Keyset page: ``limit`` rows plus a cursor for the next page (None at the end)."""
+    sort_field, _ = parse_ordering(ordering)
+    rows = list(union[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FilingsPage(rows, encode_cursor(rows[-1], sort_field) if has_more and rows else None)
+
+
+def load_filings(rows: List[Dict[str, Any]], plans: QuerySet, w3_forms: QuerySet) -> List[Any]:
+    """PlanSnapshot / W3FormORM objects for page ``rows``, in page order.
+
+    Large JSON columns are deferred; ``filing_form_type`` and the payload
+    header (``well_header`` / ``header``) are annotated instead.
+    """
+    plan_ids = [r["filing_id"] for r in rows if r["filing_kind"] == KIND_PLAN]
+    w3_ids = [r["filing_id"] for r in rows if r["filing_kind"] == KIND_W3]
+    by_key: Dict[Tuple[str, str], Any] = {}
+    if plan_ids:
+        for obj in (
+            plans.filter(pk__in=plan_ids)
+            .defer(*PLAN_DEFERRED)
+            .annotate(filing_form_type=plan_form_type(), well_header=KeyTransform("well_header", "payload"))
+        ):
+            by_key[(KIND_PLAN, str(obj.pk))] = obj
+    if w3_ids:
+        for obj in (
+            w3_forms.filter(pk__in=w3_ids)
+            .defer(*W3_DEFERRED)
+            .annotate(filing_form_type=w3_form_type(), header=KeyTransform("header", "form_data"))
+        ):
+            by_key[(KIND_W3, str(obj.pk))] = obj
+    return [by_key[k] for k in ((r["filing_kind"], r["filing_id"]) for r in rows) if k in by_key]
@@ -6,22 +6,31 @@ Groups consecutive pages into form segments for extraction.
 """
 from __future__ import annotations
 
+import contextvars
 import io
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 import fitz  # PyMuPDF
 from PIL import Image
 
-from apps.public_core.services.openai_config import get_openai_client
+from apps.public_core.services.openai_config import check_rate_limit, get_openai_client
 
 logger = logging.getLogger(__name__)
 
 # Use cheap model for classification
 CLASSIFIER_MODEL = "gpt-4o-mini"
 
+# Concurrent Vision calls per document (1 = serial)
+VISION_MAX_WORKERS = int(os.getenv("NEUBUS_VISION_MAX_WORKERS", "4"))
+# Prompt + low-detail image + max_tokens=200 response, rounded up
+VISION_ESTIMATED_TOKENS = 1000
+
 CLASSIFICATION_PROMPT = """Identify the RRC (Railroad Commission of Texas) form on this page. Return JSON only:
 {
   "form_type": "W-1" | "W-2" | "W-3" | "W-3a" | "W-15" | "G-1" | "Other",
@@ -78,6 +87,65 @@ def _page_to_image_bytes(pdf_path: Path, page_num: int, dpi: int = 150) -> bytes
         doc.close()
 
 
+def classify_pages(
+    pdf_path: Path,
+    page_nums: Sequence[int],
+    client=None,
+    max_workers: Optional[int] = None,
+    dpi: int = 150,
+) -> List[Optional[PageClassification]]:
+    """
+    Render and Vision-classify pages with bounded concurrency.
+
+    Pages are rendered on the calling thread from one open document (PyMuPDF
+    is not thread-safe); each rendered page is handed to a pool of up to
+    ``max_workers`` threads that wait on the shared rate limiter and then
+    call OpenAI. At most ``2 * max_workers`` rendered pages are held in memory.
+
+    Returns one entry per page in ``page_nums`` order. An entry is None when
+    that page could not be rendered or classified; other pages are unaffected.
+    """
+    page_nums = list(page_nums)
+    if not page_nums:
+        return []
+    workers = max(1, int(max_workers or VISION_MAX_WORKERS))
+    if client is None:
+        client = get_openai_client(operation="neubus_classification")
+
+    def _classify(image_bytes: bytes, page_num: int) -> PageClassification:
+        check_rate_limit(estimated_tokens=VISION_ESTIMATED_TOKENS, model=CLASSIFIER_MODEL)
+        return _classify_single_page(image_bytes, page_num, client=client)
+
+    results: List[Optional[PageClassification]] = [None] * len(page_nums)
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    futures = {}
+
+    doc = fitz.open(str(pdf_path))
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vision-classify") as executor:
+            for idx, page_num in enumerate(page_nums):
+                try:
+                    image_bytes = doc[page_num].get_pixmap(matrix=mat).tobytes("png")
+                except Exception as e:
+                    logger.warning(f"Could not render page {page_num} of {pdf_path.name}: {e}")
+                    continue
+                in_flight.acquire()
+                # Each call runs in a copy of this context so the tenant (usage tracking) follows it
+                future = executor.submit(contextvars.copy_context().run, _classify, image_bytes, page_num)
+                future.add_done_callback(lambda _f: in_flight.release())
+                futures[future] = idx
+    finally:
+        doc.close()
+
+    for future, idx in futures.items():
+        try:
+            results[idx] = future.result()
+        except Exception as e:
+            logger.warning(f"Vision classification failed for page {page_nums[idx]}: {e}")
+    return results
+
+
 def _classify_single_page(
     image_bytes: bytes,
     page_num: int,
@@ -163,6 +231,7 @@ def _normalize_form_type(raw: str) -> str:
 def classify_document_pages(
     pdf_path: Path,
     neubus_doc=None,
+    max_workers: Optional[int] = None,
 ) -> List[PageClassification]:
     """
     Classify all pages of a Neubus PDF document.
@@ -173,6 +242,7 @@ def classify_document_pages(
     Args:
         pdf_path: Path to the PDF file
         neubus_doc: Optional NeubusDocument model instance to update
+        max_workers: Concurrent Vision calls (defaults to NEUBUS_VISION_MAX_WORKERS)
 
     Returns:
         List of PageClassification objects, one per page
@@ -200,9 +270,16 @@ def classify_document_pages(
     client = get_openai_client(operation="neubus_classification")
     classifications = []
 
-    for page_num in range(total_pages):
-        image_bytes = _page_to_image_bytes(pdf_path, page_num)
-        classification = _classify_single_page(image_bytes, page_num, client=client)
+    results = classify_pages(pdf_path, range(total_pages), client=client, max_workers=max_workers)
+    for page_num, classification in enumerate(results):
+        if classification is None:
+            classification = PageClassification(
+                page=page_num,
+                form_type="Other",
+                is_continuation=False,
+                confidence="low",
+                evidence="Classification error: page could not be rendered or classified",
+            )
         classifications.append(classification)
         logger.debug(
             f"  Page {page_num + 1}/{total_pages}: {classification.form_type} "
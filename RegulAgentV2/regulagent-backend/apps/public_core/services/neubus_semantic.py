@@ -491,7 +491,7 @@ def index_well_timeline(api_number: str) -> Optional[DocumentVector]:
     # Delete existing timeline vectors for this well (rebuilt each time)
     DocumentVector.objects.filter(
         section_name=SECTION_WELL_TIMELINE,
-        metadata__api_number=api_number,
+        api_number=api_number,
     ).delete()
 
     try:
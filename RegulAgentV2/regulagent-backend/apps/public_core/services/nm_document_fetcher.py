@@ -2,19 +2,40 @@
 NM OCD Document Fetcher
 
 Downloads well file documents from NM OCD imaging portal.
+
+``download_to_file`` streams a document to a temporary file and hashes it
+chunk by chunk, so the PDF is never held in memory.
+
+``iter_download_documents`` downloads a well's documents concurrently over
+one pooled keep-alive session (NM_DOWNLOAD_WORKERS parallel requests). Each
+file is streamed through ``download_to_file`` and saved to default_storage
+under ocd/nm/{api14}/ (tenant S3 or local media, as configured);
+(doc, storage name) pairs are yielded as downloads finish.
 """
 from __future__ import annotations
 
 import re
+import hashlib
 import logging
-from typing import List, Optional
-from dataclasses import dataclass
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from dataclasses import dataclass, replace
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+
+def _download_workers() -> int:
+    return max(1, int(os.getenv("NM_DOWNLOAD_WORKERS", "6")))
+
 
 @dataclass
 class NMDocument:
@@ -24,6 +45,8 @@ class NMDocument:
     file_size: Optional[str] = None
     date: Optional[str] = None
     doc_type: Optional[str] = None  # C-101, C-103, etc. if detectable
+    sha256: Optional[str] = None  # set by download_to_file
+    size_bytes: Optional[int] = None
 
 
 class NMDocumentFetcher:
@@ -31,9 +54,14 @@ class NMDocumentFetcher:
 
     BASE_URL = "https://ocdimage.emnrd.nm.gov/imaging/WellFileView.aspx"
 
-    def __init__(self, timeout: float = 60.0):
+    def __init__(self, timeout: float = 60.0, max_workers: Optional[int] = None):
         self.timeout = timeout
+        self.max_workers = max_workers or _download_workers()
         self.session = requests.Session()
+        # One keep-alive connection per download worker, reused across documents
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
     def _api_to_api14(self, api: str) -> str:
         """
@@ -170,27 +198,117 @@ class NMDocumentFetcher:
         response.raise_for_status()
         return response.content
 
-    def download_all_documents(self, api: str) -> List[tuple[NMDocument, bytes]]:
+    def download_to_file(self, doc: NMDocument, dest_dir: Optional[Path] = None) -> Tuple[NMDocument, Path]:
         """
-        Download all documents for a well.
+        Stream a single document to a new temporary file, hashing it as it is written.
+
+        Every call gets its own uniquely named file (in ``dest_dir``, default
+        the system temp dir), so documents sharing a filename never write to
+        the same path. A failed download removes its file. The caller owns
+        the returned file and must delete it when done.
+
+        Returns:
+            (doc with sha256/size_bytes set, path of the downloaded file)
+        """
+        if dest_dir is not None:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+        name = Path(doc.filename)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f"nm_{name.stem[:40]}_", suffix=name.suffix or ".pdf", dir=dest_dir
+        )
+        path = Path(tmp_name)
+        h = hashlib.sha256()
+        size = 0
+
+        logger.info(f"Downloading: {doc.filename}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with self.session.get(doc.url, timeout=self.timeout, stream=True) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                        f.write(chunk)
+                        h.update(chunk)
+                        size += len(chunk)
+        except Exception:
+            path.unlink(missing_ok=True)
+            raise
+
+        return replace(doc, sha256=h.hexdigest(), size_bytes=size), path
+
+    def store_document(self, doc: NMDocument, api14: str, storage=None) -> Tuple[NMDocument, str]:
+        """
+        Download ``doc`` and save it to ``storage`` (default: default_storage).
+
+        The body goes through a temporary file (``download_to_file``) that is
+        removed once saved. The storage backend picks a free name when a file
+        with the same name already exists.
+
+        Returns:
+            (doc with sha256/size_bytes set, storage name of the saved file)
+        """
+        if storage is None:
+            from django.core.files.storage import default_storage as storage
+        from django.core.files import File
+
+        stored, path = self.download_to_file(doc)
+        try:
+            with open(path, "rb") as f:
+                name = storage.save(f"ocd/nm/{api14}/{Path(doc.filename).name}", File(f))
+        finally:
+            path.unlink(missing_ok=True)
+        return stored, name
+
+    def iter_download_documents(
+        self,
+        api: str,
+        documents: Optional[List[NMDocument]] = None,
+        storage=None,
+    ) -> Iterator[Tuple[NMDocument, str]]:
+        """
+        Download all documents for a well concurrently, yielding as each finishes.
 
         Args:
             api: API number
+            documents: Documents to download (default: list_documents(api))
+            storage: Django storage to save to (default: default_storage)
 
-        Returns:
-            List of (NMDocument, bytes) tuples
+        Yields:
+            (NMDocument, storage name) in completion order; failed downloads are
+            logged and skipped
         """
-        documents = self.list_documents(api)
-        results = []
+        if documents is None:
+            documents = self.list_documents(api)
+        if not documents:
+            return
+        api14 = self._api_to_api14(api)
 
-        for doc in documents:
+        workers = min(self.max_workers, len(documents))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nm-download") as executor:
+            futures = {executor.submit(self.store_document, doc, api14, storage): doc for doc in documents}
             try:
-                content = self.download_document(doc)
-                results.append((doc, content))
-            except Exception as e:
-                logger.error(f"Failed to download {doc.filename}: {e}")
+                for future in as_completed(futures):
+                    doc = futures[future]
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to download {doc.filename}: {e}")
+            finally:
+                # Consumer stopped early: drop downloads that have not started
+                for future in futures:
+                    future.cancel()
+
+    def download_all_documents(self, api: str, storage=None) -> List[Tuple[NMDocument, str]]:
+        """
+        Download all documents for a well to storage.
+
+        Args:
+            api: API number
+            storage: Django storage to save to (default: default_storage)
 
-        return results
+        Returns:
+            List of (NMDocument, storage name) tuples, in completion order
+        """
+        return list(self.iter_download_documents(api, storage=storage))
 
     def get_combined_pdf_url(self, api: str) -> str:
         """
@@ -66,14 +66,9 @@ def example_download_all_documents():
         results = fetcher.download_all_documents(api)
 
         print(f"Downloaded {len(results)} documents:")
-        for doc, content in results:
-            print(f"  - {doc.filename}: {len(content):,} bytes")
-
-            # Save to file
-            output_path = f"/tmp/{doc.filename}"
-            with open(output_path, "wb") as f:
-                f.write(content)
-            print(f"    Saved to: {output_path}")
+        for doc, name in results:
+            print(f"  - {doc.filename}: {doc.size_bytes:,} bytes")
+            print(f"    Saved to storage: {name}")
 
     print()
 
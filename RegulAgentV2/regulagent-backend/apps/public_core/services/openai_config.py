@@ -12,11 +12,16 @@ All OpenAI integrations should import from this module for consistency.
 """
 
 import os
-import time
-import threading
 import logging
 from typing import Optional
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from apps.public_core.services.openai_rate_limit import (
+    PRIORITY_BULK,
+    estimate_request_tokens,
+    limiter_from_env,
+    priority_for_operation,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -73,79 +78,29 @@ def calculate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -
 
 
 # =============================================================================
-# RATE LIMITING - Token Per Minute (TPM) aware throttling
+# RATE LIMITING - Token/Request Per Minute (TPM/RPM) aware throttling
 # =============================================================================
 
-class TokenRateLimiter:
-    """
-    Prevents hitting OpenAI's Token Per Minute (TPM) limit by tracking usage.
-    
-    GPT-4o limits:
-    - 30,000 TPM (tokens per minute)
-    - 500 RPM (requests per minute)
-    
-    When concurrent requests are made, TPM can be exhausted quickly.
-    This throttler ensures we stay under the TPM limit.
-    """
-    
-    def __init__(self, tokens_per_minute: int = 30000, window_seconds: int = 60):
-        self.tokens_per_minute = tokens_per_minute
-        self.window_seconds = window_seconds
-        self.tokens_used = 0
-        self.window_start = time.time()
-        self.lock = threading.Lock()
-    
-    def add_tokens(self, tokens: int):
-        """Record tokens used"""
-        with self.lock:
-            now = time.time()
-            elapsed = now - self.window_start
-            
-            # Reset window if expired
-            if elapsed >= self.window_seconds:
-                self.tokens_used = 0
-                self.window_start = now
-            
-            self.tokens_used += tokens
-    
-    def should_throttle(self, estimated_tokens: int) -> tuple[bool, float]:
-        """
-        Check if a request with estimated_tokens would exceed TPM limit.
-        
-        Returns:
-            (should_throttle: bool, wait_seconds: float)
-        """
-        with self.lock:
-            now = time.time()
-            elapsed = now - self.window_start
-            
-            # Reset window if expired
-            if elapsed >= self.window_seconds:
-                self.tokens_used = 0
-                self.window_start = now
-                return False, 0.0
-            
-            # Check if adding new tokens would exceed limit
-            if self.tokens_used + estimated_tokens > self.tokens_per_minute:
-                # Calculate how long to wait
-                tokens_over = self.tokens_used + estimated_tokens - self.tokens_per_minute
-                wait_time = (tokens_over / self.tokens_per_minute) * self.window_seconds
-                return True, wait_time
-            
-            return False, 0.0
-
-
-# Global rate limiter instance
-_token_limiter = TokenRateLimiter(
-    tokens_per_minute=int(os.getenv("OPENAI_TPM_LIMIT", "30000")),
-    window_seconds=60
-)
+# Global rate limiter instance: sliding-window TPM/RPM budgets per model,
+# shared across processes through Redis (see openai_rate_limit).
+_token_limiter = limiter_from_env()
 
 
 # =============================================================================
 # TRACKED OPENAI CLIENT WRAPPER
 # =============================================================================
 
+def _reserve_for_call(kwargs: dict, operation: str) -> None:
+    """Wait for rate-limit headroom unless check_rate_limit already reserved it."""
+    if kwargs.get("stream") or _token_limiter.has_pending():
+        return
+    _token_limiter.acquire(
+        estimate_request_tokens(kwargs),
+        model=kwargs.get("model"),
+        priority=priority_for_operation(operation),
+    )
+
+
 class _TrackedCompletions:
     """Proxy for chat.completions that records usage after each create() call."""
 
@@ -154,8 +109,14 @@ class _TrackedCompletions:
         self._operation = operation
 
     def create(self, **kwargs):
-        response = self._completions.create(**kwargs)
-        self._record_usage(response, kwargs.get("model", "unknown"))
+        _reserve_for_call(kwargs, self._operation)
+        try:
+            response = self._completions.create(**kwargs)
+            self._record_usage(response, kwargs.get("model", "unknown"))
+        finally:
+            # A failed call (or one without usage) must not leave the reservation
+            # pending, or the next call on this thread would skip the limiter
+            _token_limiter.clear_pending()
         return response
 
     def _record_usage(self, response, requested_model: str):
@@ -170,7 +131,7 @@ class _TrackedCompletions:
             total_tokens = getattr(usage, 'total_tokens', 0) or 0
 
             # Update rate limiter
-            _token_limiter.add_tokens(total_tokens)
+            _token_limiter.add_tokens(total_tokens, model=model)
 
             # Record to database if tenant context is available
             from apps.tenants.context import get_current_tenant
@@ -227,8 +188,14 @@ class _TrackedResponses:
         self._operation = operation
 
     def create(self, **kwargs):
-        response = self._responses.create(**kwargs)
-        self._record_usage(response, kwargs.get("model", "unknown"))
+        _reserve_for_call(kwargs, self._operation)
+        try:
+            response = self._responses.create(**kwargs)
+            self._record_usage(response, kwargs.get("model", "unknown"))
+        finally:
+            # A failed call (or one without usage) must not leave the reservation
+            # pending, or the next call on this thread would skip the limiter
+            _token_limiter.clear_pending()
         return response
 
     def _record_usage(self, response, requested_model: str):
@@ -243,7 +210,7 @@ class _TrackedResponses:
             total_tokens = getattr(usage, 'total_tokens', 0) or (input_tokens + output_tokens)
 
             # Update rate limiter
-            _token_limiter.add_tokens(total_tokens)
+            _token_limiter.add_tokens(total_tokens, model=model)
 
             # Record to database if tenant context is available
             from apps.tenants.context import get_current_tenant
@@ -282,9 +249,10 @@ class TrackedOpenAI:
     Wraps an OpenAI client to automatically record token usage per tenant.
 
     All chat.completions.create() calls are intercepted to:
-    1. Record tokens and cost in UsageRecord (if tenant context is set)
-    2. Update the in-memory rate limiter
-    3. Log usage for debugging
+    1. Wait on the shared rate limiter (interactive or bulk lane by operation)
+    2. Record tokens and cost in UsageRecord (if tenant context is set)
+    3. Settle the rate-limiter reservation with actual usage
+    4. Log usage for debugging
 
     Other API methods (embeddings, beta, etc.) are proxied unchanged.
     """
@@ -342,6 +310,31 @@ def get_openai_client(api_key: Optional[str] = None, operation: str = "unknown")
     return client
 
 
+def get_async_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Get an AsyncOpenAI client for ASGI code paths (e.g. streamed research answers).
+
+    Same configuration as get_openai_client but without the TrackedOpenAI
+    wrapper: it is used for streamed completions and embeddings, which the
+    sync wrapper passes through untracked as well. Close it with
+    ``await client.close()`` when done.
+
+    Raises:
+        RuntimeError: If API key not configured
+    """
+    key = api_key or os.getenv("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError(
+            "OPENAI_API_KEY not configured. "
+            "Set it in .env or pass api_key parameter."
+        )
+    return AsyncOpenAI(
+        api_key=key,
+        max_retries=5,
+        timeout=120.0,
+    )
+
+
 # =============================================================================
 # STRUCTURED OUTPUTS HELPERS
 # =============================================================================
@@ -444,14 +437,24 @@ def build_cached_messages(
 # USAGE TRACKING (Optional)
 # =============================================================================
 
-def check_rate_limit(estimated_tokens: int = 15000) -> None:
+def check_rate_limit(
+    estimated_tokens: int = 15000,
+    model: Optional[str] = None,
+    priority: str = PRIORITY_BULK,
+) -> None:
     """
     Check and apply rate limiting before making OpenAI API calls.
     
-    Prevents hitting the TPM (Tokens Per Minute) limit by throttling requests.
+    Waits until the model's sliding-window TPM/RPM budget (shared by every
+    worker process) has room, then reserves ``estimated_tokens`` for this
+    thread's next call. The reservation is replaced by the actual usage when
+    the tracked client records the response.
     
     Args:
         estimated_tokens: Estimated tokens for the request (default: 15000 for chat)
+        model: Model the request will use (selects its per-model budget)
+        priority: PRIORITY_INTERACTIVE for user-facing calls; PRIORITY_BULK
+                  (default) may only use OPENAI_BULK_SHARE of the budget
     
     Raises:
         None - will sleep if needed
@@ -460,15 +463,7 @@ def check_rate_limit(estimated_tokens: int = 15000) -> None:
         >>> check_rate_limit(estimated_tokens=12000)
         >>> response = client.chat.completions.create(...)
     """
-    should_throttle, wait_time = _token_limiter.should_throttle(estimated_tokens)
-    
-    if should_throttle:
-        logger.warning(
-            f"[Rate Limiter] TPM limit approaching. "
-            f"Waiting {wait_time:.1f}s before next request. "
-            f"Estimated tokens for next request: {estimated_tokens}"
-        )
-        time.sleep(wait_time)
+    _token_limiter.acquire(estimated_tokens, model=model, priority=priority)
 
 
 def log_openai_usage(response, operation: str):
@@ -490,8 +485,9 @@ def log_openai_usage(response, operation: str):
     try:
         usage = getattr(response, 'usage', None)
         if usage:
-            # Track tokens for rate limiting
-            _token_limiter.add_tokens(usage.total_tokens)
+            # Track tokens for rate limiting (TrackedOpenAI already did when enabled)
+            if os.getenv("TRACK_OPENAI_USAGE", "true").lower() != "true":
+                _token_limiter.add_tokens(usage.total_tokens, model=getattr(response, 'model', None))
 
             logger.info(
                 f"OpenAI Usage [{operation}]: "
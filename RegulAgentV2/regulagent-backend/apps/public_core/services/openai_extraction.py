@@ -18,6 +18,7 @@ from PIL import Image
 import io
 
 from .openai_config import get_openai_client, DEFAULT_CHAT_MODEL, DEFAULT_EMBEDDING_MODEL
+from . import classification_index, extraction_cache
 from apps.public_core.services.text_processing import json_to_prose, chunk_text
 
 logger = logging.getLogger(__name__)
@@ -288,6 +289,7 @@ class ExtractionResult:
     errors: List[str]
     raw_text: str = ""
     tokens_used: int = 0
+    cache_hit: bool = False  # served from extraction_cache; tokens_used is 0
 
 
 def _extract_pdf_text(file_path: Path, max_chars: int = 20000) -> str:
@@ -354,6 +356,83 @@ def _json_schema_for(doc_type: str) -> Dict[str, Any]:
     return schema
 
 
+def _cache_meta(
+    file_path: Path, doc_type: str, prompt: str, model: str, schema: Any, file_sha: Optional[str] = None,
+) -> Optional[Dict[str, str]]:
+    """Extraction-cache key fields for ``file_path``, or None when caching is off/unreadable."""
+    if not extraction_cache.enabled():
+        return None
+    if file_sha is None:
+        try:
+            file_sha = extraction_cache.file_sha256(file_path)
+        except OSError:
+            return None
+    meta = {
+        "file_sha": file_sha,
+        "doc_type": doc_type,
+        "prompt_ver": extraction_cache.prompt_version(prompt),
+        "model": model,
+        "schema_hash": extraction_cache.content_hash(schema),
+    }
+    meta["key"] = extraction_cache.cache_key(
+        meta["file_sha"], doc_type, meta["prompt_ver"], model, meta["schema_hash"]
+    )
+    return meta
+
+
+def _cache_store(meta: Dict[str, str], json_data: Dict[str, Any], raw_text: str = "", tokens_used: int = 0) -> None:
+    extraction_cache.store(
+        meta["key"],
+        file_sha=meta["file_sha"],
+        doc_type=meta["doc_type"],
+        prompt_ver=meta["prompt_ver"],
+        model=meta["model"],
+        schema_hash=meta["schema_hash"],
+        json_data=json_data,
+        raw_text=raw_text,
+        tokens_used=tokens_used,
+    )
+
+
+def _classifier_system_message(type_list: List[str]) -> str:
+    """System prompt for classify_document over ``type_list``."""
+    # Build form descriptions so the LLM can distinguish types
+    form_descriptions = {
+        # NM OCD forms
+        "c_100": "C-100: NM OCD well location/record form",
+        "c_101": "C-101: NM OCD Application for Permit to Drill (APD)",
+        "c_102": "C-102: NM OCD Completion or Workover Report",
+        "c_103": "C-103: NM OCD Application to Plug and Abandon",
+        "c_104": "C-104: NM OCD Subsequent/Sundry Report — Request for Allowable and Authorization to Transport, production data, monthly reports",
+        "c_105": "C-105: NM OCD Sundry Notice and Report on Wells — miscellaneous well operations",
+        "sundry": "Sundry Notice: general well operation notice (NM or TX)",
+        "apd": "Application for Permit to Drill — federal BLM Form 3160-3 or state APD",
+        # TX RRC forms
+        "w1": "W-1: TX RRC Drilling Permit",
+        "w2": "W-2: TX RRC Completion Report — ONLY for Texas wells",
+        "w3": "W-3: TX RRC Plugging Record — ONLY for Texas wells",
+        "w3a": "W-3A: TX RRC Application to Plug and Abandon — ONLY for Texas wells",
+        "w15": "W-15: TX RRC Completion/Recompletion — ONLY for Texas wells",
+        "w12": "W-12: TX RRC Cementing Report — ONLY for Texas wells",
+        "gau": "GAU: TX Gas Allowable Update — ONLY for Texas wells",
+        "g1": "G-1: TX RRC Organizational Report",
+        "schematic": "Well schematic or wellbore diagram",
+        "formation_tops": "Formation tops log or chart",
+    }
+    desc_lines = [f"  {k}: {form_descriptions.get(k, k)}" for k in type_list if k in form_descriptions]
+    descriptions_block = "\n".join(desc_lines)
+
+    return (
+        f"You are a regulatory document classifier for oil and gas wells. "
+        f"Classify the document into exactly one of these types:\n{descriptions_block}\n  unknown: document does not match any type above\n\n"
+        f"IMPORTANT: Look for the form number printed on the document (e.g., 'Form C-104', 'Form 3160-3', 'W-2'). "
+        f"Match the form number, not just keywords. If the document says 'C-104' classify as c_104. "
+        f"If the form is from a different state than the candidate types suggest, return 'unknown'. "
+        f"Federal BLM forms (3160-3, 3160-4, 3160-5) should be classified as 'apd' if they are drilling permits, otherwise 'unknown'. "
+        f"Return ONLY the key (e.g., c_103), nothing else."
+    )
+
+
 def classify_document(file_path: Path, candidate_types: list[str] | None = None) -> str:
     """Classify document type using a lightweight model. Returns one of SUPPORTED_TYPES keys or 'unknown'."""
     client = get_openai_client(operation="document_extraction")
@@ -400,6 +479,35 @@ def classify_document(file_path: Path, candidate_types: list[str] | None = None)
     if re.search(r'\bswr[\s-]*10\b', name): return "swr10"
     if re.search(r'\bswr[\s-]*13\b', name): return "swr13"
 
+    type_list = candidate_types if candidate_types else list(SUPPORTED_TYPES.keys())
+
+    # Identical bytes get the same label: consult the classification index,
+    # then the extraction cache, before any text/OCR/model work
+    file_sha = None
+    if extraction_cache.enabled():
+        try:
+            file_sha = extraction_cache.file_sha256(file_path)
+        except OSError:
+            file_sha = None
+    if file_sha:
+        indexed = classification_index.lookup(file_sha, str(file_path), type_list)
+        if indexed is not None:
+            logger.info("classify_document: index hit label=%s file=%s", indexed, file_path)
+            return indexed
+
+    system_msg = _classifier_system_message(type_list)
+    cache_meta = (
+        _cache_meta(file_path, "classification", system_msg, MODEL_CLASSIFIER, type_list, file_sha=file_sha)
+        if file_sha else None
+    )
+    if cache_meta:
+        cached = extraction_cache.lookup(cache_meta["key"])
+        if cached is not None:
+            label = cached["json_data"].get("label", "unknown")
+            logger.info("classify_document: cache hit label=%s file=%s", label, file_path)
+            classification_index.record(file_sha, str(file_path), label, "extraction_cache", MODEL_CLASSIFIER)
+            return label
+
     # Extract first page text so the LLM has real content (not just the filename)
     first_page_text = ""
     try:  # pragma: no cover
@@ -423,45 +531,6 @@ def classify_document(file_path: Path, candidate_types: list[str] | None = None)
 
     # Ask the LLM classifier using filename + first-page content
     try:  # pragma: no cover
-        type_list = candidate_types if candidate_types else list(SUPPORTED_TYPES.keys())
-        type_str = ", ".join(type_list)
-
-        # Build form descriptions so the LLM can distinguish types
-        form_descriptions = {
-            # NM OCD forms
-            "c_100": "C-100: NM OCD well location/record form",
-            "c_101": "C-101: NM OCD Application for Permit to Drill (APD)",
-            "c_102": "C-102: NM OCD Completion or Workover Report",
-            "c_103": "C-103: NM OCD Application to Plug and Abandon",
-            "c_104": "C-104: NM OCD Subsequent/Sundry Report — Request for Allowable and Authorization to Transport, production data, monthly reports",
-            "c_105": "C-105: NM OCD Sundry Notice and Report on Wells — miscellaneous well operations",
-            "sundry": "Sundry Notice: general well operation notice (NM or TX)",
-            "apd": "Application for Permit to Drill — federal BLM Form 3160-3 or state APD",
-            # TX RRC forms
-            "w1": "W-1: TX RRC Drilling Permit",
-            "w2": "W-2: TX RRC Completion Report — ONLY for Texas wells",
-            "w3": "W-3: TX RRC Plugging Record — ONLY for Texas wells",
-            "w3a": "W-3A: TX RRC Application to Plug and Abandon — ONLY for Texas wells",
-            "w15": "W-15: TX RRC Completion/Recompletion — ONLY for Texas wells",
-            "w12": "W-12: TX RRC Cementing Report — ONLY for Texas wells",
-            "gau": "GAU: TX Gas Allowable Update — ONLY for Texas wells",
-            "g1": "G-1: TX RRC Organizational Report",
-            "schematic": "Well schematic or wellbore diagram",
-            "formation_tops": "Formation tops log or chart",
-        }
-        desc_lines = [f"  {k}: {form_descriptions.get(k, k)}" for k in type_list if k in form_descriptions]
-        descriptions_block = "\n".join(desc_lines)
-
-        system_msg = (
-            f"You are a regulatory document classifier for oil and gas wells. "
-            f"Classify the document into exactly one of these types:\n{descriptions_block}\n  unknown: document does not match any type above\n\n"
-            f"IMPORTANT: Look for the form number printed on the document (e.g., 'Form C-104', 'Form 3160-3', 'W-2'). "
-            f"Match the form number, not just keywords. If the document says 'C-104' classify as c_104. "
-            f"If the form is from a different state than the candidate types suggest, return 'unknown'. "
-            f"Federal BLM forms (3160-3, 3160-4, 3160-5) should be classified as 'apd' if they are drilling permits, otherwise 'unknown'. "
-            f"Return ONLY the key (e.g., c_103), nothing else."
-        )
-
         content = f"Filename: {file_path.name}"
         if first_page_text:
             content += f"\n\nFirst page text:\n{first_page_text}"
@@ -477,6 +546,11 @@ def classify_document(file_path: Path, candidate_types: list[str] | None = None)
         label = (resp.choices[0].message.content or "").strip().lower()
         ok = label if label in (candidate_types or SUPPORTED_TYPES) else "unknown"
         logger.info("classify_document: label=%s resolved=%s", label, ok)
+        if cache_meta:
+            tokens = getattr(getattr(resp, "usage", None), "total_tokens", 0) or 0
+            _cache_store(cache_meta, {"label": ok}, tokens_used=tokens)
+        if file_sha:
+            classification_index.record(file_sha, str(file_path), ok, "llm", MODEL_CLASSIFIER)
         return ok
     except Exception:
         logger.exception("classify_document: failed remote classification; falling back to 'unknown'")
@@ -1086,9 +1160,25 @@ def extract_json_from_pdf(file_path: Path, doc_type: str, retries: int = 2, w2_d
             )
     
     # Standard text-based extraction
-    client = get_openai_client(operation="document_extraction")
     model = MODEL_PRIMARY
     prompt = _load_prompt(SUPPORTED_TYPES[doc_type]["prompt_key"], tags=tags) + " Return only valid JSON."
+
+    # Identical bytes + prompt + model + schema were extracted before: reuse that result
+    cache_meta = _cache_meta(file_path, doc_type, prompt, model, _json_schema_for(doc_type))
+    if cache_meta:
+        cached = extraction_cache.lookup(cache_meta["key"])
+        if cached is not None:
+            logger.info("extract_json_from_pdf: cache hit file=%s type=%s sha256=%s", file_path, doc_type, cache_meta["file_sha"][:12])
+            return ExtractionResult(
+                document_type=doc_type,
+                json_data=cached["json_data"],
+                model_tag=model,
+                errors=[],
+                raw_text=cached["raw_text"],
+                cache_hit=True,
+            )
+
+    client = get_openai_client(operation="document_extraction")
     last_err = None
 
     # Pre-extract textual context to aid model grounding
@@ -1236,6 +1326,8 @@ def extract_json_from_pdf(file_path: Path, doc_type: str, retries: int = 2, w2_d
                 logger.info("extract_json_from_pdf: saved output -> %s", out_path)
             except Exception:
                 logger.exception("extract_json_from_pdf: failed to save output JSON")
+            if cache_meta:
+                _cache_store(cache_meta, data, raw_text=context_text, tokens_used=tokens_used)
             return ExtractionResult(document_type=doc_type, json_data=data, model_tag=model, errors=[], raw_text=context_text, tokens_used=tokens_used)
         except Exception as e:  # pragma: no cover
             last_err = str(e)
@@ -1323,9 +1415,77 @@ def _embed_texts(texts: List[str]) -> List[List[float]]:  # pragma: no cover
     return vectors
 
 
+def build_document_vectors(ed_obj, sections: List[Tuple[str, str]], embeddings: List[List[float]]) -> list:
+    """Unsaved DocumentVector rows for ``ed_obj``'s (section_name, text) pairs and their embeddings.
+
+    Shared by vectorize_extracted_document and the bulk vectorizer so both
+    write identical metadata.
+    """
+    from apps.public_core.models.document_vector import DocumentVector, ann_embedding, metadata_columns
+
+    doc_type = getattr(ed_obj, "document_type", None) or ""
+    data = getattr(ed_obj, "json_data", None) or {}
+
+    # Get well for enriched metadata (if available)
+    well = getattr(ed_obj, "well", None)
+
+    # Extract district from JSON (commonly in well_info section)
+    well_info = data.get("well_info", {}) if isinstance(data, dict) else {}
+    district = well_info.get("district") or well_info.get("rrc_district")
+
+    # Get tenant attribution (Phase 1: uploaded_by_tenant)
+    uploaded_by_tenant = getattr(ed_obj, "uploaded_by_tenant", None)
+    tenant_id_str = str(uploaded_by_tenant) if uploaded_by_tenant else None
+
+    metadata = {
+        # Existing fields
+        "ed_id": str(getattr(ed_obj, "id", "")),
+        "api_number": getattr(ed_obj, "api_number", ""),
+        "model_tag": getattr(ed_obj, "model_tag", ""),
+
+        # Roadmap-aligned fields (from Consolidated-AI-Roadmap.md line 46)
+        # Tenant attribution (populated from ExtractedDocument.uploaded_by_tenant)
+        "tenant_id": tenant_id_str,  # None for RRC-sourced, UUID string for tenant uploads
+
+        # Well context for retrieval filtering
+        "operator": getattr(well, "operator_name", None) if well else None,
+        "district": district,
+        "county": getattr(well, "county", None) if well else None,
+        "field": getattr(well, "field_name", None) if well else None,
+        "lat": float(well.lat) if (well and well.lat) else None,
+        "lon": float(well.lon) if (well and well.lon) else None,
+
+        # Plan-level metadata (populated later when plans are generated)
+        "step_types": None,  # Future: list of step types from plan
+        "materials": None,  # Future: materials summary from plan
+        "approval_status": None,  # Future: approved/rejected/pending
+        "overlay_id": None,  # Future: canonical facts overlay ID
+        "kernel_version": None,  # Future: kernel version used
+    }
+    columns = metadata_columns(metadata)
+
+    return [
+        DocumentVector(
+            well=well,
+            file_name=(getattr(ed_obj, "source_path", None) or "")[:255],
+            document_type=doc_type,
+            section_name=section_name,
+            section_text=section_text,
+            embedding=emb,
+            embedding_ann=ann_embedding(emb),
+            metadata=dict(metadata),
+            **columns,
+        )
+        for (section_name, section_text), emb in zip(sections, embeddings)
+    ]
+
+
 def vectorize_extracted_document(ed_obj) -> int:  # pragma: no cover
     """Create DocumentVector rows for an ExtractedDocument.
     Returns number of vectors created.
+
+    For many documents at once use bulk_vectorizer.vectorize_documents, which
+    batches embedding calls across documents and bulk-inserts the rows.
     """
     try:
         from apps.public_core.models.document_vector import DocumentVector
@@ -1342,59 +1502,14 @@ def vectorize_extracted_document(ed_obj) -> int:  # pragma: no cover
             return 0
         texts = [s for _, s in sections]
         embeddings = _embed_texts(texts)
-        
-        # Get well for enriched metadata (if available)
-        well = getattr(ed_obj, "well", None)
-        
-        # Extract district from JSON (commonly in well_info section)
-        well_info = data.get("well_info", {}) if isinstance(data, dict) else {}
-        district = well_info.get("district") or well_info.get("rrc_district")
-        
-        # Get tenant attribution (Phase 1: uploaded_by_tenant)
-        uploaded_by_tenant = getattr(ed_obj, "uploaded_by_tenant", None)
-        tenant_id_str = str(uploaded_by_tenant) if uploaded_by_tenant else None
-        
-        created = 0
-        for (section_name, section_text), emb in zip(sections, embeddings):
-            try:
-                DocumentVector.objects.create(
-                    well=well,
-                    file_name=(getattr(ed_obj, "source_path", None) or ""),
-                    document_type=doc_type,
-                    section_name=section_name,
-                    section_text=section_text,
-                    embedding=emb,
-                    metadata={
-                        # Existing fields
-                        "ed_id": str(getattr(ed_obj, "id", "")),
-                        "api_number": getattr(ed_obj, "api_number", ""),
-                        "model_tag": getattr(ed_obj, "model_tag", ""),
-                        
-                        # Roadmap-aligned fields (from Consolidated-AI-Roadmap.md line 46)
-                        # Tenant attribution (populated from ExtractedDocument.uploaded_by_tenant)
-                        "tenant_id": tenant_id_str,  # None for RRC-sourced, UUID string for tenant uploads
-                        
-                        # Well context for retrieval filtering
-                        "operator": getattr(well, "operator_name", None) if well else None,
-                        "district": district,
-                        "county": getattr(well, "county", None) if well else None,
-                        "field": getattr(well, "field_name", None) if well else None,
-                        "lat": float(well.lat) if (well and well.lat) else None,
-                        "lon": float(well.lon) if (well and well.lon) else None,
-                        
-                        # Plan-level metadata (populated later when plans are generated)
-                        "step_types": None,  # Future: list of step types from plan
-                        "materials": None,  # Future: materials summary from plan
-                        "approval_status": None,  # Future: approved/rejected/pending
-                        "overlay_id": None,  # Future: canonical facts overlay ID
-                        "kernel_version": None,  # Future: kernel version used
-                    },
-                )
-                created += 1
-            except Exception:
-                logger.exception("vectorize_extracted_document: failed to create vector row")
-        return created
+
+        rows = build_document_vectors(ed_obj, sections, embeddings)
+        try:
+            DocumentVector.objects.bulk_create(rows)
+        except Exception:
+            logger.exception("vectorize_extracted_document: failed to create vector rows")
+            return 0
+        return len(rows)
     except Exception:
         logger.exception("vectorize_extracted_document: failure")
         return 0
-
@@ -0,0 +1,461 @@
+"""
+Sliding-window OpenAI rate limiter shared across processes.
+
+The previous limiter was a per-process fixed window: every Gunicorn and Celery
+process believed it owned the whole TPM budget, and resetting the window on
+expiry let up to 2x the limit through around window edges. This limiter keeps
+a sliding 60s log of requests per model bucket:
+
+- Each request is one entry ``(timestamp, tokens)``; TPM is the sum of tokens
+  and RPM the entry count over the last ``window_seconds``.
+- A caller reserves its estimated tokens before the call (``acquire``); the
+  reservation is replaced with the actual usage once the response arrives
+  (``add_tokens`` on the same thread).
+- Entries live in a Redis sorted set per bucket (REDIS_URL, atomic Lua check
+  and reserve), so all workers draw from one budget. When Redis is not
+  configured or unreachable the limiter falls back to an in-process log and
+  retries Redis after ``REDIS_RETRY_SECONDS``.
+
+Priority lanes: bulk work (extraction, classification, embeddings) may only
+use ``OPENAI_BULK_SHARE`` of each budget; interactive calls (chat, research)
+may use all of it, so they always find headroom even while bulk jobs are
+saturating their share.
+
+Configuration (environment):
+
+    OPENAI_TPM_LIMIT / OPENAI_RPM_LIMIT   default bucket limits
+    OPENAI_MODEL_RATE_LIMITS              per-model limits, "model=tpm/rpm,..."
+    OPENAI_BULK_SHARE                     fraction of each budget bulk may use
+    OPENAI_RATE_LIMIT_REDIS_URL           defaults to REDIS_URL; "off" = in-process
+    OPENAI_RATE_LIMIT_MAX_WAIT            longest a caller sleeps before proceeding
+    OPENAI_INTERACTIVE_OPERATIONS         get_openai_client operations in the
+                                          interactive lane
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+DEFAULT_BUCKET = "default"
+REDIS_RETRY_SECONDS = 30.0
+# Well below CELERY_TASK_SOFT_TIME_LIMIT (240s), so a task that waits still
+# has time to make its call and finish.
+DEFAULT_MAX_WAIT_SECONDS = 60.0
+
+# Token estimate for one image/file part; base64 payloads say nothing about
+# the tokens they cost.
+ATTACHMENT_ESTIMATED_TOKENS = 1000
+# Completion estimate when the request sets no max_tokens.
+DEFAULT_COMPLETION_ESTIMATE = 1000
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    tpm: int
+    rpm: int
+
+
+@dataclass
+class Reservation:
+    """Tokens reserved in a bucket ahead of one API call."""
+
+    bucket: str
+    member: str
+    tokens: int
+    timestamp: float
+
+
+def parse_model_limits(spec: str) -> Dict[str, ModelLimits]:
+    """Parse ``"gpt-4o=30000/500,gpt-4o-mini=200000/500"`` into limits by model."""
+    limits: Dict[str, ModelLimits] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            model, values = item.split("=", 1)
+            tpm, _, rpm = values.partition("/")
+            limits[model.strip()] = ModelLimits(tpm=int(tpm), rpm=int(rpm or 0) or 10 ** 9)
+        except ValueError:
+            logger.warning(f"[Rate Limiter] Ignoring malformed OPENAI_MODEL_RATE_LIMITS entry: {item!r}")
+    return limits
+
+
+def estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    """Rough token estimate for a chat.completions / responses create() call.
+
+    Text is counted at ~4 characters per token; image and file parts at a flat
+    ATTACHMENT_ESTIMATED_TOKENS. The requested completion budget is added.
+    """
+    def _walk(value: Any) -> int:
+        if isinstance(value, str):
+            return len(value) // 4
+        if isinstance(value, (list, tuple)):
+            return sum(_walk(v) for v in value)
+        if isinstance(value, dict):
+            kind = str(value.get("type", ""))
+            if "image" in kind or "file" in kind:
+                return ATTACHMENT_ESTIMATED_TOKENS
+            return sum(_walk(value[k]) for k in ("content", "text", "input") if k in value)
+        return 0
+
+    prompt = _walk(kwargs.get("messages")) + _walk(kwargs.get("input")) + _walk(kwargs.get("instructions"))
+    completion = (
+        kwargs.get("max_tokens")
+        or kwargs.get("max_completion_tokens")
+        or kwargs.get("max_output_tokens")
+        or DEFAULT_COMPLETION_ESTIMATE
+    )
+    return max(1, int(prompt) + int(completion))
+
+
+def _wait_seconds(entries, used: int, tokens: int, limits: ModelLimits, now: float, window: float) -> float:
+    """Seconds until enough of the oldest ``entries`` (ts, tokens) expire to fit."""
+    need_tokens = used + tokens - limits.tpm
+    need_requests = len(entries) + 1 - limits.rpm
+    freed_tokens = freed_requests = 0
+    for ts, entry_tokens in entries:
+        freed_tokens += entry_tokens
+        freed_requests += 1
+        if freed_tokens >= need_tokens and freed_requests >= need_requests:
+            return max(0.0, ts + window - now)
+    return window
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class InMemoryWindow:
+    """Per-process sliding-window log (fallback when Redis is unavailable)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logs: Dict[str, Deque[list]] = {}
+
+    def _log(self, bucket: str, now: float, window: float) -> Deque[list]:
+        log = self._logs.setdefault(bucket, deque())
+        while log and log[0][0] <= now - window:
+            log.popleft()
+        return log
+
+    def try_reserve(self, bucket, member, tokens, limits, now, window) -> Tuple[bool, float]:
+        with self._lock:
+            log = self._log(bucket, now, window)
+            used = sum(e[2] for e in log)
+            if not log or (used + tokens <= limits.tpm and len(log) + 1 <= limits.rpm):
+                log.append([now, member, tokens])
+                return True, 0.0
+            return False, _wait_seconds([(e[0], e[2]) for e in log], used, tokens, limits, now, window)
+
+    def record(self, bucket, member, tokens, now, window) -> None:
+        """Set ``member``'s tokens (replacing a reservation) or add a new entry."""
+        with self._lock:
+            log = self._log(bucket, now, window)
+            for entry in log:
+                if entry[1] == member:
+                    entry[2] = tokens
+                    return
+            log.append([now, member, tokens])
+
+    def usage(self, bucket, now, window) -> Tuple[int, int]:
+        with self._lock:
+            log = self._log(bucket, now, window)
+            return sum(e[2] for e in log), len(log)
+
+
+# KEYS[1] bucket zset; members are "<id>:<tokens>", scored by timestamp.
+# ARGV: now, window, tpm, rpm, tokens, id. Returns {granted, wait_seconds}.
+_RESERVE_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local rpm = tonumber(ARGV[4])
+local tokens = tonumber(ARGV[5])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local entries = redis.call('ZRANGE', key, 0, -1, 'WITHSCORES')
+local count = #entries / 2
+local used = 0
+for i = 1, #entries, 2 do
+  used = used + tonumber(string.match(entries[i], ':(%d+)$'))
+end
+if count == 0 or (used + tokens <= tpm and count + 1 <= rpm) then
+  redis.call('ZADD', key, now, ARGV[6] .. ':' .. ARGV[5])
+  redis.call('PEXPIRE', key, math.ceil(window * 1000))
+  return {1, '0'}
+end
+local need_tokens = used + tokens - tpm
+local need_requests = count + 1 - rpm
+local freed_tokens = 0
+local freed_requests = 0
+for i = 1, #entries, 2 do
+  freed_tokens = freed_tokens + tonumber(string.match(entries[i], ':(%d+)$'))
+  freed_requests = freed_requests + 1
+  if freed_tokens >= need_tokens and freed_requests >= need_requests then
+    return {0, tostring(math.max(0, tonumber(entries[i + 1]) + window - now))}
+  end
+end
+return {0, tostring(window)}
+"""
+
+# KEYS[1] bucket zset. ARGV: now, window, id, tokens.
+# Replaces the reservation for id (keeping its timestamp) or adds a new entry.
+_RECORD_LUA = """
+local key = KEYS[1]
+local score = tonumber(ARGV[1])
+local prefix = ARGV[3] .. ':'
+for _, m in ipairs(redis.call('ZRANGE', key, 0, -1)) do
+  if string.sub(m, 1, #prefix) == prefix then
+    score = tonumber(redis.call('ZSCORE', key, m))
+    redis.call('ZREM', key, m)
+    break
+  end
+end
+redis.call('ZADD', key, score, ARGV[3] .. ':' .. ARGV[4])
+redis.call('PEXPIRE', key, math.ceil(tonumber(ARGV[2]) * 1000))
+return 1
+"""
+
+
+class RedisWindow:
+    """Sliding-window log in Redis sorted sets, shared by every process."""
+
+    def __init__(self, url: str, key_prefix: str = "openai:ratelimit"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=1.0)
+        self._reserve = self._redis.register_script(_RESERVE_LUA)
+        self._record = self._redis.register_script(_RECORD_LUA)
+        self.key_prefix = key_prefix
+
+    def _key(self, bucket: str) -> str:
+        return f"{self.key_prefix}:{bucket}"
+
+    def try_reserve(self, bucket, member, tokens, limits, now, window) -> Tuple[bool, float]:
+        granted, wait = self._reserve(
+            keys=[self._key(bucket)],
+            args=[repr(now), window, limits.tpm, limits.rpm, int(tokens), member],
+        )
+        return bool(int(granted)), float(wait)
+
+    def record(self, bucket, member, tokens, now, window) -> None:
+        self._record(keys=[self._key(bucket)], args=[repr(now), window, member, int(tokens)])
+
+    def usage(self, bucket, now, window) -> Tuple[int, int]:
+        key = self._key(bucket)
+        self._redis.zremrangebyscore(key, "-inf", now - window)
+        members = self._redis.zrange(key, 0, -1)
+        return sum(int(m.rsplit(b":", 1)[1]) for m in members), len(members)
+
+
+# ---------------------------------------------------------------------------
+# Limiter
+# ---------------------------------------------------------------------------
+
+class SlidingWindowRateLimiter:
+    """TPM/RPM limiter per model bucket with bulk and interactive lanes."""
+
+    def __init__(
+        self,
+        default_limits: ModelLimits,
+        model_limits: Optional[Dict[str, ModelLimits]] = None,
+        window_seconds: float = 60.0,
+        bulk_share: float = 0.8,
+        redis_url: Optional[str] = None,
+        max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.default_limits = default_limits
+        self.model_limits = dict(model_limits or {})
+        self.window_seconds = float(window_seconds)
+        self.bulk_share = min(1.0, max(0.0, float(bulk_share)))
+        self.max_wait_seconds = float(max_wait_seconds)
+        self.clock = clock
+        self.sleep = sleep
+        self.redis_url = redis_url
+        self._memory = InMemoryWindow()
+        self._redis: Optional[RedisWindow] = None
+        self._redis_down_until = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # -- configuration -----------------------------------------------------
+
+    def bucket_for(self, model: Optional[str]) -> str:
+        """Configured bucket for ``model``: exact name, else longest prefix, else default.
+
+        Dated snapshots ("gpt-4o-2024-08-06") share their base model's budget.
+        """
+        if model:
+            if model in self.model_limits:
+                return model
+            matches = [name for name in self.model_limits if model.startswith(name)]
+            if matches:
+                return max(matches, key=len)
+        return DEFAULT_BUCKET
+
+    def limits_for(self, bucket: str, priority: str = PRIORITY_INTERACTIVE) -> ModelLimits:
+        limits = self.model_limits.get(bucket, self.default_limits)
+        if priority == PRIORITY_BULK:
+            return ModelLimits(
+                tpm=max(1, int(limits.tpm * self.bulk_share)),
+                rpm=max(1, int(limits.rpm * self.bulk_share)),
+            )
+        return limits
+
+    # -- backend selection -------------------------------------------------
+
+    def _backend(self):
+        if not self.redis_url:
+            return self._memory
+        with self._lock:
+            if self._redis is not None:
+                return self._redis
+            if self.clock() < self._redis_down_until:
+                return self._memory
+            try:
+                self._redis = RedisWindow(self.redis_url)
+            except Exception as e:
+                self._mark_redis_down(e)
+                return self._memory
+            return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        self._redis = None
+        self._redis_down_until = self.clock() + REDIS_RETRY_SECONDS
+        logger.warning(
+            f"[Rate Limiter] Redis unavailable ({error}); using in-process limits "
+            f"for {REDIS_RETRY_SECONDS:.0f}s"
+        )
+
+    def _call(self, method: str, *args):
+        backend = self._backend()
+        try:
+            return getattr(backend, method)(*args)
+        except Exception as e:
+            if backend is self._memory:
+                raise
+            with self._lock:
+                self._mark_redis_down(e)
+            return getattr(self._memory, method)(*args)
+
+    # -- public API --------------------------------------------------------
+
+    def try_acquire(
+        self, tokens: int, model: Optional[str] = None, priority: str = PRIORITY_BULK
+    ) -> Tuple[Optional[Reservation], float]:
+        """Reserve ``tokens`` now if the window allows; else (None, seconds to wait).
+
+        A request alone in its window is always granted, even above the limit,
+        so an oversized call cannot wait forever.
+        """
+        bucket = self.bucket_for(model)
+        limits = self.limits_for(bucket, priority)
+        member = uuid.uuid4().hex
+        now = self.clock()
+        granted, wait = self._call("try_reserve", bucket, member, int(tokens), limits, now, self.window_seconds)
+        if granted:
+            return Reservation(bucket=bucket, member=member, tokens=int(tokens), timestamp=now), 0.0
+        return None, wait
+
+    def acquire(
+        self, tokens: int, model: Optional[str] = None, priority: str = PRIORITY_BULK
+    ) -> Optional[Reservation]:
+        """Block until ``tokens`` fit, then reserve them for this thread's next call.
+
+        Gives up after ``max_wait_seconds`` and lets the call proceed
+        unreserved (OpenAI's own 429 handling is the last line of defence).
+        """
+        waited = 0.0
+        while True:
+            reservation, wait = self.try_acquire(tokens, model=model, priority=priority)
+            if reservation is not None:
+                self._local.pending = reservation
+                return reservation
+            if waited >= self.max_wait_seconds:
+                logger.warning(
+                    f"[Rate Limiter] Waited {waited:.1f}s for {tokens} tokens "
+                    f"({self.bucket_for(model)}, {priority}); proceeding without reservation"
+                )
+                self._local.pending = None
+                return None
+            wait = min(max(wait, 0.05), self.max_wait_seconds - waited)
+            logger.warning(
+                f"[Rate Limiter] {self.bucket_for(model)} limit reached for {priority} lane. "
+                f"Waiting {wait:.1f}s before next request. "
+                f"Estimated tokens for next request: {tokens}"
+            )
+            self.sleep(wait)
+            waited += wait
+
+    def has_pending(self) -> bool:
+        """True when this thread holds a reservation not yet settled by add_tokens."""
+        return getattr(self._local, "pending", None) is not None
+
+    def clear_pending(self) -> None:
+        """Drop this thread's unsettled reservation, e.g. after a failed call.
+
+        The reserved estimate stays in the window as that call's usage.
+        """
+        self._local.pending = None
+
+    def add_tokens(self, tokens: int, model: Optional[str] = None) -> None:
+        """Record actual usage of a completed call.
+
+        Settles this thread's pending reservation when there is one; otherwise
+        records a new request in ``model``'s bucket.
+        """
+        reservation = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if reservation is not None:
+            bucket, member = reservation.bucket, reservation.member
+        else:
+            bucket, member = self.bucket_for(model), uuid.uuid4().hex
+        self._call("record", bucket, member, int(tokens), self.clock(), self.window_seconds)
+
+    def usage(self, model: Optional[str] = None) -> Dict[str, int]:
+        """Tokens and requests in the current window for ``model``'s bucket."""
+        tokens, requests = self._call("usage", self.bucket_for(model), self.clock(), self.window_seconds)
+        return {"tokens": tokens, "requests": requests}
+
+
+def limiter_from_env() -> SlidingWindowRateLimiter:
+    redis_url = os.getenv("OPENAI_RATE_LIMIT_REDIS_URL") or os.getenv("REDIS_URL", "")
+    if redis_url.strip().lower() in ("", "off", "none", "memory"):
+        redis_url = None
+    return SlidingWindowRateLimiter(
+        default_limits=ModelLimits(
+            tpm=int(os.getenv("OPENAI_TPM_LIMIT", "30000")),
+            rpm=int(os.getenv("OPENAI_RPM_LIMIT", "500")),
+        ),
+        model_limits=parse_model_limits(os.getenv("OPENAI_MODEL_RATE_LIMITS", "")),
+        bulk_share=float(os.getenv("OPENAI_BULK_SHARE", "0.8")),
+        redis_url=redis_url,
+        max_wait_seconds=float(os.getenv("OPENAI_RATE_LIMIT_MAX_WAIT", str(DEFAULT_MAX_WAIT_SECONDS))),
+    )
+
+
+INTERACTIVE_OPERATIONS = frozenset(
+    op.strip()
+    for op in os.getenv(
+        "OPENAI_INTERACTIVE_OPERATIONS", "chat_assistant,research_rag,research_supplement"
+    ).split(",")
+    if op.strip()
+)
+
+
+def priority_for_operation(operation: str) -> str:
+    return PRIORITY_INTERACTIVE if operation in INTERACTIVE_OPERATIONS else PRIORITY_BULK
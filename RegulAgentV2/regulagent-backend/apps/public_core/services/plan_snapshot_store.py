@@ -0,0 +1,306 @@
+"""
+Delta-encoded storage for PlanSnapshot payloads.
+
+Every assistant edit writes a post_edit snapshot whose payload differs from
+its source plan in a few steps. Storing each one in full means a chat session
+with twenty edits keeps twenty near-identical multi-KB documents. Instead:
+
+- A post_edit snapshot created with ``delta_base`` stores an RFC 6902 patch
+  against that base (``payload_patch``, from plan_differ.generate_json_patch).
+- Its ``payload`` column keeps only a stub: top-level scalars plus
+  STUB_INDEX_KEYS, with other keys present as null, so SQL lookups such as
+  ``payload__district`` or ``payload__well_header__state`` keep working.
+- Every PLAN_SNAPSHOT_KEYFRAME_INTERVAL-th snapshot in a chain is stored
+  in full (a keyframe). A patch that would not be much smaller than the
+  payload, or that does not reproduce it exactly, is also stored in full.
+- Reading ``snapshot.payload`` materializes the full payload transparently:
+  the base chain is replayed from the nearest keyframe. Materialized payloads
+  are kept in a per-process LRU cache (PLAN_SNAPSHOT_CACHE_SIZE) keyed by
+  (snapshot id, ``payload_version``). A delta row records the version of its
+  base it was computed against (``delta_base_version``), so a cached base is
+  only ever reused for exactly the content its children were encoded from,
+  whichever process changed it.
+
+Delta bases are immutable while they have children. A snapshot whose payload
+is edited in place, or that is deleted, locks its row and rewrites its delta
+children as keyframes in the same transaction (``rebase_children``). The
+in-place edit bumps ``payload_version``. ``encode`` locks the base row and
+builds the patch from that row, so no patch is computed against content that
+changes before it commits.
+
+History rows store what the column stores: a delta snapshot's historical
+record keeps the stub, patch, base id and base version. It is materialized
+against the live base while that is still at the patched version; once the
+base has been edited in place or deleted, against the base's own historical
+record of that version (``_historical_base``).
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import jsonpatch
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DELTA_MARKER = "__snapshot_delta__"
+# Small top-level objects kept in the stub because they are queried in SQL
+STUB_INDEX_KEYS = ("well_header",)
+# Store a delta only when the patch is at most this fraction of the payload
+MAX_PATCH_RATIO = 0.5
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "PLAN_SNAPSHOT_DELTA_ENABLED", True))
+
+
+def _keyframe_interval() -> int:
+    return max(1, int(getattr(settings, "PLAN_SNAPSHOT_KEYFRAME_INTERVAL", 10)))
+
+
+class _LRU:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                return None
+            self._data.move_to_end(key)
+        # Callers mutate payloads freely; never hand out the cached object
+        return copy.deepcopy(value)
+
+    def put(self, key, value: Dict[str, Any]) -> None:
+        size = int(getattr(settings, "PLAN_SNAPSHOT_CACHE_SIZE", 256))
+        if size <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _LRU()
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def is_stub(value: Any) -> bool:
+    return isinstance(value, dict) and value.get(DELTA_MARKER) is True
+
+
+def make_stub(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The queryable part of ``payload`` stored in the column of a delta row."""
+    stub: Dict[str, Any] = {}
+    for key, value in payload.items():
+        if key in STUB_INDEX_KEYS or value is None or isinstance(value, (str, int, float, bool)):
+            stub[key] = value
+        else:
+            stub[key] = None
+    stub[DELTA_MARKER] = True
+    return stub
+
+
+def normalized(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON round trip, so the patch is computed over what the column stores."""
+    return json.loads(json.dumps(payload))
+
+
+ROW_FIELDS = ("payload", "payload_patch", "delta_base_id", "delta_base_version", "delta_depth", "payload_version")
+
+
+def _load_row(snapshot_id, lock: bool = False) -> Optional[Tuple[Any, Any, Any, Optional[int], int, int]]:
+    """Stored columns (ROW_FIELDS) of ``snapshot_id``; ``lock`` takes a row lock (inside a transaction)."""
+    from apps.public_core.models import PlanSnapshot
+
+    qs = PlanSnapshot.objects.filter(pk=snapshot_id)
+    if lock:
+        qs = qs.select_for_update()
+    return qs.values_list(*ROW_FIELDS).first()
+
+
+def _replay(snapshot_id, row) -> Optional[Dict[str, Any]]:
+    """Full payload of ``snapshot_id`` given its stored ``row``."""
+    stored, _, _, _, _, version = row
+    if is_stub(stored):
+        cached = _cache.get((snapshot_id, version))
+        if cached is not None:
+            return cached
+
+    # Walk up to a keyframe (or a cached ancestor), then replay patches down
+    chain = []
+    current_id = snapshot_id
+    while True:
+        stored, patch, base_id, base_version, _, version = row
+        if not is_stub(stored):
+            payload = stored
+            _cache.put((current_id, version), payload)
+            break
+        chain.append(((current_id, version), patch))
+        if base_id is None:
+            logger.error("plan_snapshot_store: delta snapshot %s has no base", current_id)
+            return None
+        payload = _cache.get((base_id, base_version)) if base_version is not None else None
+        if payload is not None:
+            break
+        row = _load_row(base_id)
+        if row is None:
+            logger.error("plan_snapshot_store: base %s of snapshot %s is missing", base_id, snapshot_id)
+            return None
+        if base_version is not None and row[5] != base_version:
+            logger.error(
+                "plan_snapshot_store: base %s of snapshot %s changed (version %s, patch built on %s)",
+                base_id, current_id, row[5], base_version,
+            )
+            return None
+        current_id = base_id
+
+    for key, patch in reversed(chain):
+        payload = jsonpatch.apply_patch(payload, patch or [])
+        _cache.put(key, payload)
+    return payload
+
+
+def lock_row(snapshot_id):
+    """Stored columns (ROW_FIELDS) of ``snapshot_id``, locked until the transaction ends."""
+    return _load_row(snapshot_id, lock=True)
+
+
+def materialize_row(snapshot_id, row) -> Optional[Dict[str, Any]]:
+    """Full payload of ``snapshot_id`` from its stored columns (as returned by lock_row)."""
+    return _replay(snapshot_id, row)
+
+
+def materialize_id(snapshot_id) -> Optional[Dict[str, Any]]:
+    """Full payload of the stored snapshot ``snapshot_id`` (None if it does not exist)."""
+    row = _load_row(snapshot_id)
+    if row is None:
+        return None
+    return _replay(snapshot_id, row)
+
+
+def materialize(snapshot) -> Dict[str, Any]:
+    """Full payload of a delta ``snapshot`` instance (stored, or a historical row saved as a stub)."""
+    from apps.public_core.models import PlanSnapshot
+
+    cache_key = (snapshot.pk, snapshot.payload_version)
+    cacheable = type(snapshot) is PlanSnapshot and snapshot.pk is not None
+    if cacheable:
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+    base = None
+    if snapshot.delta_base_id:
+        if snapshot.delta_base_version is not None:
+            base = _cache.get((snapshot.delta_base_id, snapshot.delta_base_version))
+        if base is None:
+            row = _load_row(snapshot.delta_base_id)
+            if row is not None and snapshot.delta_base_version in (None, row[5]):
+                base = _replay(snapshot.delta_base_id, row)
+    if base is None and snapshot.delta_base_id and snapshot.delta_base_version is not None:
+        base = _historical_base(snapshot.delta_base_id, snapshot.delta_base_version)
+    if base is None:
+        logger.error("plan_snapshot_store: cannot materialize snapshot %s; returning stub", snapshot.pk)
+        return {k: v for k, v in snapshot.__dict__["payload"].items() if k != DELTA_MARKER}
+    payload = jsonpatch.apply_patch(base, snapshot.payload_patch or [])
+    if cacheable:
+        _cache.put(cache_key, payload)
+    return payload
+
+
+def _historical_base(base_id, version: int) -> Optional[Dict[str, Any]]:
+    """Payload of ``base_id`` at ``version`` from its history (the live row has moved on or is gone)."""
+    from apps.public_core.models import PlanSnapshot
+
+    record = (
+        PlanSnapshot.history
+        .filter(id=base_id, payload_version=version)
+        .order_by("-history_date")
+        .first()
+    )
+    if record is None:
+        return None
+    payload = record.payload
+    return None if is_stub(payload) else copy.deepcopy(payload)
+
+
+def history_payload(instance) -> Optional[Dict[str, Any]]:
+    """Stored form of ``instance``'s payload for its historical record, while a stub is being written."""
+    stored = getattr(instance, "_stored_payload", None)
+    return stored if is_stub(stored) else None
+
+
+def encode(base_id, payload: Dict[str, Any]) -> Optional[Tuple[list, Dict[str, Any], int, int]]:
+    """(patch, stub, depth, base version) to store ``payload`` as a delta of ``base_id``, or None for a keyframe.
+
+    Locks the base row, so it must run inside the transaction that inserts
+    the delta; the base cannot change or be deleted before that commits.
+    """
+    row = _load_row(base_id, lock=True)
+    if row is None:
+        return None
+    stored, _, _, _, base_depth, base_version = row
+    depth = (base_depth or 0) + 1 if is_stub(stored) else 1
+    if depth >= _keyframe_interval():
+        return None
+    base = _replay(base_id, row)
+    if base is None:
+        return None
+
+    from apps.assistant.services.plan_differ import generate_json_patch
+
+    target = normalized(payload)
+    patch = generate_json_patch(base, target)
+    if len(json.dumps(patch)) > MAX_PATCH_RATIO * len(json.dumps(target)):
+        return None
+    if jsonpatch.apply_patch(base, patch) != target:
+        logger.warning("plan_snapshot_store: patch against %s does not round-trip; storing keyframe", base_id)
+        return None
+    return patch, make_stub(target), depth, base_version
+
+
+def rebase_children(snapshot_id) -> int:
+    """Rewrite the delta children of ``snapshot_id`` as keyframes; returns how many.
+
+    Must run inside the transaction that changes or deletes ``snapshot_id``;
+    it locks that row and its children. Children keep their payload_version,
+    since their content does not change.
+    """
+    from apps.public_core.models import PlanSnapshot
+
+    _load_row(snapshot_id, lock=True)
+    children = (
+        PlanSnapshot.objects
+        .select_for_update()
+        .filter(delta_base_id=snapshot_id)
+        .values_list("pk", *ROW_FIELDS)
+    )
+    rebased = 0
+    for child_id, *row in children:
+        payload = _replay(child_id, row)
+        if payload is None:
+            continue
+        PlanSnapshot.objects.filter(pk=child_id).update(
+            payload=payload, payload_patch=None, delta_base=None, delta_base_version=None, delta_depth=0,
+        )
+        rebased += 1
+    return rebased
+
+
+def remember(snapshot_id, version: int, payload: Dict[str, Any]) -> None:
+    _cache.put((snapshot_id, version), normalized(payload))
@@ -3,21 +3,31 @@ RAG Query Service for Research Sessions.
 
 Provides semantic search over indexed well documents and streams
 AI-generated answers with citations.
+
+Two streaming entry points produce the same SSE events and messages:
+- astream_research_answer: async generator for ASGI. The OpenAI stream and
+  ORM writes are awaited, so an open chat holds no worker thread.
+- stream_research_answer: sync generator (WSGI / fallback)
 """
 import json
 import logging
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
 
-from pgvector.django import CosineDistance
+from asgiref.sync import sync_to_async
 
 from apps.public_core.models import DocumentVector, ResearchSession, ResearchMessage
 
 logger = logging.getLogger(__name__)
 
 # Import the embedding function from extraction service
-from apps.public_core.services.openai_config import get_openai_client
+from apps.public_core.services.openai_config import (
+    DEFAULT_EMBEDDING_MODEL,
+    get_async_openai_client,
+    get_openai_client,
+)
 from apps.public_core.services.openai_extraction import _embed_texts
 from apps.public_core.services.text_processing import json_to_prose as _json_to_prose
+from apps.public_core.services.vector_search import nearest
 
 MODEL_CHAT = "gpt-4o"
 
@@ -47,22 +57,25 @@ def _retrieve_relevant_sections(
     top_k: int = 15,
     exclude_section_names: Optional[List[str]] = None,
     prefer_doc_types: Optional[List[str]] = None,
+    query_embedding: Optional[List[float]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Embed the question and find top-k most similar document sections.
 
-    Uses pgvector cosine distance search via the HNSW index.
+    Uses pgvector cosine distance: ANN candidates from the halfvec shadow
+    index, re-ranked exactly on the full embedding (see vector_search).
+    Pass ``query_embedding`` when the question is already embedded.
     """
     # Embed the question
-    query_embedding = _embed_texts([question])[0]
+    if query_embedding is None:
+        query_embedding = _embed_texts([question])[0]
 
-    # Build base queryset - filter by well if available, else by api_number in metadata
+    # Build base queryset - filter by well if available, else by the indexed
+    # api_number column, so the vector ordering only sees this well's rows
     if session.well:
         base_qs = DocumentVector.objects.filter(well=session.well)
     else:
-        base_qs = DocumentVector.objects.filter(
-            metadata__api_number=session.api_number
-        )
+        base_qs = DocumentVector.objects.filter(api_number=session.api_number)
 
     if exclude_section_names:
         base_qs = base_qs.exclude(section_name__in=exclude_section_names)
@@ -70,11 +83,7 @@ def _retrieve_relevant_sections(
     fetch_k = top_k * 3 if prefer_doc_types else top_k * 2
 
     # Cosine similarity search
-    results = (
-        base_qs
-        .annotate(distance=CosineDistance("embedding", query_embedding))
-        .order_by("distance")[:fetch_k]
-    )
+    results = nearest(base_qs, query_embedding, fetch_k)
 
     sections = []
     for vec in results:
@@ -173,6 +182,51 @@ def _extract_citations(sections: List[Dict[str, Any]], max_excerpt_len: int = 20
     return citations
 
 
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _build_messages(
+    question: str,
+    session: ResearchSession,
+    sections: List[Dict[str, Any]],
+    history_msgs: List[ResearchMessage],
+) -> List[Dict[str, str]]:
+    """Chat messages: system prompt, prior turns (oldest first), question with context."""
+    system_prompt = _build_system_prompt(session.api_number, session.state)
+    context_prompt = _build_context_prompt(sections)
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+    ]
+    # Add prior conversation turns
+    for msg in history_msgs:
+        messages.append({"role": msg.role, "content": msg.content})
+    # Add current question with context
+    messages.append(
+        {"role": "user", "content": f"{context_prompt}\n\nQuestion: {question}"},
+    )
+    return messages
+
+
+def _assistant_metadata(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "model": MODEL_CHAT,
+        "sections_retrieved": len(sections),
+        "top_distance": sections[0]["distance"] if sections else None,
+    }
+
+
+def _completion_kwargs(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    return {
+        "model": MODEL_CHAT,
+        "messages": messages,
+        "stream": True,
+        "temperature": 0,
+        "max_tokens": 2048,
+    }
+
+
 def stream_research_answer(
     question: str,
     session: ResearchSession,
@@ -188,6 +242,7 @@ def stream_research_answer(
     - data: {"type": "error", "message": "..."}\n\n
 
     Also persists the question and answer as ResearchMessage rows.
+    Under ASGI prefer astream_research_answer.
     """
     try:
         # Save user message
@@ -201,37 +256,17 @@ def stream_research_answer(
         sections = _retrieve_relevant_sections(question, session, top_k=top_k)
         citations = _extract_citations(sections)
 
-        # Build prompts
-        system_prompt = _build_system_prompt(session.api_number, session.state)
-        context_prompt = _build_context_prompt(sections)
-
         # Include conversation history for continuity
         history_msgs = list(
             ResearchMessage.objects.filter(session=session)
             .order_by("-created_at")[:10]  # Last 5 exchanges
         )
         history_msgs.reverse()
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-        ]
-        # Add prior conversation turns
-        for msg in history_msgs:
-            messages.append({"role": msg.role, "content": msg.content})
-        # Add current question with context
-        messages.append(
-            {"role": "user", "content": f"{context_prompt}\n\nQuestion: {question}"},
-        )
+        messages = _build_messages(question, session, sections, history_msgs)
 
         # Stream completion
         client = get_openai_client(operation="research_rag")
-        stream = client.chat.completions.create(
-            model=MODEL_CHAT,
-            messages=messages,
-            stream=True,
-            temperature=0,
-            max_tokens=2048,
-        )
+        stream = client.chat.completions.create(**_completion_kwargs(messages))
 
         full_response = []
         for chunk in stream:
@@ -239,31 +274,104 @@ def stream_research_answer(
             if delta and delta.content:
                 token = delta.content
                 full_response.append(token)
-                yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
+                yield _sse({'type': 'token', 'content': token})
 
         # Send citations
-        yield f"data: {json.dumps({'type': 'citations', 'citations': citations})}\n\n"
+        yield _sse({'type': 'citations', 'citations': citations})
 
         # Save assistant message
-        assistant_content = "".join(full_response)
         ResearchMessage.objects.create(
             session=session,
             role="assistant",
-            content=assistant_content,
+            content="".join(full_response),
+            citations=citations,
+            metadata=_assistant_metadata(sections),
+        )
+
+        # Done signal
+        yield _sse({'type': 'done'})
+
+    except Exception as e:
+        logger.exception(f"Research RAG error: {e}")
+        yield _sse({'type': 'error', 'message': str(e)})
+
+
+async def astream_research_answer(
+    question: str,
+    session: ResearchSession,
+    top_k: int = 15,
+) -> AsyncGenerator[str, None]:
+    """
+    Async variant of stream_research_answer (same events, same persistence).
+
+    The question embedding and the chat stream use AsyncOpenAI, and message
+    writes use the async ORM. The vector search runs through sync_to_async:
+    it needs SET LOCAL inside a transaction. No thread is held while tokens
+    stream.
+    """
+    client = None
+    stream = None
+    try:
+        # Save user message
+        await ResearchMessage.objects.acreate(
+            session=session,
+            role="user",
+            content=question,
+        )
+
+        client = get_async_openai_client()
+        embedding = await client.embeddings.create(model=DEFAULT_EMBEDDING_MODEL, input=[question])
+        query_embedding = list(embedding.data[0].embedding)
+
+        # Retrieve relevant sections
+        sections = await sync_to_async(_retrieve_relevant_sections)(
+            question, session, top_k=top_k, query_embedding=query_embedding,
+        )
+        citations = _extract_citations(sections)
+
+        # Include conversation history for continuity
+        history_msgs = [
+            msg async for msg in
+            ResearchMessage.objects.filter(session=session).order_by("-created_at")[:10]
+        ]
+        history_msgs.reverse()
+        messages = _build_messages(question, session, sections, history_msgs)
+
+        # Stream completion
+        stream = await client.chat.completions.create(**_completion_kwargs(messages))
+
+        full_response = []
+        async for chunk in stream:
+            delta = chunk.choices[0].delta if chunk.choices else None
+            if delta and delta.content:
+                token = delta.content
+                full_response.append(token)
+                yield _sse({'type': 'token', 'content': token})
+
+        # Send citations
+        yield _sse({'type': 'citations', 'citations': citations})
+
+        # Save assistant message
+        await ResearchMessage.objects.acreate(
+            session=session,
+            role="assistant",
+            content="".join(full_response),
             citations=citations,
-            metadata={
-                "model": MODEL_CHAT,
-                "sections_retrieved": len(sections),
-                "top_distance": sections[0]["distance"] if sections else None,
-            },
+            metadata=_assistant_metadata(sections),
         )
 
         # Done signal
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        yield _sse({'type': 'done'})
 
     except Exception as e:
         logger.exception(f"Research RAG error: {e}")
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        yield _sse({'type': 'error', 'message': str(e)})
+    finally:
+        # Release the upstream HTTP connection, also when the client disconnects
+        if stream is not None:
+            await stream.close()
+        if client is not None:
+            await client.close()
 
 
 def get_chat_history(session: ResearchSession) -> List[Dict[str, Any]]:
@@ -6,6 +6,10 @@ For each ExtractedDocument, extracts:
 - An event type classification
 - Key data summary (depths, cement, casing changes)
 - Links to WellComponent records
+
+refresh_timeline is incremental: each event records the source document's
+``updated_at`` it was derived from, so only new or changed documents are
+re-parsed and only the affected rows are written.
 """
 from __future__ import annotations
 
@@ -39,6 +43,19 @@ DOC_TYPE_TO_EVENT_TYPE = {
     "pa_procedure": "plugging_proposal",
 }
 
+TIMELINE_STATUSES = ["success", "partial"]
+
+# ExtractedDocument columns build_event reads
+EVENT_SOURCE_FIELDS = ("id", "document_type", "json_data", "segment_id", "updated_at")
+
+# WellTimelineEvent columns build_event sets (rewritten when a source changes)
+EVENT_DERIVED_FIELDS = [
+    "event_date", "event_date_precision", "event_type", "title", "description",
+    "key_data", "source_segment", "source_document_type", "source_updated_at",
+]
+
+REFRESH_BATCH_SIZE = 200
+
 
 def _extract_date(json_data: dict, doc_type: str) -> Tuple[Optional[date], str]:
     """
@@ -239,74 +256,132 @@ def _extract_key_data(doc_type: str, json_data: dict) -> dict:
     return {k: v for k, v in key_data.items() if v is not None}
 
 
-def build_timeline(well: WellRegistry) -> List[WellTimelineEvent]:
-    """
-    Build a chronological timeline for a well from all its ExtractedDocuments.
+def _timeline_documents(well: WellRegistry):
+    return ExtractedDocument.objects.filter(
+        well=well,
+        status__in=TIMELINE_STATUSES,
+    )
 
-    Returns list of created WellTimelineEvent objects.
-    """
-    docs = ExtractedDocument.objects.filter(
+
+def build_event(well: WellRegistry, doc: ExtractedDocument) -> WellTimelineEvent:
+    """Derive the (unsaved) timeline event for one ExtractedDocument."""
+    json_data = doc.json_data or {}
+    doc_type = doc.document_type
+
+    event_type = DOC_TYPE_TO_EVENT_TYPE.get(doc_type, "other")
+    event_date, precision = _extract_date(json_data, doc_type)
+    title = _build_title(doc_type, json_data, event_date)
+    key_data = _extract_key_data(doc_type, json_data)
+
+    # Build description
+    operator = (
+        _deep_get(json_data, "operator_info", "name")
+        or _deep_get(json_data, "header", "operator")
+        or ""
+    )
+    description = f"Filed by {operator}" if operator else ""
+
+    return WellTimelineEvent(
         well=well,
-        status__in=["success", "partial"],
-    ).order_by("created_at")
-
-    events = []
-    for doc in docs:
-        json_data = doc.json_data or {}
-        doc_type = doc.document_type
-
-        event_type = DOC_TYPE_TO_EVENT_TYPE.get(doc_type, "other")
-        event_date, precision = _extract_date(json_data, doc_type)
-        title = _build_title(doc_type, json_data, event_date)
-        key_data = _extract_key_data(doc_type, json_data)
-
-        # Build description
-        operator = (
-            _deep_get(json_data, "operator_info", "name")
-            or _deep_get(json_data, "header", "operator")
-            or ""
-        )
-        description = f"Filed by {operator}" if operator else ""
-
-        event = WellTimelineEvent(
-            well=well,
-            event_date=event_date,
-            event_date_precision=precision,
-            event_type=event_type,
-            title=title,
-            description=description,
-            key_data=key_data,
-            source_document=doc,
-            source_segment=getattr(doc, 'segment', None),
-            source_document_type=doc_type,
-        )
-        events.append(event)
+        event_date=event_date,
+        event_date_precision=precision,
+        event_type=event_type,
+        title=title,
+        description=description,
+        key_data=key_data,
+        source_document=doc,
+        source_segment_id=doc.segment_id,
+        source_document_type=doc_type,
+        source_updated_at=doc.updated_at,
+    )
 
-    return events
 
+def build_timeline(well: WellRegistry) -> List[WellTimelineEvent]:
+    """
+    Build a chronological timeline for a well from all its ExtractedDocuments.
 
-def refresh_timeline(well: WellRegistry) -> List[WellTimelineEvent]:
+    Returns list of unsaved WellTimelineEvent objects.
+    """
+    docs = _timeline_documents(well).order_by("created_at")
+    return [build_event(well, doc) for doc in docs]
+
+
+def _rebuild_timeline(well: WellRegistry) -> None:
+    deleted_count, _ = WellTimelineEvent.objects.filter(well=well).delete()
+    if deleted_count:
+        logger.info(f"[Timeline] Deleted {deleted_count} existing events for {well.api14}")
+
+    created = WellTimelineEvent.objects.bulk_create(build_timeline(well))
+    logger.info(f"[Timeline] Created {len(created)} timeline events for {well.api14}")
+
+
+def _sync_timeline(well: WellRegistry) -> None:
+    # Watermarks only: neither side's JSON is loaded to find what changed
+    versions = dict(_timeline_documents(well).values_list("id", "updated_at"))
+
+    current = {}
+    stale_ids = []
+    for event_id, doc_id, derived_at in (
+        WellTimelineEvent.objects.filter(well=well)
+        .order_by("created_at")
+        .values_list("id", "source_document_id", "source_updated_at")
+    ):
+        if doc_id not in versions or doc_id in current:
+            # Source deleted, failed, moved to another well, or a duplicate
+            stale_ids.append(event_id)
+        else:
+            current[doc_id] = (event_id, derived_at)
+
+    changed_ids = [
+        doc_id for doc_id, updated_at in versions.items()
+        if doc_id not in current or current[doc_id][1] != updated_at
+    ]
+
+    to_create, to_update = [], []
+    if changed_ids:
+        docs = ExtractedDocument.objects.filter(id__in=changed_ids).only(*EVENT_SOURCE_FIELDS)
+        for doc in docs.iterator(chunk_size=REFRESH_BATCH_SIZE):
+            event = build_event(well, doc)
+            if doc.id in current:
+                event.id = current[doc.id][0]
+                to_update.append(event)
+            else:
+                to_create.append(event)
+
+    if stale_ids:
+        WellTimelineEvent.objects.filter(id__in=stale_ids).delete()
+    if to_update:
+        WellTimelineEvent.objects.bulk_update(to_update, EVENT_DERIVED_FIELDS, batch_size=REFRESH_BATCH_SIZE)
+    if to_create:
+        WellTimelineEvent.objects.bulk_create(to_create, batch_size=REFRESH_BATCH_SIZE)
+
+    logger.info(
+        f"[Timeline] {well.api14}: {len(to_create)} created, {len(to_update)} updated, "
+        f"{len(stale_ids)} deleted, {len(current) - len(to_update)} unchanged"
+    )
+
+
+def refresh_timeline(well: WellRegistry, rebuild: bool = False) -> List[WellTimelineEvent]:
     """
-    Delete and rebuild the timeline for a well. Idempotent.
+    Bring the timeline for a well up to date with its ExtractedDocuments. Idempotent.
+
+    Incremental by default: only documents that are new, or whose
+    ``updated_at`` differs from the event's ``source_updated_at``, are
+    re-parsed; events for documents that are gone or no longer successful
+    are deleted, and all other rows are left untouched. ``rebuild=True``
+    deletes and re-derives every event.
 
     Called from finalize_session_task after all documents are indexed.
+    Returns the well's full timeline.
     """
     with transaction.atomic():
-        # Delete existing events
-        deleted_count, _ = WellTimelineEvent.objects.filter(well=well).delete()
-        if deleted_count:
-            logger.info(f"[Timeline] Deleted {deleted_count} existing events for {well.api14}")
-
-        # Rebuild
-        events = build_timeline(well)
-
-        # Bulk create
-        created = WellTimelineEvent.objects.bulk_create(events)
-
-        logger.info(f"[Timeline] Created {len(created)} timeline events for {well.api14}")
+        # Serialize concurrent refreshes of one well (duplicate events otherwise)
+        WellRegistry.objects.select_for_update().filter(pk=well.pk).exists()
+        if rebuild:
+            _rebuild_timeline(well)
+        else:
+            _sync_timeline(well)
 
-        # Link components (M2M requires saved objects, so iterate)
-        # Component linking is done post-bulk_create since M2M needs PKs
-        # For now, component linking is deferred to a future enhancement
+        # Component linking (M2M) is deferred to a future enhancement
 
-    return created
+    return list(WellTimelineEvent.objects.filter(well=well).order_by("event_date", "created_at"))
@@ -0,0 +1,111 @@
+"""
+Nearest-neighbour search over DocumentVector.
+
+The 3072-dim ``embedding`` column cannot carry a pgvector index (HNSW/IVFFlat
+stop at 2000 dims; see migration 0024), so ordering by CosineDistance on it
+scans every matching row. ``nearest`` searches in two stages:
+
+1. Candidate generation on ``embedding_ann`` (first 1536 dims, re-normalised,
+   halfvec) through its HNSW index: ``k * VECTOR_ANN_OVERSAMPLE`` candidates.
+2. Exact re-ranking of those candidates by cosine distance on the full
+   ``embedding``, so returned distances and order match an exact search over
+   the candidates.
+
+Rows whose shadow is still NULL (written before the backfill) are searched
+exactly and merged in, so results never silently drop rows. When the
+candidate stage returns fewer than ``k`` rows (very selective filters), the
+exact path is used instead. pgvector caps ``hnsw.ef_search`` at 1000, so a
+request needing more candidates than that is also searched exactly.
+
+Settings (environment):
+
+    VECTOR_ANN_ENABLED        default true; false = exact scan everywhere
+    VECTOR_ANN_OVERSAMPLE     candidates per requested result (default 4)
+    VECTOR_ANN_EF_SEARCH      hnsw.ef_search floor for the candidate query
+                              (clamped to MAX_EF_SEARCH)
+    VECTOR_ANN_ITERATIVE_SCAN hnsw.iterative_scan (pgvector >= 0.8), e.g.
+                              relaxed_order; empty leaves it unset
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, List, Sequence
+
+from django.db import connection, transaction
+from pgvector import HalfVector
+from pgvector.django import CosineDistance
+
+from apps.public_core.models.document_vector import ann_embedding
+
+logger = logging.getLogger(__name__)
+
+ANN_INDEX_NAME = "documentvector_embedding_ann_hnsw_idx"
+# Largest hnsw.ef_search pgvector accepts
+MAX_EF_SEARCH = 1000
+
+
+def ann_enabled() -> bool:
+    return os.getenv("VECTOR_ANN_ENABLED", "true").lower() == "true"
+
+
+def _oversample() -> int:
+    return max(1, int(os.getenv("VECTOR_ANN_OVERSAMPLE", "4")))
+
+
+def exact_nearest(queryset, query_embedding: Sequence[float], k: int) -> List[Any]:
+    """Exact cosine search on the full embedding (full scan of ``queryset``)."""
+    return list(
+        queryset
+        .annotate(distance=CosineDistance("embedding", query_embedding))
+        .order_by("distance")[:k]
+    )
+
+
+def _candidate_ids(queryset, query_embedding: Sequence[float], limit: int) -> List[Any]:
+    shadow = HalfVector(ann_embedding(query_embedding))
+    candidates = (
+        queryset
+        .filter(embedding_ann__isnull=False)
+        .annotate(ann_distance=CosineDistance("embedding_ann", shadow))
+        .order_by("ann_distance")
+        .values_list("pk", flat=True)[:limit]
+    )
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            ef_search = min(max(limit, int(os.getenv("VECTOR_ANN_EF_SEARCH", "40"))), MAX_EF_SEARCH)
+            iterative = os.getenv("VECTOR_ANN_ITERATIVE_SCAN", "").strip()
+            with connection.cursor() as cursor:
+                # SET LOCAL cannot take bind parameters; both values are validated
+                cursor.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+                if iterative in ("strict_order", "relaxed_order"):
+                    cursor.execute(f"SET LOCAL hnsw.iterative_scan = {iterative}")
+        return list(candidates)
+
+
+def nearest(queryset, query_embedding: Sequence[float], k: int) -> List[Any]:
+    """Top-``k`` rows of ``queryset`` by cosine distance to ``query_embedding``.
+
+    Returns model instances annotated with ``distance`` (exact, full vector),
+    ordered nearest first, like
+    ``queryset.annotate(distance=CosineDistance("embedding", q)).order_by("distance")[:k]``.
+    """
+    if k <= 0:
+        return []
+    if not ann_enabled():
+        return exact_nearest(queryset, query_embedding, k)
+
+    limit = k * _oversample()
+    if limit > MAX_EF_SEARCH:
+        # The HNSW scan cannot return this many candidates
+        return exact_nearest(queryset, query_embedding, k)
+
+    candidate_ids = _candidate_ids(queryset, query_embedding, limit)
+    if len(candidate_ids) < k:
+        return exact_nearest(queryset, query_embedding, k)
+
+    ranked = exact_nearest(queryset.filter(pk__in=candidate_ids), query_embedding, k)
+    missing = exact_nearest(queryset.filter(embedding_ann__isnull=True), query_embedding, k)
+    if missing:
+        ranked = sorted(ranked + missing, key=lambda row: row.distance)[:k]
+    return ranked
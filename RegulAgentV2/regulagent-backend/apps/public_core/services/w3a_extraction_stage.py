@@ -0,0 +1,178 @@
+"""
+Concurrent extraction stage for RRC documents in generate_w3a_for_api.
+
+Each downloaded file used to be classified, extracted, saved and vectorized
+one after the other, so a well with six to ten forms waited for the sum of
+its model calls. The stage now runs in three steps:
+
+1. Files are classified on a bounded thread pool (W3A_EXTRACTION_MAX_WORKERS);
+   a file already seen resolves from the classification index without a
+   model call.
+2. A successful, non-stale extraction of the same path and doc_type is
+   reused; otherwise the file is extracted. Every OpenAI call still goes
+   through the shared rate limiter (openai_config), so the pool only
+   overlaps waiting.
+3. New ExtractedDocuments are written with one bulk_create on the calling
+   thread, and their vectorization is queued (vectorize_extracted_documents
+   task) once the transaction commits.
+
+Results keep the input file order; a failure affects only its own file.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.db import connections, transaction
+
+from apps.public_core.models import ExtractedDocument
+from apps.public_core.services.openai_extraction import (
+    ExtractionResult,
+    classify_document,
+    extract_json_from_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_DOC_TYPES = ("gau", "w2", "w15", "schematic", "formation_tops")
+
+
+def _max_workers() -> int:
+    return max(1, int(os.getenv("W3A_EXTRACTION_MAX_WORKERS", "4")))
+
+
+@dataclass
+class StagedDocument:
+    """One downloaded file moving through the stage."""
+    index: int
+    path: str
+    name: str = ""
+    doc_type: str = "unknown"
+    extraction: Optional[ExtractionResult] = None
+    document: Optional[ExtractedDocument] = None
+    reused: bool = False
+    error: Optional[str] = None
+
+    @property
+    def skipped(self) -> bool:
+        return self.error is None and self.doc_type not in ALLOWED_DOC_TYPES
+
+
+@dataclass
+class StageResult:
+    documents: List[StagedDocument] = field(default_factory=list)
+
+    @property
+    def stored(self) -> List[StagedDocument]:
+        return [d for d in self.documents if d.document is not None]
+
+    @property
+    def failed(self) -> List[StagedDocument]:
+        return [d for d in self.documents if d.error is not None]
+
+
+def find_reusable_extraction(api: str, path: str, doc_type: str) -> Optional[ExtractedDocument]:
+    """Latest successful, non-stale extraction of ``path`` as ``doc_type``."""
+    return ExtractedDocument.objects.filter(
+        api_number=api,
+        source_path=str(path),
+        document_type=doc_type,
+        status="success",
+        is_stale=False,
+    ).order_by("-created_at").first()
+
+
+def _classify_and_extract(doc: StagedDocument, api: str) -> None:
+    try:
+        doc.doc_type = classify_document(Path(doc.path))
+        if doc.doc_type in ALLOWED_DOC_TYPES:
+            existing = find_reusable_extraction(api, doc.path, doc.doc_type)
+            if existing is not None:
+                doc.document, doc.reused = existing, True
+            else:
+                doc.extraction = extract_json_from_pdf(Path(doc.path), doc.doc_type)
+    except Exception as e:
+        doc.error = f"{type(e).__name__}: {e}"
+        logger.warning(f"Failed to process RRC file {doc.path}: {e}")
+    finally:
+        # Index/cache/extraction lookups open a connection on this worker thread
+        connections.close_all()
+
+
+def _store(docs: List[StagedDocument], api: str, well) -> None:
+    """Create ExtractedDocuments for new extractions in one statement."""
+    if not docs:
+        return
+    rows = [
+        ExtractedDocument(
+            well=well,
+            api_number=api,
+            document_type=d.doc_type,
+            source_path=d.path,
+            model_tag=d.extraction.model_tag,
+            status="success" if not d.extraction.errors else "error",
+            errors=d.extraction.errors,
+            json_data=d.extraction.json_data,
+        )
+        for d in docs
+    ]
+    with transaction.atomic():
+        created = ExtractedDocument.objects.bulk_create(rows)
+        ids = [str(ed.id) for ed in created]
+        transaction.on_commit(lambda: _queue_vectorization(ids))
+    for d, ed in zip(docs, created):
+        d.document = ed
+
+
+def _queue_vectorization(ed_ids: List[str]) -> None:
+    from apps.public_core.tasks import vectorize_extracted_documents
+
+    try:
+        vectorize_extracted_documents.delay(ed_ids)
+    except Exception:
+        logger.exception("vectorize: failed to queue %d RRC documents", len(ed_ids))
+
+
+def run_extraction_stage(
+    files: List[Dict[str, Any]],
+    api: str,
+    well=None,
+    max_workers: Optional[int] = None,
+) -> StageResult:
+    """
+    Classify, extract and store the downloaded RRC ``files`` (dicts with path/name).
+
+    Files without a path are ignored. Returns every file with a path, in input
+    order, with its doc_type, stored ExtractedDocument (new or reused) or error.
+    """
+    result = StageResult()
+    for idx, f in enumerate(files):
+        path = f.get("path")
+        if path:
+            result.documents.append(StagedDocument(index=idx, path=str(path), name=f.get("name") or ""))
+    if not result.documents:
+        return result
+
+    workers = min(max_workers or _max_workers(), len(result.documents))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="w3a-extract") as executor:
+        # Each call runs in a copy of this context so the tenant (usage tracking) follows it
+        futures = [
+            executor.submit(contextvars.copy_context().run, _classify_and_extract, d, api)
+            for d in result.documents
+        ]
+        for future in futures:
+            future.result()
+
+    extracted = [d for d in result.documents if d.extraction is not None]
+    try:
+        _store(extracted, api, well)
+    except Exception as e:
+        logger.exception("w3a_extraction_stage: failed to store %d extractions", len(extracted))
+        for d in extracted:
+            d.error = f"{type(e).__name__}: {e}"
+    return result
@@ -42,6 +42,7 @@ from apps.public_core.serializers.w3a_plan import (
 )
 from apps.public_core.services.rrc_completions_extractor import extract_completions_all_documents
 from apps.public_core.services.openai_extraction import classify_document, extract_json_from_pdf, vectorize_extracted_document
+from apps.public_core.services.w3a_extraction_stage import find_reusable_extraction, run_extraction_stage
 from apps.public_core.models import ExtractedDocument, WellRegistry, PlanSnapshot
 from apps.public_core.services.well_registry_enrichment import enrich_well_registry_from_documents
 from apps.tenant_overlay.models import TenantArtifact, WellEngagement
@@ -53,6 +54,18 @@ from apps.kernel.services.jurisdiction_registry import detect_jurisdiction as _d
 logger = logging.getLogger(__name__)
 
 
+def _classify_reusing_extraction(api: str, path: str):
+    """
+    (doc_type, reusable ExtractedDocument or None) for a downloaded/uploaded file.
+
+    classify_document resolves files it has seen before from the
+    classification index, so replanning an already-processed well makes no
+    model call; the existing extraction must match both path and doc_type.
+    """
+    doc_type = classify_document(Path(path))
+    return doc_type, find_reusable_extraction(api, path, doc_type)
+
+
 def fetch_nm_extraction_data(api_number: str) -> Dict[str, Any]:
     """
     Fetch NM well data via scraper, format as extraction-like dict.
@@ -336,77 +349,35 @@ def generate_w3a_for_api(
             print("🔄 PROCESSING RRC DOCUMENTS", file=sys.stderr)
             print("="*80, file=sys.stderr)
             
-            for idx, f in enumerate(files, 1):
-                path = f.get("path")
-                if not path:
-                    print(f"\n⏭️  [{idx}] SKIPPED: No path found", file=sys.stderr)
+            # Classification/extraction run concurrently; writes are batched and
+            # vectorization is queued after commit (see w3a_extraction_stage)
+            stage = run_extraction_stage(files, api, well)
+            for staged in stage.documents:
+                print(f"\n📖 [{staged.index + 1}] {staged.name}", file=sys.stderr)
+                print(f"    Path: {staged.path}", file=sys.stderr)
+                if staged.error:
+                    print(f"    ❌ FAILED: {staged.error}", file=sys.stderr)
+                    warnings.append(f"Failed to extract RRC {staged.doc_type}: {staged.error}")
                     continue
-                
-                print(f"\n📖 [{idx}] PROCESSING: {f.get('name')}", file=sys.stderr)
-                print(f"    Path: {path}", file=sys.stderr)
-                
-                try:
-                    doc_type = classify_document(Path(path))
-                    print(f"    Classified as: {doc_type}", file=sys.stderr)
-                    
-                    if doc_type not in ("gau", "w2", "w15", "schematic", "formation_tops"):
-                        print(f"    ⏭️  SKIPPED: Document type '{doc_type}' not in allowed list", file=sys.stderr)
-                        continue
-                    
-                    # --- Check for existing successful extraction (cache hit) ---
-                    existing = ExtractedDocument.objects.filter(
-                        api_number=api,
-                        source_path=str(path),
-                        document_type=doc_type,
-                        status="success",
-                        is_stale=False,
-                    ).order_by("-created_at").first()
-
-                    if existing:
-                        logger.info(
-                            "♻️  Reusing existing extraction for %s (ID: %s)",
-                            os.path.basename(str(path)),
-                            existing.id,
-                        )
-                        print(f"    ♻️  Cache hit — reusing ExtractedDocument: {existing.id}", file=sys.stderr)
-                        ed = existing
-                    else:
-                        ext = extract_json_from_pdf(Path(path), doc_type)
-                        print(f"    Extraction model: {ext.model_tag}", file=sys.stderr)
-
-                        if ext.errors:
-                            print(f"    ⚠️  Extraction errors: {ext.errors}", file=sys.stderr)
-
-                        with transaction.atomic():
-                            ed = ExtractedDocument.objects.create(
-                                well=well,
-                                api_number=api,
-                                document_type=doc_type,
-                                source_path=str(path),
-                                model_tag=ext.model_tag,
-                                status="success" if not ext.errors else "error",
-                                errors=ext.errors,
-                                json_data=ext.json_data,
-                            )
-                            print(f"    ✅ Created ExtractedDocument: {ed.id}", file=sys.stderr)
-                            print(f"       Document Type: {ed.document_type}", file=sys.stderr)
-                            print(f"       Status: {ed.status}", file=sys.stderr)
-
-                            try:
-                                vectorize_extracted_document(ed)
-                                print(f"    ✅ Vectorization successful", file=sys.stderr)
-                            except Exception as vec_err:
-                                print(f"    ⚠️  Vectorization failed (non-fatal): {vec_err}", file=sys.stderr)
-                                logger.exception("vectorize: failed for RRC doc")
+                print(f"    Classified as: {staged.doc_type}", file=sys.stderr)
+                if staged.skipped:
+                    print(f"    ⏭️  SKIPPED: Document type '{staged.doc_type}' not in allowed list", file=sys.stderr)
+                    continue
+                ed = staged.document
+                if staged.reused:
+                    logger.info(
+                        "♻️  Reusing existing extraction for %s (ID: %s)",
+                        os.path.basename(staged.path),
+                        ed.id,
+                    )
+                    print(f"    ♻️  Cache hit — reusing ExtractedDocument: {ed.id}", file=sys.stderr)
+                else:
+                    print(f"    Extraction model: {staged.extraction.model_tag}", file=sys.stderr)
+                    if staged.extraction.errors:
+                        print(f"    ⚠️  Extraction errors: {staged.extraction.errors}", file=sys.stderr)
+                    print(f"    ✅ Created ExtractedDocument: {ed.id} (status: {ed.status})", file=sys.stderr)
+                created.append({"document_type": staged.doc_type, "extracted_document_id": str(ed.id)})
 
-                    created.append({"document_type": doc_type, "extracted_document_id": str(ed.id)})
-                    print(f"    ✅ SUCCESS: Document processed and stored", file=sys.stderr)
-                
-                except Exception as e:
-                    print(f"    ❌ FAILED: {type(e).__name__}: {e}", file=sys.stderr)
-                    logger.warning(f"Failed to process RRC file {path}: {e}")
-                    warnings.append(f"Failed to extract RRC {doc_type if 'doc_type' in locals() else 'unknown'}: {e}")
-            
             print("\n" + "="*80, file=sys.stderr)
             print(f"📊 EXTRACTION PROCESSING SUMMARY", file=sys.stderr)
             print(f"   Total files to process: {len(files)}", file=sys.stderr)
@@ -478,17 +449,10 @@ def generate_w3a_for_api(
                     else:
                         # PDF upload
                         saved_path = _save_upload(fobj, str(api))
-                        doc_type = classify_document(Path(saved_path))
+                        # --- Classify (index hit for known files), then reuse an extraction of that type ---
+                        doc_type, existing = _classify_reusing_extraction(api, saved_path)
                         if doc_type not in ("gau", "w2", "w15", "schematic", "formation_tops"):
                             continue
-                        # --- Check for existing successful extraction (cache hit) ---
-                        existing = ExtractedDocument.objects.filter(
-                            api_number=api,
-                            source_path=str(saved_path),
-                            document_type=doc_type,
-                            status="success",
-                            is_stale=False,
-                        ).order_by("-created_at").first()
 
                         if existing:
                             logger.info(
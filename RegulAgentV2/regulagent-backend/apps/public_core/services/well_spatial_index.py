@@ -0,0 +1,224 @@
+"""
+In-memory spatial index over WellRegistry coordinates.
+
+WellRegistry stores lat/lon as plain decimals (no PostGIS), so the database
+can only answer bounding-box range scans. This module keeps every located
+well in per-state NumPy arrays, bucketed into a fixed lat/lon grid:
+
+- ``within`` visits only the grid cells overlapping the search radius and
+  scores all of their wells with one vectorized haversine pass.
+- ``nearest`` widens the radius until ``k`` wells are found (or the state
+  is exhausted), so k-nearest needs no radius from the caller.
+
+The process-wide index (``get_well_index``) is rebuilt lazily: after
+WELL_SPATIAL_INDEX_TTL seconds a cheap (count, max updated_at) probe decides
+whether WellRegistry changed; only then are coordinates reloaded.
+
+Settings (environment):
+
+    WELL_SPATIAL_INDEX_TTL   seconds between staleness probes (default 900)
+    WELL_SPATIAL_CELL_DEG    grid cell size in degrees (default 0.1, ~7 mi)
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MI = 3958.8
+MILES_PER_DEG_LAT = 69.0
+# nearest() never widens past this radius
+MAX_SEARCH_RADIUS_MI = 1000.0
+
+
+def _ttl() -> int:
+    return int(os.getenv("WELL_SPATIAL_INDEX_TTL", "900"))
+
+
+def _cell_deg() -> float:
+    return float(os.getenv("WELL_SPATIAL_CELL_DEG", "0.1"))
+
+
+def haversine_miles_vec(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle miles from (lat, lon) to every point of ``lats``/``lons`` (degrees)."""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dl = np.radians(lons) - math.radians(lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dl / 2) ** 2
+    return EARTH_RADIUS_MI * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+@dataclass
+class SpatialHit:
+    well_id: int
+    distance_mi: float
+
+
+class _StatePartition:
+    """Arrays and grid cells for the wells of one state."""
+
+    def __init__(self, rows: List[Tuple[int, float, float, str, str]], cell_deg: float):
+        self.cell_deg = cell_deg
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.lat = np.array([r[1] for r in rows], dtype=np.float64)
+        self.lon = np.array([r[2] for r in rows], dtype=np.float64)
+        self.county = np.array([r[3] for r in rows], dtype=object)
+        self.field = np.array([r[4] for r in rows], dtype=object)
+
+        # Sort positions by cell, then split at cell boundaries
+        ci = np.floor(self.lat / cell_deg).astype(np.int64)
+        cj = np.floor(self.lon / cell_deg).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        ci, cj = ci[order], cj[order]
+        starts = np.flatnonzero((np.diff(ci) != 0) | (np.diff(cj) != 0)) + 1
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {}
+        if len(order):
+            for first, positions in zip(np.concatenate(([0], starts)), np.split(order, starts)):
+                self.cells[(int(ci[first]), int(cj[first]))] = positions
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def candidates(self, lat: float, lon: float, radius_mi: float) -> np.ndarray:
+        """Positions of wells in grid cells overlapping the radius bounding box."""
+        dlat = radius_mi / MILES_PER_DEG_LAT
+        dlon = radius_mi / (MILES_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+        i0, i1 = math.floor((lat - dlat) / self.cell_deg), math.floor((lat + dlat) / self.cell_deg)
+        j0, j1 = math.floor((lon - dlon) / self.cell_deg), math.floor((lon + dlon) / self.cell_deg)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) >= len(self.cells):
+            return np.arange(len(self.ids))
+        found = [
+            self.cells[(i, j)]
+            for i in range(i0, i1 + 1)
+            for j in range(j0, j1 + 1)
+            if (i, j) in self.cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+class WellSpatialIndex:
+    """Grid index over located wells, partitioned by state."""
+
+    def __init__(self, rows: Iterable[Tuple[int, str, object, object, str, str]], cell_deg: Optional[float] = None):
+        cell_deg = cell_deg or _cell_deg()
+        by_state: Dict[str, List[Tuple[int, float, float, str, str]]] = {}
+        for well_id, state, lat, lon, county, field in rows:
+            by_state.setdefault(state or "", []).append(
+                (well_id, float(lat), float(lon), (county or "").strip().lower(), (field or "").strip().lower())
+            )
+        self.partitions = {state: _StatePartition(r, cell_deg) for state, r in by_state.items()}
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self.partitions.values())
+
+    @classmethod
+    def from_db(cls) -> "WellSpatialIndex":
+        from apps.public_core.models import WellRegistry
+
+        rows = (
+            WellRegistry.objects
+            .filter(lat__isnull=False, lon__isnull=False)
+            .values_list("id", "state", "lat", "lon", "county", "field_name")
+            .iterator(chunk_size=20000)
+        )
+        return cls(rows)
+
+    def within(
+        self,
+        lat: float,
+        lon: float,
+        radius_mi: float,
+        *,
+        state: str,
+        county: Optional[str] = None,
+        field: Optional[str] = None,
+        exclude_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[SpatialHit]:
+        """Wells of ``state`` within ``radius_mi`` of (lat, lon), nearest first.
+
+        ``county`` / ``field`` match case-insensitively (like ``__iexact``).
+        """
+        part = self.partitions.get(state)
+        if part is None or radius_mi < 0:
+            return []
+        pos = part.candidates(lat, lon, radius_mi)
+        if county:
+            pos = pos[part.county[pos] == county.strip().lower()]
+        if field:
+            pos = pos[part.field[pos] == field.strip().lower()]
+        if exclude_id is not None:
+            pos = pos[part.ids[pos] != exclude_id]
+        if not len(pos):
+            return []
+
+        dist = haversine_miles_vec(lat, lon, part.lat[pos], part.lon[pos])
+        keep = dist <= radius_mi
+        pos, dist = pos[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [SpatialHit(int(part.ids[p]), float(d)) for p, d in zip(pos[order], dist[order])]
+
+    def nearest(self, lat: float, lon: float, k: int, *, state: str, **filters) -> List[SpatialHit]:
+        """The ``k`` wells of ``state`` nearest to (lat, lon), nearest first."""
+        part = self.partitions.get(state)
+        if part is None or k <= 0:
+            return []
+        radius = part.cell_deg * MILES_PER_DEG_LAT
+        while True:
+            hits = self.within(lat, lon, radius, state=state, limit=k, **filters)
+            if len(hits) >= k or radius >= MAX_SEARCH_RADIUS_MI:
+                return hits
+            radius = min(radius * 2, MAX_SEARCH_RADIUS_MI)
+
+
+_lock = threading.Lock()
+_index: Optional[WellSpatialIndex] = None
+_version: Optional[Tuple[int, object]] = None
+_checked_at = 0.0
+
+
+def _db_version() -> Tuple[int, object]:
+    from apps.public_core.models import WellRegistry
+
+    agg = WellRegistry.objects.filter(lat__isnull=False, lon__isnull=False).aggregate(
+        n=Count("id"), last=Max("updated_at"),
+    )
+    return agg["n"], agg["last"]
+
+
+def get_well_index() -> WellSpatialIndex:
+    """Process-wide index, rebuilt when WellRegistry changed since the last probe."""
+    global _index, _version, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _index is not None and now - _checked_at < _ttl():
+            return _index
+        version = _db_version()
+        if _index is None or version != _version:
+            started = time.monotonic()
+            _index = WellSpatialIndex.from_db()
+            logger.info(
+                "well_spatial_index: indexed %d wells in %.2fs", len(_index), time.monotonic() - started,
+            )
+            _version = version
+        _checked_at = now
+        return _index
+
+
+def reset_well_index() -> None:
+    """Drop the process-wide index (rebuilt on next use)."""
+    global _index, _version, _checked_at
+    with _lock:
+        _index, _version, _checked_at = None, None, 0.0
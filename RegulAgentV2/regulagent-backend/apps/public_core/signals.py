@@ -0,0 +1,51 @@
+"""
+Signals for public_core.
+
+Filing writes invalidate the cached dashboard metrics
+(services.filing_metrics) once the transaction commits. Deleting a plan
+snapshot rewrites its delta children in full, and the historical record of
+a delta snapshot stores its stub and patch (services.plan_snapshot_store).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from simple_history.signals import pre_create_historical_record
+
+from apps.public_core.models import PlanSnapshot, W3FormORM
+from apps.public_core.services import filing_metrics, plan_snapshot_store
+
+
+@receiver(post_save, sender=PlanSnapshot)
+@receiver(post_delete, sender=PlanSnapshot)
+@receiver(post_save, sender=W3FormORM)
+@receiver(post_delete, sender=W3FormORM)
+def on_filing_changed(sender, instance=None, **kwargs):
+    """Mark cached filing metrics stale when a plan snapshot or W-3 form changes.
+
+    A private plan snapshot only counts in its own tenant's rollup, so it
+    invalidates that tenant alone, unless the save may have changed its
+    visibility. Everything else invalidates all tenants.
+    """
+    tenant_id = None
+    if sender is PlanSnapshot and instance is not None and instance.tenant_id \
+            and instance.visibility == PlanSnapshot.VISIBILITY_PRIVATE:
+        update_fields = kwargs.get('update_fields')
+        if 'created' not in kwargs or kwargs['created'] or (update_fields and 'visibility' not in update_fields):
+            tenant_id = instance.tenant_id
+    transaction.on_commit(partial(filing_metrics.invalidate, tenant_id))
+
+
+@receiver(pre_delete, sender=PlanSnapshot)
+def on_plan_snapshot_deleting(sender, instance, **kwargs):
+    """Keyframe snapshots stored as patches against the one being deleted (inside the delete transaction)."""
+    plan_snapshot_store.rebase_children(instance.pk)
+
+
+@receiver(pre_create_historical_record, sender=PlanSnapshot.history.model)
+def on_plan_snapshot_history(sender, instance, history_instance, **kwargs):
+    """Store a delta snapshot's history row as stub + patch, like the row itself."""
+    stored = plan_snapshot_store.history_payload(instance)
+    if stored is not None:
+        history_instance.payload = stored
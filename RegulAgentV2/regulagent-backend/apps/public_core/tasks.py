@@ -30,10 +30,14 @@ def bulk_generate_plans(
     Generate plans for multiple wells asynchronously.
 
     This task:
-    1. Iterates through each well_id
-    2. Calls the plan generation orchestrator
-    3. Updates BulkJob progress after each well
-    4. Collects results and errors
+    1. Orders wells by district/county and splits them into chunks
+    2. Runs a single chunk inline, or fans chunks out as chords of
+       bulk_generate_plans_chunk sub-tasks, at most
+       BULK_PLAN_MAX_PARALLEL_CHUNKS per wave
+    3. Each chunk updates BulkJob progress atomically after each well
+    4. bulk_generate_plans_finalize collects each wave's results, dispatches
+       the next wave, and completes the job after the last one;
+       bulk_generate_plans_failed fails the job if a wave errors out
 
     Args:
         job_id: BulkJob UUID
@@ -45,6 +49,7 @@ def bulk_generate_plans(
             - input_mode: "extractions", "user_files", or "hybrid"
 
     Returns:
+        Inline run:
         {
             'status': 'success' | 'failed',
             'processed': int,
@@ -52,16 +57,22 @@ def bulk_generate_plans(
             'results': [
                 {
                     'well_id': str,
-                    'status': 'success' | 'failed',
-                    'plan_id': str (if success),
+                    'status': 'success' | 'skipped' | 'failed',
+                    'plan_id': str (if skipped),
                     'snapshot_id': str (if success),
                     'error': str (if failed)
                 }
             ]
         }
+        Fan-out run:
+        {
+            'status': 'dispatched',
+            'chunks': int,
+            'total': int
+        }
     """
-    from apps.public_core.models import BulkJob, WellRegistry
-    from apps.public_core.services.w3a_orchestrator import generate_w3a_for_api
+    from apps.public_core.models import BulkJob
+    from apps.public_core.services import bulk_plan_engine
 
     logger.info(f"[BulkTask] Starting bulk_generate_plans for job {job_id}")
 
@@ -75,122 +86,22 @@ def bulk_generate_plans(
         tenant = Tenant.objects.get(id=job.tenant_id)
         set_current_tenant(tenant)
 
-        logger.info(f"[BulkTask] Job {job_id} marked as processing. Wells to process: {len(well_ids)}")
-
-        results = []
-        processed_count = 0
-        failed_count = 0
-
-        # Extract options
-        jurisdiction = options.get('jurisdiction')
-        force_regenerate = options.get('force_regenerate', False)
-        plugs_mode = options.get('plugs_mode', 'combined')
-        input_mode = options.get('input_mode', 'extractions')
-
-        for well_id in well_ids:
-            try:
-                logger.info(f"[BulkTask] Processing well {well_id} ({processed_count + failed_count + 1}/{len(well_ids)})")
-
-                # Validate well exists
-                try:
-                    well = WellRegistry.objects.get(api14=well_id)
-                except WellRegistry.DoesNotExist:
-                    raise ValueError(f"Well {well_id} not found in registry")
-
-                # Check if plan already exists (unless force_regenerate)
-                from apps.public_core.models import PlanSnapshot
-                existing_plan = None
-                if not force_regenerate:
-                    existing_plan = PlanSnapshot.objects.filter(
-                        well=well,
-                        tenant_id=job.tenant_id,
-                        status__in=[
-                            PlanSnapshot.STATUS_DRAFT,
-                            PlanSnapshot.STATUS_INTERNAL_REVIEW,
-                            PlanSnapshot.STATUS_ENGINEER_APPROVED,
-                        ]
-                    ).first()
-
-                if existing_plan and not force_regenerate:
-                    logger.info(f"[BulkTask] Plan already exists for well {well_id}, skipping")
-                    results.append({
-                        'well_id': well_id,
-                        'status': 'skipped',
-                        'plan_id': existing_plan.plan_id,
-                        'snapshot_id': str(existing_plan.id),
-                        'message': 'Plan already exists (use force_regenerate to override)'
-                    })
-                    processed_count += 1
-                    job.increment_progress(success=True)
-                    continue
-
-                # Generate plan using orchestrator
-                plan_result = generate_w3a_for_api(
-                    api_number=well_id,
-                    plugs_mode=plugs_mode,
-                    input_mode=input_mode,
-                    request=None,  # No HTTP request in background task
-                    confirm_fact_updates=False,  # Conservative: don't auto-update facts
-                    allow_precision_upgrades_only=True,
-                )
-
-                if plan_result.get('success'):
-                    snapshot_id = plan_result.get('snapshot_id')
-                    logger.info(f"[BulkTask] Successfully generated plan for well {well_id}: {snapshot_id}")
-
-                    results.append({
-                        'well_id': well_id,
-                        'status': 'success',
-                        'snapshot_id': snapshot_id,
-                        'auto_generated': plan_result.get('auto_generated', True),
-                    })
-                    processed_count += 1
-                    job.increment_progress(success=True)
-                else:
-                    error_msg = plan_result.get('error', 'Unknown error')
-                    logger.warning(f"[BulkTask] Failed to generate plan for well {well_id}: {error_msg}")
-
-                    results.append({
-                        'well_id': well_id,
-                        'status': 'failed',
-                        'error': error_msg
-                    })
-                    failed_count += 1
-                    job.increment_progress(success=False)
-
-            except Exception as e:
-                error_msg = str(e)
-                logger.exception(f"[BulkTask] Error processing well {well_id}")
-
-                results.append({
-                    'well_id': well_id,
-                    'status': 'failed',
-                    'error': error_msg
-                })
-                failed_count += 1
-                job.increment_progress(success=False)
-
-        # Mark job as complete
-        job.result_data = {
-            'results': results,
-            'summary': {
-                'total': len(well_ids),
-                'processed': processed_count,
-                'failed': failed_count,
-            }
-        }
-        job.complete_successfully()
-
+        chunks = bulk_plan_engine.plan_chunks(well_ids)
         logger.info(
-            f"[BulkTask] Job {job_id} completed. "
-            f"Processed: {processed_count}, Failed: {failed_count}"
+            f"[BulkTask] Job {job_id} marked as processing. "
+            f"Wells to process: {len(well_ids)} in {len(chunks)} chunk(s)"
         )
 
+        if len(chunks) <= 1:
+            results = bulk_plan_engine.run_chunk(job, chunks[0] if chunks else [], options)
+            return _finalize_bulk_plan_job(job, results, len(well_ids))
+
+        _dispatch_bulk_plan_wave(job_id, chunks, options, len(well_ids), [])
+
         return {
-            'status': 'success',
-            'processed': processed_count,
-            'failed': failed_count,
-            'results': results
+            'status': 'dispatched',
+            'chunks': len(chunks),
+            'total': len(well_ids),
         }
 
     except BulkJob.DoesNotExist:
@@ -220,6 +131,132 @@ def bulk_generate_plans(
         }
 
 
+@shared_task(bind=True)
+def bulk_generate_plans_chunk(
+    self,
+    job_id: str,
+    well_ids: List[str],
+    options: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Generate plans for one chunk of a bulk job.
+
+    Wells and existing snapshots are prefetched in one query each and the
+    policy context is warmed once per district/county. Per-well failures are
+    recorded as result entries. If the chunk stops early (error or soft time
+    limit), run_chunk marks the remaining wells as failed so the chord
+    callback still runs; if the job cannot even be loaded, every well in the
+    chunk is marked failed here.
+    """
+    from apps.public_core.models import BulkJob
+    from apps.public_core.services import bulk_plan_engine
+
+    try:
+        job = BulkJob.objects.get(id=job_id)
+        set_current_tenant(Tenant.objects.get(id=job.tenant_id))
+    except Exception as e:
+        logger.exception(f"[BulkTask] Chunk of {len(well_ids)} wells could not start for job {job_id}")
+        try:
+            BulkJob.objects.get(id=job_id).increment_progress(success=False, count=len(well_ids))
+        except Exception:
+            pass
+        return [
+            {'well_id': well_id, 'status': 'failed', 'error': str(e)}
+            for well_id in well_ids
+        ]
+    return bulk_plan_engine.run_chunk(job, well_ids, options)
+
+
+@shared_task(bind=True)
+def bulk_generate_plans_finalize(
+    self,
+    chunk_results: List[List[Dict[str, Any]]],
+    job_id: str,
+    total: int,
+    pending_chunks: List[List[str]] = None,
+    options: Dict[str, Any] = None,
+    prior_results: List[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Chord callback: merge a wave's chunk results, then dispatch the next wave or complete the BulkJob."""
+    from apps.public_core.models import BulkJob
+
+    results = list(prior_results or [])
+    results.extend(entry for chunk in (chunk_results or []) for entry in (chunk or []))
+    if pending_chunks:
+        _dispatch_bulk_plan_wave(job_id, pending_chunks, options or {}, total, results)
+        return {
+            'status': 'dispatched',
+            'chunks': len(pending_chunks),
+            'total': total,
+        }
+    try:
+        job = BulkJob.objects.get(id=job_id)
+    except BulkJob.DoesNotExist:
+        logger.error(f"[BulkTask] Job {job_id} not found")
+        return {
+            'status': 'failed',
+            'error': f"Job {job_id} not found"
+        }
+    return _finalize_bulk_plan_job(job, results, total)
+
+
+@shared_task
+def bulk_generate_plans_failed(request, exc, traceback, job_id: str) -> None:
+    """Chord error callback: fail the BulkJob when a wave cannot complete (e.g. hard time limit)."""
+    from apps.public_core.models import BulkJob
+
+    logger.error(f"[BulkTask] Chunk task {request.id} failed for job {job_id}: {exc!r}")
+    try:
+        BulkJob.objects.get(id=job_id).fail(f"Chunk task failed: {exc}")
+    except BulkJob.DoesNotExist:
+        logger.error(f"[BulkTask] Job {job_id} not found")
+
+
+def _dispatch_bulk_plan_wave(
+    job_id: str,
+    chunks: List[List[str]],
+    options: Dict[str, Any],
+    total: int,
+    prior_results: List[Dict[str, Any]]
+) -> None:
+    """Dispatch up to BULK_PLAN_MAX_PARALLEL_CHUNKS chunks as a chord; the rest ride along to the callback."""
+    from celery import chord, group
+    from apps.public_core.services import bulk_plan_engine
+
+    _, max_parallel = bulk_plan_engine.chunk_settings()
+    wave, pending = bulk_plan_engine.split_waves(chunks, max_parallel)
+    callback = bulk_generate_plans_finalize.s(job_id, total, pending, options, prior_results)
+    callback.on_error(bulk_generate_plans_failed.s(job_id))
+    chord(
+        group(bulk_generate_plans_chunk.s(job_id, chunk, options) for chunk in wave)
+    )(callback)
+
+
+def _finalize_bulk_plan_job(job, results: List[Dict[str, Any]], total: int) -> Dict[str, Any]:
+    """Persist aggregated results and mark a plan-generation job complete."""
+    from apps.public_core.services.bulk_plan_engine import summarize
+
+    summary = summarize(results, total)
+    job.result_data = {
+        'results': results,
+        'summary': summary,
+    }
+    job.save(update_fields=['result_data'])
+    job.complete_successfully()
+
+    logger.info(
+        f"[BulkTask] Job {job.id} completed. "
+        f"Processed: {summary['processed']}, Failed: {summary['failed']}"
+    )
+
+    return {
+        'status': 'success',
+        'processed': summary['processed'],
+        'failed': summary['failed'],
+        'results': results
+    }
+
+
 @shared_task(bind=True)
 def bulk_update_plan_status(
     self,
@@ -1038,3 +1075,46 @@ def bulk_import_wells(
         except Exception:
             pass
         return {'status': 'failed', 'error': str(e)}
+
+
+@shared_task
+def refresh_filing_metrics() -> Dict[str, Any]:
+    """
+    Periodic task: recompute stale cached dashboard filing metrics.
+
+    Considers the public rollup plus one per tenant that owns plan snapshots,
+    but only recomputes rollups that are still cached and whose generation
+    changed since they were computed, so idle tenants are skipped.
+    """
+    from apps.public_core.models import PlanSnapshot
+    from apps.public_core.services import filing_metrics
+
+    tenant_ids = list(
+        PlanSnapshot.objects.exclude(tenant_id__isnull=True)
+        .order_by()
+        .values_list('tenant_id', flat=True)
+        .distinct()
+    )
+    refreshed = filing_metrics.refresh_filing_metrics([None, *tenant_ids])
+    logger.info(f"[FilingMetrics] Refreshed {refreshed} stale rollup(s)")
+    return {'status': 'success', 'refreshed': refreshed}
+
+
+@shared_task
+def vectorize_extracted_documents(ed_ids: List[str]) -> Dict[str, Any]:
+    """
+    Embed ExtractedDocuments created by the W-3A extraction stage.
+
+    Deferred out of the request so plan generation does not wait on
+    embeddings; documents that already have vectors are skipped.
+    """
+    from apps.public_core.models import ExtractedDocument
+    from apps.public_core.services import bulk_vectorizer
+
+    documents = bulk_vectorizer.without_vectors(ExtractedDocument.objects.filter(id__in=ed_ids))
+    result = bulk_vectorizer.vectorize_documents(documents.iterator())
+    logger.info(
+        f"[Vectorize] {result.documents} document(s), {result.vectors} vector(s), "
+        f"{len(result.failed_ids)} failed"
+    )
+    return {'status': 'success', 'documents': result.documents, 'vectors': result.vectors}
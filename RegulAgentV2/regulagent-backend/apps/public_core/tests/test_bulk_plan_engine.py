@@ -0,0 +1,174 @@
+"""
+Unit tests for the bulk plan-generation batch engine helpers.
+
+These cover the chunking/grouping logic, per-well progress accounting in
+run_chunk (with plan generation stubbed out), and the chord error callback.
+They do not dispatch real Celery chords.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.test import override_settings
+
+from apps.public_core import tasks
+from apps.public_core.services import bulk_plan_engine
+from apps.public_core.services.bulk_plan_engine import (
+    chunk_settings,
+    chunk_well_ids,
+    order_by_district,
+    run_chunk,
+    split_waves,
+    summarize,
+)
+
+
+class TestOrderByDistrict:
+
+    def test_groups_by_district_then_county(self):
+        well_ids = ['a', 'b', 'c', 'd']
+        locations = {
+            'a': ('8A', 'Andrews'),
+            'b': ('7C', 'Coke'),
+            'c': ('8A', 'Andrews'),
+            'd': ('7C', 'Reagan'),
+        }
+        assert order_by_district(well_ids, locations) == ['b', 'd', 'a', 'c']
+
+    def test_unknown_wells_keep_order_at_end(self):
+        well_ids = ['x', 'a', 'y']
+        locations = {'a': ('8A', 'Andrews')}
+        assert order_by_district(well_ids, locations) == ['a', 'x', 'y']
+
+    def test_district_case_is_ignored(self):
+        well_ids = ['a', 'b', 'c']
+        locations = {'a': ('8a', 'Andrews'), 'b': ('7C', 'Coke'), 'c': ('8A', 'andrews')}
+        assert order_by_district(well_ids, locations) == ['b', 'a', 'c']
+
+
+class TestChunkWellIds:
+
+    def test_empty(self):
+        assert chunk_well_ids([], 25) == []
+
+    def test_small_job_is_single_chunk(self):
+        ids = [str(i) for i in range(10)]
+        assert chunk_well_ids(ids, 25) == [ids]
+
+    def test_chunks_of_chunk_size(self):
+        ids = [str(i) for i in range(60)]
+        chunks = chunk_well_ids(ids, 25)
+        assert [len(c) for c in chunks] == [25, 25, 10]
+        assert sum(chunks, []) == ids
+
+    def test_large_job_gets_more_chunks_not_bigger_ones(self):
+        ids = [str(i) for i in range(2000)]
+        chunks = chunk_well_ids(ids, 25)
+        assert len(chunks) == 80
+        assert max(len(c) for c in chunks) == 25
+        assert sum(chunks, []) == ids
+
+    def test_waves_bounded_by_max_parallel(self):
+        chunks = [[str(i)] for i in range(20)]
+        wave, pending = split_waves(chunks, 8)
+        assert wave == chunks[:8]
+        assert pending == chunks[8:]
+
+
+class TestChunkSettings:
+
+    @override_settings(BULK_PLAN_CHUNK_SIZE=250, BULK_PLAN_MAX_PARALLEL_CHUNKS=8,
+                       BULK_PLAN_SECONDS_PER_WELL=8, CELERY_TASK_SOFT_TIME_LIMIT=240)
+    def test_chunk_size_capped_by_soft_time_limit(self):
+        assert chunk_settings() == (30, 8)
+
+    @override_settings(BULK_PLAN_CHUNK_SIZE=25, BULK_PLAN_MAX_PARALLEL_CHUNKS=8,
+                       BULK_PLAN_SECONDS_PER_WELL=8, CELERY_TASK_SOFT_TIME_LIMIT=240)
+    def test_configured_chunk_size_kept_when_it_fits(self):
+        assert chunk_settings() == (25, 8)
+
+
+def _job():
+    return SimpleNamespace(tenant_id=1, increment_progress=MagicMock())
+
+
+def _counted(job):
+    counts = {True: 0, False: 0}
+    for call in job.increment_progress.call_args_list:
+        counts[call.kwargs.get('success', True)] += call.kwargs.get('count', 1)
+    return counts
+
+
+class TestRunChunk:
+
+    def _wells(self, ids):
+        return {api: SimpleNamespace(pk=i, api14=api) for i, api in enumerate(ids)}
+
+    def test_counts_each_well_once(self):
+        ids = ['a', 'b', 'c']
+        job = _job()
+
+        def _generate(well_id, well, existing, options):
+            if well_id == 'b':
+                raise ValueError('boom')
+            return {'well_id': well_id, 'status': 'success'}
+
+        with patch.object(bulk_plan_engine, 'prefetch_chunk', return_value=(self._wells(ids), {})), \
+                patch.object(bulk_plan_engine, 'warm_policy_context'), \
+                patch.object(bulk_plan_engine, 'generate_plan_for_well', side_effect=_generate):
+            results = run_chunk(job, ids, {})
+
+        assert [r['status'] for r in results] == ['success', 'failed', 'success']
+        assert _counted(job) == {True: 2, False: 1}
+
+    def test_soft_time_limit_fails_only_remaining_wells(self):
+        ids = ['a', 'b', 'c', 'd']
+        job = _job()
+
+        def _generate(well_id, well, existing, options):
+            if well_id == 'c':
+                raise SoftTimeLimitExceeded()
+            return {'well_id': well_id, 'status': 'success'}
+
+        with patch.object(bulk_plan_engine, 'prefetch_chunk', return_value=(self._wells(ids), {})), \
+                patch.object(bulk_plan_engine, 'warm_policy_context'), \
+                patch.object(bulk_plan_engine, 'generate_plan_for_well', side_effect=_generate) as gen:
+            results = run_chunk(job, ids, {})
+
+        assert gen.call_count == 3
+        assert [r['status'] for r in results] == ['success', 'success', 'failed', 'failed']
+        assert 'time limit' in results[2]['error']
+        assert _counted(job) == {True: 2, False: 2}
+
+    def test_prefetch_failure_fails_whole_chunk_once(self):
+        job = _job()
+        with patch.object(bulk_plan_engine, 'prefetch_chunk', side_effect=RuntimeError('db down')):
+            results = run_chunk(job, ['a', 'b'], {})
+
+        assert [r['error'] for r in results] == ['db down', 'db down']
+        assert _counted(job) == {True: 0, False: 2}
+
+
+class TestChordErrorCallback:
+
+    def test_fails_job(self):
+        job = MagicMock()
+        with patch('apps.public_core.models.BulkJob.objects') as objects:
+            objects.get.return_value = job
+            tasks.bulk_generate_plans_failed(SimpleNamespace(id='t1'), TimeoutError('hard limit'), None, 'job-1')
+
+        objects.get.assert_called_once_with(id='job-1')
+        job.fail.assert_called_once()
+        assert 'hard limit' in job.fail.call_args.args[0]
+
+
+class TestSummarize:
+
+    def test_counts_skipped_as_processed(self):
+        results = [
+            {'well_id': 'a', 'status': 'success'},
+            {'well_id': 'b', 'status': 'skipped'},
+            {'well_id': 'c', 'status': 'failed', 'error': 'boom'},
+        ]
+        assert summarize(results, 3) == {'total': 3, 'processed': 2, 'failed': 1}
@@ -0,0 +1,152 @@
+"""
+Tests for bulk vectorization (bulk_vectorizer).
+
+Tests coverage:
+- Batch packing keeps documents whole and respects text/token bounds
+- Oversized documents are split across consecutive batches and reassembled
+- Rows are bulk-inserted in chunks; a failed batch fails only its documents
+- replace_existing deletes old vectors in the write transaction
+"""
+
+import contextlib
+import threading
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.public_core.models.document_vector import DocumentVector
+from apps.public_core.services import bulk_vectorizer
+from apps.public_core.services.bulk_vectorizer import pack_batches, vectorize_documents
+
+
+def _doc(n_remarks=1, text='hello world'):
+    json_data = {f'remarks_{i}': text for i in range(n_remarks)}
+    return SimpleNamespace(
+        id=uuid.uuid4(), document_type='sundry', json_data=json_data, well=None,
+        api_number='42-003-05770', model_tag='gpt-4o', source_path='/tmp/a.pdf',
+        uploaded_by_tenant=None,
+    )
+
+
+def _sections(n, size=40):
+    return [(f's{i}', 'x' * size) for i in range(n)]
+
+
+class _FakeEmbed:
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.calls.append(list(texts))
+        if self.fail_on and self.fail_on in texts:
+            raise RuntimeError('embeddings down')
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def one_section_per_key():
+    with patch('apps.public_core.services.openai_extraction.iter_json_sections_for_embedding',
+               side_effect=lambda doc_type, data: list(data.items())):
+        yield
+
+
+@pytest.fixture
+def db_writes():
+    """Capture bulk_create/delete without a database."""
+    written = []
+    deleted_filters = []
+
+    def _bulk_create(rows, batch_size=None):
+        written.append(list(rows))
+        return rows
+
+    def _filter(**kwargs):
+        deleted_filters.append(kwargs)
+        qs = MagicMock()
+        qs.delete.return_value = (3, {})
+        return qs
+
+    with patch.object(DocumentVector.objects, 'bulk_create', side_effect=_bulk_create), \
+            patch.object(DocumentVector.objects, 'filter', side_effect=_filter), \
+            patch.object(bulk_vectorizer.transaction, 'atomic', contextlib.nullcontext):
+        yield SimpleNamespace(written=written, deleted_filters=deleted_filters)
+
+
+class TestPackBatches:
+
+    def test_documents_kept_whole(self):
+        docs = [('a', _sections(3)), ('b', _sections(3)), ('c', _sections(3))]
+        batches = list(pack_batches(docs, max_texts=7, max_tokens=10 ** 6))
+        assert [[p.doc for p in b.parts] for b in batches] == [['a', 'b'], ['c']]
+        assert all(p.last for b in batches for p in b.parts)
+
+    def test_token_bound(self):
+        docs = [('a', _sections(2, size=400)), ('b', _sections(2, size=400))]
+        batches = list(pack_batches(docs, max_texts=100, max_tokens=250))
+        assert [b.tokens <= 250 for b in batches] == [True, True]
+        assert len(batches) == 2
+
+    def test_oversized_document_split(self):
+        batches = list(pack_batches([('big', _sections(5)), ('small', _sections(1))], max_texts=2, max_tokens=10 ** 6))
+        parts = [(p.doc, len(p.sections), p.last) for b in batches for p in b.parts]
+        assert parts == [('big', 2, False), ('big', 2, False), ('big', 1, True), ('small', 1, True)]
+        assert all(b.texts <= 2 for b in batches)
+
+
+class TestVectorizeDocuments:
+
+    def test_batches_across_documents_and_chunks_writes(self, db_writes):
+        docs = [_doc(n_remarks=2) for _ in range(5)]
+        embed = _FakeEmbed()
+        result = vectorize_documents(docs, embed=embed, max_batch_texts=4, write_chunk=4, embed_workers=2)
+
+        assert result.documents == 5
+        assert result.vectors == 10
+        assert result.batches == len(embed.calls) == 3
+        assert all(len(rows) <= 6 for rows in db_writes.written)
+        rows = [r for chunk in db_writes.written for r in chunk]
+        assert {r.metadata['ed_id'] for r in rows} == {str(d.id) for d in docs}
+        assert {r.ed_id for r in rows} == {d.id for d in docs}
+        assert {r.api_number for r in rows} == {'42-003-05770'}
+        assert db_writes.deleted_filters == []
+
+    def test_split_document_reassembled(self, db_writes):
+        doc = _doc(n_remarks=5)
+        result = vectorize_documents([doc], embed=_FakeEmbed(), max_batch_texts=2, write_chunk=100)
+        assert result.batches == 3
+        assert [len(chunk) for chunk in db_writes.written] == [5]
+
+    def test_failed_batch_only_fails_its_documents(self, db_writes):
+        good = _doc(text='fine')
+        bad = _doc(text='poison')
+        result = vectorize_documents(
+            [good, bad], embed=_FakeEmbed(fail_on='poison'), max_batch_texts=1, write_chunk=100,
+        )
+        assert result.failed_ids == [str(bad.id)]
+        assert result.documents == 1
+        assert [r.metadata['ed_id'] for chunk in db_writes.written for r in chunk] == [str(good.id)]
+
+    def test_replace_existing_deletes_in_write(self, db_writes):
+        docs = [_doc(), _doc()]
+        empty = _doc(n_remarks=0)
+        progress = []
+        result = vectorize_documents(
+            docs + [empty], embed=_FakeEmbed(), replace_existing=True, on_progress=lambda r: progress.append(r.documents),
+        )
+        assert len(db_writes.deleted_filters) == 1
+        assert set(db_writes.deleted_filters[0]['ed_id__in']) == {d.id for d in docs + [empty]}
+        assert result.deleted == 3
+        assert result.documents == 3 and result.vectors == 2
+        assert progress == [3]
+
+    def test_empty_documents_skipped_in_backfill(self, db_writes):
+        result = vectorize_documents([_doc(n_remarks=0)], embed=_FakeEmbed())
+        assert result.skipped == 1
+        assert result.batches == 0
+        assert db_writes.written == []
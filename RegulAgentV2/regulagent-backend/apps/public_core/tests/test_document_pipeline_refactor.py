@@ -704,7 +704,7 @@ class TestTimelineBuilder(TestCase):
         assert len(events) == 4
 
     def test_refresh_timeline_idempotent(self):
-        """refresh_timeline should delete + rebuild cleanly."""
+        """Repeated refresh_timeline calls should not duplicate events."""
         from apps.public_core.services.timeline_builder import refresh_timeline
 
         ExtractedDocument.objects.create(
@@ -726,6 +726,75 @@ class TestTimelineBuilder(TestCase):
         assert len(events2) == 1
         assert WellTimelineEvent.objects.filter(well=self.well).count() == 1
 
+    def test_refresh_timeline_incremental(self):
+        """Only new or changed documents are re-derived; untouched rows keep their PK."""
+        from apps.public_core.services import timeline_builder
+
+        w2 = ExtractedDocument.objects.create(
+            well=self.well, api_number="42003356630000",
+            document_type="w2", source_path="/tmp/w2.pdf",
+            status="success",
+            json_data={"completion_info": {"completion_date": "1990-01-01"}},
+        )
+        w3 = ExtractedDocument.objects.create(
+            well=self.well, api_number="42003356630000",
+            document_type="w3", source_path="/tmp/w3.pdf",
+            status="success",
+            json_data={"plugging_summary": {"plug_date": "2001-05-01"}},
+        )
+        timeline_builder.refresh_timeline(self.well)
+        w2_event = WellTimelineEvent.objects.get(source_document=w2)
+
+        w3.json_data = {"plugging_summary": {"plug_date": "2003-05-01"}}
+        w3.save()
+        with patch.object(timeline_builder, "build_event", wraps=timeline_builder.build_event) as build:
+            events = timeline_builder.refresh_timeline(self.well)
+
+        assert [call.args[1].id for call in build.call_args_list] == [w3.id]
+        assert len(events) == 2
+        assert WellTimelineEvent.objects.get(source_document=w2).id == w2_event.id
+        assert WellTimelineEvent.objects.get(source_document=w3).event_date == date(2003, 5, 1)
+
+        with patch.object(timeline_builder, "build_event") as build:
+            timeline_builder.refresh_timeline(self.well)
+        build.assert_not_called()
+
+    def test_refresh_timeline_drops_removed_sources(self):
+        """Events whose document is deleted or no longer successful are removed."""
+        from apps.public_core.services.timeline_builder import refresh_timeline
+
+        docs = [
+            ExtractedDocument.objects.create(
+                well=self.well, api_number="42003356630000",
+                document_type=doc_type, source_path=f"/tmp/{doc_type}.pdf",
+                status="success", json_data={},
+            )
+            for doc_type in ("w1", "w2", "w15")
+        ]
+        assert len(refresh_timeline(self.well)) == 3
+
+        docs[0].delete()
+        docs[1].status = "error"
+        docs[1].save()
+        events = refresh_timeline(self.well)
+
+        assert [e.source_document_id for e in events] == [docs[2].id]
+
+    def test_refresh_timeline_rebuild(self):
+        """rebuild=True re-derives every event."""
+        from apps.public_core.services.timeline_builder import refresh_timeline
+
+        ExtractedDocument.objects.create(
+            well=self.well, api_number="42003356630000",
+            document_type="w2", source_path="/tmp/w2.pdf",
+            status="success", json_data={},
+        )
+        first = refresh_timeline(self.well)
+        rebuilt = refresh_timeline(self.well, rebuild=True)
+
+        assert len(rebuilt) == 1
+        assert rebuilt[0].id != first[0].id
+
     def test_date_parsing_formats(self):
         """Verify various date formats are parsed correctly."""
         from apps.public_core.services.timeline_builder import _parse_date_string
@@ -0,0 +1,212 @@
+"""
+Tests for the content-addressed extraction cache.
+
+Tests coverage:
+- Cache key changes with prompt, model and schema, not with the file path
+- extract_json_from_pdf / classify_document skip the model on a hit
+- Successful extractions are stored with their token usage
+- Lookup/store/invalidate round trip and hit metrics (database)
+- classify_document consults the classification index before the cache/model
+- Classification index round trip, per-path entries and reuse of existing extractions (database)
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.public_core.services import classification_index, extraction_cache, openai_extraction
+
+
+@pytest.fixture
+def pdf_copies(tmp_path):
+    body = b'%PDF-1.4 identical bytes'
+    a = tmp_path / 'well_a' / 'w2.pdf'
+    b = tmp_path / 'well_b' / 'download (1).pdf'
+    for p in (a, b):
+        p.parent.mkdir()
+        p.write_bytes(body)
+    return a, b
+
+
+@pytest.fixture(autouse=True)
+def cache_enabled(monkeypatch):
+    monkeypatch.setenv('EXTRACTION_CACHE_ENABLED', 'true')
+    extraction_cache.reset_stats()
+
+
+class TestCacheKey:
+
+    def test_same_bytes_different_path_share_key(self, pdf_copies):
+        a, b = pdf_copies
+        ka = openai_extraction._cache_meta(a, 'w2', 'prompt', 'gpt-4o', {'s': 1})['key']
+        kb = openai_extraction._cache_meta(b, 'w2', 'prompt', 'gpt-4o', {'s': 1})['key']
+        assert ka == kb
+
+    @pytest.mark.parametrize('change', [
+        {'doc_type': 'w15'}, {'prompt': 'prompt v2'}, {'model': 'gpt-4o-mini'}, {'schema': {'s': 2}},
+    ])
+    def test_inputs_change_key(self, pdf_copies, change):
+        base = dict(doc_type='w2', prompt='prompt', model='gpt-4o', schema={'s': 1})
+        key = openai_extraction._cache_meta(pdf_copies[0], **base)['key']
+        assert openai_extraction._cache_meta(pdf_copies[0], **dict(base, **change))['key'] != key
+
+    def test_disabled(self, pdf_copies, monkeypatch):
+        monkeypatch.setenv('EXTRACTION_CACHE_ENABLED', 'false')
+        assert openai_extraction._cache_meta(pdf_copies[0], 'w2', 'p', 'm', {}) is None
+
+
+class TestExtractionUsesCache:
+
+    def test_hit_skips_model(self, pdf_copies):
+        cached = {'json_data': {'header': {'api': '42-003-05770'}}, 'raw_text': 'txt', 'tokens_used': 900}
+        with patch.object(extraction_cache, 'lookup', return_value=cached), \
+                patch.object(openai_extraction, 'get_openai_client') as get_client:
+            result = openai_extraction.extract_json_from_pdf(pdf_copies[1], 'w2')
+
+        get_client.assert_not_called()
+        assert result.cache_hit
+        assert result.tokens_used == 0
+        assert result.json_data == cached['json_data']
+        assert result.raw_text == 'txt'
+
+    def test_miss_stores_result_and_tokens(self, pdf_copies, settings, tmp_path):
+        settings.BASE_DIR = tmp_path
+        client = MagicMock()
+        client.responses.create.return_value = SimpleNamespace(
+            output=[], output_text='{"header": {"api": "42-003-05770"}}',
+            usage=SimpleNamespace(total_tokens=1234),
+        )
+        with patch.object(extraction_cache, 'lookup', return_value=None), \
+                patch.object(extraction_cache, 'store') as store, \
+                patch.object(openai_extraction, 'get_openai_client', return_value=client), \
+                patch('apps.public_core.services.extraction_validator.validate_extracted_data',
+                      side_effect=lambda doc_type, data: data):
+            result = openai_extraction.extract_json_from_pdf(pdf_copies[0], 'w2')
+
+        assert not result.cache_hit
+        assert store.call_count == 1
+        kwargs = store.call_args.kwargs
+        assert kwargs['doc_type'] == 'w2'
+        assert kwargs['tokens_used'] == 1234
+        assert kwargs['json_data']['header'] == {'api': '42-003-05770'}
+
+    def test_classify_hit_skips_model(self, pdf_copies):
+        client = MagicMock()
+        with patch.object(extraction_cache, 'lookup', return_value={'json_data': {'label': 'c_103'}, 'raw_text': '', 'tokens_used': 50}), \
+                patch.object(openai_extraction, 'get_openai_client', return_value=client):
+            # Filename matches no heuristic, so classification reaches the cache
+            label = openai_extraction.classify_document(pdf_copies[1], candidate_types=['c_103', 'c_105'])
+
+        assert label == 'c_103'
+        client.chat.completions.create.assert_not_called()
+
+
+class TestClassificationIndexShortCircuit:
+
+    def test_index_hit_skips_cache_and_model(self, pdf_copies):
+        client = MagicMock()
+        with patch.object(classification_index, 'lookup', return_value='c_105') as lookup, \
+                patch.object(extraction_cache, 'lookup') as cache_lookup, \
+                patch.object(openai_extraction, 'get_openai_client', return_value=client):
+            label = openai_extraction.classify_document(pdf_copies[1], candidate_types=['c_103', 'c_105'])
+
+        assert label == 'c_105'
+        assert lookup.call_args.args == (
+            extraction_cache.file_sha256(pdf_copies[1]), str(pdf_copies[1]), ['c_103', 'c_105'],
+        )
+        cache_lookup.assert_not_called()
+        client.chat.completions.create.assert_not_called()
+
+    def test_model_label_is_indexed(self, pdf_copies):
+        client = MagicMock()
+        client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='c_103'))], usage=None,
+        )
+        with patch.object(classification_index, 'lookup', return_value=None), \
+                patch.object(classification_index, 'record') as record, \
+                patch.object(extraction_cache, 'lookup', return_value=None), \
+                patch.object(extraction_cache, 'store'), \
+                patch.object(openai_extraction, 'get_openai_client', return_value=client):
+            label = openai_extraction.classify_document(pdf_copies[1], candidate_types=['c_103', 'c_105'])
+
+        assert label == 'c_103'
+        sha, path, doc_type, method, _ = record.call_args.args
+        assert (path, doc_type, method) == (str(pdf_copies[1]), 'c_103', 'llm')
+
+
+@pytest.mark.django_db
+class TestClassificationIndex:
+
+    def test_round_trip(self):
+        from apps.public_core.models import DocumentClassification
+
+        assert classification_index.lookup('a' * 64, '/media/w2.pdf') is None
+        classification_index.record('a' * 64, '/media/w2.pdf', 'w2', 'llm', 'gpt-4o-mini')
+        classification_index.record('b' * 64, '/media/x.pdf', 'unknown', 'llm')
+        assert classification_index.lookup('a' * 64, '/media/w2.pdf') == 'w2'
+        assert classification_index.lookup('a' * 64, '/media/w2.pdf', candidate_types=['c_103']) is None
+        assert not DocumentClassification.objects.filter(file_sha256='b' * 64).exists()
+
+        # Same bytes at another path fall back to the existing label
+        assert classification_index.lookup('a' * 64, '/media/copy.pdf') == 'w2'
+        # New bytes at a known path are not resolved from the old label
+        assert classification_index.lookup('c' * 64, '/media/w2.pdf') is None
+
+    def test_entries_are_per_path(self):
+        from apps.public_core.models import DocumentClassification
+
+        classification_index.record('a' * 64, '/media/w2.pdf', 'w2', 'llm')
+        classification_index.record('a' * 64, '/media/copy.pdf', 'w15', 'extraction_cache')
+        classification_index.record('a' * 64, '/media/w2.pdf', 'w2', 'llm')
+
+        assert DocumentClassification.objects.filter(file_sha256='a' * 64).count() == 2
+        assert classification_index.lookup('a' * 64, '/media/copy.pdf') == 'w15'
+        assert classification_index.lookup('a' * 64, '/media/w2.pdf') == 'w2'
+
+    def test_orchestrator_reuse_requires_matching_doc_type(self, pdf_copies):
+        from apps.public_core.models import ExtractedDocument
+        from apps.public_core.services import w3a_orchestrator
+
+        path = pdf_copies[1]
+        ed = ExtractedDocument.objects.create(
+            api_number='4200305770', document_type='w15', source_path=str(path),
+            status='success', json_data={'x': 1},
+        )
+        with patch.object(w3a_orchestrator, 'classify_document', return_value='w15'):
+            assert w3a_orchestrator._classify_reusing_extraction('4200305770', str(path)) == ('w15', ed)
+        with patch.object(w3a_orchestrator, 'classify_document', return_value='w2'):
+            assert w3a_orchestrator._classify_reusing_extraction('4200305770', str(path)) == ('w2', None)
+
+
+@pytest.mark.django_db
+class TestCacheStore:
+
+    def _store(self, sha='a' * 64, doc_type='w2', key='k1', tokens=100):
+        extraction_cache.store(
+            key, file_sha=sha, doc_type=doc_type, prompt_ver='1:abc', model='gpt-4o',
+            schema_hash='def', json_data={'x': 1}, raw_text='t', tokens_used=tokens,
+        )
+
+    def test_round_trip_and_metrics(self):
+        from apps.public_core.models import ExtractionCacheEntry
+
+        assert extraction_cache.lookup('k1') is None
+        self._store()
+        entry = extraction_cache.lookup('k1')
+        assert entry['json_data'] == {'x': 1}
+        assert ExtractionCacheEntry.objects.get(cache_key='k1').hit_count == 1
+        assert extraction_cache.stats() == {
+            'hits': 1, 'misses': 1, 'stores': 1, 'errors': 0, 'tokens_saved': 100,
+        }
+
+    def test_invalidate_filters(self):
+        self._store(key='k1', doc_type='w2')
+        self._store(key='k2', doc_type='w15', sha='b' * 64)
+        assert extraction_cache.invalidate(doc_type='w15', dry_run=True) == 1
+        assert extraction_cache.invalidate(doc_type='w15') == 1
+        assert extraction_cache.lookup('k2') is None
+        assert extraction_cache.lookup('k1') is not None
+        with pytest.raises(ValueError):
+            extraction_cache.invalidate()
+        assert extraction_cache.invalidate(everything=True) == 1
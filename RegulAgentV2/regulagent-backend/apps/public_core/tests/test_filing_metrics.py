@@ -0,0 +1,142 @@
+"""
+Tests for the filing metrics rollup (filing_metrics).
+
+Tests coverage:
+- Metrics are derived from one aggregate per table
+- Rollups are cached per tenant; invalidate() drops one tenant or all
+- refresh only recomputes cached rollups whose generation changed
+- Filing saves invalidate the cache on commit (private snapshots: own tenant only)
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import caches
+
+from apps.public_core.models import PlanSnapshot, W3FormORM
+from apps.public_core.services import filing_metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache = caches[filing_metrics.CACHE_ALIAS]
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _aggregates(w3a, w3):
+    return [
+        patch.object(PlanSnapshot.objects, 'filter', return_value=_Agg(w3a)),
+        patch.object(W3FormORM.objects, 'aggregate', return_value=w3),
+    ]
+
+
+class _Agg:
+
+    def __init__(self, result):
+        self.result = result
+
+    def aggregate(self, **kwargs):
+        assert set(kwargs) == {'active', 'rejected'}
+        return self.result
+
+
+class TestComputeFilingMetrics:
+
+    def test_derived_values(self):
+        w3 = {
+            'active': 5, 'rejected': 2, 'submitted': 8, 'submitted_rejected': 1,
+            'avg_time_to_submission': timedelta(minutes=9),
+        }
+        p1, p2 = _aggregates({'active': 40, 'rejected': 6}, w3)
+        with p1, p2 as w3_aggregate:
+            metrics = filing_metrics.compute_filing_metrics('tenant-1')
+
+        assert w3_aggregate.call_count == 1
+        assert metrics == {
+            'active_filings': 45,
+            'requires_action': 8,
+            'avg_time_to_submission_seconds': 540,
+            'rejection_rate': 12.5,
+            'total_submitted': 8,
+            'total_rejected': 1,
+        }
+
+    def test_no_submissions(self):
+        w3 = {'active': 0, 'rejected': 0, 'submitted': 0, 'submitted_rejected': 0, 'avg_time_to_submission': None}
+        p1, p2 = _aggregates({'active': 0, 'rejected': 0}, w3)
+        with p1, p2:
+            metrics = filing_metrics.compute_filing_metrics(None)
+        assert metrics['avg_time_to_submission_seconds'] is None
+        assert metrics['rejection_rate'] == 0.0
+
+
+class TestRollupCache:
+
+    def test_cached_per_tenant_until_invalidated(self):
+        with patch.object(filing_metrics, 'compute_filing_metrics', side_effect=lambda t: {'tenant': t}) as compute:
+            assert filing_metrics.get_filing_metrics('a') == {'tenant': 'a'}
+            assert filing_metrics.get_filing_metrics('a') == {'tenant': 'a'}
+            assert filing_metrics.get_filing_metrics(None) == {'tenant': None}
+            assert compute.call_count == 2
+
+            filing_metrics.invalidate()
+            filing_metrics.get_filing_metrics('a')
+            assert compute.call_count == 3
+
+    def test_tenant_invalidation_keeps_other_tenants(self):
+        with patch.object(filing_metrics, 'compute_filing_metrics', side_effect=lambda t: {'tenant': t}) as compute:
+            filing_metrics.get_filing_metrics('a')
+            filing_metrics.get_filing_metrics('b')
+            filing_metrics.invalidate('a')
+            filing_metrics.get_filing_metrics('a')
+            filing_metrics.get_filing_metrics('b')
+            assert [c.args[0] for c in compute.call_args_list] == ['a', 'b', 'a']
+
+    def test_refresh_only_recomputes_stale_cached_rollups(self):
+        with patch.object(filing_metrics, 'compute_filing_metrics', side_effect=lambda t: {'tenant': t}) as compute:
+            filing_metrics.get_filing_metrics('a')
+            filing_metrics.get_filing_metrics('b')
+            filing_metrics.invalidate('a')
+            compute.reset_mock()
+
+            # 'b' is current and 'idle' has no cached rollup
+            assert filing_metrics.refresh_filing_metrics(['a', 'b', 'idle']) == 1
+            assert [c.args[0] for c in compute.call_args_list] == ['a']
+
+            filing_metrics.get_filing_metrics('a')
+            assert compute.call_count == 1
+
+
+class TestInvalidationSignal:
+
+    def test_save_invalidates_on_commit(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from apps.public_core.signals import on_filing_changed
+
+        for model in (PlanSnapshot, W3FormORM):
+            assert post_save.has_listeners(model) and post_delete.has_listeners(model)
+
+        with patch('apps.public_core.signals.transaction.on_commit') as on_commit:
+            on_filing_changed(sender=W3FormORM, instance=None, created=True)
+        callback = on_commit.call_args.args[0]
+        assert callback.func is filing_metrics.invalidate and callback.args == (None,)
+
+    @pytest.mark.parametrize('visibility, kwargs, expected', [
+        ('private', {'created': True}, 't1'),
+        ('private', {'created': False, 'update_fields': {'status'}}, 't1'),
+        ('private', {'created': False, 'update_fields': None}, None),
+        ('private', {}, 't1'),  # post_delete
+        ('public', {'created': True}, None),
+    ])
+    def test_plan_snapshot_scope(self, visibility, kwargs, expected):
+        from apps.public_core.signals import on_filing_changed
+
+        snapshot = SimpleNamespace(tenant_id='t1', visibility=visibility)
+        with patch('apps.public_core.signals.transaction.on_commit') as on_commit:
+            on_filing_changed(sender=PlanSnapshot, instance=snapshot, **kwargs)
+        assert on_commit.call_args.args[0].args == (expected,)
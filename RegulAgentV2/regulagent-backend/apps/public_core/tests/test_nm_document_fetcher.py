@@ -184,58 +184,134 @@ class TestDocumentDownload:
             assert content == b"PDF content"
             mock_get.assert_called_once_with("https://example.com/test.pdf", timeout=60.0)
 
-    def test_download_all_documents(self):
-        """Test downloading all documents for a well."""
+
+def _streaming_response(body=b"PDF content", fail=False):
+    response = Mock()
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    response.raise_for_status = Mock(side_effect=Exception("Download failed") if fail else None)
+    response.iter_content = Mock(return_value=[body[:3], body[3:]])
+    return response
+
+
+class TestStreamedDownload:
+    """Test streamed downloads to temporary files."""
+
+    def test_download_to_file_streams_and_hashes(self, tmp_path):
+        """Test the body is written to disk and hashed while streaming."""
+        import hashlib
+
         fetcher = NMDocumentFetcher()
+        doc = NMDocument(filename="test.pdf", url="https://example.com/test.pdf")
 
-        # Mock list_documents
-        mock_docs = [
-            NMDocument(filename="doc1.pdf", url="https://example.com/doc1.pdf"),
-            NMDocument(filename="doc2.pdf", url="https://example.com/doc2.pdf"),
-        ]
+        with patch.object(fetcher.session, 'get', return_value=_streaming_response()) as mock_get:
+            stored, path = fetcher.download_to_file(doc, tmp_path)
+
+        mock_get.assert_called_once_with("https://example.com/test.pdf", timeout=60.0, stream=True)
+        assert path.parent == tmp_path
+        assert path.suffix == ".pdf"
+        assert path.read_bytes() == b"PDF content"
+        assert stored.sha256 == hashlib.sha256(b"PDF content").hexdigest()
+        assert stored.size_bytes == len(b"PDF content")
+        assert doc.sha256 is None
 
-        with patch.object(fetcher, 'list_documents', return_value=mock_docs):
-            with patch.object(fetcher.session, 'get') as mock_get:
-                mock_response = Mock()
-                mock_response.content = b"PDF content"
-                mock_response.raise_for_status = Mock()
-                mock_get.return_value = mock_response
+    def test_same_filename_gets_distinct_files(self, tmp_path):
+        """Test documents sharing a filename never write to the same path."""
+        fetcher = NMDocumentFetcher()
+        doc = NMDocument(filename="C-103.pdf", url="https://example.com/a.pdf")
 
-                results = fetcher.download_all_documents("30-015-28692")
+        with patch.object(fetcher.session, 'get', side_effect=lambda url, **kw: _streaming_response()):
+            _, first = fetcher.download_to_file(doc, tmp_path)
+            _, second = fetcher.download_to_file(doc, tmp_path)
 
-                assert len(results) == 2
-                assert results[0][0].filename == "doc1.pdf"
-                assert results[0][1] == b"PDF content"
-                assert results[1][0].filename == "doc2.pdf"
-                assert results[1][1] == b"PDF content"
+        assert first != second
+        assert sorted(tmp_path.iterdir()) == sorted([first, second])
 
-    def test_download_all_documents_handles_errors(self):
-        """Test download_all_documents continues on individual failures."""
+    def test_failed_download_removes_file(self, tmp_path):
+        """Test a failed download leaves nothing behind."""
         fetcher = NMDocumentFetcher()
+        doc = NMDocument(filename="bad.pdf", url="https://example.com/bad.pdf")
+
+        with patch.object(fetcher.session, 'get', return_value=_streaming_response(fail=True)):
+            with pytest.raises(Exception, match="Download failed"):
+                fetcher.download_to_file(doc, tmp_path)
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_nm_adapter_releases_download(self, tmp_path):
+        """Test NMAdapter downloads to a temp file and deletes it on release."""
+        from apps.public_core.services.adapters.base import DocumentSpec
+        from apps.public_core.services.adapters.nm_adapter import NMAdapter
+
+        adapter = NMAdapter()
+        spec = DocumentSpec(filename="C-103.pdf", url="https://example.com/c103.pdf")
 
+        with patch('tempfile.tempdir', str(tmp_path)):
+            with patch('requests.Session.get', return_value=_streaming_response()):
+                local_path = adapter.download_document(spec)
+
+        assert local_path.parent == tmp_path
+        assert local_path.read_bytes() == b"PDF content"
+
+        adapter.release_document(local_path)
+        assert not local_path.exists()
+
+
+class TestConcurrentDownload:
+    """Test bounded-parallel downloads saved to storage."""
+
+    def _storage(self, tmp_path):
+        from django.core.files.storage import FileSystemStorage
+
+        return FileSystemStorage(location=str(tmp_path / "media"))
+
+    def test_download_all_documents_saves_to_storage(self, tmp_path):
+        """Test every document is streamed, saved under ocd/nm/{api14}/ and its temp file removed."""
+        import hashlib
+
+        fetcher = NMDocumentFetcher(max_workers=2)
+        storage = self._storage(tmp_path)
+        mock_docs = [
+            NMDocument(filename="doc1.pdf", url="https://example.com/doc1.pdf"),
+            NMDocument(filename="doc2.pdf", url="https://example.com/doc2.pdf"),
+            NMDocument(filename="doc2.pdf", url="https://example.com/other/doc2.pdf"),
+        ]
+
+        with patch('tempfile.tempdir', str(tmp_path)):
+            with patch.object(fetcher, 'list_documents', return_value=mock_docs):
+                with patch.object(fetcher.session, 'get', side_effect=lambda url, **kw: _streaming_response()):
+                    results = fetcher.download_all_documents("30-015-28692", storage=storage)
+
+        names = sorted(name for _, name in results)
+        assert len(set(names)) == 3
+        assert all(name.startswith("ocd/nm/30015286920000/doc") for name in names)
+        for doc, name in results:
+            assert storage.open(name).read() == b"PDF content"
+            assert doc.sha256 == hashlib.sha256(b"PDF content").hexdigest()
+        assert [p.name for p in tmp_path.iterdir()] == ["media"]
+
+    def test_failed_download_is_skipped(self, tmp_path):
+        """Test iter_download_documents continues on individual failures."""
+        fetcher = NMDocumentFetcher()
+        storage = self._storage(tmp_path)
         mock_docs = [
             NMDocument(filename="good.pdf", url="https://example.com/good.pdf"),
             NMDocument(filename="bad.pdf", url="https://example.com/bad.pdf"),
         ]
 
-        with patch.object(fetcher, 'list_documents', return_value=mock_docs):
-            with patch.object(fetcher.session, 'get') as mock_get:
-                # First call succeeds, second fails
-                def side_effect(*args, **kwargs):
-                    if 'bad.pdf' in args[0]:
-                        raise Exception("Download failed")
-                    mock_response = Mock()
-                    mock_response.content = b"PDF content"
-                    mock_response.raise_for_status = Mock()
-                    return mock_response
+        def side_effect(url, **kwargs):
+            return _streaming_response(fail='bad.pdf' in url)
+
+        with patch.object(fetcher.session, 'get', side_effect=side_effect):
+            results = list(fetcher.iter_download_documents("30-015-28692", documents=mock_docs, storage=storage))
 
-                mock_get.side_effect = side_effect
+        assert [doc.filename for doc, _ in results] == ["good.pdf"]
 
-                results = fetcher.download_all_documents("30-015-28692")
+    def test_session_pool_sized_to_workers(self):
+        """Test the shared session keeps one connection per download worker."""
+        fetcher = NMDocumentFetcher(max_workers=4)
 
-                # Should have only the successful download
-                assert len(results) == 1
-                assert results[0][0].filename == "good.pdf"
+        assert fetcher.session.get_adapter("https://ocdimage.emnrd.nm.gov")._pool_maxsize == 4
 
 
 class TestContextManager:
@@ -0,0 +1,217 @@
+"""
+Tests for the sliding-window OpenAI rate limiter.
+
+Tests coverage:
+- Sliding window: no 2x burst at window edges, RPM budget
+- Per-model buckets (dated snapshots share the base model's budget)
+- Bulk lane is capped below the interactive lane
+- Reservations are settled with actual usage on the same thread
+- Redis outage falls back to the in-process window
+- Tracked client reserves before create() unless check_rate_limit already did
+- A failed create() does not leave the reservation pending
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from apps.public_core.services import openai_config
+from apps.public_core.services.openai_rate_limit import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    DEFAULT_MAX_WAIT_SECONDS,
+    ModelLimits,
+    SlidingWindowRateLimiter,
+    estimate_request_tokens,
+    parse_model_limits,
+)
+
+
+class _Clock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock, tpm=1000, rpm=100, **kwargs):
+    return SlidingWindowRateLimiter(
+        default_limits=ModelLimits(tpm=tpm, rpm=rpm),
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+
+
+class TestSlidingWindow:
+
+    def test_no_burst_across_window_edge(self):
+        clock = _Clock()
+        limiter = _limiter(clock, bulk_share=1.0)
+        clock.now = 1059.0
+        assert limiter.try_acquire(1000)[0] is not None
+        # A fixed window would reset at 1060 and admit another 1000 tokens
+        clock.now = 1061.0
+        reservation, wait = limiter.try_acquire(500)
+        assert reservation is None
+        assert wait == pytest.approx(58.0)
+
+    def test_window_slides(self):
+        clock = _Clock()
+        limiter = _limiter(clock, bulk_share=1.0)
+        limiter.try_acquire(600)
+        clock.now += 30
+        limiter.try_acquire(400)
+        clock.now += 31
+        # The first 600 expired; the 400 from 31s ago still counts
+        assert limiter.usage() == {'tokens': 400, 'requests': 1}
+        assert limiter.try_acquire(600)[0] is not None
+
+    def test_rpm_budget(self):
+        clock = _Clock()
+        limiter = _limiter(clock, tpm=10 ** 6, rpm=3, bulk_share=1.0)
+        for _ in range(3):
+            assert limiter.try_acquire(1)[0] is not None
+        assert limiter.try_acquire(1)[0] is None
+
+    def test_oversized_request_runs_alone(self):
+        clock = _Clock()
+        limiter = _limiter(clock)
+        assert limiter.try_acquire(5000)[0] is not None
+
+    def test_acquire_sleeps_until_room(self):
+        clock = _Clock()
+        limiter = _limiter(clock, bulk_share=1.0)
+        limiter.acquire(900)
+        limiter.add_tokens(900)
+        limiter.acquire(500)
+        assert clock.sleeps == [pytest.approx(60.0)]
+
+    def test_acquire_gives_up_after_max_wait(self):
+        clock = _Clock()
+        limiter = _limiter(clock, bulk_share=1.0, max_wait_seconds=5)
+        limiter.acquire(1000)
+        assert limiter.acquire(500) is None
+        assert sum(clock.sleeps) == pytest.approx(5.0)
+
+
+class TestBucketsAndLanes:
+
+    def test_model_buckets(self):
+        clock = _Clock()
+        limiter = _limiter(clock, model_limits=parse_model_limits('gpt-4o=100/10, gpt-4o-mini=5000/10'))
+        assert limiter.bucket_for('gpt-4o-2024-08-06') == 'gpt-4o'
+        assert limiter.bucket_for('gpt-4o-mini-2024-07-18') == 'gpt-4o-mini'
+        assert limiter.bucket_for('o1') == 'default'
+        limiter.try_acquire(100, model='gpt-4o', priority=PRIORITY_INTERACTIVE)
+        assert limiter.try_acquire(50, model='gpt-4o', priority=PRIORITY_INTERACTIVE)[0] is None
+        assert limiter.try_acquire(50, model='gpt-4o-mini')[0] is not None
+
+    def test_malformed_model_limits_ignored(self):
+        assert parse_model_limits('gpt-4o=abc,gpt-4o-mini=10') == {'gpt-4o-mini': ModelLimits(10, 10 ** 9)}
+
+    def test_interactive_preempts_saturated_bulk(self):
+        clock = _Clock()
+        limiter = _limiter(clock, bulk_share=0.8)
+        assert limiter.try_acquire(800, priority=PRIORITY_BULK)[0] is not None
+        assert limiter.try_acquire(100, priority=PRIORITY_BULK)[0] is None
+        assert limiter.try_acquire(150, priority=PRIORITY_INTERACTIVE)[0] is not None
+
+
+class TestReservations:
+
+    def test_actual_usage_replaces_reservation(self):
+        clock = _Clock()
+        limiter = _limiter(clock)
+        limiter.acquire(500)
+        assert limiter.has_pending()
+        limiter.add_tokens(120)
+        assert not limiter.has_pending()
+        assert limiter.usage() == {'tokens': 120, 'requests': 1}
+
+    def test_unreserved_usage_is_recorded(self):
+        clock = _Clock()
+        limiter = _limiter(clock)
+        limiter.add_tokens(70, model='gpt-4o')
+        assert limiter.usage() == {'tokens': 70, 'requests': 1}
+
+    def test_redis_outage_falls_back_to_memory(self):
+        clock = _Clock()
+        limiter = _limiter(clock, redis_url='redis://127.0.0.1:1/0')
+        assert limiter.try_acquire(100)[0] is not None
+        assert limiter._redis is None
+        assert limiter.usage() == {'tokens': 100, 'requests': 1}
+
+
+class TestTrackedClient:
+
+    @pytest.fixture
+    def limiter(self, monkeypatch):
+        clock = _Clock()
+        limiter = _limiter(clock, tpm=10 ** 6)
+        monkeypatch.setattr(openai_config, '_token_limiter', limiter)
+        return limiter
+
+    def _client(self, operation='document_extraction'):
+        raw = MagicMock()
+        raw.chat.completions.create.return_value = SimpleNamespace(
+            model='gpt-4o-2024-08-06',
+            usage=SimpleNamespace(prompt_tokens=30, completion_tokens=10, total_tokens=40),
+        )
+        return openai_config.TrackedOpenAI(raw, operation=operation)
+
+    def test_create_reserves_and_settles(self, limiter, monkeypatch):
+        monkeypatch.setattr('apps.tenants.context.get_current_tenant', lambda: None)
+        acquire = MagicMock(wraps=limiter.acquire)
+        monkeypatch.setattr(limiter, 'acquire', acquire)
+        self._client('chat_assistant').chat.completions.create(
+            model='gpt-4o', messages=[{'role': 'user', 'content': 'x' * 400}], max_tokens=200,
+        )
+        assert acquire.call_args.args == (300,)
+        assert acquire.call_args.kwargs['priority'] == PRIORITY_INTERACTIVE
+        assert limiter.usage() == {'tokens': 40, 'requests': 1}
+
+    def test_check_rate_limit_reservation_is_reused(self, limiter, monkeypatch):
+        monkeypatch.setattr('apps.tenants.context.get_current_tenant', lambda: None)
+        openai_config.check_rate_limit(estimated_tokens=1000)
+        self._client().chat.completions.create(model='gpt-4o', messages=[])
+        assert limiter.usage() == {'tokens': 40, 'requests': 1}
+
+    def test_failed_create_does_not_leave_reservation_pending(self, limiter, monkeypatch):
+        client = self._client()
+        client._client.chat.completions.create.side_effect = RuntimeError('503')
+        acquire = MagicMock(wraps=limiter.acquire)
+        monkeypatch.setattr(limiter, 'acquire', acquire)
+        with pytest.raises(RuntimeError):
+            client.chat.completions.create(model='gpt-4o', messages=[])
+        assert not limiter.has_pending()
+
+        client._client.chat.completions.create.side_effect = RuntimeError('503')
+        with pytest.raises(RuntimeError):
+            client.chat.completions.create(model='gpt-4o', messages=[])
+        assert acquire.call_count == 2
+        # Each failed call keeps its estimate in the window
+        assert limiter.usage()['requests'] == 2
+
+
+def test_default_max_wait_is_below_task_soft_limit(settings):
+    assert DEFAULT_MAX_WAIT_SECONDS < settings.CELERY_TASK_SOFT_TIME_LIMIT
+
+
+def test_estimate_counts_images_flat():
+    kwargs = {
+        'messages': [{'role': 'user', 'content': [
+            {'type': 'text', 'text': 'a' * 40},
+            {'type': 'image_url', 'image_url': {'url': 'data:image/png;base64,' + 'A' * 100000}},
+        ]}],
+        'max_tokens': 50,
+    }
+    assert estimate_request_tokens(kwargs) == 10 + 1000 + 50
@@ -0,0 +1,262 @@
+"""
+Tests for delta-encoded PlanSnapshot storage (plan_snapshot_store).
+
+Tests coverage:
+- Stubs keep queryable scalars and index keys only
+- Patches replay from the nearest keyframe, cached per snapshot version
+- A cached base is never used for a different version of its content
+- Keyframes are forced by the interval and by oversized patches
+- Reading payload on a delta row materializes it transparently
+- Only the stub is written to the column and to history; history rows replay
+  against the base's record of the patched version once the base changes
+- Edit chains, in-place edits and deletes keep every payload intact (database)
+"""
+
+import copy
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from apps.assistant.services.plan_differ import generate_json_patch
+from apps.public_core.models import PlanSnapshot
+from apps.public_core.services import plan_snapshot_store as store
+
+
+def _plan(n_steps=12, sacks=10):
+    return {
+        'district': '08A',
+        'api': '4200312345',
+        'well_header': {'state': 'TX', 'county': 'Andrews'},
+        'steps': [{'step_id': i, 'type': 'cement_plug', 'sacks': sacks, 'top_ft': 1000 * i} for i in range(n_steps)],
+        'materials_totals': {'total_sacks': sacks * n_steps},
+    }
+
+
+def _edit(plan, step_id, sacks):
+    plan = copy.deepcopy(plan)
+    plan['steps'][step_id]['sacks'] = sacks
+    return plan
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    store.clear_cache()
+    yield
+    store.clear_cache()
+
+
+class TestStub:
+
+    def test_keeps_scalars_and_index_keys(self):
+        stub = store.make_stub(_plan())
+
+        assert stub['district'] == '08A'
+        assert stub['well_header'] == {'state': 'TX', 'county': 'Andrews'}
+        assert stub['steps'] is None and stub['materials_totals'] is None
+        assert store.is_stub(stub)
+        assert not store.is_stub(_plan())
+
+
+class TestMaterialize:
+
+    def test_replays_chain_from_keyframe(self):
+        base = _plan()
+        v1 = _edit(base, 1, 20)
+        v2 = _edit(v1, 2, 30)
+        rows = {
+            1: (base, None, None, None, 0, 0),
+            2: (store.make_stub(v1), generate_json_patch(base, v1), 1, 0, 1, 0),
+            3: (store.make_stub(v2), generate_json_patch(v1, v2), 2, 0, 2, 0),
+        }
+
+        with patch.object(store, '_load_row', side_effect=rows.get) as load:
+            assert store.materialize_id(3) == v2
+            assert load.call_count == 3
+            # Every snapshot on the chain is now cached: only the row itself is read
+            assert store.materialize_id(2) == v1
+            assert load.call_count == 4
+
+    def test_cache_hands_out_copies(self):
+        store._cache.put((1, 0), _plan())
+        first = store._cache.get((1, 0))
+        first['steps'].clear()
+
+        assert len(store._cache.get((1, 0))['steps']) == 12
+
+    def test_stale_cached_base_is_ignored(self):
+        old, new = _plan(sacks=10), _plan(sacks=40)
+        child = _edit(new, 1, 20)
+        # This process cached version 0 of the base; another one changed it to version 1
+        store._cache.put((1, 0), old)
+        rows = {1: (new, None, None, None, 0, 1)}
+        snap = PlanSnapshot(
+            id=2, delta_base_id=1, delta_base_version=1, payload_version=0,
+            payload_patch=generate_json_patch(new, child), payload=store.make_stub(child),
+        )
+
+        with patch.object(store, '_load_row', side_effect=rows.get):
+            assert store.materialize(snap) == child
+
+    def test_descriptor_materializes_stub(self):
+        snap = PlanSnapshot(id=5, delta_base_id=4, payload_patch=[], payload=store.make_stub(_plan()))
+
+        with patch.object(store, 'materialize', return_value=_plan()) as materialize:
+            assert snap.payload == _plan()
+            assert snap.payload == _plan()
+
+        materialize.assert_called_once_with(snap)
+
+    def test_only_the_column_gets_the_stub(self):
+        snap = PlanSnapshot(id=5, payload=_plan())
+        snap._stored_payload = store.make_stub(_plan())
+
+        assert store.is_stub(PlanSnapshot._meta.get_field('payload').pre_save(snap, False))
+        assert snap.payload == _plan()
+
+
+class TestHistory:
+
+    def test_history_row_gets_the_stored_stub(self):
+        from apps.public_core.signals import on_plan_snapshot_history
+
+        snap = PlanSnapshot(id=5, payload=_plan())
+        record = PlanSnapshot.history.model(id=5, payload=_plan())
+        snap._stored_payload = store.make_stub(_plan())
+        on_plan_snapshot_history(PlanSnapshot.history.model, snap, record)
+
+        assert store.is_stub(record.__dict__['payload'])
+
+    def test_keyframe_history_keeps_full_payload(self):
+        from apps.public_core.signals import on_plan_snapshot_history
+
+        snap = PlanSnapshot(id=5, payload=_plan())
+        record = PlanSnapshot.history.model(id=5, payload=_plan())
+        on_plan_snapshot_history(PlanSnapshot.history.model, snap, record)
+
+        assert record.__dict__['payload'] == _plan()
+
+    def test_changed_base_falls_back_to_its_history(self):
+        old, new = _plan(sacks=10), _plan(sacks=40)
+        child = _edit(old, 1, 20)
+        record = PlanSnapshot.history.model(
+            id=2, delta_base_id=1, delta_base_version=0, payload_version=0,
+            payload_patch=generate_json_patch(old, child), payload=store.make_stub(child),
+        )
+
+        with patch.object(store, '_load_row', return_value=(new, None, None, None, 0, 1)), \
+                patch.object(store, '_historical_base', return_value=old) as historical:
+            assert record.payload == child
+
+        historical.assert_called_once_with(1, 0)
+
+
+class TestEncode:
+
+    def test_small_edit_is_delta(self):
+        base = _plan()
+        with patch.object(store, '_load_row', return_value=(base, None, None, None, 0, 3)) as load:
+            patch_ops, stub, depth, base_version = store.encode(1, _edit(base, 3, 25))
+
+        load.assert_called_once_with(1, lock=True)
+        assert (depth, base_version) == (1, 3)
+        assert patch_ops == [{'op': 'replace', 'path': '/steps/3/sacks', 'value': 25}]
+        assert store.is_stub(stub)
+
+    def test_patch_is_built_from_the_loaded_row(self):
+        old, new = _plan(sacks=10), _plan(sacks=40)
+        store._cache.put((1, 0), old)
+        with patch.object(store, '_load_row', return_value=(new, None, None, None, 0, 1)):
+            patch_ops, _, _, base_version = store.encode(1, _edit(new, 3, 25))
+
+        assert base_version == 1
+        assert patch_ops == [{'op': 'replace', 'path': '/steps/3/sacks', 'value': 25}]
+
+    @override_settings(PLAN_SNAPSHOT_KEYFRAME_INTERVAL=3)
+    def test_keyframe_interval(self):
+        base = _plan()
+        with patch.object(store, '_load_row', return_value=(store.make_stub(base), [], 0, 0, 2, 0)):
+            assert store.encode(1, _edit(base, 3, 25)) is None
+
+    def test_large_change_is_keyframe(self):
+        base = _plan()
+        with patch.object(store, '_load_row', return_value=(base, None, None, None, 0, 0)):
+            assert store.encode(1, _plan(n_steps=3, sacks=99)) is None
+
+
+@pytest.mark.django_db
+class TestPlanSnapshotDeltas:
+
+    def _chain(self, n):
+        plans = [_plan()]
+        snaps = [PlanSnapshot.objects.create(plan_id='p1', kind='baseline', payload=plans[0])]
+        for i in range(1, n + 1):
+            plans.append(_edit(plans[-1], i % 12, 10 + i))
+            snaps.append(PlanSnapshot.objects.create(
+                plan_id='p1', kind='post_edit', payload=plans[-1], delta_base=snaps[-1],
+            ))
+        return plans, snaps
+
+    @override_settings(PLAN_SNAPSHOT_KEYFRAME_INTERVAL=3)
+    def test_chain_round_trips(self):
+        plans, snaps = self._chain(5)
+
+        assert [s.delta_depth for s in snaps] == [0, 1, 2, 0, 1, 2]
+        stored = dict(PlanSnapshot.objects.values_list('pk', 'payload'))
+        assert store.is_stub(stored[snaps[2].pk]) and not store.is_stub(stored[snaps[3].pk])
+        assert PlanSnapshot.objects.filter(payload__well_header__state='TX').count() == 6
+
+        store.clear_cache()
+        for plan, snap in zip(plans, snaps):
+            assert PlanSnapshot.objects.get(pk=snap.pk).payload == plan
+
+    def test_in_place_edit_rebases_children(self):
+        plans, snaps = self._chain(2)
+        middle = PlanSnapshot.objects.get(pk=snaps[1].pk)
+        middle.payload['steps'][0]['sacks'] = 500
+        middle.save(update_fields=['payload'])
+
+        store.clear_cache()
+        middle.refresh_from_db()
+        assert middle.payload_patch is None and middle.payload['steps'][0]['sacks'] == 500
+        assert middle.payload_version == 1
+        child = PlanSnapshot.objects.get(pk=snaps[2].pk)
+        assert child.delta_base_id is None and child.payload == plans[2]
+
+    def test_unchanged_resave_keeps_stored_form(self):
+        plans, snaps = self._chain(1)
+        stale = PlanSnapshot.objects.get(pk=snaps[1].pk)
+        # Meanwhile the base is edited elsewhere, which rebases the child
+        base = PlanSnapshot.objects.get(pk=snaps[0].pk)
+        base.payload['district'] = '7C'
+        base.save()
+
+        stale.save()
+        row = PlanSnapshot.objects.filter(pk=snaps[1].pk).values_list('payload', 'payload_patch').get()
+        assert row == (plans[1], None)
+
+    def test_history_stores_stub_and_patch(self):
+        plans, snaps = self._chain(1)
+
+        record = snaps[1].history.get()
+        assert store.is_stub(record.__dict__['payload'])
+        assert record.payload_patch == snaps[1].payload_patch
+        assert record.payload == plans[1]
+
+    def test_history_replays_against_base_history(self):
+        plans, snaps = self._chain(1)
+        base = PlanSnapshot.objects.get(pk=snaps[0].pk)
+        base.payload['district'] = '7C'
+        base.save()
+        base.delete()
+
+        store.clear_cache()
+        record = PlanSnapshot.history.filter(id=snaps[1].pk).earliest('history_date')
+        assert record.payload == plans[1]
+
+    def test_delete_rebases_children(self):
+        plans, snaps = self._chain(2)
+        snaps[1].delete()
+
+        store.clear_cache()
+        assert PlanSnapshot.objects.get(pk=snaps[2].pk).payload == plans[2]
@@ -7,7 +7,9 @@ Covers:
 - _build_context_prompt() formatting
 - get_chat_history() serialization
 - stream_research_answer() SSE format and message persistence
+- astream_research_answer() async SSE stream, persistence and cleanup
 """
+import asyncio
 import json
 import pytest
 from unittest.mock import patch, MagicMock, call
@@ -381,3 +383,106 @@ def test_stream_research_answer_citations_event_content(mock_retrieve, mock_open
     assert len(citations) == 1
     assert citations[0]["doc_type"] == "c_101"
     assert citations[0]["section_name"] == "proposed_work"
+
+
+# ---------------------------------------------------------------------------
+# astream_research_answer
+# ---------------------------------------------------------------------------
+
+class _AsyncChunks:
+    """Minimal AsyncStream stand-in."""
+
+    def __init__(self, tokens, fail=False):
+        self._tokens = list(tokens)
+        self._fail = fail
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._tokens:
+            if self._fail:
+                raise RuntimeError("stream dropped")
+            raise StopAsyncIteration
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = self._tokens.pop(0)
+        return chunk
+
+    async def close(self):
+        self.closed = True
+
+
+def _async_client(stream):
+    from unittest.mock import AsyncMock
+
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(return_value=MagicMock(data=[MagicMock(embedding=[0.1, 0.2])]))
+    client.chat.completions.create = AsyncMock(return_value=stream)
+    client.close = AsyncMock()
+    return client
+
+
+async def _collect(agen):
+    return [event async for event in agen]
+
+
+def test_astream_research_answer_events_and_persistence():
+    from unittest.mock import AsyncMock
+    from apps.public_core.services import research_rag
+
+    session = MagicMock(api_number="30-015-28692", state="NM")
+    stream = _AsyncChunks(["Casing ", "at 500 ft"])
+    client = _async_client(stream)
+    sections = [{"doc_type": "c_103", "section_name": "casing", "section_text": "500 ft", "distance": 0.2, "file_name": "a.pdf"}]
+
+    history = MagicMock()
+    history.__aiter__.return_value = []
+    with patch.object(research_rag, "get_async_openai_client", return_value=client), \
+            patch.object(research_rag, "_retrieve_relevant_sections", return_value=sections) as retrieve, \
+            patch.object(research_rag.ResearchMessage.objects, "acreate", new_callable=AsyncMock) as acreate, \
+            patch.object(research_rag.ResearchMessage.objects, "filter") as filter_:
+        filter_.return_value.order_by.return_value.__getitem__.return_value = history
+        events = asyncio.run(_collect(research_rag.astream_research_answer("Casing depth?", session, top_k=5)))
+
+    types = [json.loads(e[len("data: "):])["type"] for e in events]
+    assert types == ["token", "token", "citations", "done"]
+    assert retrieve.call_args.kwargs["query_embedding"] == [0.1, 0.2]
+    assert [c.kwargs["role"] for c in acreate.call_args_list] == ["user", "assistant"]
+    assert acreate.call_args_list[1].kwargs["content"] == "Casing at 500 ft"
+    assert client.chat.completions.create.call_args.kwargs["stream"] is True
+    assert stream.closed
+    client.close.assert_awaited_once()
+
+
+def test_astream_research_answer_error_event_and_cleanup():
+    from unittest.mock import AsyncMock
+    from apps.public_core.services import research_rag
+
+    stream = _AsyncChunks(["partial"], fail=True)
+    client = _async_client(stream)
+    history = MagicMock()
+    history.__aiter__.return_value = []
+    with patch.object(research_rag, "get_async_openai_client", return_value=client), \
+            patch.object(research_rag, "_retrieve_relevant_sections", return_value=[]), \
+            patch.object(research_rag.ResearchMessage.objects, "acreate", new_callable=AsyncMock) as acreate, \
+            patch.object(research_rag.ResearchMessage.objects, "filter") as filter_:
+        filter_.return_value.order_by.return_value.__getitem__.return_value = history
+        events = asyncio.run(_collect(research_rag.astream_research_answer("Q?", MagicMock(api_number="x", state="TX"))))
+
+    payload = json.loads(events[-1][len("data: "):])
+    assert payload == {"type": "error", "message": "stream dropped"}
+    assert acreate.await_count == 1  # only the question is persisted
+    assert stream.closed
+
+
+def test_use_async_stream_only_under_asgi(monkeypatch):
+    from django.test import AsyncRequestFactory, RequestFactory
+    from apps.public_core.views.research import _use_async_stream
+
+    asgi_request = AsyncRequestFactory().post("/")
+    assert _use_async_stream(asgi_request)
+    assert not _use_async_stream(RequestFactory().post("/"))
+    monkeypatch.setenv("RESEARCH_ASYNC_STREAMING", "false")
+    assert not _use_async_stream(asgi_request)
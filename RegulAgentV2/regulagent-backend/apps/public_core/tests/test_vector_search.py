@@ -0,0 +1,117 @@
+"""
+Tests for DocumentVector nearest-neighbour search (vector_search).
+
+Tests coverage:
+- ann_embedding truncates to the shadow width and re-normalises
+- nearest re-ranks ANN candidates exactly and merges rows without a shadow
+- Falls back to the exact scan when ANN is disabled, candidates run short,
+  or k * oversample exceeds pgvector's ef_search cap
+- Indexed metadata columns are derived from (and kept in sync with) metadata
+"""
+
+import math
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.public_core.models.document_vector import (
+    ANN_DIMENSIONS, METADATA_COLUMNS, DocumentVector, ann_embedding, metadata_columns,
+)
+from apps.public_core.services import vector_search
+
+
+def _row(pk, distance):
+    return SimpleNamespace(pk=pk, distance=distance)
+
+
+class TestAnnEmbedding:
+
+    def test_truncates_and_normalises(self):
+        vec = [3.0, 4.0] + [0.0] * (ANN_DIMENSIONS - 2) + [100.0] * 10
+        out = ann_embedding(vec)
+        assert len(out) == ANN_DIMENSIONS
+        assert out[:2] == pytest.approx([0.6, 0.8])
+        assert math.isclose(math.sqrt(sum(x * x for x in out)), 1.0)
+
+    def test_none_and_zero(self):
+        assert ann_embedding(None) is None
+        assert ann_embedding([0.0] * 3072) == [0.0] * ANN_DIMENSIONS
+
+
+class TestNearest:
+
+    @pytest.fixture
+    def queryset(self):
+        qs = MagicMock()
+        qs.filter.side_effect = lambda **kwargs: SimpleNamespace(filters=kwargs)
+        return qs
+
+    def test_reranks_candidates_and_merges_missing_shadow(self, queryset, monkeypatch):
+        monkeypatch.setenv('VECTOR_ANN_ENABLED', 'true')
+
+        def _exact(qs, q, k):
+            if 'pk__in' in qs.filters:
+                return [_row(1, 0.1), _row(2, 0.3)]
+            return [_row(9, 0.2)]  # row written before the backfill
+
+        with patch.object(vector_search, '_candidate_ids', return_value=[1, 2, 3, 4]) as candidates, \
+                patch.object(vector_search, 'exact_nearest', side_effect=_exact):
+            rows = vector_search.nearest(queryset, [0.1] * 3072, 2)
+
+        assert candidates.call_args.args[2] == 2 * vector_search._oversample()
+        assert [r.pk for r in rows] == [1, 9]
+
+    def test_few_candidates_fall_back_to_exact(self, queryset, monkeypatch):
+        monkeypatch.setenv('VECTOR_ANN_ENABLED', 'true')
+        with patch.object(vector_search, '_candidate_ids', return_value=[1]), \
+                patch.object(vector_search, 'exact_nearest', return_value=[_row(1, 0.1)]) as exact:
+            vector_search.nearest(queryset, [0.1] * 3072, 5)
+        exact.assert_called_once_with(queryset, [0.1] * 3072, 5)
+
+    def test_limit_above_ef_search_cap_uses_exact(self, queryset, monkeypatch):
+        monkeypatch.setenv('VECTOR_ANN_ENABLED', 'true')
+        monkeypatch.setenv('VECTOR_ANN_OVERSAMPLE', '4')
+        with patch.object(vector_search, '_candidate_ids') as candidates, \
+                patch.object(vector_search, 'exact_nearest', return_value=[]) as exact:
+            vector_search.nearest(queryset, [0.1] * 3072, 251)
+        candidates.assert_not_called()
+        exact.assert_called_once_with(queryset, [0.1] * 3072, 251)
+
+    def test_disabled_uses_exact(self, queryset, monkeypatch):
+        monkeypatch.setenv('VECTOR_ANN_ENABLED', 'false')
+        with patch.object(vector_search, '_candidate_ids') as candidates, \
+                patch.object(vector_search, 'exact_nearest', return_value=[]) as exact:
+            vector_search.nearest(queryset, [0.1] * 3072, 3)
+        candidates.assert_not_called()
+        exact.assert_called_once()
+
+    def test_non_positive_k(self, queryset):
+        assert vector_search.nearest(queryset, [0.1], 0) == []
+
+
+class TestMetadataColumns:
+
+    def test_derived_from_metadata(self):
+        tenant, ed = uuid.uuid4(), uuid.uuid4()
+        cols = metadata_columns({
+            'api_number': '42-003-05770', 'tenant_id': str(tenant), 'district': '08A',
+            'county': 'Andrews', 'ed_id': str(ed), 'operator': 'X',
+        })
+        assert cols == {
+            'api_number': '42-003-05770', 'tenant_id': tenant, 'district': '08A',
+            'county': 'Andrews', 'ed_id': ed,
+        }
+
+    def test_missing_and_malformed(self):
+        cols = metadata_columns({'tenant_id': 'not-a-uuid', 'district': None})
+        assert cols == {'api_number': '', 'tenant_id': None, 'district': '', 'county': '', 'ed_id': None}
+        assert metadata_columns(None)['api_number'] == ''
+
+    def test_save_syncs_columns_on_metadata_update(self):
+        dv = DocumentVector(metadata={'api_number': '42-1', 'district': '7C'})
+        with patch('django.db.models.Model.save') as base_save:
+            dv.save(update_fields=['metadata'])
+        assert (dv.api_number, dv.district) == ('42-1', '7C')
+        assert set(base_save.call_args.kwargs['update_fields']) == {'metadata', *METADATA_COLUMNS}
@@ -0,0 +1,161 @@
+"""
+Tests for bounded-concurrency Vision classification.
+
+Tests coverage:
+- classify_pages preserves page order and bounds concurrency
+- Each call waits on the shared rate limiter
+- One failing page does not affect the others
+- Pool threads keep the tenant context, so OpenAI usage is still recorded
+- segment_document / classify_document_pages use the concurrent path
+"""
+
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from apps.public_core.services import neubus_classifier, openai_config
+from apps.public_core.services.neubus_classifier import PageClassification, classify_pages
+from apps.tenants.context import set_current_tenant
+
+
+@pytest.fixture
+def blank_pdf(tmp_path):
+    path = tmp_path / 'packet.pdf'
+    doc = fitz.open()
+    for _ in range(8):
+        doc.new_page(width=200, height=200)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+class _FakeVision:
+    """Stands in for _classify_single_page; tracks peak concurrency."""
+
+    def __init__(self, fail_pages=(), delay=0.02):
+        self.fail_pages = set(fail_pages)
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, image_bytes, page_num, client=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            # Later pages finish first, so ordering must not depend on completion
+            time.sleep(self.delay * (10 - page_num) / 10)
+            if page_num in self.fail_pages:
+                raise RuntimeError('boom')
+            assert image_bytes.startswith(b'\x89PNG')
+            return PageClassification(
+                page=page_num, form_type='W-2', is_continuation=False,
+                confidence='high', evidence=f'page {page_num}',
+            )
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestClassifyPages:
+
+    def test_order_preserved_and_concurrency_bounded(self, blank_pdf):
+        fake = _FakeVision()
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit') as limiter:
+            results = classify_pages(blank_pdf, [6, 1, 3, 0], client=object(), max_workers=3)
+
+        assert [r.page for r in results] == [6, 1, 3, 0]
+        assert 1 < fake.peak <= 3
+        assert limiter.call_count == 4
+
+    def test_failed_page_is_isolated(self, blank_pdf):
+        fake = _FakeVision(fail_pages={2})
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit'):
+            results = classify_pages(blank_pdf, [1, 2, 3], client=object(), max_workers=2)
+
+        assert results[1] is None
+        assert [r.page for r in (results[0], results[2])] == [1, 3]
+
+    def test_unrenderable_page_is_isolated(self, blank_pdf):
+        fake = _FakeVision()
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit'):
+            results = classify_pages(blank_pdf, [0, 99], client=object(), max_workers=2)
+
+        assert results[0].page == 0
+        assert results[1] is None
+
+    def test_serial_mode(self, blank_pdf):
+        fake = _FakeVision()
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit'):
+            results = classify_pages(blank_pdf, range(4), client=object(), max_workers=1)
+
+        assert fake.peak == 1
+        assert [r.page for r in results] == [0, 1, 2, 3]
+
+
+    def test_usage_is_tracked_for_tenant(self, blank_pdf):
+        tenant = SimpleNamespace(id=3, schema_name='acme')
+        response = SimpleNamespace(
+            model='gpt-4o-mini', usage=SimpleNamespace(prompt_tokens=900, completion_tokens=50, total_tokens=950),
+        )
+        completions = openai_config._TrackedCompletions(
+            SimpleNamespace(create=lambda **kw: response), operation='neubus_classification',
+        )
+        fake = _FakeVision(delay=0)
+
+        def _vision(image_bytes, page_num, client=None):
+            completions.create(model='gpt-4o-mini', messages=[])
+            return fake(image_bytes, page_num)
+
+        def _run():
+            set_current_tenant(tenant)
+            return classify_pages(blank_pdf, [0, 1, 2], client=object(), max_workers=2)
+
+        with patch.object(neubus_classifier, '_classify_single_page', _vision), \
+                patch.object(neubus_classifier, 'check_rate_limit'), \
+                patch.object(openai_config, '_reserve_for_call'), \
+                patch.object(openai_config._token_limiter, 'add_tokens'), \
+                patch('apps.tenants.services.usage_tracker.track_usage') as track:
+            contextvars.copy_context().run(_run)
+
+        assert track.call_count == 3
+        assert all(c.kwargs['tenant'] is tenant and c.kwargs['tokens_used'] == 950 for c in track.call_args_list)
+
+
+class TestCallers:
+
+    def test_segment_document_keeps_text_result_on_failure(self, blank_pdf):
+        from apps.public_core.services.document_segmenter import segment_document
+
+        fake = _FakeVision(fail_pages={0})
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit'), \
+                patch('apps.public_core.services.document_segmenter.attribute_segment',
+                      return_value=('', 'unresolved', 'unresolved')):
+            segments = segment_document(blank_pdf, client=object(), max_workers=4)
+
+        # Page 0 failed (stays "Other"); pages 1-7 came back as new W-2 forms
+        assert [(s.page_start, s.page_end, s.method) for s in segments] == [
+            (p, p, 'vision') for p in range(1, 8)
+        ]
+
+    def test_legacy_classifier_returns_every_page(self, blank_pdf):
+        fake = _FakeVision(fail_pages={5})
+        with patch.object(neubus_classifier, '_classify_single_page', fake), \
+                patch.object(neubus_classifier, 'check_rate_limit'), \
+                patch.object(neubus_classifier, 'get_openai_client', return_value=object()):
+            results = neubus_classifier.classify_document_pages(blank_pdf, max_workers=4)
+
+        assert [r.page for r in results] == list(range(8))
+        assert results[5].form_type == 'Other'
+        assert results[5].evidence.startswith('Classification error')
@@ -0,0 +1,142 @@
+"""
+Tests for the concurrent W-3A extraction stage (w3a_extraction_stage).
+
+Tests coverage:
+- Files are classified/extracted concurrently; results keep input order
+- Disallowed doc types are skipped and failures stay per file
+- Existing extractions of the same path and doc_type are reused without extracting
+- Pool threads keep the tenant context, so OpenAI usage is still recorded
+- New extractions are bulk-created and vectorization is queued on commit (database)
+"""
+
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from apps.public_core.services import openai_config
+from apps.public_core.services import w3a_extraction_stage as stage
+from apps.public_core.services.openai_extraction import ExtractionResult
+from apps.tenants.context import set_current_tenant
+
+
+def _files(*names):
+    return [{'name': n, 'path': f'/media/rrc/{n}'} for n in names]
+
+
+def _extraction(doc_type):
+    return ExtractionResult(document_type=doc_type, json_data={'type': doc_type}, model_tag='gpt-4.1', errors=[])
+
+
+@pytest.fixture
+def no_db():
+    def _store(docs, api, well):
+        for i, d in enumerate(docs):
+            d.document = SimpleNamespace(id=i, status='success')
+
+    with patch.object(stage, 'find_reusable_extraction', return_value=None), \
+            patch.object(stage, '_store', side_effect=_store), \
+            patch.object(stage.connections, 'close_all'):
+        yield
+
+
+class TestStage:
+
+    def test_runs_concurrently_in_order(self, no_db):
+        types = {'w2.pdf': 'w2', 'w15.pdf': 'w15', 'gau.pdf': 'gau', 'l1.pdf': 'l1'}
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def _extract(path, doc_type):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return _extraction(doc_type)
+
+        with patch.object(stage, 'classify_document', side_effect=lambda p: types[p.name]), \
+                patch.object(stage, 'extract_json_from_pdf', side_effect=_extract) as extract:
+            result = stage.run_extraction_stage(_files(*types), '4200305770', max_workers=4)
+
+        assert [d.name for d in result.documents] == list(types)
+        assert [d.doc_type for d in result.stored] == ['w2', 'w15', 'gau']
+        assert result.documents[3].skipped
+        assert extract.call_count == 3
+        assert peak[0] > 1
+
+    def test_failure_is_per_file(self, no_db):
+        def _classify(path):
+            if path.name == 'bad.pdf':
+                raise RuntimeError('unreadable')
+            return 'w2'
+
+        with patch.object(stage, 'classify_document', side_effect=_classify), \
+                patch.object(stage, 'extract_json_from_pdf', side_effect=lambda p, t: _extraction(t)):
+            result = stage.run_extraction_stage(_files('bad.pdf', 'w2.pdf'), '4200305770')
+
+        assert [d.name for d in result.failed] == ['bad.pdf']
+        assert 'unreadable' in result.failed[0].error
+        assert [d.name for d in result.stored] == ['w2.pdf']
+
+    def test_usage_is_tracked_for_tenant(self, no_db):
+        tenant = SimpleNamespace(id=3, schema_name='acme')
+        response = SimpleNamespace(
+            model='gpt-4.1', usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120),
+        )
+        completions = openai_config._TrackedCompletions(
+            SimpleNamespace(create=lambda **kw: response), operation='w3a_extraction',
+        )
+
+        def _extract(path, doc_type):
+            completions.create(model='gpt-4.1', messages=[])
+            return _extraction(doc_type)
+
+        def _run():
+            set_current_tenant(tenant)
+            return stage.run_extraction_stage(_files('w2.pdf', 'w15.pdf'), '4200305770', max_workers=2)
+
+        with patch.object(stage, 'classify_document', side_effect=lambda p: p.stem), \
+                patch.object(stage, 'extract_json_from_pdf', side_effect=_extract), \
+                patch.object(openai_config, '_reserve_for_call'), \
+                patch.object(openai_config._token_limiter, 'add_tokens'), \
+                patch('apps.tenants.services.usage_tracker.track_usage') as track:
+            contextvars.copy_context().run(_run)
+
+        assert track.call_count == 2
+        assert all(c.kwargs['tenant'] is tenant and c.kwargs['tokens_used'] == 120 for c in track.call_args_list)
+
+    def test_reuses_existing_extraction(self):
+        ed = SimpleNamespace(id=7, document_type='w15', source_path='/media/rrc/w15.pdf')
+        with patch.object(stage, 'find_reusable_extraction', return_value=ed) as find, \
+                patch.object(stage, '_store') as store, \
+                patch.object(stage, 'classify_document', return_value='w15'), \
+                patch.object(stage, 'extract_json_from_pdf') as extract, \
+                patch.object(stage.connections, 'close_all'):
+            result = stage.run_extraction_stage(_files('w15.pdf'), '4200305770')
+
+        find.assert_called_once_with('4200305770', '/media/rrc/w15.pdf', 'w15')
+        extract.assert_not_called()
+        store.assert_called_once_with([], '4200305770', None)
+        assert result.stored[0].reused and result.stored[0].document is ed
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStore:
+
+    def test_bulk_create_and_queue_vectorization(self):
+        from apps.public_core.models import ExtractedDocument
+
+        docs = [
+            stage.StagedDocument(index=i, path=f'/media/rrc/{t}.pdf', doc_type=t, extraction=_extraction(t))
+            for i, t in enumerate(['w2', 'w15'])
+        ]
+        with patch.object(stage, '_queue_vectorization') as queue:
+            stage._store(docs, '4200305770', None)
+
+        assert ExtractedDocument.objects.filter(api_number='4200305770').count() == 2
+        queue.assert_called_once_with([str(d.document.id) for d in docs])
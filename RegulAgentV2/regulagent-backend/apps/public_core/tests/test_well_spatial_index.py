@@ -0,0 +1,75 @@
+"""
+Tests for the in-memory well spatial index (well_spatial_index).
+
+Tests coverage:
+- Radius search matches a brute-force haversine scan, nearest first
+- County/field filters are case-insensitive; exclusion and limit apply
+- k-nearest widens the radius until k wells are found
+- Vectorized haversine agrees with the scalar view helper
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from apps.public_core.services.well_spatial_index import WellSpatialIndex, haversine_miles_vec
+from apps.public_core.views.similar_wells import haversine_miles
+
+SRC = (31.9, -102.3)
+
+
+@pytest.fixture
+def rows():
+    rng = random.Random(7)
+    out = []
+    for i in range(2000):
+        county = rng.choice(['Andrews', 'Ector', 'Midland'])
+        out.append((i, 'TX', 31.0 + rng.random() * 2, -103.5 + rng.random() * 2, county, 'Spraberry'))
+    out.append((5000, 'NM', *SRC, 'Lea', ''))
+    return out
+
+
+def _brute(rows, radius, **match):
+    hits = [
+        (haversine_miles(*SRC, lat, lon), i)
+        for i, state, lat, lon, county, _ in rows
+        if state == 'TX' and all(county.lower() == v.lower() for v in match.values())
+    ]
+    return [i for d, i in sorted(hits) if d <= radius]
+
+
+class TestWellSpatialIndex:
+
+    def test_within_matches_brute_force(self, rows):
+        index = WellSpatialIndex(rows, cell_deg=0.05)
+        hits = index.within(*SRC, 10.0, state='TX')
+        assert [h.well_id for h in hits] == _brute(rows, 10.0)
+        assert all(a.distance_mi <= b.distance_mi for a, b in zip(hits, hits[1:]))
+
+    def test_filters_exclude_and_limit(self, rows):
+        index = WellSpatialIndex(rows, cell_deg=0.05)
+        expected = _brute(rows, 15.0, county='ECTOR')
+        hits = index.within(*SRC, 15.0, state='TX', county=' ECTOR', field='spraberry',
+                            exclude_id=expected[0], limit=3)
+        assert [h.well_id for h in hits] == expected[1:4]
+        assert index.within(*SRC, 15.0, state='TX', field='Wolfcamp') == []
+        assert index.within(*SRC, 15.0, state='OK') == []
+
+    def test_nearest(self, rows):
+        index = WellSpatialIndex(rows, cell_deg=0.05)
+        hits = index.nearest(*SRC, 25, state='TX')
+        assert [h.well_id for h in hits] == _brute(rows, 10_000)[:25]
+        assert [h.well_id for h in index.nearest(*SRC, 5, state='NM')] == [5000]
+
+    def test_empty_index(self):
+        index = WellSpatialIndex([])
+        assert len(index) == 0
+        assert index.nearest(*SRC, 3, state='TX') == []
+
+
+def test_haversine_vec_matches_scalar():
+    lats = np.array([31.0, 32.5, -10.0])
+    lons = np.array([-100.0, -103.2, 40.0])
+    expected = [haversine_miles(*SRC, lat, lon) for lat, lon in zip(lats, lons)]
+    assert haversine_miles_vec(*SRC, lats, lons) == pytest.approx(expected)
@@ -0,0 +1,65 @@
+"""
+Tests for Celery worker memory management (ra_config.worker_memory).
+
+Tests coverage:
+- Vision/PDF tasks are routed to the heavy queue, light tasks are not
+- Preload skips modules that fail to import
+- task_postrun trims memory after heavy-queue tasks only
+- RSS is logged once it nears the recycle limit
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from ra_config import worker_memory
+
+
+def _task(routing_key, name='apps.public_core.tasks.example'):
+    return SimpleNamespace(name=name, request=SimpleNamespace(delivery_info={'routing_key': routing_key}))
+
+
+class TestRouting:
+
+    def test_heavy_tasks_routed(self):
+        route = settings.CELERY_TASK_ROUTES['apps.public_core.tasks_w3_wizard.import_wizard_plan']
+        assert route == {'queue': settings.CELERY_HEAVY_QUEUE}
+
+    def test_light_tasks_use_default_queue(self):
+        assert 'apps.public_core.tasks.fetch_filing_remarks' not in settings.CELERY_TASK_ROUTES
+        assert 'apps.public_core.tasks.embed_plan_modification' not in settings.CELERY_TASK_ROUTES
+
+
+class TestPreload:
+
+    def test_skips_missing_modules(self):
+        loaded = worker_memory.preload_modules(['json', 'apps.does_not_exist'])
+        assert loaded == ['json']
+
+    @override_settings(CELERY_WORKER_PRELOAD_MODULES=['json'])
+    def test_worker_init_freezes_gc(self):
+        with mock.patch.object(worker_memory.gc, 'freeze') as freeze:
+            worker_memory.on_worker_init()
+        freeze.assert_called_once()
+
+
+class TestPostrun:
+
+    @override_settings(CELERY_HEAVY_QUEUE='heavy', CELERY_WORKER_MAX_MEMORY_PER_CHILD=None)
+    def test_trims_after_heavy_task(self):
+        with mock.patch.object(worker_memory, '_malloc_trim') as trim:
+            worker_memory.on_task_postrun(task=_task('heavy'))
+            worker_memory.on_task_postrun(task=_task('celery'))
+        trim.assert_called_once()
+
+    @override_settings(CELERY_WORKER_MAX_MEMORY_PER_CHILD=1000)
+    def test_logs_rss_near_limit(self, caplog):
+        caplog.set_level('INFO', logger=worker_memory.__name__)
+        with mock.patch.object(worker_memory, 'current_rss_kb', return_value=900):
+            worker_memory.on_task_postrun(task=_task('celery'))
+        assert 'rss=900 KiB' in caplog.text
+
+    def test_current_rss(self):
+        assert worker_memory.current_rss_kb() > 0
@@ -10,13 +10,17 @@ Supports:
 - Filtering by form_type and status
 - Pagination (default 25/page, max 100)
 - Sorting by updated_at, created_at, form_type, status
+- Keyset pagination via ?cursor= (next_cursor is returned with every page)
 - Tenant isolation (public or tenant-owned)
 
+Filtering, ordering and pagination run in PostgreSQL over a UNION of the
+plan and W-3 tables (services.filings_query); only the page's rows are
+loaded, with plan payloads deferred.
+
 Response includes well information (api14, lease_name, well_number, operator_name, county, state)
 """
 
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -27,7 +31,8 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 
-from ..models import WellRegistry, PlanSnapshot, W3FormORM
+from ..models import PlanSnapshot, W3FormORM
+from ..services import filings_query
 from ..serializers.well_filings import (
     W3AFilingSerializer,
     W3FilingSerializer,
@@ -38,7 +43,7 @@ class AllFilingsPagination(PageNumberPagination):
     """Custom pagination for filings"""
     page_size = 25
     page_size_query_param = "page_size"
-    page_size_query_max = 100
+    max_page_size = 100
     page_query_param = "page"
 
 
@@ -53,6 +58,7 @@ class AllFilingsView(APIView):
     - status: Filter by status (draft, submitted, rejected, revised and submitted, approved, withdrawn)
     - page: Page number (default: 1)
     - page_size: Items per page (default: 25, max: 100)
+    - cursor: Keyset cursor from a previous response's next_cursor (replaces page)
     - ordering: Sort field (default: -updated_at, options: updated_at, -updated_at, created_at, -created_at, form_type, status)
     
     Example:
@@ -65,241 +71,182 @@ class AllFilingsView(APIView):
 
     def get(self, request) -> Response:
         """Handle GET request to retrieve all filings"""
-        
-        # Collect all filings
-        all_filings: List[Dict[str, Any]] = []
-
-        # Get W-3A plans from PlanSnapshot
-        w3a_filings = self._get_w3a_filings(request)
-        all_filings.extend(w3a_filings)
-
-        # Get W-3 forms from W3FormORM
-        w3_filings = self._get_w3_filings(request)
-        all_filings.extend(w3_filings)
-
-        # Apply query parameter filters
-        all_filings = self._apply_filters(all_filings, request)
 
-        # Sort filings (default: -updated_at)
-        all_filings = self._apply_sorting(all_filings, request)
+        tenant_id = self._get_tenant_id(request)
+        plans = self._w3a_queryset(request, tenant_id)
+        w3_forms = self._w3_queryset(request, tenant_id)
+
+        params = request.query_params
+        cursor = params.get("cursor")
+        try:
+            union = filings_query.filings_union(
+                plans,
+                w3_forms,
+                form_types=filings_query.parse_csv(params.get("form_type")),
+                statuses=filings_query.parse_csv(params.get("status")),
+                ordering=params.get("ordering"),
+                cursor=cursor,
+            )
+        except filings_query.InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Paginate
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(all_filings, request)
 
-        if page is not None:
+        if cursor:
+            page = filings_query.cursor_page(union, paginator.get_page_size(request), params.get("ordering"))
+            filings = self._serialize(page.rows, plans, w3_forms)
             response_data = {
-                "total": paginator.page.paginator.count,
-                "count": len(page),
-                "next": paginator.get_next_link(),
-                "previous": paginator.get_previous_link(),
-                "filings": page,
+                "count": len(filings),
+                "next": None,
+                "previous": None,
+                "next_cursor": page.next_cursor,
+                "filings": filings,
             }
-            return paginator.get_paginated_response(response_data)
+            return Response(response_data, status=status.HTTP_200_OK)
 
+        # Paginate (COUNT and LIMIT/OFFSET run on the union in SQL)
+        rows = paginator.paginate_queryset(union, request)
+        filings = self._serialize(rows, plans, w3_forms)
         response_data = {
-            "total": len(all_filings),
-            "count": len(all_filings),
-            "next": None,
-            "previous": None,
-            "filings": all_filings,
+            "total": paginator.page.paginator.count,
+            "count": len(filings),
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "next_cursor": self._next_cursor(rows, paginator, params.get("ordering")),
+            "filings": filings,
         }
+        return paginator.get_paginated_response(response_data)
 
-        return Response(response_data, status=status.HTTP_200_OK)
-
-    def _get_w3a_filings(self, request) -> List[Dict[str, Any]]:
-        """Get W-3A plans from PlanSnapshot"""
-        
-        filings: List[Dict[str, Any]] = []
-
-        # Build query: only public snapshots or user's tenant snapshots
-        w3a_filter = Q()
+    @staticmethod
+    def _next_cursor(rows, paginator, ordering) -> Optional[str]:
+        if not rows or not paginator.page.has_next():
+            return None
+        sort_field, _ = filings_query.parse_ordering(ordering)
+        return filings_query.encode_cursor(rows[-1], sort_field)
 
-        # Get tenant ID from request user
+    def _get_tenant_id(self, request):
         tenant_id = getattr(request.user, "tenant_id", None)
         if not tenant_id:
             user_tenant = request.user.tenants.first()
             tenant_id = user_tenant.id if user_tenant else None
+        return tenant_id
+
+    def _w3a_queryset(self, request, tenant_id):
+        """Visible W-3A plans (PlanSnapshot)"""
 
+        # Build query: only public snapshots or user's tenant snapshots
         if tenant_id:
             # User can see public filings or their own tenant's filings
-            w3a_filter &= Q(
-                Q(visibility="public") | Q(tenant_id=tenant_id)
-            )
+            w3a_filter = Q(visibility="public") | Q(tenant_id=tenant_id)
         else:
             # Anonymous users only see public filings
-            w3a_filter &= Q(visibility="public")
+            w3a_filter = Q(visibility="public")
 
         # Add workspace filtering if provided
         workspace_id = request.query_params.get('workspace')
         if workspace_id:
             w3a_filter &= Q(workspace_id=workspace_id)
 
-        # Get W-3A plans (order by created_at since PlanSnapshot doesn't have updated_at)
-        w3a_plans = PlanSnapshot.objects.filter(w3a_filter).select_related("well", "workspace").order_by("-created_at")
+        return PlanSnapshot.objects.filter(w3a_filter)
 
-        # Serialize
-        for plan in w3a_plans:
-            filing_data = W3AFilingSerializer(plan).data
-            # Add well information — prefer linked WellRegistry, fall back to payload
-            if plan.well:
-                filing_data.update({
-                    "api14": plan.well.api14,
-                    "lease_name": plan.well.lease_name,
-                    "well_number": plan.well.well_number,
-                    "operator_name": plan.well.operator_name,
-                    "county": plan.well.county,
-                    "state": plan.well.state,
-                })
-            else:
-                # Fall back to well_header in snapshot payload
-                wh = (plan.payload or {}).get("well_header", {})
-                if wh:
-                    filing_data.update({
-                        "api14": wh.get("api_number", ""),
-                        "lease_name": wh.get("lease_name", ""),
-                        "well_number": wh.get("well_number", ""),
-                        "operator_name": wh.get("operator", ""),
-                        "county": wh.get("county", ""),
-                        "state": wh.get("state", ""),
-                    })
-
-            # Add workspace information
-            filing_data["workspace_id"] = plan.workspace_id
-            filing_data["workspace_name"] = plan.workspace.name if plan.workspace else None
-            
-            # Add creator from history
-            try:
-                first_history = plan.history.all().last()  # Get oldest record
-                filing_data["created_by"] = first_history.history_user.username if first_history and first_history.history_user else "System"
-            except Exception:
-                filing_data["created_by"] = "System"
-            
-            filings.append(filing_data)
-
-        return filings
-
-    def _get_w3_filings(self, request) -> List[Dict[str, Any]]:
-        """Get W-3 forms from W3FormORM"""
-
-        filings: List[Dict[str, Any]] = []
-
-        # Build query with tenant isolation and workspace filtering
-        w3_filter = Q()
-        tenant_id = getattr(request.user, "tenant_id", None)
-        if not tenant_id:
-            user_tenant = request.user.tenants.first()
-            tenant_id = user_tenant.id if user_tenant else None
+    def _w3_queryset(self, request, tenant_id):
+        """Visible W-3 forms (W3FormORM)"""
 
-        if tenant_id:
-            w3_filter &= Q(tenant_id=tenant_id)
-        else:
-            return []  # W-3 forms are always private
+        if not tenant_id:
+            return W3FormORM.objects.none()  # W-3 forms are always private
 
+        w3_filter = Q(tenant_id=tenant_id)
         workspace_id = request.query_params.get('workspace')
         if workspace_id:
             w3_filter &= Q(workspace_id=workspace_id)
 
-        w3_forms = W3FormORM.objects.filter(w3_filter).select_related("well", "workspace").order_by("-updated_at")
-
-        # Serialize
-        for form in w3_forms:
-            filing_data = W3FilingSerializer(form).data
+        return W3FormORM.objects.filter(w3_filter)
+
+    def _serialize(self, rows, plans, w3_forms) -> List[Dict[str, Any]]:
+        """Serialize the page's rows in order"""
+        objects = filings_query.load_filings(
+            list(rows or []),
+            plans.select_related("well", "workspace"),
+            w3_forms.select_related("well", "workspace"),
+        )
+        return [
+            self._serialize_w3a(obj) if isinstance(obj, PlanSnapshot) else self._serialize_w3(obj)
+            for obj in objects
+        ]
+
+    def _serialize_w3a(self, plan: PlanSnapshot) -> Dict[str, Any]:
+        filing_data = W3AFilingSerializer(plan).data
+        # Add well information — prefer linked WellRegistry, fall back to payload
+        if plan.well:
+            filing_data.update({
+                "api14": plan.well.api14,
+                "lease_name": plan.well.lease_name,
+                "well_number": plan.well.well_number,
+                "operator_name": plan.well.operator_name,
+                "county": plan.well.county,
+                "state": plan.well.state,
+            })
+        else:
+            # Fall back to well_header in snapshot payload (annotated; payload is deferred)
+            wh = getattr(plan, "well_header", None) or {}
+            if wh:
+                filing_data.update({
+                    "api14": wh.get("api_number", ""),
+                    "lease_name": wh.get("lease_name", ""),
+                    "well_number": wh.get("well_number", ""),
+                    "operator_name": wh.get("operator", ""),
+                    "county": wh.get("county", ""),
+                    "state": wh.get("state", ""),
+                })
 
-            # Add well information — prefer linked WellRegistry, fall back to form_data
-            if form.well:
+        # Add workspace information
+        filing_data["workspace_id"] = plan.workspace_id
+        filing_data["workspace_name"] = plan.workspace.name if plan.workspace else None
+
+        # Add creator from history
+        try:
+            first_history = plan.history.all().last()  # Get oldest record
+            filing_data["created_by"] = first_history.history_user.username if first_history and first_history.history_user else "System"
+        except Exception:
+            filing_data["created_by"] = "System"
+
+        return filing_data
+
+    def _serialize_w3(self, form: W3FormORM) -> Dict[str, Any]:
+        filing_data = W3FilingSerializer(form).data
+
+        # Add well information — prefer linked WellRegistry, fall back to form_data
+        if form.well:
+            filing_data.update({
+                "api14": form.well.api14,
+                "lease_name": form.well.lease_name,
+                "well_number": form.well.well_number,
+                "operator_name": form.well.operator_name,
+                "county": form.well.county,
+                "state": form.well.state,
+            })
+        else:
+            # Fall back to header in form_data (annotated; form_data is deferred)
+            hdr = getattr(form, "header", None) or {}
+            if hdr:
                 filing_data.update({
-                    "api14": form.well.api14,
-                    "lease_name": form.well.lease_name,
-                    "well_number": form.well.well_number,
-                    "operator_name": form.well.operator_name,
-                    "county": form.well.county,
-                    "state": form.well.state,
+                    "api14": hdr.get("api_number", ""),
+                    "lease_name": hdr.get("lease_name") or hdr.get("well_name", ""),
+                    "well_number": hdr.get("well_number", ""),
+                    "operator_name": hdr.get("operator", ""),
+                    "county": hdr.get("county", ""),
+                    "state": hdr.get("state", ""),
                 })
-            else:
-                # Fall back to header in form_data
-                hdr = (form.form_data or {}).get("header", {})
-                if hdr:
-                    filing_data.update({
-                        "api14": hdr.get("api_number", ""),
-                        "lease_name": hdr.get("lease_name") or hdr.get("well_name", ""),
-                        "well_number": hdr.get("well_number", ""),
-                        "operator_name": hdr.get("operator", ""),
-                        "county": hdr.get("county", ""),
-                        "state": hdr.get("state", ""),
-                    })
-
-            # Add workspace information
-            filing_data["workspace_id"] = form.workspace_id
-            filing_data["workspace_name"] = form.workspace.name if form.workspace else None
-            
-            # Add creator from history
-            try:
-                first_history = form.history.all().last()  # Get oldest record
-                filing_data["created_by"] = first_history.history_user.username if first_history and first_history.history_user else "System"
-            except Exception:
-                filing_data["created_by"] = "System"
-            
-            filings.append(filing_data)
-
-        return filings
-
-    def _apply_filters(
-        self, filings: List[Dict[str, Any]], request
-    ) -> List[Dict[str, Any]]:
-        """Apply form_type and status filters"""
-        
-        # Get form_type filter from query params
-        form_type_param = request.query_params.get("form_type")
-        if form_type_param:
-            form_types = [ft.strip() for ft in form_type_param.split(",")]
-            filings = [
-                f for f in filings
-                if f.get("form_type") in form_types
-            ]
-
-        # Get status filter from query params
-        status_param = request.query_params.get("status")
-        if status_param:
-            statuses = [s.strip() for s in status_param.split(",")]
-            filings = [
-                f for f in filings
-                if f.get("status") in statuses
-            ]
-
-        return filings
-
-    def _apply_sorting(
-        self, filings: List[Dict[str, Any]], request
-    ) -> List[Dict[str, Any]]:
-        """Apply sorting to filings"""
-        
-        ordering = request.query_params.get("ordering", "-updated_at")
-        
-        # Determine reverse based on leading dash
-        reverse = ordering.startswith("-")
-        sort_field = ordering.lstrip("-")
-
-        # Validate sort field
-        valid_fields = {"updated_at", "created_at", "form_type", "status"}
-        if sort_field not in valid_fields:
-            sort_field = "updated_at"
-            reverse = True
-
-        # Sort filings
-        def get_sort_value(item: Dict[str, Any]) -> Any:
-            """Get value for sorting, handling None values"""
-            value = item.get(sort_field)
-            
-            # Handle datetime strings
-            if isinstance(value, str) and sort_field in {"updated_at", "created_at"}:
-                try:
-                    return datetime.fromisoformat(value.replace("Z", "+00:00"))
-                except Exception:
-                    return datetime.min
-            
-            return value or ""
-
-        filings.sort(key=get_sort_value, reverse=reverse)
-
-        return filings
+
+        # Add workspace information
+        filing_data["workspace_id"] = form.workspace_id
+        filing_data["workspace_name"] = form.workspace.name if form.workspace else None
+
+        # Add creator from history
+        try:
+            first_history = form.history.all().last()  # Get oldest record
+            filing_data["created_by"] = first_history.history_user.username if first_history and first_history.history_user else "System"
+        except Exception:
+            filing_data["created_by"] = "System"
+
+        return filing_data
@@ -8,19 +8,19 @@ Returns aggregated metrics for dashboard display:
 - Requires action count (status = 'rejected')
 - Average time to submission
 - Rejection rate
+
+Computed with one conditional-aggregation query per table and served from a
+per-tenant rollup cache (services.filing_metrics).
 """
 
-from datetime import datetime, timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Q, Count, Avg, F
-from django.utils import timezone
 
-from ..models import PlanSnapshot, W3FormORM
+from ..services import filing_metrics
 
 
 class FilingMetricsView(APIView):
@@ -44,86 +44,9 @@ class FilingMetricsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request) -> Response:
-        """Get filing metrics"""
-        
+        """Get filing metrics (cached per tenant; see services.filing_metrics)"""
+
         # Get tenant ID from request user
         tenant_id = getattr(request.user, "tenant_id", None)
-        
-        # Build queries based on tenant
-        w3a_filter = Q()
-        if tenant_id:
-            w3a_filter &= Q(Q(visibility="public") | Q(tenant_id=tenant_id))
-        else:
-            w3a_filter &= Q(visibility="public")
-        
-        # === Active Filings ===
-        # Count W-3A plans not in 'approved' status
-        active_w3a = PlanSnapshot.objects.filter(
-            w3a_filter,
-            status__in=['draft', 'internal_review', 'engineer_approved', 'filed', 'under_agency_review', 'agency_rejected']
-        ).count()
-        
-        # Count W-3 forms not in 'approved' status
-        active_w3 = W3FormORM.objects.filter(
-            status__in=['draft', 'submitted', 'rejected', 'archived']
-        ).count()
-        
-        active_filings = active_w3a + active_w3
-        
-        # === Requires Action ===
-        # Count W-3A plans that were rejected
-        rejected_w3a = PlanSnapshot.objects.filter(
-            w3a_filter,
-            status='agency_rejected'
-        ).count()
-        
-        # Count W-3 forms that were rejected
-        rejected_w3 = W3FormORM.objects.filter(
-            status='rejected'
-        ).count()
-        
-        requires_action = rejected_w3a + rejected_w3
-        
-        # === Time to Submission ===
-        # For W-3 forms: calculate avg time between created_at and submitted_at
-        w3_times = W3FormORM.objects.filter(
-            submitted_at__isnull=False
-        ).annotate(
-            time_to_submission=F('submitted_at') - F('created_at')
-        ).values_list('time_to_submission', flat=True)
-        
-        avg_seconds = None
-        if w3_times.exists():
-            total_seconds = sum(td.total_seconds() for td in w3_times if td is not None)
-            count = len([td for td in w3_times if td is not None])
-            if count > 0:
-                avg_seconds = int(total_seconds / count)
-        
-        # === Rejection Rate ===
-        # Calculate percentage of submitted forms that were rejected
-        total_submitted = W3FormORM.objects.filter(
-            submitted_at__isnull=False
-        ).count()
-        
-        total_rejected = W3FormORM.objects.filter(
-            submitted_at__isnull=False,
-            status='rejected'
-        ).count()
-        
-        rejection_rate = 0.0
-        if total_submitted > 0:
-            rejection_rate = (total_rejected / total_submitted) * 100
-        
-        return Response({
-            "active_filings": active_filings,
-            "requires_action": requires_action,
-            "avg_time_to_submission_seconds": avg_seconds,
-            "rejection_rate": round(rejection_rate, 1),
-            "total_submitted": total_submitted,
-            "total_rejected": total_rejected,
-        }, status=status.HTTP_200_OK)
-
-
-
-
 
+        return Response(filing_metrics.get_filing_metrics(tenant_id), status=status.HTTP_200_OK)
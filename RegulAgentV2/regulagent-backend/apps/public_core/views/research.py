@@ -10,7 +10,9 @@ Endpoints:
     GET    /api/research/sessions/{id}/summary/  — aggregated well summary
 """
 import logging
+import os
 
+from django.core.handlers.asgi import ASGIRequest
 from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -25,12 +27,27 @@ from apps.public_core.serializers.research import (
     ResearchSessionSerializer,
 )
 from apps.public_core.services.document_pipeline import detect_jurisdiction
-from apps.public_core.services.research_rag import get_chat_history, stream_research_answer
+from apps.public_core.services.research_rag import (
+    astream_research_answer,
+    get_chat_history,
+    stream_research_answer,
+)
 from apps.public_core.tasks_research import start_research_session_task
 
 logger = logging.getLogger(__name__)
 
 
+def _use_async_stream(request) -> bool:
+    """Serve SSE from an async generator when running under ASGI.
+
+    Under WSGI (or with RESEARCH_ASYNC_STREAMING=false) the sync generator is
+    used; Django would otherwise drive the async one through async_to_sync.
+    """
+    if os.getenv("RESEARCH_ASYNC_STREAMING", "true").lower() != "true":
+        return False
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
 class ResearchSessionListCreateView(APIView):
     """
     GET  /api/research/sessions/  — list sessions for the current tenant
@@ -275,7 +292,7 @@ class ResearchSessionAskView(APIView):
     POST /api/research/sessions/{id}/ask/
 
     Ask a question about this well's indexed documents.
-    Returns a Server-Sent Events stream.
+    Returns a Server-Sent Events stream (async under ASGI, see _use_async_stream).
 
     SSE event format:
         data: {"type": "token", "content": "..."}\n\n
@@ -319,10 +336,12 @@ class ResearchSessionAskView(APIView):
             f"{question[:80]!r} (top_k={top_k})"
         )
 
-        response = StreamingHttpResponse(
-            stream_research_answer(question, session, top_k=top_k),
-            content_type="text/event-stream",
-        )
+        if _use_async_stream(request):
+            events = astream_research_answer(question, session, top_k=top_k)
+        else:
+            events = stream_research_answer(question, session, top_k=top_k)
+
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
         response["Cache-Control"] = "no-cache"
         response["X-Accel-Buffering"] = "no"
         return response
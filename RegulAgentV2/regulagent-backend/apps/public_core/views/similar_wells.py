@@ -3,6 +3,7 @@ from __future__ import annotations
 import math
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from django.http import Http404
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -12,8 +13,12 @@ from apps.public_core.models import WellRegistry
 from apps.public_core.services.api_normalization import get_well_by_api
 from apps.public_core.models.document_vector import DocumentVector
 from apps.public_core.models import ExtractedDocument, PlanSnapshot
+from apps.public_core.services.well_spatial_index import get_well_index
 from apps.kernel.services.jurisdiction_registry import detect_jurisdiction
 
+# Safety cap on scored neighbours (nearest first)
+MAX_CANDIDATES = 1000
+
 
 def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     R = 3958.8  # miles
@@ -26,6 +31,34 @@ def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float
     return R * c
 
 
+def _latest_w2_by_api(api_numbers: List[str]) -> Dict[str, ExtractedDocument]:
+    """Latest W-2 per API number, one query (DISTINCT ON)."""
+    if not api_numbers:
+        return {}
+    docs = (
+        ExtractedDocument.objects
+        .filter(api_number__in=api_numbers, document_type='w2')
+        .order_by('api_number', '-created_at')
+        .distinct('api_number')
+        .only('id', 'api_number', 'json_data')
+    )
+    return {d.api_number: d for d in docs}
+
+
+def _latest_snapshot_by_well(well_ids: List[int]) -> Dict[int, PlanSnapshot]:
+    """Latest PlanSnapshot per well, one query (DISTINCT ON)."""
+    if not well_ids:
+        return {}
+    snaps = (
+        PlanSnapshot.objects
+        .filter(well_id__in=well_ids)
+        .order_by('well_id', '-created_at')
+        .distinct('well_id')
+        .only('id', 'well_id', 'payload', 'payload_patch', 'delta_base', 'delta_base_version', 'payload_version')
+    )
+    return {s.well_id: s for s in snaps}
+
+
 class SimilarWellsView(APIView):
     """Find similar wells based on location, architecture, and plan patterns."""
 
@@ -62,42 +95,8 @@ class SimilarWellsView(APIView):
         if src.lat is None or src.lon is None:
             return Response({"detail": "source well has no lat/lon"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Coarse bbox prefilter (~1 degree ~ 69 miles)
-        deg = radius_mi / 69.0
-        lat_min = float(src.lat) - deg
-        lat_max = float(src.lat) + deg
-        lon_min = float(src.lon) - deg
-        lon_max = float(src.lon) + deg
-
-        qs = WellRegistry.objects.exclude(id=src.id).filter(state=state, lat__isnull=False, lon__isnull=False, lat__gte=lat_min, lat__lte=lat_max, lon__gte=lon_min, lon__lte=lon_max)
-
-        # Helpers (defined before use)
-        def _latest_w2(api_num: str) -> Optional[ExtractedDocument]:
-            return (
-                ExtractedDocument.objects
-                .filter(api_number=api_num, document_type='w2')
-                .order_by('-created_at')
-                .first()
-            )
-
-        def _latest_gau(api_num: str) -> Optional[ExtractedDocument]:
-            return (
-                ExtractedDocument.objects
-                .filter(api_number=api_num, document_type='gau')
-                .order_by('-created_at')
-                .first()
-            )
-
-        def _latest_snapshot(well: WellRegistry) -> Optional[PlanSnapshot]:
-            return (
-                PlanSnapshot.objects
-                .filter(well=well)
-                .order_by('-created_at')
-                .first()
-            )
-
         # Derive source county/field
-        src_snap = _latest_snapshot(src)
+        src_snap = _latest_snapshot_by_well([src.id]).get(src.id)
         src_field = (src.field_name or '') or ((src_snap and isinstance(src_snap.payload, dict) and (src_snap.payload.get('field') or '')) or '')
         src_county = (src.county or '') or ((src_snap and isinstance(src_snap.payload, dict) and (src_snap.payload.get('county') or '')) or '')
 
@@ -110,20 +109,35 @@ class SimilarWellsView(APIView):
                 return False
             return (state.upper() == 'TX')
 
-        if county:
-            qs = qs.filter(county__iexact=county)
-        elif _enforce(require_county) and src_county:
-            qs = qs.filter(county__iexact=src_county)
-
-        if field:
-            qs = qs.filter(field_name__iexact=field)
-        elif _enforce(require_field) and src_field:
-            qs = qs.filter(field_name__iexact=src_field)
+        county_filter = county or (src_county if _enforce(require_county) else None)
+        field_filter = field or (src_field if _enforce(require_field) else None)
         # Boost same-operator later in scoring
 
         # TODO: incorporate district/field/operator once persisted on WellRegistry
 
-        
+        # Radius search on the in-memory grid index (nearest first)
+        hits = get_well_index().within(
+            float(src.lat), float(src.lon), radius_mi,
+            state=state, county=county_filter, field=field_filter,
+            exclude_id=src.id, limit=MAX_CANDIDATES,
+        )
+        wells = WellRegistry.objects.in_bulk([h.well_id for h in hits])
+        hits = [h for h in hits if h.well_id in wells]
+
+        # Batched prefetch of every candidate's latest W-2 and plan snapshot
+        w2_by_api = _latest_w2_by_api([src.api14] + [wells[h.well_id].api14 for h in hits])
+        snap_by_well = _latest_snapshot_by_well([h.well_id for h in hits])
+
+        # Geo score for all candidates at once
+        distances = np.array([h.distance_mi for h in hits], dtype=np.float64)
+        geo_scores = 1.0 / (1.0 + distances)
+        if operator:
+            same_op = np.array([(wells[h.well_id].operator_name or '').strip().lower() == operator.strip().lower() for h in hits], dtype=bool)
+            geo_scores = np.where(same_op, geo_scores * operator_boost, geo_scores)
+        if field:
+            same_field = np.array([(wells[h.well_id].field_name or '').strip().lower() == field.strip().lower() for h in hits], dtype=bool)
+            geo_scores = np.where(same_field, geo_scores * field_boost, geo_scores)
+
 
         def _parse_arch(w2: Optional[ExtractedDocument]) -> Dict[str, Any]:
             out: Dict[str, Any] = {
@@ -278,54 +292,50 @@ class SimilarWellsView(APIView):
                     score += 1.0 if a == b else 0.0
             return score/cnt if cnt else 0.0
 
+        # Source features are computed once
+        arch_a = _parse_arch(w2_by_api.get(src.api14))
+        snap_a = src_snap
+        pat_a = _pattern_signature(snap_a)
+
         neighbors: List[Dict[str, Any]] = []
-        for w in qs[:1000]:  # safety cap
-            d = haversine_miles(float(src.lat), float(src.lon), float(w.lat), float(w.lon))
-            if d <= radius_mi:
-                score = 1.0 / (1.0 + d)
-                if operator and (w.operator_name or '').strip().lower() == operator.strip().lower():
-                    score *= operator_boost
-                if field and (w.field_name or '').strip().lower() == field.strip().lower():
-                    score *= field_boost
-                nb_api = w.api14
-                # Structured features
-                src_w2 = _latest_w2(src.api14)
-                nb_w2 = _latest_w2(nb_api)
-                arch_a = _parse_arch(src_w2); arch_b = _parse_arch(nb_w2)
-                s_arch = _arch_similarity(arch_a, arch_b)
-                # Pattern from latest snapshots
-                snap_a = _latest_snapshot(src)
-                snap_b = _latest_snapshot(w)
-                pat_a = _pattern_signature(snap_a); pat_b = _pattern_signature(snap_b)
-                s_pat = _pattern_similarity(pat_a, pat_b)
-                # Context
-                ctx_a = {"district": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('district') if snap_a else None,
-                         "county": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('county') if snap_a else src.county,
-                         "field": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('field') if snap_a else None}
-                ctx_b = {"district": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('district') if snap_b else None,
-                         "county": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('county') if snap_b else w.county,
-                         "field": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('field') if snap_b else None}
-                s_ctx = _context_similarity(ctx_a, ctx_b)
-                # Quality factor (optional; default 1)
-                q = 1.0
-                s_struct = max(0.0, min(1.0, w_arch*s_arch + w_pattern*s_pat + w_context*s_ctx + w_quality*q))
-                base_geo = score
-                base_structured = alpha_geo*base_geo + (1.0 - alpha_geo)*s_struct
-                neighbors.append({
-                    "api14": w.api14,
-                    "state": w.state,
-                    "county": w.county,
-                    "distance_mi": round(d, 3),
-                    "operator_name": w.operator_name,
-                    "field_name": w.field_name,
-                    "score": round(base_structured, 6),
-                    "components": {
-                        "base_geo": round(base_geo, 6),
-                        "arch": round(s_arch, 6),
-                        "pattern": round(s_pat, 6),
-                        "context": round(s_ctx, 6),
-                    }
-                })
+        for hit, score in zip(hits, geo_scores.tolist()):
+            w = wells[hit.well_id]
+            d = hit.distance_mi
+            # Structured features
+            arch_b = _parse_arch(w2_by_api.get(w.api14))
+            s_arch = _arch_similarity(arch_a, arch_b)
+            # Pattern from latest snapshots
+            snap_b = snap_by_well.get(w.id)
+            pat_b = _pattern_signature(snap_b)
+            s_pat = _pattern_similarity(pat_a, pat_b)
+            # Context
+            ctx_a = {"district": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('district') if snap_a else None,
+                     "county": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('county') if snap_a else src.county,
+                     "field": getattr(snap_a and snap_a.payload, 'get', lambda k: None)('field') if snap_a else None}
+            ctx_b = {"district": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('district') if snap_b else None,
+                     "county": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('county') if snap_b else w.county,
+                     "field": getattr(snap_b and snap_b.payload, 'get', lambda k: None)('field') if snap_b else None}
+            s_ctx = _context_similarity(ctx_a, ctx_b)
+            # Quality factor (optional; default 1)
+            q = 1.0
+            s_struct = max(0.0, min(1.0, w_arch*s_arch + w_pattern*s_pat + w_context*s_ctx + w_quality*q))
+            base_geo = score
+            base_structured = alpha_geo*base_geo + (1.0 - alpha_geo)*s_struct
+            neighbors.append({
+                "api14": w.api14,
+                "state": w.state,
+                "county": w.county,
+                "distance_mi": round(d, 3),
+                "operator_name": w.operator_name,
+                "field_name": w.field_name,
+                "score": round(base_structured, 6),
+                "components": {
+                    "base_geo": round(base_geo, 6),
+                    "arch": round(s_arch, 6),
+                    "pattern": round(s_pat, 6),
+                    "context": round(s_ctx, 6),
+                }
+            })
 
         # sort by score desc, then distance asc
         neighbors.sort(key=lambda x: (-x["score"], x["distance_mi"]))  # type: ignore
@@ -364,9 +374,9 @@ class SimilarWellsView(APIView):
                 if src_avg is not None:
                     # Compute avg embedding for each neighbor well and blend the score
                     api14_to_vec: Dict[str, List[float]] = {}
+                    wells_by_api = {w.api14: w for w in wells.values()}
                     for n in neighbors:
-                        # Resolve neighbor well by API14 suffix
-                        w = WellRegistry.objects.filter(api14=n["api14"]).first()
+                        w = wells_by_api.get(n["api14"])
                         if not w:
                             continue
                         vecs = list(DocumentVector.objects.filter(well=w).values_list('embedding', flat=True)[:500])
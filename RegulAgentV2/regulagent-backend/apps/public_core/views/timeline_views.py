@@ -63,7 +63,7 @@ class WellTimelineRefreshView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        events = refresh_timeline(well)
+        events = refresh_timeline(well, rebuild=True)
         serializer = WellTimelineEventSerializer(events, many=True)
         return Response({
             "api14": api14,
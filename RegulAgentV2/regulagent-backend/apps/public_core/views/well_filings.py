@@ -10,11 +10,13 @@ Supports:
 - Filtering by form_type and status
 - Pagination (default 25/page, max 100)
 - Sorting by updated_at, created_at, form_type, status
+- Keyset pagination via ?cursor= (next_cursor is returned with every page)
 - Tenant isolation (public or tenant-owned)
+
+Filtering, ordering and pagination run in PostgreSQL (services.filings_query).
 """
 
-from typing import List, Dict, Any
-from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -27,6 +29,7 @@ from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
 from ..models import WellRegistry, PlanSnapshot, W3FormORM
+from ..services import filings_query
 from ..serializers.well_filings import (
     W3AFilingSerializer,
     W3FilingSerializer,
@@ -38,7 +41,7 @@ class WellFilingsPagination(PageNumberPagination):
     """Custom pagination for filings"""
     page_size = 25
     page_size_query_param = "page_size"
-    page_size_query_max = 100
+    max_page_size = 100
     page_query_param = "page"
 
 
@@ -53,6 +56,7 @@ class WellFilingsView(APIView):
     - status: Filter by status (draft, submitted, rejected, revised and submitted, approved, withdrawn)
     - page: Page number (default: 1)
     - page_size: Items per page (default: 25, max: 100)
+    - cursor: Keyset cursor from a previous response's next_cursor (replaces page)
     - ordering: Sort field (default: -updated_at, options: updated_at, -updated_at, created_at, -created_at, form_type, status)
     
     Example:
@@ -69,55 +73,61 @@ class WellFilingsView(APIView):
         # Get well by API number
         well = get_object_or_404(WellRegistry, api14=api14)
 
-        # Collect all filings
-        all_filings: List[Dict[str, Any]] = []
-
-        # Get W-3A plans from PlanSnapshot
-        w3a_filings = self._get_w3a_filings(well, request)
-        all_filings.extend(w3a_filings)
-
-        # Get W-3 forms from W3FormORM
-        w3_filings = self._get_w3_filings(well, request)
-        all_filings.extend(w3_filings)
-
-        # Apply query parameter filters
-        all_filings = self._apply_filters(all_filings, request)
-
-        # Sort filings (default: -updated_at)
-        all_filings = self._apply_sorting(all_filings, request)
+        plans = self._w3a_queryset(well, request)
+        w3_forms = self._w3_queryset(well, request)
+
+        params = request.query_params
+        cursor = params.get("cursor")
+        try:
+            union = filings_query.filings_union(
+                plans,
+                w3_forms,
+                form_types=filings_query.parse_csv(params.get("form_type")),
+                statuses=filings_query.parse_csv(params.get("status")),
+                ordering=params.get("ordering"),
+                cursor=cursor,
+            )
+        except filings_query.InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Paginate
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(all_filings, request)
 
-        if page is not None:
+        if cursor:
+            page = filings_query.cursor_page(union, paginator.get_page_size(request), params.get("ordering"))
+            filings = self._serialize(page.rows, plans, w3_forms)
             response_data = {
                 "api14": well.api14,
-                "total": paginator.page.paginator.count,
-                "count": len(page),
-                "next": paginator.get_next_link(),
-                "previous": paginator.get_previous_link(),
-                "filings": page,
+                "count": len(filings),
+                "next": None,
+                "previous": None,
+                "next_cursor": page.next_cursor,
+                "filings": filings,
             }
-            return paginator.get_paginated_response(response_data)
+            return Response(response_data, status=status.HTTP_200_OK)
 
+        # Paginate (COUNT and LIMIT/OFFSET run on the union in SQL)
+        rows = paginator.paginate_queryset(union, request)
+        filings = self._serialize(rows, plans, w3_forms)
         response_data = {
             "api14": well.api14,
-            "total": len(all_filings),
-            "count": len(all_filings),
-            "next": None,
-            "previous": None,
-            "filings": all_filings,
+            "total": paginator.page.paginator.count,
+            "count": len(filings),
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "next_cursor": self._next_cursor(rows, paginator, params.get("ordering")),
+            "filings": filings,
         }
+        return paginator.get_paginated_response(response_data)
 
-        return Response(response_data, status=status.HTTP_200_OK)
+    @staticmethod
+    def _next_cursor(rows, paginator, ordering) -> Optional[str]:
+        if not rows or not paginator.page.has_next():
+            return None
+        sort_field, _ = filings_query.parse_ordering(ordering)
+        return filings_query.encode_cursor(rows[-1], sort_field)
 
-    def _get_w3a_filings(
-        self, well: WellRegistry, request
-    ) -> List[Dict[str, Any]]:
-        """Get W-3A plans from PlanSnapshot"""
-        
-        filings: List[Dict[str, Any]] = []
+    def _w3a_queryset(self, well: WellRegistry, request):
+        """Visible W-3A plans (PlanSnapshot) for the well"""
 
         # Build query: only public snapshots or user's tenant snapshots
         w3a_filter = Q(well=well)
@@ -134,90 +144,18 @@ class WellFilingsView(APIView):
             # Anonymous users only see public filings
             w3a_filter &= Q(visibility="public")
 
-        # Get W-3A plans (order by created_at since PlanSnapshot doesn't have updated_at)
-        w3a_plans = PlanSnapshot.objects.filter(w3a_filter).order_by("-created_at")
-
-        # Serialize
-        for plan in w3a_plans:
-            serializer = W3AFilingSerializer(plan)
-            filings.append(serializer.data)
+        return PlanSnapshot.objects.filter(w3a_filter)
 
-        return filings
+    def _w3_queryset(self, well: WellRegistry, request):
+        """W-3 forms (W3FormORM) for the well"""
 
-    def _get_w3_filings(
-        self, well: WellRegistry, request
-    ) -> List[Dict[str, Any]]:
-        """Get W-3 forms from W3FormORM"""
-        
-        filings: List[Dict[str, Any]] = []
-
-        # Get W-3 forms (all for now, tenant isolation to be added when tenant_id field exists)
-        w3_forms = W3FormORM.objects.filter(well=well).order_by("-updated_at")
-
-        # Serialize
-        for form in w3_forms:
-            serializer = W3FilingSerializer(form)
-            filings.append(serializer.data)
-
-        return filings
-
-    def _apply_filters(
-        self, filings: List[Dict[str, Any]], request
-    ) -> List[Dict[str, Any]]:
-        """Apply form_type and status filters"""
-        
-        # Get form_type filter from query params
-        form_type_param = request.query_params.get("form_type")
-        if form_type_param:
-            form_types = [ft.strip() for ft in form_type_param.split(",")]
-            filings = [
-                f for f in filings
-                if f.get("form_type") in form_types
-            ]
-
-        # Get status filter from query params
-        status_param = request.query_params.get("status")
-        if status_param:
-            statuses = [s.strip() for s in status_param.split(",")]
-            filings = [
-                f for f in filings
-                if f.get("status") in statuses
-            ]
-
-        return filings
-
-    def _apply_sorting(
-        self, filings: List[Dict[str, Any]], request
-    ) -> List[Dict[str, Any]]:
-        """Apply sorting to filings"""
-        
-        ordering = request.query_params.get("ordering", "-updated_at")
-        
-        # Determine reverse based on leading dash
-        reverse = ordering.startswith("-")
-        sort_field = ordering.lstrip("-")
-
-        # Validate sort field
-        valid_fields = {"updated_at", "created_at", "form_type", "status"}
-        if sort_field not in valid_fields:
-            sort_field = "updated_at"
-            reverse = True
-
-        # Sort filings
-        def get_sort_value(item: Dict[str, Any]) -> Any:
-            """Get value for sorting, handling None values"""
-            value = item.get(sort_field)
-            
-            # Handle datetime strings
-            if isinstance(value, str) and sort_field in {"updated_at", "created_at"}:
-                try:
-                    return datetime.fromisoformat(value.replace("Z", "+00:00"))
-                except Exception:
-                    return datetime.min
-            
-            return value or ""
-
-        filings.sort(key=get_sort_value, reverse=reverse)
-
-        return filings
+        # All for now, tenant isolation to be added when tenant_id field exists
+        return W3FormORM.objects.filter(well=well)
 
+    def _serialize(self, rows, plans, w3_forms) -> List[Dict[str, Any]]:
+        """Serialize the page's rows in order (payload/form_data deferred)"""
+        objects = filings_query.load_filings(list(rows or []), plans, w3_forms)
+        return [
+            W3AFilingSerializer(obj).data if isinstance(obj, PlanSnapshot) else W3FilingSerializer(obj).data
+            for obj in objects
+        ]
@@ -6,6 +6,7 @@ This file initializes the Celery app and auto-discovers tasks from all Django ap
 
 import os
 from celery import Celery
+from celery.signals import task_postrun, worker_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ra_config.settings.development')
@@ -24,6 +25,18 @@ app.autodiscover_tasks(related_name='tasks_polling')
 app.autodiscover_tasks(related_name='tasks_w3_wizard')
 
 
+@worker_init.connect
+def _preload_worker(**kwargs):
+    from ra_config.worker_memory import on_worker_init
+    on_worker_init(**kwargs)
+
+
+@task_postrun.connect
+def _check_child_memory(**kwargs):
+    from ra_config.worker_memory import on_task_postrun
+    on_task_postrun(**kwargs)
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task to verify Celery is working."""
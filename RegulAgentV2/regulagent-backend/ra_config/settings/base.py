@@ -236,6 +236,52 @@ FILE_UPLOAD_PERMISSIONS = 0o644
 ALLOWED_UPLOAD_EXTENSIONS = ['.pdf']
 
 
+# ==============================================================================
+# CACHE SETTINGS
+# ==============================================================================
+
+# The default cache stays Django's per-process locmem. Redis-backed aliases are
+# opt-in per feature; their errors are treated as misses, so a Redis outage
+# never fails a request.
+_REDIS_CACHE_LOCATION = os.getenv('REDIS_CACHE_URL') or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+_REDIS_CACHE_OPTIONS = {
+    'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+    'IGNORE_EXCEPTIONS': True,
+    'SOCKET_CONNECT_TIMEOUT': 1,
+    'SOCKET_TIMEOUT': 1,
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Dashboard filing metrics rollups (apps.public_core.services.filing_metrics)
+    'filing_metrics': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': _REDIS_CACHE_LOCATION,
+        'KEY_PREFIX': 'regulagent',
+        'OPTIONS': dict(_REDIS_CACHE_OPTIONS),
+    },
+    # plan_from_facts results shared across workers (apps.kernel.services.plan_cache)
+    'plan_cache': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': _REDIS_CACHE_LOCATION,
+        'KEY_PREFIX': 'regulagent',
+        'OPTIONS': dict(_REDIS_CACHE_OPTIONS),
+    },
+}
+
+# Filing metrics rollup cache lifetime (seconds); writes invalidate it sooner
+FILING_METRICS_CACHE_TTL = int(os.getenv('FILING_METRICS_CACHE_TTL', '900'))
+
+# Plan snapshot delta storage: post_edit snapshots store an RFC 6902 patch
+# against their base, with a full keyframe every KEYFRAME_INTERVAL edits
+# (apps.public_core.services.plan_snapshot_store)
+PLAN_SNAPSHOT_DELTA_ENABLED = os.getenv('PLAN_SNAPSHOT_DELTA_ENABLED', 'true').lower() == 'true'
+PLAN_SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv('PLAN_SNAPSHOT_KEYFRAME_INTERVAL', '10'))
+# Materialized payloads kept per process (LRU keyed by snapshot id and payload_version)
+PLAN_SNAPSHOT_CACHE_SIZE = int(os.getenv('PLAN_SNAPSHOT_CACHE_SIZE', '256'))
+
+
 # ==============================================================================
 # CELERY SETTINGS
 # ==============================================================================
@@ -254,11 +300,21 @@ CELERY_ENABLE_UTC = True
 # Task result expiration
 CELERY_RESULT_EXPIRES = 3600  # 1 hour
 
-# Task routing (optional - for when you want to split tasks across queues)
-# CELERY_TASK_ROUTES = {
-#     'apps.assistant.tasks.*': {'queue': 'assistant'},
-# }
-# Note: Commented out - using default 'celery' queue for all tasks
+# Task routing: Vision/PDF tasks go to the heavy queue, everything else stays
+# on the default 'celery' queue. Run one worker per queue (docker/compose.prod.yml)
+# so each gets its own concurrency and recycling limits.
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_HEAVY_QUEUE = os.getenv('CELERY_HEAVY_QUEUE', 'heavy')
+CELERY_HEAVY_TASKS = [
+    'apps.public_core.tasks_research.start_research_session_task',
+    'apps.public_core.tasks_research.index_document_task',
+    'apps.public_core.tasks_research.classify_extract_document_task',
+    'apps.public_core.tasks.extract_and_populate_components',
+    'apps.public_core.tasks_w3_wizard.parse_wizard_tickets',
+    'apps.public_core.tasks_w3_wizard.import_wizard_plan',
+    'apps.public_core.tasks_w3_wizard.generate_wizard_w3',
+]
+CELERY_TASK_ROUTES = {name: {'queue': CELERY_HEAVY_QUEUE} for name in CELERY_HEAVY_TASKS}
 
 # Task time limits (prevent runaway tasks)
 CELERY_TASK_TIME_LIMIT = 300  # 5 minutes hard limit
@@ -266,7 +322,29 @@ CELERY_TASK_SOFT_TIME_LIMIT = 240  # 4 minutes soft limit
 
 # Worker configuration
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
-CELERY_WORKER_MAX_TASKS_PER_CHILD = 1  # Restart worker after each task (prevents OOM on Vision pipeline)
+# Recycle a child once its RSS after a task exceeds this many KiB (set per worker deployment)
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(os.getenv('CELERY_WORKER_MAX_MEMORY_PER_CHILD', str(768 * 1024)))
+# Backstop for slow leaks that stay under the memory limit
+CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.getenv('CELERY_WORKER_MAX_TASKS_PER_CHILD', '500'))
+# Imported in the worker parent before forking so children share the pages (ra_config.worker_memory)
+CELERY_WORKER_PRELOAD_MODULES = [
+    'openai',
+    'numpy',
+    'fitz',
+    'apps.public_core.services.openai_config',
+    'apps.public_core.services.openai_extraction',
+    'apps.public_core.services.document_pipeline',
+    'apps.public_core.services.neubus_classifier',
+    'apps.public_core.services.neubus_extractor',
+    'apps.public_core.services.universal_ticket_parser',
+    'apps.public_core.services.bulk_plan_engine',
+]
+
+# Bulk plan generation fan-out (apps.public_core.services.bulk_plan_engine)
+BULK_PLAN_CHUNK_SIZE = int(os.getenv('BULK_PLAN_CHUNK_SIZE', '25'))  # Wells per chunk sub-task
+BULK_PLAN_MAX_PARALLEL_CHUNKS = int(os.getenv('BULK_PLAN_MAX_PARALLEL_CHUNKS', '8'))  # Max concurrent chunks per wave
+# Expected worst-case seconds per well; caps the chunk size to fit CELERY_TASK_SOFT_TIME_LIMIT
+BULK_PLAN_SECONDS_PER_WELL = float(os.getenv('BULK_PLAN_SECONDS_PER_WELL', '8'))
 
 # Beat scheduler (for periodic tasks)
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
@@ -291,6 +369,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.intelligence.tasks_polling.sync_all_tenant_filings',
         'schedule': crontab(hour=3, minute=0),  # daily at 3am UTC
     },
+    'refresh-filing-metrics': {
+        'task': 'apps.public_core.tasks.refresh_filing_metrics',
+        'schedule': crontab(minute='*/10'),
+    },
 }
 
 
@@ -66,6 +66,21 @@ CELERY_TASK_EAGER_PROPAGATES = True
 USE_S3 = False
 DEFAULT_FILE_STORAGE = 'apps.public_core.storage.TenantLocalStorage'
 
+# Per-process cache for tests (no Redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'filing_metrics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'filing_metrics',
+    },
+    'plan_cache': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'plan_cache',
+    },
+}
+
 # Use local Redis for tests if needed, or mock
 CELERY_BROKER_URL = 'memory://'
 CELERY_RESULT_BACKEND = 'cache+memory://'
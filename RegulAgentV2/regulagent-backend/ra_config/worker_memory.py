@@ -0,0 +1,108 @@
+"""
+Celery worker memory management.
+
+Children are recycled on measured RSS (worker_max_memory_per_child) instead
+of after every task. Heavy Vision/PDF tasks are routed to their own queue
+(CELERY_HEAVY_QUEUE) so each worker deployment can set its own limits through
+the CELERY_WORKER_MAX_MEMORY_PER_CHILD / CELERY_WORKER_MAX_TASKS_PER_CHILD
+environment variables.
+
+Signal handlers (connected in ra_config.celery):
+
+- worker_init (parent, before the prefork pool starts): import
+  CELERY_WORKER_PRELOAD_MODULES and gc.freeze(), so forked children share the
+  already-imported Django apps, OpenAI client and PDF stack as copy-on-write
+  pages instead of importing them per child.
+- task_postrun (child): after a heavy-queue task, collect garbage and return
+  freed heap to the OS (malloc_trim) before billiard compares the child's
+  RSS with worker_max_memory_per_child; log the measured RSS when it nears
+  the limit so limits can be tuned from worker logs.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import gc
+import importlib
+import logging
+import os
+import resource
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Log a child's RSS once it passes this fraction of the recycle limit
+RSS_WARN_FRACTION = 0.8
+
+_libc = None
+
+
+def current_rss_kb() -> int:
+    """Resident set size of this process in KiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _malloc_trim() -> None:
+    global _libc
+    if _libc is None:
+        name = ctypes.util.find_library('c')
+        try:
+            _libc = ctypes.CDLL(name) if name else False
+        except OSError:
+            _libc = False
+    if _libc and hasattr(_libc, 'malloc_trim'):
+        _libc.malloc_trim(0)
+
+
+def preload_modules(modules: Iterable[str]) -> List[str]:
+    """Import ``modules`` and return those that loaded; missing optional deps are skipped."""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception as e:
+            logger.warning("worker preload: could not import %s: %s", name, e)
+    return loaded
+
+
+def on_worker_init(**kwargs) -> None:
+    modules = getattr(settings, 'CELERY_WORKER_PRELOAD_MODULES', [])
+    loaded = preload_modules(modules)
+    # Keep the preloaded objects out of the collector: GC passes in the
+    # children would otherwise write to (and un-share) their pages.
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "worker preload: %d/%d modules imported, rss=%d KiB",
+        len(loaded), len(modules), current_rss_kb(),
+    )
+
+
+def _task_queue(task) -> Optional[str]:
+    delivery_info = getattr(getattr(task, 'request', None), 'delivery_info', None) or {}
+    return delivery_info.get('routing_key')
+
+
+def on_task_postrun(sender=None, task=None, **kwargs) -> None:
+    task = task or sender
+    if _task_queue(task) == getattr(settings, 'CELERY_HEAVY_QUEUE', 'heavy'):
+        gc.collect()
+        _malloc_trim()
+
+    limit_kb = getattr(settings, 'CELERY_WORKER_MAX_MEMORY_PER_CHILD', None)
+    if not limit_kb:
+        return
+    rss_kb = current_rss_kb()
+    if rss_kb >= limit_kb * RSS_WARN_FRACTION:
+        logger.info(
+            "worker memory: %s left child pid=%d at rss=%d KiB (recycle limit %d KiB)",
+            getattr(task, 'name', task), os.getpid(), rss_kb, limit_kb,
+        )